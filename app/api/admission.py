@@ -0,0 +1,250 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, List
+
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from app.shared.fair_queue import read_fair_backlog
+from app.shared.fanout import node_queue
+from app.shared.queue_depth import get_queue_depth
+from app.shared.throughput import read_tasks_completed
+from config.app_config import (
+    ADMISSION_CLIENT_BURST,
+    ADMISSION_CLIENT_HEADER,
+    ADMISSION_CLIENT_RATE,
+    ADMISSION_MAX_QUEUE_DELAY,
+    ADMISSION_QUEUE_HIGH_WATERMARK,
+    ADMISSION_QUEUE_LOW_WATERMARK,
+    ADMISSION_QUEUE_NAME,
+    ADMISSION_RETRY_AFTER_MAX,
+    ADMISSION_SAMPLE_INTERVAL,
+    FAIR_SCHEDULING,
+    HOSTS,
+    PER_NODE_QUEUES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest measurement in the service rate moving average
+SERVICE_RATE_SMOOTHING = 0.3
+
+# Upper bound of the per-client buckets kept in memory
+MAX_TRACKED_CLIENTS = 10000
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = now
+
+    def take(self, now: float) -> float:
+        """
+        Takes a token from the bucket.
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one is available.
+        """
+
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Sheds load with 429 responses once the group operations queue is backed up.
+
+    With per-node queues, the depth also counts the queues of the nodes, and
+    with fair scheduling the backlogs of the tenants, not sent to the broker
+    yet.
+    Queue depth and the workers' service rate are sampled at most once per
+    `sample_interval`, off the event loop. Shedding starts above the high
+    watermark, or when the estimated queueing delay exceeds `max_queue_delay`,
+    and stops once the queue drained below the low watermark.
+    """
+
+    def __init__(
+        self,
+        queue_name: str = ADMISSION_QUEUE_NAME,
+        high_watermark: int = ADMISSION_QUEUE_HIGH_WATERMARK,
+        low_watermark: int = ADMISSION_QUEUE_LOW_WATERMARK,
+        max_queue_delay: float = ADMISSION_MAX_QUEUE_DELAY,
+        sample_interval: float = ADMISSION_SAMPLE_INTERVAL,
+        retry_after_max: int = ADMISSION_RETRY_AFTER_MAX,
+        client_header: str = ADMISSION_CLIENT_HEADER,
+        client_rate: float = ADMISSION_CLIENT_RATE,
+        client_burst: int = ADMISSION_CLIENT_BURST,
+        per_node_queues: bool = PER_NODE_QUEUES,
+        hosts: List[str] = HOSTS,
+        fair_scheduling: bool = FAIR_SCHEDULING,
+        depth_reader: Callable[..., int] = get_queue_depth,
+        backlog_reader: Callable[[], int] = read_fair_backlog,
+        completed_reader: Callable[[], int] = read_tasks_completed,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.queue_name = queue_name
+        self.queue_names = [queue_name] + (
+            [node_queue(node) for node in hosts] if per_node_queues else []
+        )
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark or high_watermark
+        self.max_queue_delay = max_queue_delay
+        self.sample_interval = sample_interval
+        self.retry_after_max = retry_after_max
+        self.client_header = client_header
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.fair_scheduling = fair_scheduling
+        self._depth_reader = depth_reader
+        self._backlog_reader = backlog_reader
+        self._completed_reader = completed_reader
+        self._clock = clock
+
+        self.depth = 0
+        self.service_rate = None
+        self.shedding = False
+        self._completed = None
+        self._sampled_at = None
+        self._sampling = False
+        self._buckets = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.high_watermark > 0 or self.max_queue_delay > 0
+
+    def estimated_delay(self) -> float:
+        """
+        Returns the estimated time (in seconds) a new task waits in the queue.
+        """
+
+        if self.service_rate is None:
+            # Not measured yet, only the watermarks apply
+            return 0.0
+        if not self.service_rate:
+            return math.inf if self.depth else 0.0
+        return self.depth / self.service_rate
+
+    def retry_after(self) -> int:
+        """
+        Returns the seconds a shed client should wait, based on the drain time.
+        """
+
+        if not self.service_rate:
+            return self.retry_after_max
+        target_depth = self.low_watermark
+        if self.max_queue_delay:
+            delay_depth = self.max_queue_delay * self.service_rate
+            target_depth = min(target_depth, delay_depth) if target_depth else delay_depth
+        seconds = math.ceil(max(self.depth - target_depth, 0) / self.service_rate)
+        return min(max(seconds, 1), self.retry_after_max)
+
+    def update(self, depth: int, completed: int, now: float) -> None:
+        """
+        Feeds a new sample of the queue depth and completed task counter.
+
+        Args:
+            depth (int): Current number of messages in the queues.
+            completed (int): Tasks completed by all workers so far.
+            now (float): Monotonic time of the sample.
+        """
+
+        if self._sampled_at is not None and completed >= self._completed:
+            elapsed = now - self._sampled_at
+            if elapsed > 0:
+                rate = (completed - self._completed) / elapsed
+                if self.service_rate is None:
+                    self.service_rate = rate
+                else:
+                    self.service_rate = (
+                        SERVICE_RATE_SMOOTHING * rate
+                        + (1 - SERVICE_RATE_SMOOTHING) * self.service_rate
+                    )
+        self.depth = depth
+        self._completed = completed
+        self._sampled_at = now
+
+        overloaded = (self.high_watermark and depth >= self.high_watermark) or (
+            self.max_queue_delay and self.estimated_delay() > self.max_queue_delay
+        )
+        if overloaded:
+            if not self.shedding:
+                logger.warning(
+                    f"Queue {self.queue_name} overloaded (depth {depth}), shedding load."
+                )
+            self.shedding = True
+        elif self.shedding and (not self.low_watermark or depth <= self.low_watermark):
+            logger.info(f"Queue {self.queue_name} drained (depth {depth}), admitting.")
+            self.shedding = False
+
+    def _sample(self):
+        depth = self._depth_reader(*self.queue_names)
+        if self.fair_scheduling:
+            depth += self._backlog_reader()
+        return depth, self._completed_reader()
+
+    async def refresh(self) -> None:
+        """
+        Samples the queue if the last sample is older than the sample interval.
+
+        Only one request samples at a time, the others use the last sample.
+        Sampling errors keep the last known state so the API fails open.
+        """
+
+        now = self._clock()
+        due = self._sampled_at is None or now - self._sampled_at >= self.sample_interval
+        if not due or self._sampling:
+            return
+
+        self._sampling = True
+        try:
+            depth, completed = await run_in_threadpool(self._sample)
+            self.update(depth, completed, self._clock())
+        except Exception as exc:
+            logger.warning(f"Failed to sample queue {self.queue_name}: {exc}")
+        finally:
+            self._sampling = False
+
+    def _client_wait(self, client_id: str) -> float:
+        now = self._clock()
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = TokenBucket(self.client_rate, self.client_burst, now)
+            self._buckets[client_id] = bucket
+            if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_id)
+        return bucket.take(now)
+
+    async def __call__(self, request: Request) -> None:
+        if self.enabled:
+            await self.refresh()
+            if self.shedding:
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many pending tasks, retry later.",
+                    headers={"Retry-After": str(self.retry_after())},
+                )
+
+        if self.client_rate > 0:
+            client_id = request.headers.get(self.client_header) or (
+                request.client.host if request.client else "anonymous"
+            )
+            wait = self._client_wait(client_id)
+            if wait:
+                raise HTTPException(
+                    status_code=429,
+                    detail="Client quota exceeded, retry later.",
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+
+
+admission_control = AdmissionController()
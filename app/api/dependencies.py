@@ -0,0 +1,19 @@
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from config.app_config import ADMIN_API_TOKEN
+
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Guards admin routes with the shared token configured in `ADMIN_API_TOKEN`.
+
+    The admin API is disabled while no token is configured.
+    """
+
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled.")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
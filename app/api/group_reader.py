@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List
+
+from httpx import AsyncClient
+from starlette.concurrency import run_in_threadpool
+
+from app.clients.node_client import AsyncNodeClient
+from app.shared.group_cache import get_cached_summary, set_cached_summary
+from config.app_config import GROUP_READ_CONCURRENCY, GROUP_READ_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class GroupReader:
+    """
+    Reads a group from all nodes concurrently and summarizes its consistency.
+
+    Summaries are cached in Redis for a short time. Concurrent reads of the
+    same group share a single fan-out to the nodes, so a burst of requests
+    on an expired entry does not stampede the nodes.
+    """
+
+    def __init__(
+        self,
+        node_client: AsyncNodeClient = None,
+        concurrency: int = GROUP_READ_CONCURRENCY,
+    ):
+        self.node_client = node_client or AsyncNodeClient(
+            AsyncClient(timeout=GROUP_READ_TIMEOUT)
+        )
+        self.concurrency = concurrency
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def get_summary(
+        self, group_id: str, nodes: List[str], refresh: bool = False
+    ) -> dict:
+        """
+        Returns the cross-node summary of a group.
+
+        Args:
+            group_id (str): Group ID.
+            nodes (List[str]): Nodes expected to hold the group.
+            refresh (bool): Whether to bypass the cache.
+
+        Returns:
+            dict: Nodes the group is present on, missing on, or that could not
+                be reached.
+        """
+
+        if not refresh:
+            try:
+                cached = await run_in_threadpool(get_cached_summary, group_id)
+            except Exception as exc:
+                logger.warning(f"Failed to read cached summary of {group_id}: {exc}")
+                cached = None
+            if cached:
+                return {**cached, "cached": True}
+
+        in_flight = self._in_flight.get(group_id)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[group_id] = future
+        try:
+            summary = await self._query_nodes(group_id, nodes)
+            # Cache before releasing the waiters so late readers hit the cache
+            await self._cache(group_id, summary)
+            future.set_result(summary)
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            del self._in_flight[group_id]
+            if not future.done():
+                # Cancelled while querying, do not leave the waiters hanging
+                future.cancel()
+            elif not future.cancelled():
+                # Nobody else may be waiting, avoid "exception never retrieved"
+                future.exception()
+        return summary
+
+    @staticmethod
+    async def _cache(group_id: str, summary: dict) -> None:
+        try:
+            await run_in_threadpool(set_cached_summary, group_id, summary)
+        except Exception as exc:
+            logger.warning(f"Failed to cache summary of {group_id}: {exc}")
+
+    async def _query_nodes(self, group_id: str, nodes: List[str]) -> dict:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def get_status(node: str) -> int:
+            async with semaphore:
+                response = await self.node_client.get_group(node, group_id)
+                return response.status_code
+
+        status_codes = await asyncio.gather(*(get_status(node) for node in nodes))
+
+        summary = {
+            "group_id": group_id,
+            "present_on": [],
+            "missing_on": [],
+            "unreachable": [],
+        }
+        for node, status_code in zip(nodes, status_codes):
+            if status_code == 200:
+                summary["present_on"].append(node)
+            elif status_code == 404:
+                summary["missing_on"].append(node)
+            else:
+                summary["unreachable"].append(node)
+        summary["consistent"] = not summary["unreachable"] and (
+            not summary["present_on"] or not summary["missing_on"]
+        )
+        summary["checked_at"] = time.time()
+        summary["cached"] = False
+        return summary
+
+
+group_reader = GroupReader()
@@ -0,0 +1,162 @@
+import json
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.shared.tracing import TRACEPARENT_HEADER, Tracer, tracer
+from app.shared.traffic import TrafficRecorder, traffic_recorder
+from config.app_config import ADMISSION_CLIENT_HEADER, FAIR_TENANT_HEADER
+
+# Larger bodies are not recorded, group requests are a few hundred bytes
+MAX_RECORDED_BODY = 64 * 1024
+
+
+class ProcessTimeMiddleware:
+    """
+    Adds the time spent handling a request as the `X-Process-Time` header.
+
+    A plain ASGI middleware: unlike `@app.middleware("http")` it does not
+    wrap the request and response in extra tasks and streams, and it times
+    with the monotonic `perf_counter` clock.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+
+        async def send_with_process_time(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                process_time = time.perf_counter() - started_at
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-process-time", b"%.4f sec" % process_time),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_process_time)
+
+
+def _parse_body(body: bytes):
+    if not body or len(body) > MAX_RECORDED_BODY:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body.decode(errors="replace")
+
+
+class TrafficRecordMiddleware:
+    """
+    Records the requests under `prefix` with the traffic recorder: their
+    JSON body, the tenant and client headers, the response status and
+    duration, and the task ID returned, so a replay can follow the task.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        prefix: str = "/groups",
+        recorder: TrafficRecorder = traffic_recorder,
+    ):
+        self.app = app
+        self.prefix = prefix
+        self.recorder = recorder
+        self.headers = {
+            name.lower().encode(): name
+            for name in (FAIR_TENANT_HEADER, ADMISSION_CLIENT_HEADER)
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.recorder.enabled
+            or not scope["path"].startswith(self.prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        request_body, response_body = bytearray(), bytearray()
+        status = 500
+
+        async def receive_and_record() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                request_body.extend(message.get("body", b"")[:MAX_RECORDED_BODY])
+            return message
+
+        async def send_and_record(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_body.extend(message.get("body", b"")[:MAX_RECORDED_BODY])
+            await send(message)
+
+        try:
+            await self.app(scope, receive_and_record, send_and_record)
+        finally:
+            headers = {
+                self.headers[name]: value.decode()
+                for name, value in scope["headers"]
+                if name in self.headers
+            }
+            response = _parse_body(bytes(response_body))
+            self.recorder.record_request(
+                scope["method"],
+                scope["path"],
+                _parse_body(bytes(request_body)),
+                headers,
+                status,
+                started_at,
+                task_id=response.get("task_id") if isinstance(response, dict) else None,
+            )
+
+
+class TracingMiddleware:
+    """
+    Runs the requests under `prefix` in a span, continuing the trace of an
+    incoming `traceparent` header or starting a sampled one. The span is
+    current while the request is handled, so the tasks it publishes carry
+    the trace, and its `traceparent` is returned in the response headers.
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str = "/groups", tracer: Tracer = tracer):
+        self.app = app
+        self.prefix = prefix
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == TRACEPARENT_HEADER.encode():
+                incoming = value.decode(errors="replace")
+                break
+        name = f"{scope['method']} {scope['path']}"
+        with self.tracer.span(name, incoming, root=True) as span:
+            if span is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_traceparent(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = "error"
+                    message["headers"] = [
+                        *message.get("headers", ()),
+                        (TRACEPARENT_HEADER.encode(), span.traceparent.encode()),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_traceparent)
@@ -0,0 +1,307 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from celery import Celery
+from fastapi import HTTPException
+
+from app.celery_tasks.celery_app import celery_app
+from app.shared.tracing import TRACEPARENT_HEADER, tracer
+from config.app_config import (
+    PUBLISH_BATCH_SIZE,
+    PUBLISH_BUFFER_SIZE,
+    PUBLISH_CONFIRM_TIMEOUT,
+    PUBLISH_RETRY_INTERVAL,
+    PUBLISH_WAIT_CONFIRM,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PublishNotConfirmed(Exception):
+    pass
+
+
+class ConfirmTracker:
+    """
+    Tracks the publisher confirms of an AMQP channel in confirm mode.
+
+    The broker numbers the messages of a channel from 1 and acks or nacks
+    them, possibly several at once (`multiple`), so the confirms of a whole
+    batch are awaited in one go instead of one round trip per message.
+    """
+
+    def __init__(self, channel):
+        channel.confirm_select()
+        channel.events["basic_ack"].add(self._on_ack)
+        channel.events["basic_nack"].add(self._on_nack)
+        self._next_tag = 1
+        self._pending: Dict[int, Optional[bool]] = {}
+
+    def expect(self) -> int:
+        """
+        Returns the delivery tag of the next message published on the channel.
+        """
+
+        tag = self._next_tag
+        self._next_tag += 1
+        self._pending[tag] = None
+        return tag
+
+    def _resolve(self, delivery_tag: int, multiple: bool, confirmed: bool) -> None:
+        tags = (
+            [tag for tag in self._pending if tag <= delivery_tag]
+            if multiple
+            else [delivery_tag]
+        )
+        for tag in tags:
+            if self._pending.get(tag) is None:
+                self._pending[tag] = confirmed
+
+    def _on_ack(self, delivery_tag: int, multiple: bool) -> None:
+        self._resolve(delivery_tag, multiple, True)
+
+    def _on_nack(self, delivery_tag: int, multiple: bool) -> None:
+        self._resolve(delivery_tag, multiple, False)
+
+    def wait(self, connection, tags: List[int], timeout: float) -> Dict[int, bool]:
+        """
+        Reads confirms from the connection until all tags are resolved or
+        the timeout expired.
+
+        Returns:
+            dict: Whether each tag was acked, unresolved tags count as not.
+        """
+
+        deadline = time.monotonic() + timeout
+        while any(self._pending[tag] is None for tag in tags):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                connection.drain_events(timeout=remaining)
+            except TimeoutError:
+                break
+        return {tag: bool(self._pending.pop(tag)) for tag in tags}
+
+
+class _Publish:
+    __slots__ = ("task_name", "args", "kwargs", "task_id", "future", "traceparent")
+
+    def __init__(self, task_name: str, args: List, kwargs: Dict):
+        self.task_name = task_name
+        self.args = args
+        self.kwargs = kwargs
+        self.task_id = str(uuid.uuid4())
+        self.future = Future()
+        # Published from another thread, outside of the request's trace
+        self.traceparent = tracer.current_traceparent()
+
+
+class TaskPublisher:
+    """
+    Publishes tasks from a dedicated thread so the event loop never waits
+    on the broker.
+
+    Requests only append to a bounded buffer and get their task ID. The
+    thread publishes the buffer in batches over one connection. On AMQP it
+    waits for the publisher confirms of each batch at once, and republishes
+    the messages that were not confirmed (at-least-once). While the broker
+    is unreachable it keeps retrying, and requests are rejected once the
+    buffer is full.
+    """
+
+    def __init__(
+        self,
+        app: Celery = celery_app,
+        buffer_size: int = PUBLISH_BUFFER_SIZE,
+        batch_size: int = PUBLISH_BATCH_SIZE,
+        confirm_timeout: float = PUBLISH_CONFIRM_TIMEOUT,
+        retry_interval: float = PUBLISH_RETRY_INTERVAL,
+        wait_confirm: bool = PUBLISH_WAIT_CONFIRM,
+    ):
+        self.app = app
+        self.batch_size = max(batch_size, 1)
+        self.confirm_timeout = confirm_timeout
+        self.retry_interval = retry_interval
+        self.wait_confirm = wait_confirm
+        self.published = 0
+        self._buffer: "queue.Queue[_Publish]" = queue.Queue(maxsize=buffer_size)
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._connection = None
+        self._producer = None
+        self._trackers: Dict[int, ConfirmTracker] = {}
+
+    def submit(self, task_name: str, args: List, kwargs: Dict) -> _Publish:
+        """
+        Appends a task to the buffer.
+
+        Raises:
+            queue.Full: If the buffer is full.
+        """
+
+        self._ensure_started()
+        item = _Publish(task_name, args, kwargs)
+        self._buffer.put_nowait(item)
+        return item
+
+    async def publish(self, task_name: str, args: List, kwargs: Dict) -> str:
+        """
+        Queues a task for publishing without blocking the event loop.
+
+        Returns:
+            str: ID of the task.
+
+        Raises:
+            HTTPException: 503 if the buffer is full, or if waiting for the
+                confirm is enabled and the broker did not confirm in time.
+        """
+
+        try:
+            item = self.submit(task_name, args, kwargs)
+        except queue.Full:
+            raise HTTPException(
+                status_code=503,
+                detail="Task buffer full, retry later.",
+                headers={"Retry-After": str(max(int(self.retry_interval), 1))},
+            )
+        if self.wait_confirm:
+            try:
+                await asyncio.wait_for(
+                    asyncio.wrap_future(item.future), self.confirm_timeout
+                )
+            except asyncio.TimeoutError:
+                # Still buffered, it is published once the broker is back
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Task {item.task_id} not confirmed by the broker yet.",
+                )
+        return item.task_id
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Stops the thread once the buffer is flushed, or after `timeout`.
+        """
+
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if not self._buffer.empty():
+            logger.error(f"{self._buffer.qsize()} tasks were not published.")
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                # Started lazily so the thread lives in the API worker process
+                self._stopped.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="task-publisher", daemon=True
+                )
+                self._thread.start()
+
+    def _next_batch(self) -> List[_Publish]:
+        try:
+            batch = [self._buffer.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._buffer.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not (self._stopped.is_set() and self._buffer.empty()):
+            batch = self._next_batch()
+            while batch:
+                try:
+                    batch = self._publish_batch(batch)
+                except Exception as exc:
+                    logger.warning(
+                        f"Failed to publish {len(batch)} tasks, retrying: {exc!r}"
+                    )
+                    self._reset_connection()
+                    if self._stopped.wait(self.retry_interval):
+                        for item in batch:
+                            item.future.set_exception(exc)
+                        batch = []
+        self._reset_connection()
+
+    def _publish_batch(self, batch: List[_Publish]) -> List[_Publish]:
+        """
+        Publishes a batch and returns the messages to publish again.
+        """
+
+        if self._connection is None:
+            self._connection = self.app.connection_for_write()
+            self._connection.ensure_connection(max_retries=1)
+            self._producer = self._connection.Producer()
+        producer = self._producer
+        tracker = self._tracker(producer.channel)
+
+        tags = {}
+        for item in batch:
+            if tracker is not None:
+                tags[item.task_id] = tracker.expect()
+            options = {}
+            if item.traceparent:
+                options["headers"] = {TRACEPARENT_HEADER: item.traceparent}
+            self.app.send_task(
+                item.task_name,
+                args=item.args,
+                kwargs=item.kwargs,
+                task_id=item.task_id,
+                producer=producer,
+                **options,
+            )
+
+        confirmed = {}
+        if tracker is not None:
+            confirmed = tracker.wait(
+                self._connection, list(tags.values()), self.confirm_timeout
+            )
+        retry = []
+        for item in batch:
+            if tracker is None or confirmed[tags[item.task_id]]:
+                self.published += 1
+                item.future.set_result(item.task_id)
+            else:
+                retry.append(item)
+        if retry and len(retry) == len(batch):
+            # Nothing confirmed, the connection is likely broken
+            raise PublishNotConfirmed(f"{len(retry)} tasks not confirmed")
+        if retry:
+            logger.warning(f"{len(retry)} tasks nacked by the broker, republishing.")
+        return retry
+
+    def _tracker(self, channel) -> Optional[ConfirmTracker]:
+        # Only AMQP channels support confirms, other transports are trusted
+        if not hasattr(channel, "confirm_select"):
+            return None
+        tracker = self._trackers.get(id(channel))
+        if tracker is None:
+            tracker = self._trackers[id(channel)] = ConfirmTracker(channel)
+        return tracker
+
+    def _reset_connection(self) -> None:
+        self._trackers.clear()
+        if self._connection is not None:
+            try:
+                self._connection.release()
+            except Exception as exc:
+                logger.debug(f"Failed to release the broker connection: {exc!r}")
+            self._connection = None
+            self._producer = None
+
+
+task_publisher = TaskPublisher()
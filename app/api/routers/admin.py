@@ -0,0 +1,231 @@
+import asyncio
+import time
+import uuid
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.api.dependencies import require_admin_token
+from app.celery_tasks.backfill_task import (
+    pause_backfill,
+    read_backfill,
+    start_backfill,
+)
+from app.celery_tasks.celery_app import celery_app
+from app.celery_tasks.dead_letter_task import (
+    read_replay,
+    scan_replay_outcomes,
+    start_replay,
+)
+from app.celery_tasks.sweeper_task import read_sweep_report
+from app.shared.dead_letters import scan_dead_letters
+from app.shared.fair_queue import read_fair_queues
+from app.shared.metrics import read_published_metrics
+from app.shared.profiler import ProfilerBusy, collapse, read_profiles, sample
+from app.shared.rollback_data import scan_rollbacks
+from config.app_config import PROFILER_INTERVAL, PROFILER_MAX_DURATION
+
+# Time allowed to the workers past the profile duration to store the result
+PROFILE_GRACE = 5.0
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin_token)],
+    responses={
+        401: {"description": "Invalid admin token"},
+        403: {"description": "Admin API is disabled"},
+    },
+)
+
+
+@router.get("/rollbacks")
+async def list_rollbacks(
+    cursor: int = Query(0, ge=0),
+    count: int = Query(100, ge=1, le=1000),
+    node: Optional[str] = None,
+    operation: Optional[Literal["create_group", "delete_group"]] = None,
+):
+    """
+    List pending rollbacks and creation locks, one page at a time.
+    Pass next_cursor back as cursor until it is 0
+    """
+    next_cursor, items = await run_in_threadpool(
+        scan_rollbacks, cursor, count, node, operation
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/dead-letters")
+async def list_dead_letters(
+    cursor: int = Query(0, ge=0),
+    count: int = Query(100, ge=1, le=1000),
+    node: Optional[str] = None,
+    operation: Optional[
+        Literal["rollback_create_group", "rollback_delete_group", "repair_create_group"]
+    ] = None,
+):
+    """
+    List dead-lettered node operations, one page at a time.
+    Pass next_cursor back as cursor until it is 0
+    """
+    next_cursor, items = await run_in_threadpool(
+        scan_dead_letters, cursor, count, node, operation
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.post("/dead-letters/replay")
+async def replay_dead_letters(
+    node: Optional[str] = None,
+    operation: Optional[
+        Literal["rollback_create_group", "rollback_delete_group", "repair_create_group"]
+    ] = None,
+):
+    """
+    Replay the dead letters in bulk, node by node, rate limited and after a
+    health check of each node. Replayed entries leave the dead letters
+    """
+    try:
+        return await run_in_threadpool(start_replay, node, operation)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/dead-letters/replay")
+async def get_dead_letter_replay():
+    """
+    Progress of the last bulk replay of the dead letters: outcome counts and
+    status of each node
+    """
+    replay = await run_in_threadpool(read_replay)
+    if not replay:
+        raise HTTPException(status_code=404, detail="No replay of the dead letters.")
+    return replay
+
+
+@router.get("/dead-letters/replay/outcomes")
+async def list_dead_letter_replay_outcomes(
+    cursor: int = Query(0, ge=0),
+    count: int = Query(100, ge=1, le=1000),
+):
+    """
+    Outcome of each entry of the last bulk replay, one page at a time.
+    Pass next_cursor back as cursor until it is 0
+    """
+    next_cursor, items = await run_in_threadpool(scan_replay_outcomes, cursor, count)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/metrics")
+async def list_metrics():
+    """
+    Counters and gauges recently published by the worker processes,
+    by process
+    """
+    return await run_in_threadpool(read_published_metrics)
+
+
+@router.get("/fair-queues")
+async def list_fair_queues():
+    """
+    Backlog, running tasks and weight of each tenant of the fair scheduler
+    """
+    return await run_in_threadpool(read_fair_queues)
+
+
+@router.get("/sweeper")
+async def get_sweep_report():
+    """
+    Report of the last sweep of the rollback keys: keys scanned, and locks,
+    stale and stuck rollbacks reclaimed
+    """
+    return await run_in_threadpool(read_sweep_report)
+
+
+@router.post("/backfill/{node}")
+async def start_node_backfill(node: str, verify_only: bool = False):
+    """
+    Copy the cataloged groups placed on a node newly added to HOSTS, then
+    verify them. Resumes from the checkpoint if the backfill was paused or
+    interrupted. Set verify_only to only run the verification pass
+    """
+    try:
+        return await run_in_threadpool(start_backfill, node, verify_only)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.post("/backfill/{node}/pause")
+async def pause_node_backfill(node: str):
+    """
+    Pause the backfill of a node after its current chunk
+    """
+    return await run_in_threadpool(pause_backfill, node)
+
+
+@router.get("/backfill/{node}")
+async def get_node_backfill(node: str):
+    """
+    Checkpoint of the backfill of a node: status, phase, cursor and counts
+    of the groups created, already present, verified, repaired or failed
+    """
+    state = await run_in_threadpool(read_backfill, node)
+    if not state:
+        raise HTTPException(status_code=404, detail=f"No backfill of node {node}.")
+    return state
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile_api(
+    seconds: float = Query(10, gt=0, le=PROFILER_MAX_DURATION),
+    interval: float = Query(PROFILER_INTERVAL, ge=0.001, le=1),
+):
+    """
+    Sample the stacks of the API process serving this request for the
+    given seconds. Returns collapsed stacks for flamegraph.pl or speedscope
+    """
+    try:
+        stacks = await run_in_threadpool(sample, seconds, interval)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return collapse(stacks)
+
+
+@router.post("/profile/workers", response_class=PlainTextResponse)
+async def profile_workers(
+    seconds: float = Query(10, gt=0, le=PROFILER_MAX_DURATION),
+    interval: float = Query(PROFILER_INTERVAL, ge=0.001, le=1),
+    worker: Optional[List[str]] = Query(None),
+):
+    """
+    Sample the stacks of the processes running tasks on the workers (all,
+    or the given worker names) for the given seconds. Returns collapsed
+    stacks rooted at the host and process ID
+    """
+    request_id = uuid.uuid4().hex
+    replies = await run_in_threadpool(
+        celery_app.control.broadcast,
+        "profile",
+        arguments={"request_id": request_id, "duration": seconds, "interval": interval},
+        destination=worker,
+        reply=True,
+        timeout=1.0,
+    )
+    expected = sum(
+        len(reply.get("processes", []))
+        for answer in replies
+        for reply in answer.values()
+    )
+    if not expected:
+        raise HTTPException(status_code=503, detail="No worker answered.")
+
+    await asyncio.sleep(seconds)
+    deadline = time.monotonic() + PROFILE_GRACE
+    profiles = await run_in_threadpool(read_profiles, request_id)
+    while len(profiles) < expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.5)
+        profiles = await run_in_threadpool(read_profiles, request_id)
+    return "".join(profiles[source] for source in sorted(profiles))
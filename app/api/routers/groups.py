@@ -1,42 +1,106 @@
-from fastapi import APIRouter
-from starlette.responses import JSONResponse
+from celery import Task
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
 
+from app.api.admission import admission_control
+from app.api.group_reader import group_reader
+from app.api.publisher import task_publisher
 from app.api.schemas.schemas import CreateGroup, DeleteGroup
-from app.celery_tasks import celery_app
+from app.celery_tasks.celery_app import celery_app
 from app.celery_tasks.create_task import create_group
 from app.celery_tasks.delete_task import delete_group
+from app.shared.fair_queue import resolve_tenant, submit
+from app.shared.placement import nodes_for_group
+from app.shared.progress import read_progress
+from config.app_config import (
+    FAIR_SCHEDULING,
+    FAIR_TENANT_HEADER,
+    HOSTS,
+    PUBLISH_BUFFERED,
+)
 
 router = APIRouter(
-    prefix="/groups", tags=["Groups"], responses={404: {"description": "Not found"}}
+    prefix="/groups",
+    tags=["Groups"],
+    responses={
+        404: {"description": "Not found"},
+        429: {"description": "Too many pending tasks or client quota exceeded"},
+    },
 )
 
 
-@router.post("/create")
-async def create(input_dto: CreateGroup):
+async def _submit(task: Task, request: Request, group_id: str, **kwargs) -> str:
+    """
+    Queues a group operation, through the backlog of its tenant when fair
+    scheduling is enabled, and returns its task ID. Broker publishes never
+    run on the event loop.
+    """
+
+    if not FAIR_SCHEDULING:
+        if PUBLISH_BUFFERED:
+            return await task_publisher.publish(task.name, [group_id], kwargs)
+        return (await run_in_threadpool(task.delay, group_id, **kwargs)).id
+    tenant = resolve_tenant(request.headers.get(FAIR_TENANT_HEADER), group_id)
+    return await run_in_threadpool(
+        submit, tenant, task.name, [group_id], kwargs, celery_app.send_task
+    )
+
+
+@router.post("/create", dependencies=[Depends(admission_control)])
+async def create(input_dto: CreateGroup, request: Request):
     """
-    Create a group with the given group_id
+    Create a group with the given group_id, optionally notifying callback_url
+    with the final state once the task finishes. With write_quorum, the task
+    succeeds once that many nodes created the group and the others are
+    repaired in the background
     """
-    task = create_group.delay(input_dto.group_id)
-    return JSONResponse({"task_id": task.id})
+    task_id = await _submit(
+        create_group,
+        request,
+        input_dto.group_id,
+        callback_url=input_dto.callback,
+        write_quorum=input_dto.write_quorum,
+    )
+    return ORJSONResponse({"task_id": task_id})
 
 
-@router.post("/delete")
-async def delete(input_dto: DeleteGroup):
+@router.post("/delete", dependencies=[Depends(admission_control)])
+async def delete(input_dto: DeleteGroup, request: Request):
     """
-    Delete a group with the given group_id
+    Delete a group with the given group_id, optionally notifying callback_url
+    with the final state once the task finishes
     """
-    task = delete_group.delay(input_dto.group_id)
-    return JSONResponse({"task_id": task.id})
+    task_id = await _submit(
+        delete_group, request, input_dto.group_id, callback_url=input_dto.callback
+    )
+    return ORJSONResponse({"task_id": task_id})
 
 
 @router.get("/task/{task_id}")
 async def get_task_status(task_id: str):
     """
-    Return the status of the submitted task
+    Return the status of the submitted task, with its per-node progress
     """
+    # Plain JSON types, serialized directly without FastAPI's encoder pass
+    return ORJSONResponse(await run_in_threadpool(_read_task_status, task_id))
+
+
+def _read_task_status(task_id: str) -> dict:
     task_result = celery_app.AsyncResult(task_id, app=celery_app)
     return {
         "task_id": task_result.id,
         "state": task_result.state,
         "status": task_result.status,
+        "progress": read_progress(task_id),
     }
+
+
+@router.get("/{group_id}")
+async def read_group(group_id: str, refresh: bool = False):
+    """
+    Return the nodes the group is present on, missing on or that are
+    unreachable. Set refresh to bypass the short-lived cache
+    """
+    nodes = nodes_for_group(group_id, HOSTS)
+    return await group_reader.get_summary(group_id, nodes, refresh=refresh)
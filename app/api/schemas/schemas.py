@@ -1,19 +1,38 @@
-from pydantic import BaseModel
+from typing import Optional
+
+from pydantic import BaseModel, Field, HttpUrl, field_validator
+
+from app.shared.callback_urls import check_callback_url
 
 
 class GroupBase(BaseModel):
     group_id: str
+    callback_url: Optional[HttpUrl] = None
 
     class Config:
         json_schema_extra = {
             "example": {
                 "group_id": "test-group-1",
+                "callback_url": "https://example.com/hooks/groups",
             }
         }
 
+    @field_validator("callback_url")
+    @classmethod
+    def callback_url_allowed(cls, value: Optional[HttpUrl]) -> Optional[HttpUrl]:
+        # Webhooks must not reach internal services
+        if value is not None:
+            check_callback_url(str(value))
+        return value
+
+    @property
+    def callback(self) -> Optional[str]:
+        return str(self.callback_url) if self.callback_url else None
+
 
 class CreateGroup(GroupBase):
-    pass
+    # Nodes that must acknowledge the group, defaults to CREATE_WRITE_QUORUM
+    write_quorum: Optional[int] = Field(default=None, ge=1)
 
 
 class DeleteGroup(GroupBase):
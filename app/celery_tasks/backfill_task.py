@@ -0,0 +1,253 @@
+import logging
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from app.celery_tasks.celery_app import celery_app
+from app.clients.batching_node_client import shared_node_client
+from app.shared.group_catalog import in_catalog, scan_catalog
+from app.shared.placement import nodes_for_group
+from app.shared.queue_depth import get_queue_depth
+from app.shared.redis_client import redis_client
+from config.app_config import (
+    ADMISSION_QUEUE_NAME,
+    BACKFILL_CHUNK_SIZE,
+    BACKFILL_CONCURRENCY,
+    BACKFILL_PAUSE_INTERVAL,
+    BACKFILL_PAUSE_QUEUE_DEPTH,
+    BACKFILL_QUEUE,
+    BACKFILL_RATE,
+    HOSTS,
+)
+
+node_client = shared_node_client()
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_KEY_PREFIX = "backfill_"
+
+# Progress counters of a backfill, next to its status, phase and cursor
+COUNTERS = (
+    "scanned",
+    "placed",
+    "created",
+    "existing",
+    "failed",
+    "verified",
+    "repaired",
+    "unverified",
+    "removed",
+    "throttled",
+)
+
+
+def read_backfill(node: str) -> dict:
+    """
+    Returns the checkpoint of the backfill of a node, empty if none ran.
+    """
+
+    state = redis_client.hgetall(f"{BACKFILL_KEY_PREFIX}{node}")
+    if not state:
+        return {}
+    state = dict(state)
+    for field in COUNTERS + ("cursor",):
+        state[field] = int(state.get(field, 0))
+    for field in ("started_at", "updated_at", "finished_at"):
+        if field in state:
+            state[field] = float(state[field])
+    return state
+
+
+def start_backfill(node: str, verify_only: bool = False) -> dict:
+    """
+    Starts the backfill of a node added to HOSTS, or resumes it from its
+    checkpoint if it was paused or interrupted.
+
+    Args:
+        node (str): Node to copy the groups placed on it to.
+        verify_only (bool): Only run the verification pass.
+
+    Returns:
+        dict: The checkpoint of the backfill.
+
+    Raises:
+        ValueError: If the node is not in HOSTS.
+    """
+
+    if node not in HOSTS:
+        raise ValueError(f"Node {node} is not in HOSTS.")
+
+    key = f"{BACKFILL_KEY_PREFIX}{node}"
+    state = read_backfill(node)
+    # A new run ID stops the chunks still queued by a previous run
+    run_id = uuid.uuid4().hex
+    pipe = redis_client.pipeline(transaction=False)
+    if not state or state["status"] == "done" or verify_only:
+        pipe.delete(key)
+        pipe.hset(
+            key,
+            mapping={
+                "status": "running",
+                "phase": "verify" if verify_only else "copy",
+                "cursor": 0,
+                "run_id": run_id,
+                "started_at": time.time(),
+                **{counter: 0 for counter in COUNTERS},
+            },
+        )
+    else:
+        pipe.hset(key, mapping={"status": "running", "run_id": run_id})
+    pipe.execute()
+
+    _schedule_chunk(node, run_id, countdown=0)
+    logger.info(f"Backfill of node {node} started.")
+    return read_backfill(node)
+
+
+def pause_backfill(node: str) -> dict:
+    """
+    Pauses the backfill of a node after its current chunk.
+
+    Returns:
+        dict: The checkpoint of the backfill, empty if none ran.
+    """
+
+    key = f"{BACKFILL_KEY_PREFIX}{node}"
+    state = read_backfill(node)
+    if state and state["status"] == "running":
+        redis_client.hset(key, "status", "paused")
+        logger.info(f"Backfill of node {node} paused.")
+    return read_backfill(node)
+
+
+def _schedule_chunk(node: str, run_id: str, countdown: float) -> None:
+    celery_app.send_task(
+        "app.celery_tasks.backfill_task.backfill_chunk",
+        kwargs={"node": node, "run_id": run_id},
+        countdown=countdown,
+        queue=BACKFILL_QUEUE,
+    )
+
+
+def _live_traffic_busy() -> bool:
+    if not BACKFILL_PAUSE_QUEUE_DEPTH:
+        return False
+    try:
+        return get_queue_depth(ADMISSION_QUEUE_NAME) > BACKFILL_PAUSE_QUEUE_DEPTH
+    except Exception as exc:
+        logger.warning(f"Failed to read the depth of {ADMISSION_QUEUE_NAME}: {exc}")
+        return False
+
+
+def _copy_group(node: str, group_id: str) -> str:
+    response = node_client.create_group(node, group_id)
+    if response.status_code == 201:
+        return "created"
+    if response.status_code == 400:
+        # Left for the verification pass to confirm
+        return "existing"
+    logger.warning(f"Failed to backfill group {group_id} on {node}.")
+    return "failed"
+
+
+def _verify_group(node: str, group_id: str) -> str:
+    response = node_client.get_group(node, group_id)
+    if response.status_code == 200:
+        return "verified"
+    if response.status_code == 404:
+        if node_client.create_group(node, group_id).status_code == 201:
+            return "repaired"
+    logger.warning(f"Could not verify group {group_id} on {node}.")
+    return "unverified"
+
+
+def _undo_deleted(node: str, group_ids: List[str]) -> int:
+    """
+    Deletes again the groups created on the node whose deletion completed
+    while the chunk ran, they left the catalog in the meantime.
+    """
+
+    deleted = [
+        group_id
+        for group_id, cataloged in zip(group_ids, in_catalog(group_ids))
+        if not cataloged
+    ]
+    for group_id in deleted:
+        node_client.delete_group(node, group_id)
+    return len(deleted)
+
+
+@celery_app.task(name="app.celery_tasks.backfill_task.backfill_chunk", acks_late=True)
+def backfill_chunk(node: str, run_id: str) -> Optional[dict]:
+    """
+    Backfills the next chunk of the group catalog on a node, then queues
+    the following chunk.
+
+    The catalog is streamed with SSCAN, `BACKFILL_CHUNK_SIZE` groups at a
+    time, and only the groups placed on the node are sent to it, at most
+    `BACKFILL_CONCURRENCY` requests at once. The SCAN cursor and counters
+    are checkpointed after every chunk: a chunk interrupted by a worker
+    crash is redelivered and simply runs again. Chunks are paced to
+    `BACKFILL_RATE` groups per second, and postponed while the live queue
+    is deeper than `BACKFILL_PAUSE_QUEUE_DEPTH`.
+
+    The copy pass is followed by a verification pass reading every group
+    back from the node and creating the missing ones.
+
+    Args:
+        node (str): Node to backfill.
+        run_id (str): Run the chunk belongs to, stale runs stop.
+
+    Returns:
+        dict: Outcome counts of the chunk, None if it did not run.
+    """
+
+    key = f"{BACKFILL_KEY_PREFIX}{node}"
+    state = read_backfill(node)
+    if not state or state["run_id"] != run_id or state["status"] != "running":
+        logger.info(f"Backfill run {run_id} of node {node} stopped.")
+        return None
+    if _live_traffic_busy():
+        redis_client.hincrby(key, "throttled", 1)
+        _schedule_chunk(node, run_id, countdown=BACKFILL_PAUSE_INTERVAL)
+        return None
+
+    started_at = time.monotonic()
+    cursor, group_ids = scan_catalog(state["cursor"], BACKFILL_CHUNK_SIZE)
+    placed = [
+        group_id for group_id in group_ids if node in nodes_for_group(group_id, HOSTS)
+    ]
+    handle = _verify_group if state["phase"] == "verify" else _copy_group
+    with ThreadPoolExecutor(max_workers=max(BACKFILL_CONCURRENCY, 1)) as executor:
+        outcomes = list(executor.map(lambda group_id: handle(node, group_id), placed))
+    created = [
+        group_id
+        for group_id, outcome in zip(placed, outcomes)
+        if outcome in ("created", "repaired")
+    ]
+    counts = Counter(outcomes)
+    counts.update(scanned=len(group_ids), placed=len(placed))
+    counts["removed"] = _undo_deleted(node, created)
+
+    done = cursor == 0 and state["phase"] == "verify"
+    pipe = redis_client.pipeline(transaction=False)
+    for counter, value in counts.items():
+        if value:
+            pipe.hincrby(key, counter, value)
+    checkpoint = {"cursor": cursor, "updated_at": time.time()}
+    if cursor == 0 and state["phase"] == "copy":
+        checkpoint["phase"] = "verify"
+    if done:
+        checkpoint.update(status="done", finished_at=time.time())
+    pipe.hset(key, mapping=checkpoint)
+    pipe.execute()
+
+    if done:
+        logger.info(f"Backfill of node {node} done: {read_backfill(node)}")
+    else:
+        elapsed = time.monotonic() - started_at
+        pace = len(placed) / BACKFILL_RATE if BACKFILL_RATE else 0
+        _schedule_chunk(node, run_id, countdown=max(pace - elapsed, 0))
+    return dict(counts)
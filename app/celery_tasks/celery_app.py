@@ -1,18 +1,98 @@
 from celery import Celery
+from celery.signals import (
+    after_task_publish,
+    before_task_publish,
+    setup_logging,
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+)
+from kombu import Queue
 
-from config.app_config import CELERY_BROKER_URL, CELERY_RESULT_BACKEND
+# Registers the `profile` remote control command
+from app.celery_tasks import profile_command  # noqa: F401
+from app.clients.warmup import warm_up_worker
+from app.shared.fair_queue import release_on_task_finished
+from app.shared.group_cache import invalidate_on_task_finished
+from app.shared.logs import configure_worker_logging
+from app.shared.profiler import install_profile_handler
+from app.shared.throughput import record_task_completed
+from app.shared.tracing import (
+    end_publish_span,
+    end_task_span,
+    inject_on_publish,
+    start_task_span,
+    tracer,
+)
+from config.app_config import (
+    CELERY_BROKER_URL,
+    CELERY_RESULT_BACKEND,
+    SWEEPER_INTERVAL,
+    WEBHOOK_QUEUE_MAX_LENGTH,
+)
 
 # Initialize Celery
 celery_app = Celery(
     "SwisscomApp", broker=CELERY_BROKER_URL, backend=CELERY_RESULT_BACKEND
 )
 
+# Webhook deliveries get their own bounded queue so slow receivers can neither
+# stall the group workers nor grow the broker backlog without limit.
+celery_app.conf.task_queues = (
+    Queue("celery"),
+    Queue(
+        "webhooks",
+        queue_arguments={
+            "x-max-length": WEBHOOK_QUEUE_MAX_LENGTH,
+            "x-overflow": "drop-head",
+        },
+    ),
+)
+celery_app.conf.task_routes = {
+    "app.celery_tasks.webhook_task.deliver_webhook": {"queue": "webhooks"},
+}
+
+# Heal rollback keys left behind by dead workers or lost tasks
+if SWEEPER_INTERVAL > 0:
+    celery_app.conf.beat_schedule = {
+        "sweep-rollbacks": {
+            "task": "app.celery_tasks.sweeper_task.sweep_rollbacks",
+            "schedule": SWEEPER_INTERVAL,
+        },
+    }
+
+# Log off the task threads, in place of Celery's own logging setup
+setup_logging.connect(configure_worker_logging, weak=False)
+
+# Feed the service rate estimate used by the API admission control
+task_postrun.connect(record_task_completed, weak=False)
+# Keep the cached group summaries of the read API in line with the nodes
+task_postrun.connect(invalidate_on_task_finished, weak=False)
+# Hand the slot of a fairly scheduled task to the next backlogged tenant
+task_postrun.connect(release_on_task_finished, weak=False)
+
+# Carry the trace of a request through the broker into its tasks, and on
+# to the tasks they spawn
+if tracer.enabled:
+    before_task_publish.connect(inject_on_publish, weak=False)
+    after_task_publish.connect(end_publish_span, weak=False)
+    task_prerun.connect(start_task_span, weak=False)
+    task_postrun.connect(end_task_span, weak=False)
+
+# Resolve and connect to the nodes before a worker process consumes tasks
+worker_process_init.connect(warm_up_worker, weak=False)
+# Let pool processes profile themselves on demand, see the `profile` command
+worker_process_init.connect(install_profile_handler, weak=False)
+
 # Import tasks
 celery_app.autodiscover_tasks(
     [
         "app.celery_tasks.create_task",
         "app.celery_tasks.delete_task",
         "app.celery_tasks.dead_letter_task",
+        "app.celery_tasks.webhook_task",
+        "app.celery_tasks.sweeper_task",
+        "app.celery_tasks.backfill_task",
     ],
     force=True,
 )
@@ -1,23 +1,55 @@
 import json
 import logging
+import time
+import uuid
+from typing import Optional
 
 import httpx
 
 from app.celery_tasks.celery_app import celery_app
-from app.clients.node_client import NodeClient
-from app.shared.redis_client import redis_client
+from app.celery_tasks.webhook_task import (
+    build_callback,
+    notify_completion,
+    record_node_outcome,
+)
+from app.clients.batching_node_client import shared_node_client
+from app.shared.fair_queue import release_slot
+from app.shared.fanout import (
+    node_queue,
+    node_route,
+    read_fanout,
+    record_node_result,
+    start_fanout,
+)
+from app.shared.group_cache import invalidate_summary
+from app.shared.group_catalog import add_to_catalog
+from app.shared.placement import nodes_for_group
+from app.shared.progress import (
+    ProgressRecorder,
+    record_node_status,
+    record_rollback_status,
+)
+from app.shared.redis_client import group_key, redis_client
+from app.shared.rollback_data import REPAIR_KEY_PREFIX, decode_rollback_item
 from config.app_config import (
     CELERY_DEFAULT_MAX_RETRIES,
     CELERY_DEFAULT_RETRY_DELAY,
+    CREATE_WRITE_QUORUM,
     HOSTS,
+    PER_NODE_QUEUES,
+    SWEEPER_LOCK_MAX_AGE,
 )
 
-node_client = NodeClient()
+node_client = shared_node_client()
 
 logger = logging.getLogger(__name__)
 
 REDIS_KEY_PREFIX = "rollback_create_group_"
 
+# A sequential creation refreshes its lock this often, so the sweeper never
+# takes a live lock for an orphaned one
+LOCK_REFRESH_INTERVAL = SWEEPER_LOCK_MAX_AGE / 3
+
 
 def _is_rollback_needed(node: str, group_id: str, response: httpx.Response) -> bool:
     """
@@ -42,66 +74,302 @@ def _is_rollback_needed(node: str, group_id: str, response: httpx.Response) -> b
     return False
 
 
+def resolve_write_quorum(write_quorum: Optional[int], total: int) -> int:
+    """
+    Returns the number of nodes that must acknowledge a creation.
+
+    Args:
+        write_quorum (int, optional): Requested quorum, None falls back to
+            CREATE_WRITE_QUORUM. 0 requires all nodes.
+        total (int): Number of nodes.
+
+    Returns:
+        int: Quorum between 1 and `total`.
+    """
+
+    if write_quorum is None:
+        write_quorum = CREATE_WRITE_QUORUM
+    if not write_quorum:
+        return total
+    return max(1, min(write_quorum, total))
+
+
 @celery_app.task(name="app.celery_tasks.create_task.create_group")
-def create_group(group_id: str):
+def create_group(
+    group_id: str,
+    callback_url: Optional[str] = None,
+    write_quorum: Optional[int] = None,
+):
     """
-    Creates a group on all nodes.
+    Creates a group on the nodes it is placed on (all nodes by default).
+
+    Succeeds once `write_quorum` nodes acknowledged the group, the nodes that
+    failed or were not contacted yet are then repaired in the background.
+    The creation is rolled back once the quorum can no longer be reached.
 
     Args:
         group_id (str): ID of the group to create.
+        callback_url (str, optional): URL notified with the final state.
+        write_quorum (int, optional): Nodes that must acknowledge the group,
+            defaults to CREATE_WRITE_QUORUM (all nodes if 0).
     """
 
-    rollback_key = f"{REDIS_KEY_PREFIX}{group_id}"
+    rollback_key = group_key(REDIS_KEY_PREFIX, group_id)
     # Skip creation if rollback data exists (indicating previous failure)
     if redis_client.exists(rollback_key):
         logger.info(f"Rollback data exists for group {group_id}, skipping creation.")
         return
 
-    # Set empty rollback data to lock creation
-    redis_client.set(f"{rollback_key}", json.dumps([]))
+    task_id = create_group.request.id
+    # Lock creation, with what the sweeper needs to tell a live lock apart
+    lock = {"locked_at": time.time(), "task_id": task_id}
+    redis_client.set(rollback_key, json.dumps(lock))
+    nodes = nodes_for_group(group_id, HOSTS)
+    quorum = resolve_write_quorum(write_quorum, len(nodes))
+    callback = build_callback(callback_url, task_id, "create_group", group_id)
+    progress = ProgressRecorder(task_id, "create_group", len(nodes), quorum=quorum)
+
+    if PER_NODE_QUEUES:
+        progress.flush(done=True)
+        _fan_out(group_id, nodes, task_id, callback, quorum)
+        return
 
     nodes_processed = []
-    for node in HOSTS:
+    nodes_failed = []
+    for node in nodes:
+        if len(nodes_processed) >= quorum:
+            break
+        _refresh_lock(rollback_key, lock)
+        progress.start(node)
         response = node_client.create_group(node, group_id)
         if _is_rollback_needed(node, group_id, response):
-            logger.info(f"Rollback needed for group {group_id} on node {node}.")
-            trigger_rollback(group_id, nodes_processed)
+            progress.finish(node, "failed")
+            record_node_outcome(callback, node, "failed")
+            nodes_failed.append(node)
+            if len(nodes_failed) <= len(nodes) - quorum:
+                logger.info("Group %s failed on %s, will be repaired.", group_id, node)
+                continue
+            logger.info("Rollback needed for group %s on node %s.", group_id, node)
+            progress.flush()
+            trigger_rollback(group_id, nodes_processed, callback)
             break
 
-        logger.info(f"{node} processed. Group {group_id} created successfully.")
+        logger.info(
+            "%s processed. Group %s created successfully.",
+            node,
+            group_id,
+            extra={"event": "group_created_on_node"},
+        )
         nodes_processed.append(node)
+        progress.finish(node, "created")
+        record_node_outcome(callback, node, "created")
+
+    if len(nodes_processed) >= quorum:
+        nodes_pending = [node for node in nodes if node not in nodes_processed]
+        for node in nodes_pending:
+            progress.finish(node, "pending_repair")
+            record_node_outcome(callback, node, "pending_repair")
+        schedule_repairs(group_id, nodes_pending, task_id)
+
+    progress.flush(done=True)
+
+    # If enough nodes processed, delete rollback data
+    if len(nodes_processed) >= quorum:
+        _complete_creation(group_id)
+        notify_completion(callback, "SUCCESS")
+
+
+def _refresh_lock(rollback_key: str, lock: dict) -> None:
+    now = time.time()
+    if now - lock["locked_at"] < LOCK_REFRESH_INTERVAL:
+        return
+    lock["locked_at"] = now
+    # Not recreated if the sweeper took it in the meantime
+    redis_client.set(rollback_key, json.dumps(lock), xx=True)
+
+
+def _fan_out(
+    group_id: str,
+    nodes: list,
+    task_id: Optional[str],
+    callback: Optional[dict],
+    quorum: int,
+) -> None:
+    """
+    Queues the creation on each node to the queue of that node.
+
+    The last sub-operation to finish joins them, see `_join_create`.
+    """
 
-    # If all nodes processed, delete rollback data
-    if len(nodes_processed) == len(HOSTS):
-        redis_client.delete(f"{rollback_key}")
+    operation_id = task_id or uuid.uuid4().hex
+    meta = {
+        "group_id": group_id,
+        "nodes": nodes,
+        "total": len(nodes),
+        "quorum": quorum,
+        "task_id": task_id,
+        "callback": callback,
+    }
+    start_fanout(operation_id, meta)
+    for node in nodes:
+        celery_app.send_task(
+            "app.celery_tasks.create_task.create_group_on_node",
+            kwargs={"operation_id": operation_id, "node": node},
+            queue=node_queue(node),
+        )
+    logger.info(
+        "Creation of group %s queued on nodes %s.",
+        group_id,
+        nodes,
+        extra={"event": "create_queued"},
+    )
+
+
+@celery_app.task(name="app.celery_tasks.create_task.create_group_on_node")
+def create_group_on_node(operation_id: str, node: str):
+    """
+    Creates a group on one node as part of a fanned out creation.
 
+    Nodes whose turn comes once the quorum is out of reach are skipped, as
+    they would only be rolled back.
 
-def trigger_rollback(group_id: str, nodes_processed: list) -> None:
+    Args:
+        operation_id (str): ID of the creation.
+        node (str): Name of the node.
+    """
+
+    operation = read_fanout(operation_id)
+    if not operation:
+        logger.info(
+            "Operation %s unknown, skipping node %s.",
+            operation_id,
+            node,
+            extra={"event": "operation_unknown"},
+        )
+        return
+
+    group_id = operation["group_id"]
+    if operation["failed"] > operation["total"] - operation["quorum"]:
+        logger.info(
+            "Quorum of group %s out of reach, skipping %s.",
+            group_id,
+            node,
+            extra={"event": "quorum_out_of_reach"},
+        )
+        outcome, duration_ms = "skipped", None
+    else:
+        started_at = time.monotonic()
+        response = node_client.create_group(node, group_id)
+        outcome = (
+            "failed" if _is_rollback_needed(node, group_id, response) else "created"
+        )
+        duration_ms = (time.monotonic() - started_at) * 1000
+    record_node_status(operation["task_id"], node, outcome, duration_ms)
+
+    outcomes = record_node_result(
+        operation_id, node, outcome, outcome != "created", operation["total"]
+    )
+    if outcomes is not None:
+        _join_create(operation, outcomes)
+
+
+def _join_create(operation: dict, outcomes: dict) -> None:
+    """
+    Completes a fanned out creation once every node reported: succeeds and
+    repairs the missing nodes if the quorum was reached, rolls back the
+    created nodes otherwise.
+    """
+
+    group_id = operation["group_id"]
+    # The nodes changed in sub-tasks, which only know the operation ID
+    invalidate_summary(group_id)
+    # The fair scheduling slot of the operation was held until now
+    release_slot(operation["task_id"], celery_app.send_task)
+    task_id = operation["task_id"]
+    callback = operation["callback"]
+    nodes_created = []
+    for node in operation["nodes"]:
+        record_node_outcome(callback, node, outcomes.get(node, "skipped"))
+        if outcomes.get(node) == "created":
+            nodes_created.append(node)
+
+    if len(nodes_created) < operation["quorum"]:
+        logger.info(
+            "Rollback needed for group %s, quorum not reached.",
+            group_id,
+            extra={"event": "rollback_needed"},
+        )
+        trigger_rollback(group_id, nodes_created, callback, task_id=task_id)
+        return
+
+    nodes_pending = [node for node in operation["nodes"] if node not in nodes_created]
+    for node in nodes_pending:
+        record_node_status(task_id, node, "pending_repair")
+        record_node_outcome(callback, node, "pending_repair")
+    schedule_repairs(group_id, nodes_pending, task_id)
+    _complete_creation(group_id)
+    notify_completion(callback, "SUCCESS")
+
+
+def _complete_creation(group_id: str) -> None:
+    # Releases the creation lock and catalogs the group in one round trip
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.delete(group_key(REDIS_KEY_PREFIX, group_id))
+    add_to_catalog(group_id, pipe)
+    pipe.execute()
+
+
+def trigger_rollback(
+    group_id: str,
+    nodes_processed: list,
+    callback: Optional[dict] = None,
+    task_id: Optional[str] = None,
+) -> None:
     """
     Triggers rollback for group creation on specified nodes.
 
     Args:
         group_id (str): ID of the group to rollback.
         nodes_processed (list): List of nodes that need rollback.
+        callback (dict, optional): Callback context notified once rolled back.
+        task_id (str, optional): ID of the creation task, defaults to the
+            current task.
     """
 
-    rollback_key = f"{REDIS_KEY_PREFIX}{group_id}"
-    redis_value = json.dumps({"group_id": group_id, "nodes": nodes_processed})
+    rollback_key = group_key(REDIS_KEY_PREFIX, group_id)
+    task_id = task_id or create_group.request.id
+    rollback_data = {"group_id": group_id, "nodes": nodes_processed}
+    if task_id:
+        rollback_data["task_id"] = task_id
+    if callback:
+        rollback_data["callback"] = callback
+    redis_value = json.dumps(rollback_data)
     redis_client.set(
         rollback_key,
         redis_value,
         ex=60 * 60,
     )
     logger.info(
-        f"Rollback data set on redis. Key: {rollback_key}, Value: {redis_value}"
+        "Rollback data set on redis. Key: %s, Value: %s", rollback_key, redis_value
     )
+    record_rollback_status(task_id, nodes_processed, "rolling_back")
 
     for node in nodes_processed:
         celery_app.send_task(
             "app.celery_tasks.create_task.rollback_create_group",
             kwargs={"group_id": group_id, "node": node},
+            **node_route(node),
         )
-        logger.info(f"Rollback task sent for group {group_id} on node {node}.")
+        logger.info(
+            "Rollback task sent for group %s on node %s.",
+            group_id,
+            node,
+            extra={"event": "rollback_sent"},
+        )
+
+    # Nothing to compensate, the operation is already in its final state
+    if not nodes_processed:
+        notify_completion(callback, "ROLLED_BACK")
 
 
 @celery_app.task(
@@ -119,7 +387,7 @@ def rollback_create_group(group_id: str, node: str):
         node (str): Name of the node to rollback the group on.
     """
 
-    rollback_key = f"{REDIS_KEY_PREFIX}{group_id}"
+    rollback_key = group_key(REDIS_KEY_PREFIX, group_id)
     rollback_item = redis_client.get(rollback_key)
     if not rollback_item:
         logger.info(
@@ -154,7 +422,10 @@ def _handle_failed_rollback(group_id: str, node: str) -> None:
     if rollback_create_group.request.retries != rollback_create_group.max_retries:
         rollback_create_group.retry(exc=Exception("Failed to delete group on node."))
     else:
-        redis_client.delete(f"rollback_create_group_{group_id}")
+        rollback_key = group_key(REDIS_KEY_PREFIX, group_id)
+        rollback_data = decode_rollback_item(redis_client.get(rollback_key))
+        callback = rollback_data.get("callback")
+        redis_client.delete(rollback_key)
         celery_app.send_task(
             "app.celery_tasks.dead_letter_task.process_dead_letter",
             kwargs={
@@ -163,6 +434,9 @@ def _handle_failed_rollback(group_id: str, node: str) -> None:
                 "task": "rollback_create_group",
             },
         )
+        record_rollback_status(rollback_data.get("task_id"), [node], "dead_lettered")
+        record_node_outcome(callback, node, "dead_lettered")
+        notify_completion(callback, "ROLLBACK_FAILED")
 
 
 def _update_rollback_data(group_id: str, node: str) -> None:
@@ -174,10 +448,14 @@ def _update_rollback_data(group_id: str, node: str) -> None:
         node (str): Name of the node.
     """
 
-    rollback_key = f"{REDIS_KEY_PREFIX}{group_id}"
+    rollback_key = group_key(REDIS_KEY_PREFIX, group_id)
     rollback_item = redis_client.get(rollback_key)
     if not rollback_item:
-        logger.info(f"No rollback needed for group {group_id}.")
+        logger.info(
+            "No rollback needed for group %s.",
+            group_id,
+            extra={"event": "rollback_not_needed"},
+        )
         return
 
     try:
@@ -195,9 +473,110 @@ def _update_rollback_data(group_id: str, node: str) -> None:
             f"Node {node} not in rollback data for group {group_id}, skipping rollback."
         )
         return
-    
+
     rollback_data["nodes"].remove(node)
+    callback = rollback_data.get("callback")
+    record_rollback_status(rollback_data.get("task_id"), [node], "rolled_back")
+    record_node_outcome(callback, node, "rolled_back")
     if not rollback_data["nodes"]:
         redis_client.delete(rollback_key)
+        notify_completion(callback, "ROLLED_BACK")
     else:
         redis_client.set(rollback_key, json.dumps(rollback_data))
+
+
+def schedule_repairs(group_id: str, nodes: list, task_id: Optional[str]) -> None:
+    """
+    Records nodes missing a created group and queues their repair.
+
+    Args:
+        group_id (str): ID of the created group.
+        nodes (list): Nodes the group still has to be created on.
+        task_id (str, optional): ID of the creation task.
+    """
+
+    if not nodes:
+        return
+
+    repair_key = group_key(REPAIR_KEY_PREFIX, group_id)
+    repair_data = {"group_id": group_id, "nodes": nodes}
+    if task_id:
+        repair_data["task_id"] = task_id
+    redis_client.set(repair_key, json.dumps(repair_data), ex=60 * 60)
+    logger.info(
+        "Repairs pending for group %s on nodes %s.",
+        group_id,
+        nodes,
+        extra={"event": "repairs_pending"},
+    )
+
+    for node in nodes:
+        celery_app.send_task(
+            "app.celery_tasks.create_task.repair_create_group",
+            kwargs={"group_id": group_id, "node": node},
+            **node_route(node),
+        )
+
+
+@celery_app.task(
+    name="app.celery_tasks.create_task.repair_create_group",
+    default_retry_delay=CELERY_DEFAULT_RETRY_DELAY,
+    max_retries=CELERY_DEFAULT_MAX_RETRIES,
+    acks_late=True,
+)
+def repair_create_group(group_id: str, node: str):
+    """
+    Creates a group on a node left behind by a quorum creation.
+
+    Args:
+        group_id (str): ID of the group to repair.
+        node (str): Name of the node to create the group on.
+    """
+
+    repair_key = group_key(REPAIR_KEY_PREFIX, group_id)
+    repair_data = decode_rollback_item(redis_client.get(repair_key))
+    # Repairs are dropped when the group is deleted in the meantime
+    if node not in repair_data.get("nodes", []):
+        logger.info(
+            "No repair pending for group %s on node %s.",
+            group_id,
+            node,
+            extra={"event": "repair_not_pending"},
+        )
+        return
+
+    response = node_client.create_group(node, group_id)
+    task_id = repair_data.get("task_id")
+    if not _is_rollback_needed(node, group_id, response):
+        logger.info(
+            "Group %s repaired on node %s.",
+            group_id,
+            node,
+            extra={"event": "group_repaired_on_node"},
+        )
+        _remove_pending_repair(group_id, node)
+        record_node_status(task_id, node, "repaired")
+        return
+
+    if repair_create_group.request.retries != repair_create_group.max_retries:
+        repair_create_group.retry(exc=Exception("Failed to create group on node."))
+        return
+
+    # The dead letter processing removes the node from the repair data
+    celery_app.send_task(
+        "app.celery_tasks.dead_letter_task.process_dead_letter",
+        kwargs={"group_id": group_id, "node": node, "task": "repair_create_group"},
+    )
+    record_node_status(task_id, node, "repair_failed")
+
+
+def _remove_pending_repair(group_id: str, node: str) -> None:
+    repair_key = group_key(REPAIR_KEY_PREFIX, group_id)
+    repair_data = decode_rollback_item(redis_client.get(repair_key))
+    if node not in repair_data.get("nodes", []):
+        return
+    repair_data["nodes"].remove(node)
+    if repair_data["nodes"]:
+        redis_client.set(repair_key, json.dumps(repair_data), ex=60 * 60)
+    else:
+        redis_client.delete(repair_key)
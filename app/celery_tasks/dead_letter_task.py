@@ -1,12 +1,53 @@
 import json
 import logging
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 from app.celery_tasks.celery_app import celery_app
-from app.shared.redis_client import redis_client
+from app.clients.batching_node_client import shared_node_client
+from app.shared.dead_letters import (
+    index_dead_letters,
+    record_dead_letter,
+    record_replay_failure,
+    resolve_dead_letter,
+    scan_dead_letters,
+)
+from app.shared.fanout import node_route
+from app.shared.group_catalog import in_catalog
+from app.shared.placement import nodes_for_group
+from app.shared.redis_client import group_key, redis_client
+from config.app_config import (
+    DEAD_LETTER_REPLAY_CHUNK_SIZE,
+    DEAD_LETTER_REPLAY_CONCURRENCY,
+    DEAD_LETTER_REPLAY_RATE,
+    HOSTS,
+)
 
+node_client = shared_node_client()
 
 logger = logging.getLogger(__name__)
 
+# State of the last bulk replay, and outcome of each entry it replayed
+REPLAY_KEY = "dead_letter_replay"
+REPLAY_OUTCOMES_KEY_PREFIX = "dead_letter_replay_outcomes_"
+REPLAY_TTL = 7 * 24 * 60 * 60
+# Prefix of the fields of the replay state holding the status of a node
+REPLAY_NODE_PREFIX = "node|"
+
+REPLAY_COUNTERS = (
+    "replayed",
+    "superseded",
+    "failed",
+    "undetermined",
+    "unhealthy_nodes",
+)
+
+# Outcomes removing the entry from the dead letters
+RESOLVED = ("replayed", "superseded")
+
 
 @celery_app.task(name="app.celery_tasks.dead_letter_task.process_dead_letter")
 def process_dead_letter(group_id: str, node: str, task: str):
@@ -21,7 +62,11 @@ def process_dead_letter(group_id: str, node: str, task: str):
     Returns:
         None
     """
-    rollback_key = f"{task}_{group_id}"
+    # Keep the failed operation so it can be listed and replayed later
+    record_dead_letter(task, group_id, node)
+    logger.info(f"Dead letter recorded for {task} of group {group_id} on {node}")
+
+    rollback_key = group_key(f"{task}_", group_id)
 
     # Retrieve rollback item from Redis
     rollback_item = redis_client.get(rollback_key)
@@ -49,3 +94,242 @@ def process_dead_letter(group_id: str, node: str, task: str):
             logger.info(f"Updated {rollback_key} in Redis with remaining nodes.")
     else:
         logger.info(f"Node {node} not found in rollback item nodes for {rollback_key}")
+
+
+def read_replay() -> dict:
+    """
+    Returns the state of the last bulk replay, with the status of each of
+    its nodes, empty if none ran.
+    """
+
+    state = redis_client.hgetall(REPLAY_KEY)
+    if not state:
+        return {}
+    replay = {"nodes": {}}
+    for field, value in state.items():
+        if field.startswith(REPLAY_NODE_PREFIX):
+            replay["nodes"][field[len(REPLAY_NODE_PREFIX) :]] = value
+        elif field in REPLAY_COUNTERS or field == "nodes_pending":
+            replay[field] = int(value)
+        elif field in ("started_at", "finished_at"):
+            replay[field] = float(value)
+        else:
+            replay[field] = value
+    return replay
+
+
+def start_replay(node: Optional[str] = None, operation: Optional[str] = None) -> dict:
+    """
+    Replays the dead letters in bulk, node by node: each node of HOSTS, or
+    only `node`, gets its own chain of chunks. A new replay supersedes the
+    one running.
+
+    Args:
+        node (str, optional): Only replay the entries of this node.
+        operation (str, optional): Only replay the entries of this task.
+
+    Returns:
+        dict: The state of the replay.
+
+    Raises:
+        ValueError: If the node is not in HOSTS.
+    """
+
+    if node is not None and node not in HOSTS:
+        raise ValueError(f"Node {node} is not in HOSTS.")
+    nodes = [node] if node else list(HOSTS)
+    index_dead_letters()
+
+    run_id = uuid.uuid4().hex
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.delete(REPLAY_KEY)
+    pipe.hset(
+        REPLAY_KEY,
+        mapping={
+            "status": "running",
+            "run_id": run_id,
+            "operation": operation or "",
+            "started_at": time.time(),
+            "nodes_pending": len(nodes),
+            **{counter: 0 for counter in REPLAY_COUNTERS},
+            **{f"{REPLAY_NODE_PREFIX}{name}": "running" for name in nodes},
+        },
+    )
+    pipe.execute()
+
+    for name in nodes:
+        _schedule_replay_chunk(name, run_id, cursor=0, countdown=0)
+    logger.info(f"Replay {run_id} of the dead letters started on {nodes}.")
+    return read_replay()
+
+
+def scan_replay_outcomes(cursor: int = 0, count: int = 100) -> Tuple[int, List[dict]]:
+    """
+    Lists the outcome of each entry replayed by the last bulk replay, one
+    page at a time.
+    """
+
+    run_id = redis_client.hget(REPLAY_KEY, "run_id")
+    if not run_id:
+        return 0, []
+    next_cursor, fields = redis_client.hscan(
+        f"{REPLAY_OUTCOMES_KEY_PREFIX}{run_id}", cursor=cursor, count=count
+    )
+    return next_cursor, [
+        {"id": field, **json.loads(value)} for field, value in fields.items()
+    ]
+
+
+def _schedule_replay_chunk(node: str, run_id: str, cursor: int, countdown: float):
+    # In the lane of the node, behind its live operations
+    celery_app.send_task(
+        "app.celery_tasks.dead_letter_task.replay_dead_letters",
+        kwargs={"node": node, "run_id": run_id, "cursor": cursor},
+        countdown=countdown,
+        **node_route(node),
+    )
+
+
+def _finish_node(node: str, status: str) -> None:
+    redis_client.hset(REPLAY_KEY, f"{REPLAY_NODE_PREFIX}{node}", status)
+    if redis_client.hincrby(REPLAY_KEY, "nodes_pending", -1) <= 0:
+        redis_client.hset(
+            REPLAY_KEY, mapping={"status": "done", "finished_at": time.time()}
+        )
+        logger.info(f"Replay of the dead letters done: {read_replay()}")
+
+
+def _exists_elsewhere(node: str, group_id: str) -> Optional[bool]:
+    """
+    Whether a group exists, from its other nodes: True if one of them has
+    it, False if all of them answer it is missing, None otherwise.
+    """
+
+    others = [other for other in nodes_for_group(group_id, HOSTS) if other != node]
+    status_codes = [
+        node_client.get_group(other, group_id).status_code for other in others
+    ]
+    if 200 in status_codes:
+        return True
+    if others and all(status_code == 404 for status_code in status_codes):
+        return False
+    return None
+
+
+def _replay_entry(entry: dict, cataloged: bool) -> Tuple[str, Optional[int]]:
+    """
+    Runs the operation a dead letter gave up on again, if it is still
+    needed.
+
+    A cataloged group exists. Groups created before the catalog are missing
+    from it until the catalog is backfilled, so for a group outside of the
+    catalog its other nodes decide, and the entry is kept when they cannot.
+
+    Returns:
+        Tuple[str, Optional[int]]: Outcome (replayed, superseded, failed or
+            undetermined) and status code of the node, if it was called.
+    """
+
+    node, group_id = entry["node"], entry["group_id"]
+    if entry["task"] not in (
+        "rollback_create_group",
+        "rollback_delete_group",
+        "repair_create_group",
+    ):
+        logger.warning(f"Cannot replay dead letter {entry['id']}.")
+        return "failed", None
+
+    exists = True if cataloged else _exists_elsewhere(node, group_id)
+    if exists is None:
+        logger.warning(
+            f"Cannot tell if group {group_id} exists, dead letter {entry['id']} "
+            "is kept."
+        )
+        return "undetermined", None
+
+    if entry["task"] == "rollback_create_group":
+        # Created again, successfully, since the creation was rolled back
+        if exists:
+            return "superseded", None
+        response = node_client.delete_group(node, group_id)
+        # 400: the group is already absent
+        done = response.status_code in (200, 400)
+    else:
+        # Deleted since
+        if not exists:
+            return "superseded", None
+        response = node_client.create_group(node, group_id)
+        # 400: the group already exists
+        done = response.status_code in (201, 400)
+    return ("replayed" if done else "failed"), response.status_code
+
+
+@celery_app.task(
+    name="app.celery_tasks.dead_letter_task.replay_dead_letters", acks_late=True
+)
+def replay_dead_letters(node: str, run_id: str, cursor: int = 0) -> Optional[dict]:
+    """
+    Replays the next chunk of the dead letters of a node, then queues the
+    following chunk.
+
+    The node is health checked before every chunk, and left alone for this
+    replay when it does not answer. Entries are read from the index of the
+    node with SSCAN, `DEAD_LETTER_REPLAY_CHUNK_SIZE` at a time, and replayed
+    with at most `DEAD_LETTER_REPLAY_CONCURRENCY` requests at once. Chunks
+    are paced to `DEAD_LETTER_REPLAY_RATE` entries per second. Replayed
+    entries, and the ones no longer needed, leave the dead letters. Failed
+    and undetermined ones stay, with their number of replays. The outcome
+    of each entry is recorded for a week.
+
+    Args:
+        node (str): Node to replay the dead letters of.
+        run_id (str): Replay the chunk belongs to, stale replays stop.
+        cursor (int): SSCAN cursor of the chunk.
+
+    Returns:
+        dict: Outcome counts of the chunk, None if it did not run.
+    """
+
+    state = read_replay()
+    if not state or state["run_id"] != run_id or state["status"] != "running":
+        logger.info(f"Replay {run_id} of the dead letters stopped.")
+        return None
+    if not node_client.ping(node):
+        logger.warning(f"Node {node} is unreachable, its dead letters are kept.")
+        redis_client.hincrby(REPLAY_KEY, "unhealthy_nodes", 1)
+        _finish_node(node, "unhealthy")
+        return None
+
+    started_at = time.monotonic()
+    cursor, entries = scan_dead_letters(
+        cursor, DEAD_LETTER_REPLAY_CHUNK_SIZE, node, state["operation"] or None
+    )
+    cataloged = in_catalog([entry["group_id"] for entry in entries]) if entries else []
+    with ThreadPoolExecutor(
+        max_workers=max(DEAD_LETTER_REPLAY_CONCURRENCY, 1)
+    ) as executor:
+        results = list(executor.map(_replay_entry, entries, cataloged))
+
+    counts = Counter(outcome for outcome, _ in results)
+    outcomes_key = f"{REPLAY_OUTCOMES_KEY_PREFIX}{run_id}"
+    pipe = redis_client.pipeline(transaction=False)
+    for entry, (outcome, status_code) in zip(entries, results):
+        if outcome in RESOLVED:
+            resolve_dead_letter(entry, pipe)
+        else:
+            record_replay_failure(entry, outcome, pipe)
+        record = {"outcome": outcome, "status_code": status_code, "at": time.time()}
+        pipe.hset(outcomes_key, entry["id"], json.dumps(record))
+    if entries:
+        pipe.expire(outcomes_key, REPLAY_TTL)
+    for counter, value in counts.items():
+        pipe.hincrby(REPLAY_KEY, counter, value)
+    pipe.execute()
+
+    if cursor == 0:
+        _finish_node(node, "done")
+    else:
+        elapsed = time.monotonic() - started_at
+        pace = len(entries) / DEAD_LETTER_REPLAY_RATE if DEAD_LETTER_REPLAY_RATE else 0
+        _schedule_replay_chunk(node, run_id, cursor, countdown=max(pace - elapsed, 0))
+    return dict(counts)
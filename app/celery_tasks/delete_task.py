@@ -1,16 +1,42 @@
 import json
 import logging
+import time
+import uuid
+from typing import Optional
 
 from app.celery_tasks.celery_app import celery_app
-from app.clients.node_client import NodeClient
-from app.shared.redis_client import redis_client
+from app.celery_tasks.webhook_task import (
+    build_callback,
+    notify_completion,
+    record_node_outcome,
+)
+from app.clients.batching_node_client import shared_node_client
+from app.shared.fair_queue import release_slot
+from app.shared.fanout import (
+    node_queue,
+    node_route,
+    read_fanout,
+    record_node_result,
+    start_fanout,
+)
+from app.shared.group_cache import invalidate_summary
+from app.shared.group_catalog import remove_from_catalog
+from app.shared.placement import nodes_for_group
+from app.shared.progress import (
+    ProgressRecorder,
+    record_node_status,
+    record_rollback_status,
+)
+from app.shared.redis_client import group_key, redis_client
+from app.shared.rollback_data import REPAIR_KEY_PREFIX
 from config.app_config import (
     CELERY_DEFAULT_MAX_RETRIES,
     CELERY_DEFAULT_RETRY_DELAY,
     HOSTS,
+    PER_NODE_QUEUES,
 )
 
-node_client = NodeClient()
+node_client = shared_node_client()
 
 logger = logging.getLogger(__name__)
 
@@ -18,57 +44,233 @@ REDIS_KEY_PREFIX = "rollback_delete_group_"
 
 
 @celery_app.task(name="app.celery_tasks.delete_task.delete_group")
-def delete_group(group_id: str):
+def delete_group(group_id: str, callback_url: Optional[str] = None):
     """
-    Deletes a group on all nodes.
+    Deletes a group on the nodes it is placed on (all nodes by default).
 
     Args:
         group_id (str): ID of the group to delete.
+        callback_url (str, optional): URL notified with the final state.
 
     Returns:
         None
     """
 
+    # Pending repairs of a quorum creation must not recreate the group
+    redis_client.delete(group_key(REPAIR_KEY_PREFIX, group_id))
+
+    task_id = delete_group.request.id
+    callback = build_callback(callback_url, task_id, "delete_group", group_id)
+    nodes = nodes_for_group(group_id, HOSTS)
+    progress = ProgressRecorder(task_id, "delete_group", len(nodes))
+
+    if PER_NODE_QUEUES:
+        progress.flush(done=True)
+        _fan_out(group_id, nodes, task_id, callback)
+        return
+
     nodes_processed = []
-    for node in HOSTS:
+    for node in nodes:
+        progress.start(node)
         response = node_client.delete_group(node, group_id)
         if response.status_code == 200:
-            logger.info(f"Group {group_id} deleted on {node}")
+            logger.info(
+                "Group %s deleted on %s",
+                group_id,
+                node,
+                extra={"event": "group_deleted_on_node"},
+            )
         elif response.status_code > 400:
             logger.error(
                 f"Group {group_id} could not be deleted on {node}. Retrying..."
             )
-            trigger_rollback(group_id, nodes_processed)
+            progress.finish(node, "failed")
+            progress.flush()
+            record_node_outcome(callback, node, "failed")
+            trigger_rollback(group_id, nodes_processed, callback)
             break
 
         nodes_processed.append(node)
+        outcome = "deleted" if response.status_code == 200 else "absent"
+        progress.finish(node, outcome)
+        record_node_outcome(callback, node, outcome)
+    else:
+        remove_from_catalog(group_id)
+        notify_completion(callback, "SUCCESS")
+
+    progress.flush(done=True)
 
 
-def trigger_rollback(group_id: str, nodes_processed: list):
+def _fan_out(
+    group_id: str, nodes: list, task_id: Optional[str], callback: Optional[dict]
+) -> None:
+    """
+    Queues the deletion on each node to the queue of that node.
+
+    The last sub-operation to finish joins them, see `_join_delete`.
+    """
+
+    operation_id = task_id or uuid.uuid4().hex
+    meta = {
+        "group_id": group_id,
+        "nodes": nodes,
+        "total": len(nodes),
+        "quorum": len(nodes),
+        "task_id": task_id,
+        "callback": callback,
+    }
+    start_fanout(operation_id, meta)
+    for node in nodes:
+        celery_app.send_task(
+            "app.celery_tasks.delete_task.delete_group_on_node",
+            kwargs={"operation_id": operation_id, "node": node},
+            queue=node_queue(node),
+        )
+    logger.info(
+        "Deletion of group %s queued on nodes %s.",
+        group_id,
+        nodes,
+        extra={"event": "delete_queued"},
+    )
+
+
+@celery_app.task(name="app.celery_tasks.delete_task.delete_group_on_node")
+def delete_group_on_node(operation_id: str, node: str):
+    """
+    Deletes a group on one node as part of a fanned out deletion.
+
+    Nodes whose turn comes after another node failed are skipped, as they
+    would only be rolled back.
+
+    Args:
+        operation_id (str): ID of the deletion.
+        node (str): Name of the node.
+    """
+
+    operation = read_fanout(operation_id)
+    if not operation:
+        logger.info(
+            "Operation %s unknown, skipping node %s.",
+            operation_id,
+            node,
+            extra={"event": "operation_unknown"},
+        )
+        return
+
+    group_id = operation["group_id"]
+    if operation["failed"]:
+        logger.info(
+            "Deletion of group %s failed, skipping %s.",
+            group_id,
+            node,
+            extra={"event": "delete_failed"},
+        )
+        outcome, duration_ms = "skipped", None
+    else:
+        started_at = time.monotonic()
+        response = node_client.delete_group(node, group_id)
+        if response.status_code == 200:
+            outcome = "deleted"
+        elif response.status_code > 400:
+            logger.error(f"Group {group_id} could not be deleted on {node}.")
+            outcome = "failed"
+        else:
+            outcome = "absent"
+        duration_ms = (time.monotonic() - started_at) * 1000
+    record_node_status(operation["task_id"], node, outcome, duration_ms)
+
+    outcomes = record_node_result(
+        operation_id,
+        node,
+        outcome,
+        outcome in ("failed", "skipped"),
+        operation["total"],
+    )
+    if outcomes is not None:
+        _join_delete(operation, outcomes)
+
+
+def _join_delete(operation: dict, outcomes: dict) -> None:
+    """
+    Completes a fanned out deletion once every node reported: succeeds if no
+    node failed, otherwise recreates the group on the processed nodes.
+    """
+
+    group_id = operation["group_id"]
+    # The nodes changed in sub-tasks, which only know the operation ID
+    invalidate_summary(group_id)
+    # The fair scheduling slot of the operation was held until now
+    release_slot(operation["task_id"], celery_app.send_task)
+    callback = operation["callback"]
+    nodes_processed = []
+    for node in operation["nodes"]:
+        outcome = outcomes.get(node, "skipped")
+        record_node_outcome(callback, node, outcome)
+        if outcome in ("deleted", "absent"):
+            nodes_processed.append(node)
+
+    if len(nodes_processed) == len(operation["nodes"]):
+        remove_from_catalog(group_id)
+        notify_completion(callback, "SUCCESS")
+        return
+
+    logger.info(
+        "Rollback needed for deletion of group %s.",
+        group_id,
+        extra={"event": "rollback_needed"},
+    )
+    trigger_rollback(
+        group_id, nodes_processed, callback, task_id=operation["task_id"]
+    )
+
+
+def trigger_rollback(
+    group_id: str,
+    nodes_processed: list,
+    callback: Optional[dict] = None,
+    task_id: Optional[str] = None,
+):
     """
     Triggers rollback for group deletion on specified nodes.
 
     Args:
         group_id (str): ID of the group to rollback.
         nodes_processed (list): List of nodes that need rollback.
+        callback (dict, optional): Callback context notified once rolled back.
+        task_id (str, optional): ID of the deletion task, defaults to the
+            current task.
     """
 
-    redis_key = f"{REDIS_KEY_PREFIX}{group_id}"
-    redis_value = json.dumps({"group_id": group_id, "nodes": nodes_processed})
+    redis_key = group_key(REDIS_KEY_PREFIX, group_id)
+    task_id = task_id or delete_group.request.id
+    rollback_data = {"group_id": group_id, "nodes": nodes_processed}
+    if task_id:
+        rollback_data["task_id"] = task_id
+    if callback:
+        rollback_data["callback"] = callback
+    redis_value = json.dumps(rollback_data)
     redis_client.set(
         redis_key,
         redis_value,
         ex=60 * 60,  # 1 hour expiration
     )
 
-    logger.info(f"Rollback data set on redis. Key: {redis_key}, Value: {redis_value}")
+    logger.info(
+        "Rollback data set on redis. Key: %s, Value: %s", redis_key, redis_value
+    )
+    record_rollback_status(task_id, nodes_processed, "rolling_back")
 
     for node in nodes_processed:
         celery_app.send_task(
             "app.celery_tasks.delete_task.rollback_delete_group",
             kwargs={"group_id": group_id, "node": node},
+            **node_route(node),
         )
 
+    # Nothing to compensate, the operation is already in its final state
+    if not nodes_processed:
+        notify_completion(callback, "ROLLED_BACK")
+
 
 @celery_app.task(
     name="app.celery_tasks.delete_task.rollback_delete_group",
@@ -85,10 +287,14 @@ def rollback_delete_group(group_id: str, node: str):
         node (str): Name of the node to rollback the group on.
     """
     # Check if rollback data exists
-    rollback_key = f"{REDIS_KEY_PREFIX}{group_id}"
+    rollback_key = group_key(REDIS_KEY_PREFIX, group_id)
     rollback_item = redis_client.get(rollback_key)
     if not rollback_item:
-        logger.info(f"No rollback needed for group {group_id}.")
+        logger.info(
+            "No rollback needed for group %s.",
+            group_id,
+            extra={"event": "rollback_not_needed"},
+        )
         return
 
     try:
@@ -107,20 +313,25 @@ def rollback_delete_group(group_id: str, node: str):
         )
         return
 
+    callback = rollback_data.get("callback")
+    task_id = rollback_data.get("task_id")
     response = node_client.create_group(node, group_id)
     if response.status_code == 201:
         rollback_data["nodes"].remove(node)
+        record_rollback_status(task_id, [node], "rolled_back")
+        record_node_outcome(callback, node, "rolled_back")
         if not rollback_data["nodes"]:
-            redis_client.delete(f"{REDIS_KEY_PREFIX}{group_id}")
+            redis_client.delete(rollback_key)
+            notify_completion(callback, "ROLLED_BACK")
         else:
-            redis_client.set(f"{REDIS_KEY_PREFIX}{group_id}", json.dumps(rollback_data))
+            redis_client.set(rollback_key, json.dumps(rollback_data))
         return
 
     if rollback_delete_group.request.retries != rollback_delete_group.max_retries:
         rollback_delete_group.retry(exc=Exception("Failed to create group on node."))
         return
 
-    redis_client.delete(f"{REDIS_KEY_PREFIX}{group_id}")
+    redis_client.delete(rollback_key)
     celery_app.send_task(
         "app.celery_tasks.dead_letter_task.process_dead_letter",
         kwargs={
@@ -129,3 +340,6 @@ def rollback_delete_group(group_id: str, node: str):
             "task": "rollback_delete_group",
         },
     )
+    record_rollback_status(task_id, [node], "dead_lettered")
+    record_node_outcome(callback, node, "dead_lettered")
+    notify_completion(callback, "ROLLBACK_FAILED")
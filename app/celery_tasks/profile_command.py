@@ -0,0 +1,41 @@
+import logging
+import os
+
+from celery.worker.control import control_command
+
+from app.shared.profiler import PROFILE_SIGNAL, request_profile, start_profile
+
+logger = logging.getLogger(__name__)
+
+
+@control_command(
+    args=[("request_id", str), ("duration", float), ("interval", float)],
+    signature="<request_id> <duration> <interval>",
+)
+def profile(state, request_id: str, duration: float, interval: float) -> dict:
+    """
+    Remote control command profiling the processes running the tasks of a
+    worker, without blocking the worker.
+
+    Prefork pool processes are signaled to profile themselves. Other pools
+    run tasks in the worker process, which is profiled from a thread. The
+    profiles are stored in Redis, see `read_profiles`.
+
+    Returns:
+        dict: IDs of the processes being profiled.
+    """
+
+    pids = state.consumer.pool.info.get("processes") or []
+    if not pids:
+        start_profile(request_id, duration, interval)
+        return {"ok": "profiling", "processes": [os.getpid()]}
+
+    request_profile(request_id, duration, interval, pids)
+    signaled = []
+    for pid in pids:
+        try:
+            os.kill(pid, PROFILE_SIGNAL)
+            signaled.append(pid)
+        except OSError as exc:
+            logger.warning(f"Failed to signal pool process {pid}: {exc}")
+    return {"ok": "profiling", "processes": signaled}
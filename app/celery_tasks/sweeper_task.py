@@ -0,0 +1,250 @@
+import hashlib
+import json
+import logging
+import time
+import uuid
+
+import redis
+
+from app.celery_tasks.celery_app import celery_app
+from app.shared.fanout import FANOUT_KEY_PREFIX, node_route
+from app.shared.metrics import metrics
+from app.shared.redis_client import redis_client
+from app.shared.rollback_data import scan_rollbacks
+from config.app_config import (
+    SWEEPER_INTERVAL,
+    SWEEPER_LOCK_MAX_AGE,
+    SWEEPER_MAX_ACTIONS,
+    SWEEPER_MAX_REDRIVES,
+    SWEEPER_SCAN_BATCH,
+    SWEEPER_STUCK_AFTER,
+)
+
+logger = logging.getLogger(__name__)
+
+# Sweeper state: SCAN cursor, first sighting of each suspicious key, report
+SWEEPER_CURSOR_KEY = "sweeper_cursor"
+SWEEPER_SEEN_KEY = "sweeper_seen"
+SWEEPER_CYCLE_KEY = "sweeper_cycle_started_at"
+SWEEPER_REPORT_KEY = "sweeper_last_report"
+SWEEPER_LOCK_KEY = "sweeper_lock"
+
+# Same expiry as the rollback data written by the tasks
+ROLLBACK_TTL = 60 * 60
+
+ROLLBACK_TASKS = {
+    "create_group": "rollback_create_group",
+    "delete_group": "rollback_delete_group",
+}
+TASK_MODULES = {
+    "create_group": "app.celery_tasks.create_task",
+    "delete_group": "app.celery_tasks.delete_task",
+}
+
+
+def _fingerprint(rollback: dict) -> str:
+    state = json.dumps([rollback["state"], sorted(rollback["nodes"])])
+    return hashlib.blake2b(state.encode(), digest_size=8).hexdigest()
+
+
+def _classify(rollback: dict, seen: dict, now: float) -> str:
+    """
+    Returns what to do with a rollback key: `orphaned_lock`, `stale`,
+    `stuck`, `rearm` or `ok`.
+
+    Rollback keys carry no timestamp, so their ages are measured from the
+    first sweep that saw them in their current state, they must look wrong
+    on two sweeps. Locks are aged from their acquisition time, or like
+    rollbacks for locks written before they carried it.
+    """
+
+    if rollback["state"] == "invalid" or (
+        rollback["state"] == "rolling_back" and not rollback["nodes"]
+    ):
+        return "stale"
+    age = now - seen["first_seen"] if seen else 0
+    if rollback["state"] == "lock":
+        if rollback.get("locked_at"):
+            age = now - rollback["locked_at"]
+        return "orphaned_lock" if age >= SWEEPER_LOCK_MAX_AGE else "ok"
+    if age >= SWEEPER_STUCK_AFTER:
+        return "stuck"
+    # Rewritten without expiry by a rollback that made progress
+    return "rearm" if rollback["ttl"] == -1 else "ok"
+
+
+def _fanout_running(lock: dict) -> bool:
+    # A slow per-node fan-out holds the lock until its last node reports
+    task_id = lock.get("task_id")
+    return bool(task_id) and bool(redis_client.exists(f"{FANOUT_KEY_PREFIX}{task_id}"))
+
+
+def _redrive(rollback: dict, redrives: int) -> str:
+    operation = rollback["operation"]
+    group_id = rollback["group_id"]
+    task = ROLLBACK_TASKS[operation]
+    if redrives >= SWEEPER_MAX_REDRIVES:
+        # Same outcome as a rollback that ran out of retries
+        for node in rollback["nodes"]:
+            celery_app.send_task(
+                "app.celery_tasks.dead_letter_task.process_dead_letter",
+                kwargs={"group_id": group_id, "node": node, "task": task},
+            )
+        logger.warning(f"Dead-lettered stuck {task} of group {group_id}.")
+        return "dead_lettered"
+
+    # Keep the data alive for the retries of the re-driven tasks
+    redis_client.expire(rollback["key"], ROLLBACK_TTL)
+    for node in rollback["nodes"]:
+        celery_app.send_task(
+            f"{TASK_MODULES[operation]}.{task}",
+            kwargs={"group_id": group_id, "node": node},
+            **node_route(node),
+        )
+    logger.warning(f"Re-drove stuck {task} of group {group_id}: {rollback['nodes']}")
+    return "redriven"
+
+
+def sweep(max_keys: int = SWEEPER_SCAN_BATCH, now: float = None) -> dict:
+    """
+    Examines the next rollback keys and heals the ones left behind.
+
+    The keyspace is walked incrementally: each sweep resumes the SCAN cursor
+    of the previous one and has SCAN examine at most `max_keys` keys,
+    rollback keys or not. At most `SWEEPER_MAX_ACTIONS` keys are acted on
+    per sweep.
+
+    - orphaned locks (creation locks older than `SWEEPER_LOCK_MAX_AGE`,
+      whose worker died) are deleted, unblocking the group, unless the
+      per-node fan-out of their creation is still running;
+    - stale keys (invalid data or nothing left to roll back) are deleted;
+    - stuck rollbacks (no progress for `SWEEPER_STUCK_AFTER`) get their
+      expiry extended and their tasks sent again, and are dead-lettered
+      after `SWEEPER_MAX_REDRIVES` attempts;
+    - rollbacks that lost their expiry get it back.
+
+    Returns:
+        dict: Number of rollback keys found and of each action taken.
+    """
+
+    now = now or time.time()
+    report = {
+        "scanned": 0,
+        "orphaned_locks": 0,
+        "stale": 0,
+        "redriven": 0,
+        "dead_lettered": 0,
+        "rearmed": 0,
+        "cycle_completed": False,
+    }
+    cursor = int(redis_client.get(SWEEPER_CURSOR_KEY) or 0)
+    if cursor == 0:
+        redis_client.set(SWEEPER_CYCLE_KEY, now)
+    seen_entries = redis_client.hgetall(SWEEPER_SEEN_KEY)
+    updates, cleared = {}, []
+    actions = 0
+
+    visited = 0
+    while visited < max_keys and actions < SWEEPER_MAX_ACTIONS:
+        count = min(100, max_keys - visited)
+        cursor, rollbacks = scan_rollbacks(cursor=cursor, count=count)
+        visited += count
+        for rollback in rollbacks:
+            report["scanned"] += 1
+            key = rollback["key"]
+            seen = json.loads(seen_entries.get(key, "null"))
+            fingerprint = _fingerprint(rollback)
+            if not seen or seen["fingerprint"] != fingerprint:
+                # First sighting in this state, progress resets the clock
+                redrives = seen["redrives"] if seen else 0
+                seen = {"fingerprint": fingerprint, "first_seen": now}
+                seen["redrives"] = redrives
+            seen["last_seen"] = now
+
+            action = _classify(rollback, seen, now)
+            if action == "orphaned_lock" and _fanout_running(rollback):
+                action = "ok"
+            if action != "ok" and actions >= SWEEPER_MAX_ACTIONS:
+                updates[key] = json.dumps(seen)
+                continue
+            if action in ("orphaned_lock", "stale"):
+                redis_client.delete(key)
+                cleared.append(key)
+                report["stale" if action == "stale" else "orphaned_locks"] += 1
+                logger.warning(f"Cleared {action.replace('_', ' ')} {key}.")
+                actions += 1
+                continue
+            if action == "stuck":
+                report[_redrive(rollback, seen["redrives"])] += 1
+                seen = {**seen, "first_seen": now, "redrives": seen["redrives"] + 1}
+                actions += 1
+            elif action == "rearm":
+                redis_client.expire(key, ROLLBACK_TTL)
+                report["rearmed"] += 1
+                actions += 1
+            updates[key] = json.dumps(seen)
+        if cursor == 0:
+            report["cycle_completed"] = True
+            break
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.set(SWEEPER_CURSOR_KEY, cursor)
+    if updates:
+        pipe.hset(SWEEPER_SEEN_KEY, mapping=updates)
+    if cleared:
+        pipe.hdel(SWEEPER_SEEN_KEY, *cleared)
+    pipe.execute()
+    if report["cycle_completed"]:
+        _forget_vanished_keys(seen_entries, updates)
+    return report
+
+
+def _forget_vanished_keys(seen_entries: dict, updates: dict) -> None:
+    # Keys not seen since the cycle started are gone (done or expired)
+    cycle_started_at = float(redis_client.get(SWEEPER_CYCLE_KEY) or 0)
+    vanished = [
+        key
+        for key, value in seen_entries.items()
+        if key not in updates and json.loads(value)["last_seen"] < cycle_started_at
+    ]
+    if vanished:
+        redis_client.hdel(SWEEPER_SEEN_KEY, *vanished)
+
+
+@celery_app.task(name="app.celery_tasks.sweeper_task.sweep_rollbacks")
+def sweep_rollbacks():
+    """
+    Periodic sweep of the rollback keys, see `sweep`. Runs are skipped while
+    another one is in progress, and their report is kept for the admin API.
+    """
+
+    token = uuid.uuid4().hex
+    lock_ttl = max(int(SWEEPER_INTERVAL) * 5, 60)
+    if not redis_client.set(SWEEPER_LOCK_KEY, token, nx=True, ex=lock_ttl):
+        logger.info("Sweep already in progress, skipping.")
+        return None
+    try:
+        report = sweep()
+    finally:
+        if redis_client.get(SWEEPER_LOCK_KEY) == token:
+            redis_client.delete(SWEEPER_LOCK_KEY)
+
+    for action, count in report.items():
+        if action not in ("scanned", "cycle_completed") and count:
+            metrics.increment("sweeper_reclaimed_total", count, action=action)
+    report["swept_at"] = time.time()
+    try:
+        redis_client.set(SWEEPER_REPORT_KEY, json.dumps(report))
+    except redis.RedisError as exc:
+        logger.warning(f"Failed to store the sweep report: {exc}")
+    logger.info(f"Swept rollback keys: {report}")
+    return report
+
+
+def read_sweep_report() -> dict:
+    """
+    Returns the report of the last sweep, empty if none ran yet.
+    """
+
+    report = redis_client.get(SWEEPER_REPORT_KEY)
+    return json.loads(report) if report else {}
@@ -0,0 +1,182 @@
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+from app.celery_tasks.celery_app import celery_app
+from app.clients.callback_transport import CallbackTransport
+from app.shared.callback_urls import ForbiddenCallbackTarget
+from config.app_config import (
+    WEBHOOK_MAX_RETRIES,
+    WEBHOOK_RETRY_BACKOFF,
+    WEBHOOK_RETRY_BACKOFF_MAX,
+    WEBHOOK_SIGNING_SECRET,
+    WEBHOOK_TIMEOUT,
+)
+
+webhook_client = httpx.Client(timeout=WEBHOOK_TIMEOUT, transport=CallbackTransport())
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+TIMESTAMP_HEADER = "X-Webhook-Timestamp"
+
+# Receiver errors that are worth retrying, anything else in 4xx is permanent
+RETRYABLE_CLIENT_ERRORS = {408, 409, 425, 429}
+
+
+def build_callback(
+    callback_url: Optional[str], task_id: Optional[str], operation: str, group_id: str
+) -> Optional[dict]:
+    """
+    Builds the callback context carried along with a group operation.
+
+    Args:
+        callback_url (str): URL to notify once the operation finishes.
+        task_id (str): ID of the task that started the operation.
+        operation (str): Name of the operation (create_group/delete_group).
+        group_id (str): Group ID.
+
+    Returns:
+        dict: Callback context, or None if no callback URL was given.
+    """
+
+    if not callback_url:
+        return None
+    return {
+        "url": callback_url,
+        "task_id": task_id,
+        "operation": operation,
+        "group_id": group_id,
+        "nodes": {},
+    }
+
+
+def record_node_outcome(callback: Optional[dict], node: str, outcome: str) -> None:
+    """
+    Records the outcome of the operation on a node in the callback context.
+
+    Args:
+        callback (dict): Callback context built by `build_callback`.
+        node (str): Name of the node.
+        outcome (str): Outcome on the node (created, deleted, failed, ...).
+    """
+
+    if callback:
+        callback["nodes"][node] = outcome
+
+
+def notify_completion(callback: Optional[dict], state: str) -> None:
+    """
+    Queues the delivery of the final state of an operation to its callback URL.
+
+    Args:
+        callback (dict): Callback context built by `build_callback`.
+        state (str): Final state of the operation.
+    """
+
+    if not callback:
+        return
+
+    payload = {
+        "task_id": callback["task_id"],
+        "operation": callback["operation"],
+        "group_id": callback["group_id"],
+        "state": state,
+        "nodes": callback["nodes"],
+    }
+    celery_app.send_task(
+        "app.celery_tasks.webhook_task.deliver_webhook",
+        kwargs={"url": callback["url"], "payload": payload},
+    )
+    logger.info(f"Webhook queued for task {callback['task_id']} with state {state}.")
+
+
+def sign_payload(body: bytes, timestamp: str, secret: str) -> str:
+    """
+    Signs a webhook body so receivers can verify where it came from.
+
+    Args:
+        body (bytes): Serialized payload.
+        timestamp (str): Delivery timestamp, part of the signed message.
+        secret (str): Shared signing secret.
+
+    Returns:
+        str: Signature in the form `sha256=<hex digest>`.
+    """
+
+    message = timestamp.encode() + b"." + body
+    digest = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def _retry_countdown(retries: int) -> int:
+    return min(WEBHOOK_RETRY_BACKOFF * (2**retries), WEBHOOK_RETRY_BACKOFF_MAX)
+
+
+@celery_app.task(
+    name="app.celery_tasks.webhook_task.deliver_webhook",
+    max_retries=WEBHOOK_MAX_RETRIES,
+    acks_late=True,
+)
+def deliver_webhook(url: str, payload: dict):
+    """
+    Posts the final state of an operation to the client's callback URL.
+
+    Args:
+        url (str): Callback URL.
+        payload (dict): Final state of the operation.
+    """
+
+    body = json.dumps(payload).encode()
+    timestamp = str(int(time.time()))
+    headers = {"Content-Type": "application/json", TIMESTAMP_HEADER: timestamp}
+    if WEBHOOK_SIGNING_SECRET:
+        headers[SIGNATURE_HEADER] = sign_payload(
+            body, timestamp, WEBHOOK_SIGNING_SECRET
+        )
+
+    try:
+        response = webhook_client.post(url, content=body, headers=headers)
+    except ForbiddenCallbackTarget as exc:
+        logger.error(f"Webhook to {url} dropped: {exc}")
+        return
+    except httpx.HTTPError as exc:
+        logger.error(f"Webhook delivery to {url} failed: {exc}")
+        _handle_failed_delivery(url, exc)
+        return
+
+    if response.is_success:
+        logger.info(f"Webhook delivered to {url} for task {payload['task_id']}.")
+        return
+
+    status_code = response.status_code
+    if status_code < 500 and status_code not in RETRYABLE_CLIENT_ERRORS:
+        logger.error(
+            f"Webhook rejected by {url} with status {status_code}, dropping."
+        )
+        return
+
+    _handle_failed_delivery(
+        url, Exception(f"Receiver responded with status {status_code}")
+    )
+
+
+def _handle_failed_delivery(url: str, exc: Exception) -> None:
+    """
+    Retries the delivery with exponential backoff until retries are exhausted.
+
+    Args:
+        url (str): Callback URL.
+        exc (Exception): Reason of the failed delivery.
+    """
+
+    retries = deliver_webhook.request.retries
+    if retries < deliver_webhook.max_retries:
+        deliver_webhook.retry(exc=exc, countdown=_retry_countdown(retries))
+    else:
+        logger.error(f"Webhook delivery to {url} abandoned after {retries} retries.")
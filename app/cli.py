@@ -0,0 +1,78 @@
+"""
+Admin command line, e.g.:
+
+    python -m app.cli rollbacks --node 127.0.0.1:8001
+    python -m app.cli dead-letters --operation rollback_create_group --all
+    python -m app.cli catalog-import groups.txt
+"""
+
+import argparse
+import json
+import sys
+from typing import Callable, List, Optional
+
+from app.shared.dead_letters import scan_dead_letters
+from app.shared.group_catalog import import_groups
+from app.shared.rollback_data import ROLLBACK_KEY_PREFIXES, scan_rollbacks
+
+
+def _print_pages(scan: Callable, args: argparse.Namespace) -> None:
+    cursor = args.cursor
+    while True:
+        cursor, items = scan(cursor, args.count, args.node, args.operation)
+        for item in items:
+            print(json.dumps(item))
+        if not args.all or cursor == 0:
+            break
+    if not args.all:
+        print(f"next_cursor: {cursor}", file=sys.stderr)
+
+
+def _add_listing_arguments(parser: argparse.ArgumentParser, operations: List[str]):
+    parser.add_argument("--cursor", type=int, default=0, help="cursor to resume from")
+    parser.add_argument("--count", type=int, default=100, help="page size hint")
+    parser.add_argument("--node", help="only list entries of this node")
+    parser.add_argument("--operation", choices=operations, help="operation filter")
+    parser.add_argument(
+        "--all", action="store_true", help="follow the cursor until the end"
+    )
+
+
+def _import_catalog(args: argparse.Namespace) -> None:
+    with open(args.file) as group_ids:
+        added = import_groups(line.strip() for line in group_ids if line.strip())
+    print(f"{added} groups added to the catalog")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rollbacks = commands.add_parser("rollbacks", help="list pending rollbacks")
+    _add_listing_arguments(rollbacks, list(ROLLBACK_KEY_PREFIXES))
+    rollbacks.set_defaults(handler=lambda args: _print_pages(scan_rollbacks, args))
+
+    dead_letters = commands.add_parser("dead-letters", help="list dead letters")
+    _add_listing_arguments(
+        dead_letters,
+        ["rollback_create_group", "rollback_delete_group", "repair_create_group"],
+    )
+    dead_letters.set_defaults(
+        handler=lambda args: _print_pages(scan_dead_letters, args)
+    )
+
+    catalog_import = commands.add_parser(
+        "catalog-import", help="add existing groups to the group catalog"
+    )
+    catalog_import.add_argument("file", help="file with one group ID per line")
+    catalog_import.set_defaults(handler=_import_catalog)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
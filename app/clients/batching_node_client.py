@@ -0,0 +1,218 @@
+import contextvars
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from httpx import URL, Client, Limits, Response
+
+from app.clients.dns_cache import CachedDnsTransport, dns_cache
+from app.clients.node_client import NodeClient
+from config.app_config import (
+    NODE_BATCH_MAX_SIZE,
+    NODE_BATCH_WINDOW_MS,
+    NODE_KEEPALIVE_EXPIRY,
+    NODE_MAX_IN_FLIGHT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _NodeRequest:
+    __slots__ = ("method", "url", "kwargs", "future", "context")
+
+    def __init__(self, method: str, url: str, kwargs: dict):
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+        self.future = Future()
+        # Context of the caller, e.g. its trace, for the thread sending it
+        self.context = contextvars.copy_context()
+
+
+class NodeDispatcher:
+    """
+    Sends the requests of many callers to one node in micro-batches.
+
+    Requests are buffered for up to `window` seconds or `max_batch` requests,
+    then sent with at most `max_in_flight` requests outstanding. Identical
+    reads within a batch share a single request. The dispatcher stops taking
+    from its buffer while the node is saturated, so bursts are smoothed
+    instead of piling up on the node.
+    """
+
+    def __init__(
+        self,
+        node: str,
+        send: Callable[..., Response],
+        window: float,
+        max_batch: int,
+        max_in_flight: int,
+    ):
+        self.node = node
+        self.window = window
+        self.max_batch = max(max_batch, 1)
+        self.batches = 0
+        self.requests = 0
+        self._send = send
+        self._buffer: "queue.Queue[_NodeRequest]" = queue.Queue()
+        self._in_flight = threading.BoundedSemaphore(max(max_in_flight, 1))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(max_in_flight, 1), thread_name_prefix=f"node-{node}"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name=f"dispatcher-{node}", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, method: str, url: str, **kwargs) -> Future:
+        """
+        Queues a request to the node.
+
+        Returns:
+            Future: Resolved with the response of the node.
+        """
+
+        request = _NodeRequest(method, url, kwargs)
+        self._buffer.put(request)
+        return request.future
+
+    def close(self) -> None:
+        self._buffer.put(None)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def _run(self) -> None:
+        while True:
+            first = self._buffer.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._buffer.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+            self._dispatch(batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch: List[_NodeRequest]) -> None:
+        self.batches += 1
+        coalesced: Dict[object, List[_NodeRequest]] = {}
+        for request in batch:
+            # Only reads are safe to share, a second create must still fail
+            key = (request.url, "GET") if request.method == "GET" else id(request)
+            coalesced.setdefault(key, []).append(request)
+
+        for requests in coalesced.values():
+            self._in_flight.acquire()
+            self.requests += 1
+            # A shared read is sent, and traced, in the context of its first caller
+            self._executor.submit(requests[0].context.run, self._send_one, requests)
+
+    def _send_one(self, requests: List[_NodeRequest]) -> None:
+        first = requests[0]
+        try:
+            response = self._send(first.method, first.url, **first.kwargs)
+        except Exception as exc:
+            for request in requests:
+                request.future.set_exception(exc)
+        else:
+            for request in requests:
+                request.future.set_result(response)
+        finally:
+            self._in_flight.release()
+
+
+class BatchingNodeClient(NodeClient):
+    """
+    NodeClient routing requests through one NodeDispatcher per node.
+
+    Meant for workers running many tasks concurrently in one process
+    (`--pool threads` or gevent): the tasks share pooled connections and
+    their requests to a node are coalesced, bounded and smoothed.
+    """
+
+    def __init__(
+        self,
+        httpx_client: Client = None,
+        window: float = NODE_BATCH_WINDOW_MS / 1000,
+        max_batch: int = NODE_BATCH_MAX_SIZE,
+        max_in_flight: int = NODE_MAX_IN_FLIGHT,
+    ):
+        super().__init__(httpx_client)
+        self.window = window
+        self.max_batch = max_batch
+        self.max_in_flight = max_in_flight
+        self.dispatchers: Dict[str, NodeDispatcher] = {}
+        self._lock = threading.Lock()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for dispatcher in self.dispatchers.values():
+            dispatcher.close()
+        super().__exit__(exc_type, exc_val, exc_tb)
+
+    def _dispatcher(self, node: str) -> NodeDispatcher:
+        dispatcher = self.dispatchers.get(node)
+        if dispatcher is None:
+            with self._lock:
+                dispatcher = self.dispatchers.get(node)
+                if dispatcher is None:
+                    # Started lazily so the threads live in the worker process
+                    dispatcher = NodeDispatcher(
+                        node,
+                        super()._handle_request,
+                        self.window,
+                        self.max_batch,
+                        self.max_in_flight,
+                    )
+                    self.dispatchers[node] = dispatcher
+        return dispatcher
+
+    def _handle_request(self, method, url, **kwargs) -> Response:
+        node = URL(url).netloc.decode()
+        return self._dispatcher(node).submit(method, url, **kwargs).result()
+
+
+def build_node_client() -> NodeClient:
+    """
+    Returns a node client resolving hosts through the shared DNS cache,
+    batching if NODE_BATCH_WINDOW_MS is set.
+    """
+
+    limits = Limits(
+        max_connections=None,
+        max_keepalive_connections=None,
+        keepalive_expiry=NODE_KEEPALIVE_EXPIRY,
+    )
+    httpx_client = Client(transport=CachedDnsTransport(dns_cache, limits=limits))
+    if NODE_BATCH_WINDOW_MS > 0:
+        return BatchingNodeClient(httpx_client)
+    return NodeClient(httpx_client)
+
+
+_shared_node_client: Optional[NodeClient] = None
+
+
+def shared_node_client() -> NodeClient:
+    """
+    Returns the node client shared by the tasks of this process, so the
+    connections warmed up at worker start are the ones tasks use.
+    """
+
+    global _shared_node_client
+    if _shared_node_client is None:
+        _shared_node_client = build_node_client()
+    return _shared_node_client
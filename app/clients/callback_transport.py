@@ -0,0 +1,53 @@
+from typing import Iterable, Optional
+
+import httpcore
+from httpx import HTTPTransport, Limits, create_ssl_context
+
+from app.shared.callback_urls import resolve_callback_host
+
+
+class CallbackNetworkBackend(httpcore.SyncBackend):
+    """
+    httpcore backend connecting webhook deliveries only to allowed
+    addresses, checked once resolved, right before connecting.
+    """
+
+    def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable] = None,
+    ) -> httpcore.NetworkStream:
+        try:
+            address = resolve_callback_host(host, port)
+        except OSError as exc:
+            # Surfaces like any connection failure, an httpx.ConnectError
+            raise httpcore.ConnectError(str(exc)) from exc
+        return super().connect_tcp(
+            address,
+            port,
+            timeout=timeout,
+            local_address=local_address,
+            socket_options=socket_options,
+        )
+
+
+class CallbackTransport(HTTPTransport):
+    """
+    HTTP(S) transport of the webhook deliveries, refusing targets that are
+    not allowed with `ForbiddenCallbackTarget`. Requests keep their host
+    name, for TLS as well, only the TCP connection goes to the checked
+    address.
+    """
+
+    def __init__(self, limits: Limits = Limits()):
+        # HTTPTransport.__init__ only builds a pool, replaced by this one
+        self._pool = httpcore.ConnectionPool(
+            ssl_context=create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=CallbackNetworkBackend(),
+        )
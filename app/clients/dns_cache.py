@@ -0,0 +1,114 @@
+import logging
+import socket
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import httpcore
+from httpx import HTTPTransport, Limits
+
+from app.shared.metrics import metrics
+from config.app_config import NODE_DNS_TTL
+
+logger = logging.getLogger(__name__)
+
+
+class DnsCache:
+    """
+    Caches the address of node hosts for `ttl` seconds.
+
+    If a refresh fails, the last known address is served (and retried on the
+    next lookup) rather than failing requests on a transient DNS error.
+    """
+
+    def __init__(self, ttl: float = NODE_DNS_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: Dict[Tuple[str, int], Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> str:
+        """
+        Returns an address of the host, resolving it if not cached.
+
+        Raises:
+            socket.gaierror: If the host cannot be resolved and has no
+                cached address.
+        """
+
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[1] > self._clock():
+            metrics.increment("node_dns_cache_hits_total")
+            return entry[0]
+
+        started_at = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror as exc:
+            metrics.increment("node_dns_failures_total", host=host)
+            if entry:
+                logger.warning(f"Failed to resolve {host}, using {entry[0]}: {exc}")
+                return entry[0]
+            raise
+        elapsed = time.perf_counter() - started_at
+        metrics.set("node_dns_resolve_seconds", elapsed, host=host)
+
+        address = infos[0][4][0]
+        with self._lock:
+            self._entries[key] = (address, self._clock() + self.ttl)
+        return address
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CachingNetworkBackend(httpcore.SyncBackend):
+    """
+    httpcore backend connecting to node hosts through a DnsCache.
+    """
+
+    def __init__(self, dns_cache: DnsCache):
+        self.dns_cache = dns_cache
+
+    def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable] = None,
+    ) -> httpcore.NetworkStream:
+        try:
+            address = self.dns_cache.resolve(host, port)
+        except OSError as exc:
+            # Surfaces like any connection failure, an httpx.ConnectError
+            raise httpcore.ConnectError(str(exc)) from exc
+        return super().connect_tcp(
+            address,
+            port,
+            timeout=timeout,
+            local_address=local_address,
+            socket_options=socket_options,
+        )
+
+
+class CachedDnsTransport(HTTPTransport):
+    """
+    Plain HTTP transport resolving hosts through a DnsCache. Requests keep
+    their host name, only the TCP connection goes to the cached address.
+    """
+
+    def __init__(self, dns_cache: DnsCache, limits: Limits = Limits()):
+        # HTTPTransport.__init__ only builds a pool, replaced by this one
+        self._pool = httpcore.ConnectionPool(
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=CachingNetworkBackend(dns_cache),
+        )
+
+
+dns_cache = DnsCache()
@@ -1,5 +1,10 @@
 import logging
-from httpx import Client, ConnectError, Response
+import time
+
+from httpx import AsyncClient, Client, ConnectError, Response, TransportError
+
+from app.shared.tracing import tracer
+from app.shared.traffic import traffic_recorder
 
 
 logger = logging.getLogger(__name__)
@@ -19,26 +24,97 @@ class NodeClient:
         """
         Handle HTTP request with error handling.
         """
-        try:
-            response = self._httpx_client.request(method, url, **kwargs)
+        started_at = time.perf_counter()
+        with tracer.child_span(f"node {method}", url=url) as span:
+            try:
+                response = self._httpx_client.request(method, url, **kwargs)
+            except ConnectError as exc:
+                logger.error("Failed to connect to node")
+                traffic_recorder.record_node_call(method, url, started_at, error=exc)
+                if span is not None:
+                    span.set_error(exc)
+                return Response(status_code=500, content=str(exc))
+            except TransportError as exc:
+                # Timeouts and resets must lead to a rollback, not crash the task
+                logger.error(f"Failed to reach node: {exc!r}")
+                traffic_recorder.record_node_call(method, url, started_at, error=exc)
+                if span is not None:
+                    span.set_error(exc)
+                return Response(status_code=500, content=str(exc))
+            traffic_recorder.record_node_call(
+                method, url, started_at, response=response
+            )
+            if span is not None:
+                span.set_attribute("status_code", response.status_code)
             return response
-        except ConnectError as exc:
-            logger.error("Failed to connect to node")
-            return Response(status_code=500, content=str(exc))
+
+    def ping(self, node: str) -> bool:
+        """
+        Sends a cheap request to the node, leaving a warm keep-alive
+        connection in the pool. Any HTTP response counts as reachable.
+        """
+        try:
+            self._httpx_client.request("GET", f"http://{node}/")
+            return True
+        except TransportError as exc:
+            logger.warning(f"Failed to reach node {node}: {exc!r}")
+            return False
 
     def create_group(self, node: str, group_id: str) -> Response:
-        logger.info(f"Creating group {group_id} on {node}")
+        logger.info(
+            "Creating group %s on %s", group_id, node, extra={"event": "node_create"}
+        )
         url = f"http://{node}/v1/group/"
         data = {"groupId": group_id}
         return self._handle_request("POST", url, json=data)
 
     def delete_group(self, node: str, group_id: str) -> Response:
-        logger.info(f"Deleting group {group_id} on {node}")
+        logger.info(
+            "Deleting group %s on %s", group_id, node, extra={"event": "node_delete"}
+        )
         url = f"http://{node}/v1/group/"
         data = {"groupId": group_id}
         return self._handle_request("DELETE", url, json=data)
 
     def get_group(self, node: str, group_id: str) -> Response:
-        logger.info(f"Getting group {group_id} on {node}")
+        logger.info(
+            "Getting group %s on %s", group_id, node, extra={"event": "node_get"}
+        )
         url = f"http://{node}/v1/group/{group_id}"
         return self._handle_request("GET", url)
+
+
+class AsyncNodeClient:
+    def __init__(self, httpx_client: AsyncClient = None):
+        self._httpx_client = httpx_client or AsyncClient()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._httpx_client.aclose()
+
+    async def _handle_request(self, method, url, **kwargs) -> Response:
+        """
+        Handle HTTP request with error handling, without blocking the event loop.
+        """
+        started_at = time.perf_counter()
+        with tracer.child_span(f"node {method}", url=url) as span:
+            try:
+                response = await self._httpx_client.request(method, url, **kwargs)
+            except TransportError as exc:
+                logger.error(f"Failed to reach node: {exc!r}")
+                traffic_recorder.record_node_call(method, url, started_at, error=exc)
+                if span is not None:
+                    span.set_error(exc)
+                return Response(status_code=500, content=str(exc))
+            traffic_recorder.record_node_call(
+                method, url, started_at, response=response
+            )
+            if span is not None:
+                span.set_attribute("status_code", response.status_code)
+            return response
+
+    async def get_group(self, node: str, group_id: str) -> Response:
+        url = f"http://{node}/v1/group/{group_id}"
+        return await self._handle_request("GET", url)
@@ -0,0 +1,141 @@
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List
+
+from app.clients.batching_node_client import shared_node_client
+from app.clients.dns_cache import dns_cache
+from app.clients.node_client import NodeClient
+from app.shared.metrics import metrics
+from config.app_config import (
+    HOSTS,
+    NODE_KEEPALIVE_INTERVAL,
+    NODE_WARMUP_CONNECTIONS,
+    NODE_WARMUP_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_up_node(node_client: NodeClient, node: str, connections: int) -> bool:
+    host, _, port = node.partition(":")
+    try:
+        dns_cache.resolve(host, int(port or 80))
+    except (OSError, ValueError) as exc:
+        logger.warning(f"Failed to resolve node {node}: {exc}")
+        return False
+    # Concurrent pings so each leaves its own keep-alive connection in the pool
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        results = list(
+            executor.map(lambda _: node_client.ping(node), range(connections))
+        )
+    return any(results)
+
+
+def warm_up_nodes(
+    node_client: NodeClient,
+    nodes: List[str],
+    connections: int = NODE_WARMUP_CONNECTIONS,
+    timeout: float = NODE_WARMUP_TIMEOUT,
+) -> Dict[str, bool]:
+    """
+    Resolves every node and opens warm keep-alive connections to it.
+
+    Nodes are warmed up concurrently and the whole warm-up is bounded by
+    `timeout`, a node that is down or slow is reported and skipped.
+
+    Args:
+        node_client (NodeClient): Client whose connection pool is warmed up.
+        nodes (List[str]): Nodes to warm up.
+        connections (int): Connections to open per node.
+        timeout (float): Maximum time (in seconds) spent warming up.
+
+    Returns:
+        Dict[str, bool]: Whether each node was reached.
+    """
+
+    started_at = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max(len(nodes), 1))
+    futures = {
+        node: executor.submit(_warm_up_node, node_client, node, max(connections, 1))
+        for node in nodes
+    }
+    wait(futures.values(), timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = {}
+    for node, future in futures.items():
+        results[node] = future.done() and not future.exception() and future.result()
+        metrics.increment(
+            "node_warmup_total", node=node, result="ok" if results[node] else "failed"
+        )
+    elapsed = time.perf_counter() - started_at
+    metrics.set("node_warmup_seconds", elapsed)
+    failed = [node for node, reached in results.items() if not reached]
+    if failed:
+        logger.warning(f"Warm-up could not reach nodes {failed}")
+    logger.info(
+        f"Warmed up {len(nodes) - len(failed)}/{len(nodes)} nodes in {elapsed:.3f}s"
+    )
+    return results
+
+
+class NodeKeepalive(threading.Thread):
+    """
+    Pings every node periodically so idle pooled connections stay open, and
+    publishes the metrics of the process at the same pace.
+    """
+
+    def __init__(
+        self,
+        node_client: NodeClient,
+        nodes: List[str],
+        interval: float = NODE_KEEPALIVE_INTERVAL,
+        source: str = None,
+    ):
+        super().__init__(name="node-keepalive", daemon=True)
+        self.node_client = node_client
+        self.nodes = nodes
+        self.interval = interval
+        self.source = source or f"{socket.gethostname()}:{os.getpid()}"
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.tick()
+
+    def tick(self) -> None:
+        for node in self.nodes:
+            reached = self.node_client.ping(node)
+            metrics.increment(
+                "node_keepalive_total", node=node, result="ok" if reached else "failed"
+            )
+        metrics.publish(self.source)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+def warm_up_worker(**kwargs) -> None:
+    """
+    Warms up the node connections of a worker process before it consumes
+    tasks, and starts the keepalive. Never fails the worker start.
+
+    Connected to Celery's `worker_process_init` signal.
+    """
+
+    nodes = [node for node in HOSTS if node]
+    if not nodes:
+        return
+    node_client = shared_node_client()
+    try:
+        warm_up_nodes(node_client, nodes)
+    except Exception as exc:
+        logger.warning(f"Node warm-up failed: {exc}")
+    if NODE_KEEPALIVE_INTERVAL > 0:
+        keepalive = NodeKeepalive(node_client, nodes)
+        keepalive.start()
+        metrics.publish(keepalive.source)
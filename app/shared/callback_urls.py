@@ -0,0 +1,74 @@
+import ipaddress
+import socket
+from urllib.parse import urlsplit
+
+from config.app_config import WEBHOOK_ALLOWED_HOSTS
+
+
+class ForbiddenCallbackTarget(ValueError):
+    """
+    Raised for a callback URL webhooks must not be sent to.
+    """
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address)
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    # Not global: private, loopback, link-local, shared or reserved ranges
+    return ip.is_global and not ip.is_multicast
+
+
+def check_callback_url(url: str) -> None:
+    """
+    Checks a callback URL before it is accepted, without resolving it.
+
+    With `WEBHOOK_ALLOWED_HOSTS`, only the listed hosts are accepted.
+    Otherwise IP addresses must be public and `localhost` is refused, host
+    names are checked once resolved, by `resolve_callback_host`.
+
+    Raises:
+        ForbiddenCallbackTarget: If webhooks must not be sent to the URL.
+    """
+
+    host = (urlsplit(url).hostname or "").lower()
+    if WEBHOOK_ALLOWED_HOSTS:
+        if host not in WEBHOOK_ALLOWED_HOSTS:
+            raise ForbiddenCallbackTarget(f"Callback host {host} is not allowed.")
+        return
+    if host == "localhost" or host.endswith(".localhost"):
+        raise ForbiddenCallbackTarget(f"Callback host {host} is not public.")
+    try:
+        public = _is_public(host)
+    except ValueError:
+        # A host name
+        return
+    if not public:
+        raise ForbiddenCallbackTarget(f"Callback address {host} is not public.")
+
+
+def resolve_callback_host(host: str, port: int) -> str:
+    """
+    Returns the address a webhook delivery to `host` connects to.
+
+    Hosts of `WEBHOOK_ALLOWED_HOSTS` are trusted as they are. Otherwise every
+    address of the host must be public, so a host name cannot point a
+    delivery at an internal service.
+
+    Raises:
+        ForbiddenCallbackTarget: If the host is not allowed.
+        socket.gaierror: If the host cannot be resolved.
+    """
+
+    if WEBHOOK_ALLOWED_HOSTS:
+        if host.lower() not in WEBHOOK_ALLOWED_HOSTS:
+            raise ForbiddenCallbackTarget(f"Callback host {host} is not allowed.")
+        return host
+    infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    addresses = [info[4][0] for info in infos]
+    for address in addresses:
+        if not _is_public(address):
+            raise ForbiddenCallbackTarget(
+                f"Callback host {host} resolves to {address}, which is not public."
+            )
+    return addresses[0]
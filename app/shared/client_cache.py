@@ -0,0 +1,179 @@
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, List, Optional
+
+import redis
+
+from app.shared.redis_client import redis_client
+from config.app_config import (
+    REDIS_CLIENT_CACHE,
+    REDIS_CLIENT_CACHE_PREFIXES,
+    REDIS_CLIENT_CACHE_SIZE,
+    REDIS_MODE,
+)
+
+logger = logging.getLogger(__name__)
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+# Seconds without invalidation before checking the connection is alive
+PING_INTERVAL = 5.0
+RECONNECT_DELAY = 1.0
+
+# Marks a key being read, an invalidation in the meantime drops it
+_PENDING = object()
+_MISSING = object()
+
+
+class ClientCache:
+    """
+    Process-local cache of the keys starting with `prefixes`, kept coherent
+    by Redis server-assisted client tracking (Redis 6+).
+
+    A background thread holds one connection with tracking in broadcast mode
+    on the prefixes, redirected to itself and subscribed to the invalidation
+    channel: Redis sends the name of every key of the prefixes that changes,
+    expires or is evicted, and the thread drops it from the cache. While that
+    connection is down, the cache is emptied and reads go to Redis.
+
+    Holds at most `max_keys` keys, the least recently read are dropped first.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        prefixes: Iterable[str] = REDIS_CLIENT_CACHE_PREFIXES,
+        max_keys: int = REDIS_CLIENT_CACHE_SIZE,
+        enabled: bool = True,
+    ):
+        self.client = client
+        self.prefixes = tuple(prefixes)
+        self.max_keys = max_keys
+        self.enabled = enabled and bool(self.prefixes)
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._tracking = threading.Event()
+        self._pid: Optional[int] = None
+
+    def read(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Returns the value of `key`, from the cache once read and while
+        tracked, from `fetch` (e.g. `lambda: redis_client.get(key)`)
+        otherwise. A key must always be read with the same command.
+
+        Args:
+            key (str): Key read by `fetch`.
+            fetch (Callable): Reads the key from Redis.
+        """
+
+        if not self.enabled or not key.startswith(self.prefixes):
+            return fetch()
+        self._ensure_started()
+        if not self._tracking.is_set():
+            return fetch()
+
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING and value is not _PENDING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.copy(value)
+            self.misses += 1
+            if value is _MISSING:
+                self._entries[key] = _PENDING
+                self._evict()
+
+        value = fetch()
+        with self._lock:
+            if self._entries.get(key) is _PENDING:
+                # Callers may modify the value they get
+                self._entries[key] = copy.copy(value)
+        return value
+
+    def invalidate(self, keys: Optional[List[str]]) -> None:
+        """
+        Drops `keys` from the cache, or every key if None (what Redis sends
+        on FLUSHDB and FLUSHALL).
+        """
+
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+                return
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def _ensure_started(self) -> None:
+        # Forked processes start their own thread, the parent's is gone
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._tracking.clear()
+            self._entries.clear()
+        threading.Thread(
+            target=self._listen, name="redis-client-cache", daemon=True
+        ).start()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                self._track()
+            except (redis.RedisError, OSError) as exc:
+                logger.warning(f"Client cache bypassed, tracking lost: {exc}")
+            except Exception:
+                # Never leave the cache served without invalidations
+                logger.exception("Client cache bypassed, tracking failed")
+            finally:
+                self._tracking.clear()
+                self.invalidate(None)
+            time.sleep(RECONNECT_DELAY)
+
+    def _track(self) -> None:
+        """
+        Enables tracking on a new connection and applies its invalidations
+        until it fails.
+        """
+
+        connection = self.client.connection_pool.make_connection()
+        try:
+            connection.send_command("CLIENT", "ID")
+            client_id = connection.read_response()
+            prefixes = [arg for prefix in self.prefixes for arg in ("PREFIX", prefix)]
+            connection.send_command(
+                "CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", *prefixes
+            )
+            connection.read_response()
+            connection.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+            connection.read_response()
+            # Drops what reads stored while no invalidation was received
+            self.invalidate(None)
+            self._tracking.set()
+
+            while True:
+                if not connection.can_read(timeout=PING_INTERVAL):
+                    connection.send_command("PING")
+                    if not connection.can_read(timeout=PING_INTERVAL):
+                        raise redis.ConnectionError("No answer to PING.")
+                message = connection.read_response()
+                if message[0] == "message":
+                    self.invalidate(message[2])
+        finally:
+            connection.disconnect()
+
+
+# Tracking follows a single server, it is not available with a cluster
+client_cache = ClientCache(
+    redis_client, enabled=REDIS_CLIENT_CACHE and REDIS_MODE != "cluster"
+)
@@ -0,0 +1,173 @@
+import json
+import time
+from typing import List, Optional, Tuple
+
+from app.shared.redis_client import redis_client
+
+DEAD_LETTERS_KEY = "dead_letters"
+
+# Index of the entry IDs of each node, so a node is listed without a full scan
+DEAD_LETTERS_NODE_KEY_PREFIX = "dead_letters_node_"
+
+# Set once the entries recorded before the index existed are indexed
+DEAD_LETTERS_INDEXED_KEY = "dead_letters_indexed"
+
+# Separates the parts of an entry ID, never part of a task name
+ENTRY_ID_SEPARATOR = "|"
+
+
+def entry_id(task: str, group_id: str, node: str) -> str:
+    return ENTRY_ID_SEPARATOR.join((task, group_id, node))
+
+
+def _node_key(node: str) -> str:
+    return f"{DEAD_LETTERS_NODE_KEY_PREFIX}{node}"
+
+
+def _encode(fields: dict) -> str:
+    return json.dumps(fields, separators=(",", ":"))
+
+
+def _decode(field: str, value: str) -> dict:
+    # Entries written before the store was compacted hold every field
+    task, rest = field.split(ENTRY_ID_SEPARATOR, 1)
+    group_id, node = rest.rsplit(ENTRY_ID_SEPARATOR, 1)
+    entry = {"id": field, "task": task, "group_id": group_id, "node": node}
+    entry.update(json.loads(value))
+    return entry
+
+
+def record_dead_letter(task: str, group_id: str, node: str) -> dict:
+    """
+    Stores a dead-lettered node operation so it can be listed and replayed.
+
+    Entries live in a single hash without expiry, keyed by task, group and
+    node, so dead-lettering the same operation twice keeps a single entry.
+    Values only hold what the key does not tell, e.g. the time. The ID is
+    also added to the index of the node.
+
+    Args:
+        task (str): Name of the task that gave up (e.g. rollback_create_group).
+        group_id (str): Group ID.
+        node (str): Node the operation failed on.
+
+    Returns:
+        dict: The stored entry.
+    """
+
+    field = entry_id(task, group_id, node)
+    fields = {"dead_lettered_at": time.time()}
+    pipe = redis_client.pipeline()
+    pipe.hset(DEAD_LETTERS_KEY, field, _encode(fields))
+    pipe.sadd(_node_key(node), field)
+    pipe.execute()
+    return _decode(field, _encode(fields))
+
+
+def resolve_dead_letter(entry: dict, pipe=None) -> None:
+    """
+    Removes an entry whose operation was replayed, or is no longer needed.
+
+    Args:
+        entry (dict): Entry to remove.
+        pipe (Pipeline, optional): Pipeline to queue the command on.
+    """
+
+    target = pipe or redis_client.pipeline()
+    target.hdel(DEAD_LETTERS_KEY, entry["id"])
+    target.srem(_node_key(entry["node"]), entry["id"])
+    if pipe is None:
+        target.execute()
+
+
+def record_replay_failure(entry: dict, outcome: str, pipe=None) -> None:
+    """
+    Keeps an entry whose replay failed, with its number of replays and the
+    outcome of the last one.
+
+    Args:
+        entry (dict): Entry replayed.
+        outcome (str): Outcome of the replay.
+        pipe (Pipeline, optional): Pipeline to queue the command on.
+    """
+
+    fields = {
+        "dead_lettered_at": entry["dead_lettered_at"],
+        "replays": entry.get("replays", 0) + 1,
+        "last_outcome": outcome,
+        "last_replayed_at": time.time(),
+    }
+    (pipe or redis_client).hset(DEAD_LETTERS_KEY, entry["id"], _encode(fields))
+
+
+def scan_dead_letters(
+    cursor: int = 0,
+    count: int = 100,
+    node: Optional[str] = None,
+    operation: Optional[str] = None,
+) -> Tuple[int, List[dict]]:
+    """
+    Lists dead-lettered operations one page at a time, with HSCAN, or with
+    SSCAN over the index of `node` when given.
+
+    Args:
+        cursor (int): Cursor returned by the previous page, 0 to start.
+        count (int): Hint of the number of entries to examine.
+        node (str, optional): Only return entries of this node.
+        operation (str, optional): Only return entries of this task.
+
+    Returns:
+        Tuple[int, List[dict]]: Cursor of the next page (0 when done) and the
+            entries of this page.
+    """
+
+    # The filters match the entry IDs in Redis, only matches are sent back
+    match = None
+    if operation:
+        match = ENTRY_ID_SEPARATOR.join((operation, "*"))
+    if node:
+        return _scan_node(node, cursor, count, match)
+    next_cursor, fields = redis_client.hscan(
+        DEAD_LETTERS_KEY, cursor=cursor, match=match, count=count
+    )
+    return next_cursor, [_decode(field, value) for field, value in fields.items()]
+
+
+def _scan_node(
+    node: str, cursor: int, count: int, match: Optional[str]
+) -> Tuple[int, List[dict]]:
+    next_cursor, ids = redis_client.sscan(
+        _node_key(node), cursor=cursor, match=match, count=count
+    )
+    if not ids:
+        return next_cursor, []
+    ids = list(ids)
+    values = redis_client.hmget(DEAD_LETTERS_KEY, ids)
+    # Left behind by an entry resolved while the index was being built
+    stale = [field for field, value in zip(ids, values) if value is None]
+    if stale:
+        redis_client.srem(_node_key(node), *stale)
+    return next_cursor, [
+        _decode(field, value) for field, value in zip(ids, values) if value is not None
+    ]
+
+
+def index_dead_letters() -> None:
+    """
+    Adds the entries recorded before the per-node index existed to it, once.
+    Later entries are indexed when recorded.
+    """
+
+    if redis_client.exists(DEAD_LETTERS_INDEXED_KEY):
+        return
+    cursor = None
+    while cursor != 0:
+        cursor, fields = redis_client.hscan(
+            DEAD_LETTERS_KEY, cursor=cursor or 0, count=1000
+        )
+        pipe = redis_client.pipeline(transaction=False)
+        for field in fields:
+            node = field.rsplit(ENTRY_ID_SEPARATOR, 1)[1]
+            pipe.sadd(_node_key(node), field)
+        pipe.execute()
+    redis_client.set(DEAD_LETTERS_INDEXED_KEY, 1)
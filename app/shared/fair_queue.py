@@ -0,0 +1,303 @@
+import json
+import logging
+import re
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+import redis
+
+from app.shared.fanout import FANOUT_KEY_PREFIX
+from app.shared.redis_client import redis_client
+from app.shared.tracing import TRACEPARENT_HEADER, tracer
+from config.app_config import (
+    FAIR_MAX_IN_FLIGHT,
+    FAIR_RUNNING_TIMEOUT,
+    FAIR_SCHEDULING,
+    FAIR_TENANT_CONCURRENCY,
+    FAIR_TENANT_SEPARATOR,
+    FAIR_TENANT_WEIGHTS,
+)
+
+logger = logging.getLogger(__name__)
+
+FAIR_QUEUE_KEY_PREFIX = "fair_queue_"
+# Tenants with a backlog
+FAIR_TENANTS_KEY = "fair_tenants"
+# Virtual finish time of the last task dispatched for each backlogged tenant
+FAIR_PASS_KEY = "fair_pass"
+# Virtual time of the scheduler, the pass of the last dispatched task
+FAIR_VTIME_KEY = "fair_vtime"
+# Dispatched tasks that did not finish yet, by task ID
+FAIR_RUNNING_KEY = "fair_running"
+FAIR_LOCK_KEY = "fair_dispatch_lock"
+# Set by submitters so the dispatcher holding the lock runs once more
+FAIR_PENDING_KEY = "fair_dispatch_pending"
+
+FAIR_LOCK_TTL = 10
+
+DEFAULT_TENANT = "default"
+MAX_TENANT_LENGTH = 64
+
+_TENANT_PATTERN = re.compile(r"[^A-Za-z0-9_.:-]")
+
+
+def resolve_tenant(header_value: Optional[str], group_id: str) -> str:
+    """
+    Returns the tenant of a request: the tenant header if set, otherwise the
+    prefix of the group ID before `FAIR_TENANT_SEPARATOR`.
+
+    Args:
+        header_value (str): Value of the tenant header, if any.
+        group_id (str): Group ID of the request.
+    """
+
+    tenant = header_value
+    if not tenant and FAIR_TENANT_SEPARATOR and FAIR_TENANT_SEPARATOR in group_id:
+        tenant = group_id.split(FAIR_TENANT_SEPARATOR, 1)[0]
+    tenant = _TENANT_PATTERN.sub("_", tenant or "")[:MAX_TENANT_LENGTH]
+    return tenant or DEFAULT_TENANT
+
+
+def _weight(tenant: str) -> float:
+    return max(FAIR_TENANT_WEIGHTS.get(tenant, 1.0), 0.001)
+
+
+def enqueue(tenant: str, task_name: str, args: List, kwargs: Dict) -> str:
+    """
+    Appends a task to the backlog of a tenant.
+
+    The task ID is generated here, so the caller can report it before the
+    task is dispatched to Celery.
+
+    Returns:
+        str: ID the task will run with.
+    """
+
+    task_id = str(uuid.uuid4())
+    item = {"task_id": task_id, "task": task_name, "args": args, "kwargs": kwargs}
+    traceparent = tracer.current_traceparent()
+    if traceparent:
+        # Dispatched later, by whichever process frees a slot
+        item[TRACEPARENT_HEADER] = traceparent
+    pipe = redis_client.pipeline(transaction=False)
+    # Pushed before the tenant is marked backlogged, see _retire
+    pipe.rpush(f"{FAIR_QUEUE_KEY_PREFIX}{tenant}", json.dumps(item))
+    pipe.sadd(FAIR_TENANTS_KEY, tenant)
+    pipe.set(FAIR_PENDING_KEY, 1)
+    pipe.execute()
+    return task_id
+
+
+def _retire(tenant: str) -> None:
+    redis_client.srem(FAIR_TENANTS_KEY, tenant)
+    redis_client.hdel(FAIR_PASS_KEY, tenant)
+    # A task pushed while retiring must not be stranded
+    if redis_client.llen(f"{FAIR_QUEUE_KEY_PREFIX}{tenant}"):
+        redis_client.sadd(FAIR_TENANTS_KEY, tenant)
+
+
+def _running_by_tenant(now: float) -> Dict[str, int]:
+    running = {}
+    stale = []
+    for task_id, value in redis_client.hgetall(FAIR_RUNNING_KEY).items():
+        entry = json.loads(value)
+        if now - entry["dispatched_at"] > FAIR_RUNNING_TIMEOUT:
+            stale.append(task_id)
+            continue
+        running[entry["tenant"]] = running.get(entry["tenant"], 0) + 1
+    if stale:
+        # Lost tasks (e.g. a killed worker) must not hold slots forever
+        logger.warning(f"Releasing {len(stale)} fair scheduling slots timed out.")
+        redis_client.hdel(FAIR_RUNNING_KEY, *stale)
+    return running
+
+
+def _dispatch_locked(send: Callable) -> int:
+    now = time.time()
+    running = _running_by_tenant(now)
+    free = FAIR_MAX_IN_FLIGHT - sum(running.values())
+    tenants = redis_client.smembers(FAIR_TENANTS_KEY)
+    if free <= 0 or not tenants:
+        return 0
+
+    vtime = float(redis_client.get(FAIR_VTIME_KEY) or 0)
+    stored = redis_client.hgetall(FAIR_PASS_KEY)
+    # A tenant returning from idle starts at the current virtual time: it is
+    # served next, but cannot claim the share it did not use while idle.
+    passes = {
+        tenant: max(float(stored.get(tenant, vtime)), vtime) for tenant in tenants
+    }
+
+    dispatched = 0
+    try:
+        while free > 0:
+            candidates = [
+                tenant
+                for tenant in passes
+                if not FAIR_TENANT_CONCURRENCY
+                or running.get(tenant, 0) < FAIR_TENANT_CONCURRENCY
+            ]
+            if not candidates:
+                break
+            tenant = min(candidates, key=lambda name: (passes[name], name))
+            raw = redis_client.lpop(f"{FAIR_QUEUE_KEY_PREFIX}{tenant}")
+            if raw is None:
+                _retire(tenant)
+                del passes[tenant]
+                continue
+
+            item = json.loads(raw)
+            # Registered first, the task may finish before send returns
+            redis_client.hset(
+                FAIR_RUNNING_KEY,
+                item["task_id"],
+                json.dumps({"tenant": tenant, "dispatched_at": now}),
+            )
+            options = {}
+            if item.get(TRACEPARENT_HEADER):
+                options["headers"] = {TRACEPARENT_HEADER: item[TRACEPARENT_HEADER]}
+            try:
+                send(
+                    item["task"],
+                    args=item["args"],
+                    kwargs=item["kwargs"],
+                    task_id=item["task_id"],
+                    **options,
+                )
+            except Exception:
+                redis_client.hdel(FAIR_RUNNING_KEY, item["task_id"])
+                redis_client.lpush(f"{FAIR_QUEUE_KEY_PREFIX}{tenant}", raw)
+                raise
+
+            running[tenant] = running.get(tenant, 0) + 1
+            free -= 1
+            dispatched += 1
+            vtime = passes[tenant]
+            passes[tenant] += 1 / _weight(tenant)
+    finally:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(FAIR_VTIME_KEY, vtime)
+        if passes:
+            pipe.hset(FAIR_PASS_KEY, mapping=passes)
+        pipe.execute()
+    return dispatched
+
+
+def dispatch(send: Callable) -> int:
+    """
+    Sends backlogged tasks to Celery in weighted fair order.
+
+    Tasks are dispatched while fewer than `FAIR_MAX_IN_FLIGHT` dispatched
+    tasks are unfinished, and at most `FAIR_TENANT_CONCURRENCY` of them per
+    tenant. Each time, the backlogged tenant with the smallest virtual
+    finish time is served, and its virtual time advances by 1 / weight.
+    Only one process dispatches at a time.
+
+    Args:
+        send (Callable): Sends a task, e.g. `celery_app.send_task`.
+
+    Returns:
+        int: Number of dispatched tasks.
+    """
+
+    dispatched = 0
+    while True:
+        token = uuid.uuid4().hex
+        if not redis_client.set(FAIR_LOCK_KEY, token, nx=True, ex=FAIR_LOCK_TTL):
+            # The holder sees the pending flag and runs once more
+            return dispatched
+        try:
+            redis_client.delete(FAIR_PENDING_KEY)
+            dispatched += _dispatch_locked(send)
+        finally:
+            if redis_client.get(FAIR_LOCK_KEY) == token:
+                redis_client.delete(FAIR_LOCK_KEY)
+        if not redis_client.exists(FAIR_PENDING_KEY):
+            return dispatched
+
+
+def submit(
+    tenant: str, task_name: str, args: List, kwargs: Dict, send: Callable
+) -> str:
+    """
+    Queues a task in the backlog of its tenant and dispatches what can be.
+
+    Returns:
+        str: ID the task will run with.
+    """
+
+    task_id = enqueue(tenant, task_name, args, kwargs)
+    dispatch(send)
+    return task_id
+
+
+def release_slot(task_id: Optional[str], send: Callable) -> None:
+    """
+    Frees the slot of a fairly scheduled task and dispatches the next
+    backlogged task.
+
+    Args:
+        task_id (str): ID of the task holding the slot.
+        send (Callable): Sends a task, e.g. `celery_app.send_task`.
+    """
+
+    if not FAIR_SCHEDULING or not task_id:
+        return
+    try:
+        if redis_client.hdel(FAIR_RUNNING_KEY, task_id):
+            redis_client.set(FAIR_PENDING_KEY, 1)
+            dispatch(send)
+    except redis.RedisError as exc:
+        logger.warning(f"Failed to release fair scheduling slot of {task_id}: {exc}")
+
+
+def release_on_task_finished(sender=None, task_id=None, state=None, **kwargs) -> None:
+    """
+    Frees the slot of a finished fairly scheduled task. A task that fanned
+    its operation out to per-node tasks keeps it until they joined, the join
+    calls `release_slot`.
+
+    Connected to Celery's `task_postrun` signal.
+    """
+
+    if not FAIR_SCHEDULING or sender is None or state == "RETRY":
+        return
+    try:
+        fanned_out = redis_client.exists(f"{FANOUT_KEY_PREFIX}{task_id}")
+    except redis.RedisError as exc:
+        logger.warning(f"Failed to release fair scheduling slot of {task_id}: {exc}")
+        return
+    if not fanned_out:
+        release_slot(task_id, sender.app.send_task)
+
+
+def read_fair_backlog() -> int:
+    """
+    Returns the number of tasks waiting in the backlogs of all tenants.
+    """
+
+    pipe = redis_client.pipeline(transaction=False)
+    for tenant in redis_client.smembers(FAIR_TENANTS_KEY):
+        pipe.llen(f"{FAIR_QUEUE_KEY_PREFIX}{tenant}")
+    return sum(pipe.execute())
+
+
+def read_fair_queues() -> Dict[str, dict]:
+    """
+    Returns the backlog and running tasks of each tenant.
+    """
+
+    running = _running_by_tenant(time.time())
+    tenants = redis_client.smembers(FAIR_TENANTS_KEY) | set(running)
+    pipe = redis_client.pipeline(transaction=False)
+    for tenant in sorted(tenants):
+        pipe.llen(f"{FAIR_QUEUE_KEY_PREFIX}{tenant}")
+    return {
+        tenant: {
+            "backlog": backlog,
+            "running": running.get(tenant, 0),
+            "weight": _weight(tenant),
+        }
+        for tenant, backlog in zip(sorted(tenants), pipe.execute())
+    }
@@ -0,0 +1,112 @@
+import json
+from typing import Dict, Optional
+
+from app.shared.redis_client import redis_client
+from config.app_config import PER_NODE_QUEUES
+
+FANOUT_KEY_PREFIX = "fanout_"
+NODE_QUEUE_PREFIX = "node."
+
+# Hash fields that are not nodes
+META_FIELD = "__meta__"
+DONE_FIELD = "__done__"
+FAILED_FIELD = "__failed__"
+
+FANOUT_TTL = 60 * 60
+
+
+def node_queue(node: str) -> str:
+    return f"{NODE_QUEUE_PREFIX}{node}"
+
+
+def node_route(node: str) -> dict:
+    """
+    Returns the `send_task` options routing a per-node task to the queue of
+    its node, when per-node queues are enabled.
+    """
+
+    return {"queue": node_queue(node)} if PER_NODE_QUEUES else {}
+
+
+def start_fanout(operation_id: str, meta: dict) -> None:
+    """
+    Stores the state joining the per-node sub-operations of an operation.
+
+    Args:
+        operation_id (str): ID of the operation, the ID of its task.
+        meta (dict): Operation context (group_id, nodes, total, quorum, ...).
+    """
+
+    key = f"{FANOUT_KEY_PREFIX}{operation_id}"
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hset(key, META_FIELD, json.dumps(meta))
+    pipe.expire(key, FANOUT_TTL)
+    pipe.execute()
+
+
+def read_fanout(operation_id: str) -> Optional[dict]:
+    """
+    Returns the context of an operation and its number of failed nodes.
+
+    Returns:
+        dict: The stored context with a `failed` count, or None if the
+            operation is unknown or already joined.
+    """
+
+    key = f"{FANOUT_KEY_PREFIX}{operation_id}"
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hget(key, META_FIELD)
+    pipe.hget(key, FAILED_FIELD)
+    meta, failed = pipe.execute()
+    if not meta:
+        return None
+    return {**json.loads(meta), "failed": int(failed or 0)}
+
+
+def record_node_result(
+    operation_id: str, node: str, outcome: str, failed: bool, total: int
+) -> Optional[Dict[str, str]]:
+    """
+    Records the outcome of a sub-operation and joins the operation once all
+    nodes reported.
+
+    The counter is incremented atomically, so exactly one sub-operation (the
+    last one) gets the outcomes and runs the join. A sub-operation reporting
+    once the operation is joined, e.g. a redelivered duplicate, is ignored.
+
+    Args:
+        operation_id (str): ID of the operation.
+        node (str): Name of the node.
+        outcome (str): Outcome on the node (created, failed, skipped, ...).
+        failed (bool): Whether the outcome counts as a failure.
+        total (int): Number of nodes of the operation.
+
+    Returns:
+        dict: Outcome by node if this was the last node, None otherwise.
+    """
+
+    key = f"{FANOUT_KEY_PREFIX}{operation_id}"
+    # In one MULTI: whether the operation is still open, then the writes,
+    # which keep the expiry if they recreated the record of a joined one
+    pipe = redis_client.pipeline()
+    pipe.exists(key)
+    pipe.hset(key, node, outcome)
+    if failed:
+        pipe.hincrby(key, FAILED_FIELD, 1)
+    pipe.hincrby(key, DONE_FIELD, 1)
+    pipe.expire(key, FANOUT_TTL)
+    results = pipe.execute()
+    if not results[0]:
+        # Joined already, the record only holds this late outcome
+        redis_client.delete(key)
+        return None
+    if results[-2] < total:
+        return None
+
+    fields = redis_client.hgetall(key)
+    redis_client.delete(key)
+    return {
+        field: value
+        for field, value in fields.items()
+        if field not in (META_FIELD, DONE_FIELD, FAILED_FIELD)
+    }
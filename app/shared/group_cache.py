@@ -0,0 +1,78 @@
+import json
+import logging
+from typing import Optional
+
+import redis
+
+from app.shared.client_cache import client_cache
+from app.shared.redis_client import group_key, redis_client
+from config.app_config import GROUP_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+GROUP_CACHE_KEY_PREFIX = "group_summary_"
+
+# Tasks changing the state of a group on the nodes. The per-node tasks of a
+# fanned out operation only know its ID, their join invalidates instead
+GROUP_TASKS = {
+    "app.celery_tasks.create_task.create_group",
+    "app.celery_tasks.create_task.rollback_create_group",
+    "app.celery_tasks.create_task.repair_create_group",
+    "app.celery_tasks.delete_task.delete_group",
+    "app.celery_tasks.delete_task.rollback_delete_group",
+}
+
+
+def get_cached_summary(group_id: str) -> Optional[dict]:
+    """
+    Returns the cached cross-node summary of a group, if still fresh.
+
+    Args:
+        group_id (str): Group ID.
+    """
+
+    key = group_key(GROUP_CACHE_KEY_PREFIX, group_id)
+    cached = client_cache.read(key, lambda: redis_client.get(key))
+    return json.loads(cached) if cached else None
+
+
+def set_cached_summary(group_id: str, summary: dict) -> None:
+    """
+    Caches the cross-node summary of a group for `GROUP_CACHE_TTL` seconds.
+
+    Args:
+        group_id (str): Group ID.
+        summary (dict): Summary to cache.
+    """
+
+    key = group_key(GROUP_CACHE_KEY_PREFIX, group_id)
+    redis_client.set(key, json.dumps(summary), ex=GROUP_CACHE_TTL)
+
+
+def invalidate_summary(group_id: str) -> None:
+    """
+    Drops the cached summary of a group, e.g. once its state on the nodes
+    changed.
+
+    Args:
+        group_id (str): Group ID.
+    """
+
+    try:
+        redis_client.unlink(group_key(GROUP_CACHE_KEY_PREFIX, group_id))
+    except redis.RedisError as exc:
+        logger.warning(f"Failed to invalidate cached summary of {group_id}: {exc}")
+
+
+def invalidate_on_task_finished(sender=None, args=None, kwargs=None, **extra) -> None:
+    """
+    Drops the cached summary of the group a finished task operated on.
+
+    Connected to Celery's `task_postrun` signal.
+    """
+
+    if sender is None or sender.name not in GROUP_TASKS:
+        return
+    group_id = (kwargs or {}).get("group_id") or (args[0] if args else None)
+    if group_id:
+        invalidate_summary(group_id)
@@ -0,0 +1,64 @@
+from typing import Iterable, List, Tuple
+
+from app.shared.redis_client import redis_client
+
+# Set of the IDs of all groups that exist, or should exist, on their nodes
+CATALOG_KEY = "group_catalog"
+
+
+def add_to_catalog(group_id: str, pipe=None) -> None:
+    """
+    Adds a created group to the catalog.
+
+    Args:
+        group_id (str): Group ID.
+        pipe (Pipeline, optional): Pipeline to queue the command on, so it
+            costs no extra round trip.
+    """
+
+    (pipe or redis_client).sadd(CATALOG_KEY, group_id)
+
+
+def remove_from_catalog(group_id: str) -> None:
+    redis_client.srem(CATALOG_KEY, group_id)
+
+
+def import_groups(group_ids: Iterable[str], chunk_size: int = 1000) -> int:
+    """
+    Adds groups created before the catalog existed, in pipelined chunks.
+
+    Returns:
+        int: Number of groups that were not in the catalog yet.
+    """
+
+    added = 0
+    chunk: List[str] = []
+    for group_id in group_ids:
+        chunk.append(group_id)
+        if len(chunk) == chunk_size:
+            added += redis_client.sadd(CATALOG_KEY, *chunk)
+            chunk = []
+    if chunk:
+        added += redis_client.sadd(CATALOG_KEY, *chunk)
+    return added
+
+
+def scan_catalog(cursor: int = 0, count: int = 1000) -> Tuple[int, List[str]]:
+    """
+    Returns one page of the catalog with SSCAN. A group may be returned
+    more than once over a full scan, never missed if it stayed in the
+    catalog.
+
+    Returns:
+        Tuple[int, List[str]]: Cursor of the next page (0 when done) and the
+            group IDs of this page.
+    """
+
+    cursor, group_ids = redis_client.sscan(CATALOG_KEY, cursor=cursor, count=count)
+    return int(cursor), list(group_ids)
+
+
+def in_catalog(group_ids: List[str]) -> List[bool]:
+    if not group_ids:
+        return []
+    return [bool(found) for found in redis_client.smismember(CATALOG_KEY, group_ids)]
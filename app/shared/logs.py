@@ -0,0 +1,181 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from config.app_config import LOG_EVENT_RATE, LOG_FORMAT, LOG_LEVEL, LOG_QUEUE_SIZE
+
+# Attributes of every log record, the others were passed with `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_handler: Optional["NonBlockingQueueHandler"] = None
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+
+
+class EventRateFilter(logging.Filter):
+    """
+    Lets through at most `rate` records per second of each event, the
+    records logged with `extra={"event": ...}`: the per-node success
+    messages of the hot path. Warnings, errors and records without an
+    event always pass.
+
+    The first record let through after some were dropped carries their
+    count as `suppressed`.
+    """
+
+    def __init__(self, rate: int = LOG_EVENT_RATE):
+        super().__init__()
+        self.rate = rate
+        self._windows: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if event is None or self.rate <= 0 or record.levelno >= logging.WARNING:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(event)
+            if window is None or now - window[0] >= 1:
+                # [start of the window, records let through, records dropped]
+                window = self._windows[event] = [now, 0, window[2] if window else 0]
+            if window[1] >= self.rate:
+                window[2] += 1
+                return False
+            window[1] += 1
+            suppressed, window[2] = window[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formats records as text followed by their `extra` fields as
+    `key=value`, or as one JSON object per line.
+    """
+
+    def __init__(self, fmt: str = "text"):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+        self.json = fmt == "json"
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {
+            key: value
+            for key, value in vars(record).items()
+            if key not in _RECORD_ATTRIBUTES
+        }
+        if not self.json:
+            line = super().format(record)
+            if not fields:
+                return line
+            extra = " ".join(f"{key}={value}" for key, value in fields.items())
+            if record.exc_text:
+                head, _, trace = line.partition("\n")
+                return f"{head} {extra}\n{trace}"
+            return f"{line} {extra}"
+
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **fields,
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without formatting them: the
+    message is only built, and written, off the calling thread. Records are
+    dropped, and counted, when the queue is full rather than blocking.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue stays in process, the record needs no pickling
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _start_listener(formatter: logging.Formatter) -> None:
+    global _listener
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(formatter)
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_after_fork(formatter: logging.Formatter) -> None:
+    # The thread is gone in the child, and may have held the queue's lock
+    _handler.queue = queue.Queue(maxsize=_handler.queue.maxsize)
+    _start_listener(formatter)
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    queue_size: int = LOG_QUEUE_SIZE,
+    event_rate: int = LOG_EVENT_RATE,
+) -> NonBlockingQueueHandler:
+    """
+    Routes the root logger through a bounded queue drained by a background
+    thread, which formats and writes the records to stderr. Forked
+    processes (e.g. prefork pool workers) start their own thread.
+
+    Configuring again only updates the level.
+
+    Returns:
+        NonBlockingQueueHandler: The handler of the root logger.
+    """
+
+    global _handler
+    root = logging.getLogger()
+    root.setLevel(level)
+    with _lock:
+        if _handler is not None:
+            return _handler
+        _handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+        _handler.addFilter(EventRateFilter(event_rate))
+        formatter = StructuredFormatter(fmt)
+        _start_listener(formatter)
+        os.register_at_fork(after_in_child=lambda: _restart_after_fork(formatter))
+        atexit.register(stop_logging)
+        root.addHandler(_handler)
+    return _handler
+
+
+def configure_worker_logging(loglevel=None, **kwargs) -> None:
+    """
+    Connected to Celery's `setup_logging` signal, in place of the logging
+    setup of Celery.
+    """
+
+    configure_logging(loglevel or LOG_LEVEL)
+
+
+def stop_logging() -> None:
+    """
+    Writes the records still queued.
+    """
+
+    if _listener is not None:
+        _listener.stop()
@@ -0,0 +1,97 @@
+import json
+import logging
+import threading
+from typing import Dict
+
+import redis
+
+from app.shared.redis_client import redis_client, scan_keys
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY_PREFIX = "metrics_"
+METRICS_TTL = 5 * 60
+
+
+def _series(name: str, labels: dict) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    return f"{name}{{{rendered}}}"
+
+
+class Metrics:
+    """
+    In-process counters and gauges of a worker or API process.
+
+    Series are named like Prometheus ones (`name{label="value"}`). Processes
+    publish their snapshot to Redis so the admin API can report them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        series = _series(name, labels)
+        with self._lock:
+            self._counters[series] = self._counters.get(series, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges[_series(name, labels)] = value
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+
+    def publish(self, source: str) -> None:
+        """
+        Stores the snapshot of this process in Redis for a few minutes.
+
+        Args:
+            source (str): Name of the process, e.g. `<hostname>:<pid>`.
+        """
+
+        try:
+            redis_client.set(
+                f"{METRICS_KEY_PREFIX}{source}",
+                json.dumps(self.snapshot()),
+                ex=METRICS_TTL,
+            )
+        except redis.RedisError as exc:
+            logger.warning(f"Failed to publish metrics of {source}: {exc}")
+
+
+def read_published_metrics(count: int = 100) -> Dict[str, dict]:
+    """
+    Returns the snapshots recently published by all processes.
+
+    Returns:
+        dict: Snapshot by process name.
+    """
+
+    snapshots = {}
+    cursor = 0
+    while True:
+        cursor, keys = scan_keys(
+            redis_client, cursor, match=f"{METRICS_KEY_PREFIX}*", count=count
+        )
+        if keys:
+            pipe = redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(key)
+            for key, value in zip(keys, pipe.execute()):
+                if value:
+                    snapshots[key[len(METRICS_KEY_PREFIX):]] = json.loads(value)
+        if cursor == 0:
+            return snapshots
+
+
+metrics = Metrics()
@@ -0,0 +1,41 @@
+import hashlib
+import heapq
+from typing import List, Optional
+
+from config.app_config import GROUP_REPLICAS
+
+
+def _weight(node: str, group_id: str) -> int:
+    digest = hashlib.blake2b(f"{node}/{group_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def nodes_for_group(
+    group_id: str, nodes: List[str], replicas: Optional[int] = None
+) -> List[str]:
+    """
+    Returns the nodes a group is placed on.
+
+    Uses rendezvous (highest random weight) hashing: every node gets a
+    pseudo-random weight for the group and the `replicas` heaviest nodes hold
+    it. The placement needs no shared state, and adding or removing a node
+    only moves the groups that node wins or loses.
+
+    Args:
+        group_id (str): Group ID.
+        nodes (List[str]): All nodes.
+        replicas (int, optional): Number of nodes holding each group, defaults
+            to GROUP_REPLICAS. 0 places every group on every node.
+
+    Returns:
+        List[str]: Nodes of the group, in the order of `nodes`.
+    """
+
+    replicas = GROUP_REPLICAS if replicas is None else replicas
+    if not replicas or replicas >= len(nodes):
+        return list(nodes)
+
+    chosen = set(
+        heapq.nlargest(replicas, nodes, key=lambda node: _weight(node, group_id))
+    )
+    return [node for node in nodes if node in chosen]
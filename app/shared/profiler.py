@@ -0,0 +1,202 @@
+import functools
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+import redis
+
+from app.shared.redis_client import redis_client
+from config.app_config import PROFILER_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Profiles of worker processes: a queue of requests per signaled process,
+# and a hash of their collapsed stacks by process per request
+PROFILE_REQUESTS_KEY_PREFIX = "profile_requests_"
+PROFILE_KEY_PREFIX = "profile_"
+PROFILE_TTL = 10 * 60
+
+# Sent to the pool processes of a worker to make them profile themselves
+PROFILE_SIGNAL = signal.SIGUSR2
+
+# One profile at a time per process
+_profiling = threading.Lock()
+
+# Set by the signal handler to wake the profiler thread of a pool process
+_profile_requested = threading.Event()
+_profiler_thread: Optional[threading.Thread] = None
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _short_path(filename: str) -> str:
+    if "site-packages" in filename:
+        return filename.rsplit("site-packages", 1)[1].lstrip(os.sep)
+    if filename.startswith(os.getcwd()):
+        return os.path.relpath(filename)
+    return os.path.basename(filename)
+
+
+@functools.lru_cache(maxsize=4096)
+def _label(code) -> str:
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample(duration: float, interval: float = PROFILER_INTERVAL) -> Counter:
+    """
+    Samples the Python stacks of all threads of this process, except the
+    calling one, every `interval` seconds for `duration` seconds.
+
+    Nothing runs outside of a profile. While profiling, the overhead is one
+    walk of the thread stacks per interval.
+
+    Returns:
+        Counter: Number of samples of each stack, as `thread;outer;...;inner`.
+
+    Raises:
+        ProfilerBusy: If a profile of this process is already running.
+    """
+
+    if not _profiling.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this process.")
+    try:
+        own_thread = threading.get_ident()
+        stacks = Counter()
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(labels))] += 1
+            time.sleep(interval)
+        return stacks
+    finally:
+        _profiling.release()
+
+
+def collapse(stacks: Counter, root: Optional[str] = None) -> str:
+    """
+    Renders stacks in the collapsed format of flamegraph.pl and speedscope,
+    one `frame;frame;frame count` line per stack.
+    """
+
+    prefix = f"{root};" if root else ""
+    lines = (f"{prefix}{stack} {count}\n" for stack, count in stacks.most_common())
+    return "".join(lines)
+
+
+def _source(pid: Optional[int] = None) -> str:
+    return f"{socket.gethostname()}:{pid or os.getpid()}"
+
+
+def _profile_to_redis(request_id: str, duration: float, interval: float) -> None:
+    source = _source()
+    try:
+        collapsed = collapse(sample(duration, interval), root=source)
+    except ProfilerBusy as exc:
+        logger.warning(f"Profile {request_id} skipped: {exc}")
+        return
+    key = f"{PROFILE_KEY_PREFIX}{request_id}"
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(key, source, collapsed)
+        pipe.expire(key, PROFILE_TTL)
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning(f"Failed to store profile {request_id}: {exc}")
+
+
+def start_profile(request_id: str, duration: float, interval: float) -> None:
+    """
+    Profiles this process from a background thread and stores the result
+    in the `profile_<request_id>` hash.
+    """
+
+    threading.Thread(
+        target=_profile_to_redis,
+        args=(request_id, duration, interval),
+        name="profiler",
+        daemon=True,
+    ).start()
+
+
+def request_profile(
+    request_id: str, duration: float, interval: float, pids: Iterable[int]
+) -> None:
+    """
+    Queues a profile request for each process of this host about to receive
+    `PROFILE_SIGNAL`. A signal carries no request ID, so every process reads
+    its own queue and concurrent requests do not overwrite each other.
+    """
+
+    request = json.dumps(
+        {"id": request_id, "duration": duration, "interval": interval}
+    )
+    pipe = redis_client.pipeline(transaction=False)
+    for pid in pids:
+        key = f"{PROFILE_REQUESTS_KEY_PREFIX}{_source(pid)}"
+        pipe.rpush(key, request)
+        pipe.expire(key, PROFILE_TTL)
+    pipe.execute()
+
+
+def _run_requested_profiles() -> None:
+    key = f"{PROFILE_REQUESTS_KEY_PREFIX}{_source()}"
+    while True:
+        _profile_requested.wait()
+        _profile_requested.clear()
+        while True:
+            try:
+                request = redis_client.lpop(key)
+            except redis.RedisError as exc:
+                logger.warning(f"Failed to read profile requests: {exc}")
+                break
+            if not request:
+                break
+            request = json.loads(request)
+            _profile_to_redis(request["id"], request["duration"], request["interval"])
+
+
+def _on_profile_signal(signum, frame) -> None:
+    # Leave the signal handler at once, Redis is only read from the thread
+    _profile_requested.set()
+
+
+def install_profile_handler(**kwargs) -> None:
+    """
+    Lets the pool process profile itself when it receives `PROFILE_SIGNAL`,
+    from a thread started now and woken by the signal.
+
+    Connected to Celery's `worker_process_init` signal.
+    """
+
+    global _profiler_thread
+    if _profiler_thread is None:
+        _profiler_thread = threading.Thread(
+            target=_run_requested_profiles, name="profiler", daemon=True
+        )
+        _profiler_thread.start()
+    signal.signal(PROFILE_SIGNAL, _on_profile_signal)
+
+
+def read_profiles(request_id: str) -> Dict[str, str]:
+    """
+    Returns the collapsed stacks stored for a profile, by process.
+    """
+
+    return redis_client.hgetall(f"{PROFILE_KEY_PREFIX}{request_id}")
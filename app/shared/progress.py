@@ -0,0 +1,250 @@
+import json
+import logging
+import time
+from typing import Callable, Iterable, Optional
+
+import redis
+
+from app.shared.client_cache import client_cache
+from app.shared.redis_client import redis_client
+from config.app_config import PROGRESS_FLUSH_EVERY, PROGRESS_FLUSH_INTERVAL, PROGRESS_TTL
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_KEY_PREFIX = "task_progress_"
+
+# Hash fields that are not nodes
+META_FIELD = "__meta__"
+CURRENT_FIELD = "__current__"
+ROLLBACK_FIELD_PREFIX = "rb:"
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+class ProgressRecorder:
+    """
+    Records the per-node progress of a task in a Redis hash.
+
+    Updates are buffered and written in one pipelined round trip every
+    `flush_every` nodes, or once `flush_interval` seconds passed since the last
+    write, so a task touching N nodes costs about N / flush_every writes.
+    A recorder without a task ID (task called directly) records nothing.
+    """
+
+    def __init__(
+        self,
+        task_id: Optional[str],
+        operation: str,
+        total: int,
+        quorum: Optional[int] = None,
+        flush_every: int = PROGRESS_FLUSH_EVERY,
+        flush_interval: float = PROGRESS_FLUSH_INTERVAL,
+        ttl: int = PROGRESS_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.key = f"{PROGRESS_KEY_PREFIX}{task_id}" if task_id else None
+        self.flush_every = max(flush_every, 1)
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self._clock = clock
+        self._started_at = {}
+        self._finished = 0
+        self._last_flush = clock()
+        self._pending = {}
+        if self.key:
+            meta = {"op": operation, "total": total, "started": time.time()}
+            if quorum is not None:
+                meta["quorum"] = quorum
+            self._pending[META_FIELD] = _dumps(meta)
+
+    def start(self, node: str) -> None:
+        """
+        Marks a node as being processed.
+
+        Args:
+            node (str): Name of the node.
+        """
+
+        if not self.key:
+            return
+        self._started_at[node] = self._clock()
+        self._pending[CURRENT_FIELD] = _dumps({"node": node, "since": time.time()})
+        if self._clock() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def finish(self, node: str, status: str) -> None:
+        """
+        Records the outcome of the operation on a node, with its duration.
+
+        Args:
+            node (str): Name of the node.
+            status (str): Outcome on the node (created, deleted, failed, ...).
+        """
+
+        if not self.key:
+            return
+        entry = {"s": status}
+        started_at = self._started_at.pop(node, None)
+        if started_at is not None:
+            entry["ms"] = round((self._clock() - started_at) * 1000, 1)
+        self._pending[node] = _dumps(entry)
+        self._finished += 1
+        if (
+            self._finished % self.flush_every == 0
+            or self._clock() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self, done: bool = False) -> None:
+        """
+        Writes the buffered updates in a single pipelined round trip.
+
+        Args:
+            done (bool): Whether the task finished walking the nodes.
+        """
+
+        if not self.key:
+            return
+        if done:
+            self._pending.pop(CURRENT_FIELD, None)
+        if not self._pending and not done:
+            return
+
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            if self._pending:
+                pipe.hset(self.key, mapping=self._pending)
+            if done:
+                pipe.hdel(self.key, CURRENT_FIELD)
+            pipe.expire(self.key, self.ttl)
+            pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning(f"Failed to record progress on {self.key}: {exc}")
+        self._pending = {}
+        self._last_flush = self._clock()
+
+
+def record_rollback_status(
+    task_id: Optional[str], nodes: Iterable[str], status: str
+) -> None:
+    """
+    Records the rollback status of nodes in the progress of a task.
+
+    Args:
+        task_id (str): ID of the task whose operation is rolled back.
+        nodes (Iterable[str]): Nodes to update.
+        status (str): Rollback status (rolling_back, rolled_back, dead_lettered).
+    """
+
+    mapping = {f"{ROLLBACK_FIELD_PREFIX}{node}": status for node in nodes}
+    if not task_id or not mapping:
+        return
+
+    key = f"{PROGRESS_KEY_PREFIX}{task_id}"
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, PROGRESS_TTL)
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning(f"Failed to record rollback progress on {key}: {exc}")
+
+
+def record_node_status(
+    task_id: Optional[str],
+    node: str,
+    status: str,
+    duration_ms: Optional[float] = None,
+) -> None:
+    """
+    Records the outcome of a node outside of the task itself, e.g. when a
+    background repair or a per-node sub-operation processed it.
+
+    Args:
+        task_id (str): ID of the task whose progress is updated.
+        node (str): Name of the node.
+        status (str): Outcome on the node (repaired, repair_failed, ...).
+        duration_ms (float, optional): Time spent on the node.
+    """
+
+    if not task_id:
+        return
+
+    key = f"{PROGRESS_KEY_PREFIX}{task_id}"
+    entry = {"s": status}
+    if duration_ms is not None:
+        entry["ms"] = round(duration_ms, 1)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(key, node, _dumps(entry))
+        pipe.expire(key, PROGRESS_TTL)
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning(f"Failed to record node status on {key}: {exc}")
+
+
+def read_progress(task_id: str) -> Optional[dict]:
+    """
+    Returns the per-node progress recorded for a task.
+
+    Args:
+        task_id (str): ID of the task.
+
+    Returns:
+        dict: Progress summary with per-node status and timing, the nodes
+            left to a repair apart from the processed ones, and the achieved
+            replication of quorum creations, or None if nothing was
+            recorded for the task.
+    """
+
+    key = f"{PROGRESS_KEY_PREFIX}{task_id}"
+    fields = client_cache.read(key, lambda: redis_client.hgetall(key))
+    if not fields:
+        return None
+
+    meta = json.loads(fields.pop(META_FIELD, "{}"))
+    current = fields.pop(CURRENT_FIELD, None)
+
+    nodes = {}
+    rollbacks = {}
+    for field, value in fields.items():
+        if field.startswith(ROLLBACK_FIELD_PREFIX):
+            rollbacks[field[len(ROLLBACK_FIELD_PREFIX):]] = value
+            continue
+        entry = json.loads(value)
+        nodes[field] = {"status": entry["s"], "duration_ms": entry.get("ms")}
+    for node, status in rollbacks.items():
+        nodes.setdefault(node, {"status": None, "duration_ms": None})
+        nodes[node]["rollback"] = status
+
+    counts = {}
+    for entry in nodes.values():
+        if entry["status"]:
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        if entry.get("rollback"):
+            counts[entry["rollback"]] = counts.get(entry["rollback"], 0) + 1
+
+    summary = {
+        "operation": meta.get("op"),
+        "total": meta.get("total"),
+        # Not processed yet, a background repair will
+        "processed": sum(
+            1
+            for entry in nodes.values()
+            if entry["status"] and entry["status"] != "pending_repair"
+        ),
+        "pending_repair": counts.get("pending_repair", 0),
+        "counts": counts,
+        "current": json.loads(current) if current else None,
+        "nodes": nodes,
+    }
+    if "quorum" in meta:
+        summary["replication"] = {
+            "required": meta["quorum"],
+            "acknowledged": counts.get("created", 0) + counts.get("repaired", 0),
+            "pending_repair": counts.get("pending_repair", 0),
+            "total": meta.get("total"),
+        }
+    return summary
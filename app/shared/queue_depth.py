@@ -0,0 +1,30 @@
+from kombu import Connection
+
+from config.app_config import CELERY_BROKER_URL
+
+
+def get_queue_depth(*queue_names: str) -> int:
+    """
+    Returns the number of messages waiting in broker queues.
+
+    Args:
+        queue_names (str): Names of the queues. A queue not declared yet, e.g.
+            the queue of a node no task was sent to, counts as empty.
+
+    Returns:
+        int: Number of ready messages in the queues.
+    """
+
+    depth = 0
+    with Connection(CELERY_BROKER_URL) as connection:
+        for queue_name in queue_names:
+            # A missing queue closes its channel, each queue gets its own
+            channel = connection.channel()
+            try:
+                declared = channel.queue_declare(queue=queue_name, passive=True)
+                depth += declared.message_count
+            except connection.channel_errors:
+                continue
+            finally:
+                channel.close()
+    return depth
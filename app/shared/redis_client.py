@@ -1,6 +1,178 @@
+from typing import List, Optional, Tuple
+
 import redis
+from redis.client import Pipeline
+from redis.cluster import ClusterNode, ClusterPipeline, RedisCluster
+from redis.sentinel import Sentinel
+
+from app.shared.tracing import tracer
+from config.app_config import (
+    REDIS_CLUSTER_NODES,
+    REDIS_DB,
+    REDIS_HASH_TAGS,
+    REDIS_HOST,
+    REDIS_MODE,
+    REDIS_PORT,
+    REDIS_SENTINEL_MASTER,
+    REDIS_SENTINELS,
+)
+
+
+class TracedPipeline(Pipeline):
+    def execute(self, raise_on_error: bool = True):
+        with tracer.child_span("redis pipeline", commands=len(self.command_stack)):
+            return super().execute(raise_on_error)
+
+
+class TracedRedis(redis.Redis):
+    """
+    Redis client recording a span per command, and per pipeline, inside
+    sampled traces.
+    """
+
+    def execute_command(self, *args, **options):
+        with tracer.child_span(f"redis {args[0]}"):
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None) -> Pipeline:
+        return TracedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class TracedClusterPipeline(ClusterPipeline):
+    def execute(self, raise_on_error: bool = True):
+        with tracer.child_span("redis pipeline", commands=len(self.command_stack)):
+            return super().execute(raise_on_error)
+
+
+class TracedRedisCluster(RedisCluster):
+    """
+    Cluster client recording spans like `TracedRedis`. Its pipelines send
+    the commands of each shard in one round trip, and only run without a
+    transaction.
+    """
+
+    def execute_command(self, *args, **kwargs):
+        with tracer.child_span(f"redis {args[0]}"):
+            return super().execute_command(*args, **kwargs)
+
+    def pipeline(self, transaction=None, shard_hint=None) -> ClusterPipeline:
+        if transaction or shard_hint:
+            # Raises the error of the base client
+            return super().pipeline(transaction, shard_hint)
+        return TracedClusterPipeline(
+            nodes_manager=self.nodes_manager,
+            commands_parser=self.commands_parser,
+            startup_nodes=self.nodes_manager.startup_nodes,
+            result_callbacks=self.result_callbacks,
+            cluster_response_callbacks=self.cluster_response_callbacks,
+            cluster_error_retry_attempts=self.cluster_error_retry_attempts,
+            read_from_replicas=self.read_from_replicas,
+            reinitialize_steps=self.reinitialize_steps,
+            lock=self._lock,
+        )
+
+
+def _address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host, int(port)
+
+
+def create_redis_client(mode: str = REDIS_MODE) -> redis.Redis:
+    """
+    Creates the Redis client of the deployment:
+
+    - standalone: the server at REDIS_HOST:REDIS_PORT.
+    - sentinel: the master REDIS_SENTINEL_MASTER, looked up through
+      REDIS_SENTINELS on every new connection, so connections follow a
+      failover.
+    - cluster: the cluster of REDIS_CLUSTER_NODES (REDIS_HOST:REDIS_PORT by
+      default). Clusters only have database 0, REDIS_DB is ignored.
+
+    Args:
+        mode (str): standalone, sentinel or cluster.
+
+    Returns:
+        redis.Redis: The client, a RedisCluster in cluster mode.
+    """
+
+    if mode == "sentinel":
+        sentinel = Sentinel([_address(address) for address in REDIS_SENTINELS])
+        return sentinel.master_for(
+            REDIS_SENTINEL_MASTER,
+            redis_class=TracedRedis,
+            db=REDIS_DB,
+            decode_responses=True,
+        )
+    if mode == "cluster":
+        addresses = REDIS_CLUSTER_NODES or [f"{REDIS_HOST}:{REDIS_PORT}"]
+        return TracedRedisCluster(
+            startup_nodes=[ClusterNode(*_address(address)) for address in addresses],
+            decode_responses=True,
+        )
+    if mode != "standalone":
+        raise ValueError(f"Unknown REDIS_MODE {mode}.")
+    return TracedRedis(
+        host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True
+    )
+
+
+def group_key(prefix: str, group_id: str) -> str:
+    """
+    Returns the key of a group under `prefix`.
+
+    With REDIS_HASH_TAGS the group ID is a hash tag, `prefix{group_id}`: all
+    the keys of a group map to the same cluster slot, so the commands of a
+    group pipeline go to one shard.
+    """
+
+    return f"{prefix}{{{group_id}}}" if REDIS_HASH_TAGS else f"{prefix}{group_id}"
+
+
+def group_id_from_key(prefix: str, key: str) -> str:
+    """
+    Returns the group ID of a key built by `group_key`, with or without hash
+    tag.
+    """
+
+    group_id = key[len(prefix) :]
+    if group_id.startswith("{") and group_id.endswith("}"):
+        return group_id[1:-1]
+    return group_id
+
+
+def scan_keys(
+    client: redis.Redis,
+    cursor: int = 0,
+    match: Optional[str] = None,
+    count: Optional[int] = None,
+) -> Tuple[int, List[str]]:
+    """
+    One SCAN page, also across the primaries of a cluster.
+
+    A cluster is scanned one primary after the other, the cursor packing the
+    position of the primary with its own cursor, so callers keep a single
+    integer cursor that is 0 once done. A resharding during a scan may skip
+    or repeat keys, like a rehash does within a server.
+
+    Returns:
+        Tuple[int, List[str]]: Cursor of the next page (0 when done) and the
+            keys of this page.
+    """
+
+    if not isinstance(client, RedisCluster):
+        return client.scan(cursor=cursor, match=match, count=count)
 
-from config.app_config import REDIS_DB, REDIS_HOST, REDIS_PORT
+    primaries = sorted(client.get_primaries(), key=lambda node: node.name)
+    index, node_cursor = cursor % len(primaries), cursor // len(primaries)
+    connection = client.get_redis_connection(primaries[index])
+    node_cursor, keys = connection.scan(cursor=node_cursor, match=match, count=count)
+    if node_cursor == 0:
+        index += 1
+        if index == len(primaries):
+            return 0, keys
+    return node_cursor * len(primaries) + index, keys
 
 
-redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+redis_client = create_redis_client()
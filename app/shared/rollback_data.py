@@ -0,0 +1,109 @@
+import json
+from typing import List, Optional, Tuple
+
+from app.shared.redis_client import group_id_from_key, redis_client, scan_keys
+
+ROLLBACK_KEY_PREFIXES = {
+    "create_group": "rollback_create_group_",
+    "delete_group": "rollback_delete_group_",
+}
+# Nodes a quorum creation still has to create the group on
+REPAIR_KEY_PREFIX = "repair_create_group_"
+
+
+def decode_rollback_item(rollback_item: Optional[str]) -> dict:
+    """
+    Decodes rollback data read from Redis, tolerating missing or invalid items.
+
+    Args:
+        rollback_item (str): Raw rollback data read from Redis.
+
+    Returns:
+        dict: Decoded rollback data, empty if there is none or it is invalid.
+    """
+
+    if not rollback_item:
+        return {}
+    try:
+        rollback_data = json.loads(rollback_item)
+    except (json.JSONDecodeError, ValueError):
+        return {}
+    return rollback_data if isinstance(rollback_data, dict) else {}
+
+
+def scan_rollbacks(
+    cursor: int = 0,
+    count: int = 100,
+    node: Optional[str] = None,
+    operation: Optional[str] = None,
+) -> Tuple[int, List[dict]]:
+    """
+    Lists pending rollbacks one page at a time with SCAN, never KEYS.
+
+    Creation locks (empty rollback data set while a group is being created)
+    are listed as well, with the `lock` state.
+
+    Args:
+        cursor (int): Cursor returned by the previous page, 0 to start.
+        count (int): Hint of the number of keys to examine.
+        node (str, optional): Only return rollbacks pending on this node.
+        operation (str, optional): Only return rollbacks of this operation
+            (create_group or delete_group).
+
+    Returns:
+        Tuple[int, List[dict]]: Cursor of the next page (0 when done) and the
+            rollbacks of this page.
+    """
+
+    if operation:
+        match = f"{ROLLBACK_KEY_PREFIXES[operation]}*"
+    else:
+        match = "rollback_*_group_*"
+    next_cursor, keys = scan_keys(redis_client, cursor, match=match, count=count)
+    if not keys:
+        return next_cursor, []
+
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.get(key)
+        pipe.ttl(key)
+    values = pipe.execute()
+
+    rollbacks = []
+    for key, rollback_item, ttl in zip(keys, values[::2], values[1::2]):
+        key_operation, group_id = _parse_rollback_key(key)
+        if key_operation is None or rollback_item is None:
+            continue
+        rollback_data = decode_rollback_item(rollback_item)
+        nodes = rollback_data.get("nodes", [])
+        if node and node not in nodes:
+            continue
+        entry = {
+            "key": key,
+            "operation": key_operation,
+            "group_id": group_id,
+            "state": _rollback_state(rollback_item, rollback_data),
+            "nodes": nodes,
+            "ttl": ttl,
+        }
+        if entry["state"] == "lock" and "locked_at" in rollback_data:
+            entry["locked_at"] = rollback_data["locked_at"]
+            entry["task_id"] = rollback_data.get("task_id")
+        rollbacks.append(entry)
+    return next_cursor, rollbacks
+
+
+def _parse_rollback_key(key: str) -> Tuple[Optional[str], Optional[str]]:
+    for operation, prefix in ROLLBACK_KEY_PREFIXES.items():
+        if key.startswith(prefix):
+            return operation, group_id_from_key(prefix, key)
+    return None, None
+
+
+def _rollback_state(rollback_item: str, rollback_data: dict) -> str:
+    # Locks were empty lists before they carried their acquisition time
+    if rollback_item == json.dumps([]) or (
+        "locked_at" in rollback_data and "nodes" not in rollback_data
+    ):
+        return "lock"
+    return "rolling_back" if rollback_data else "invalid"
@@ -0,0 +1,46 @@
+import logging
+
+import redis
+
+from app.shared.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+TASKS_COMPLETED_KEY = "tasks_completed_total"
+
+# Tasks of the group operations, the ones the API admits
+GROUP_OPERATION_TASKS = {
+    "app.celery_tasks.create_task.create_group",
+    "app.celery_tasks.create_task.create_group_on_node",
+    "app.celery_tasks.create_task.rollback_create_group",
+    "app.celery_tasks.create_task.repair_create_group",
+    "app.celery_tasks.delete_task.delete_group",
+    "app.celery_tasks.delete_task.delete_group_on_node",
+    "app.celery_tasks.delete_task.rollback_delete_group",
+}
+
+
+def record_task_completed(sender=None, **kwargs) -> None:
+    """
+    Counts a finished group operation task, used by the API to estimate the
+    service rate.
+
+    Connected to Celery's `task_postrun` signal.
+    """
+
+    if sender is None or sender.name not in GROUP_OPERATION_TASKS:
+        return
+    try:
+        redis_client.incr(TASKS_COMPLETED_KEY)
+    except redis.RedisError as exc:
+        logger.warning(f"Failed to record completed task: {exc}")
+
+
+def read_tasks_completed() -> int:
+    """
+    Returns the number of group operation tasks finished by all workers so
+    far.
+    """
+
+    value = redis_client.get(TASKS_COMPLETED_KEY)
+    return int(value) if value else 0
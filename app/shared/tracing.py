@@ -0,0 +1,371 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config.app_config import TRACING_EXPORTER, TRACING_PATH, TRACING_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# W3C trace context header, also carried in the Celery message headers
+TRACEPARENT_HEADER = "traceparent"
+# Message header with the publish time, to measure the time spent queued
+PUBLISHED_AT_HEADER = "trace_published_at"
+
+
+class Span:
+    """
+    Timed operation of a trace. Unsampled spans only carry the context to
+    propagate, they are never exported.
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "sampled",
+        "start_time",
+        "end_time",
+        "attributes",
+        "status",
+        "_tracer",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        attributes: Optional[dict] = None,
+        start_time: Optional[float] = None,
+    ):
+        self._tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start_time = start_time or time.time()
+        self.end_time: Optional[float] = None
+        self.attributes = attributes or {}
+        self.status = "ok"
+
+    @property
+    def traceparent(self) -> str:
+        flags = "01" if self.sampled else "00"
+        return f"00-{self.trace_id}-{self.span_id}-{flags}"
+
+    def set_attribute(self, key: str, value) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def set_error(self, error) -> None:
+        self.status = "error"
+        self.set_attribute("error", repr(error))
+
+    def end(self, end_time: Optional[float] = None) -> None:
+        if self.end_time is not None:
+            return
+        self.end_time = end_time or time.time()
+        if self.sampled:
+            self._tracer.export(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": round((self.end_time - self.start_time) * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    Returns the trace ID, parent span ID and sampled flag of a W3C
+    `traceparent` value, None if it is missing or malformed.
+    """
+
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+class InMemoryExporter:
+    """
+    Keeps the exported spans in a list, for tests.
+    """
+
+    def __init__(self):
+        self.spans: List[dict] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: dict) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def by_name(self) -> Dict[str, dict]:
+        return {span["name"]: span for span in self.spans}
+
+
+class JsonlExporter:
+    """
+    Appends the exported spans to a file, one JSON object per line. Several
+    processes can share the file, each span is written with one append.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._pid: Optional[int] = None
+
+    def export(self, span: dict) -> None:
+        line = json.dumps(span, separators=(",", ":"), default=str).encode() + b"\n"
+        with self._lock:
+            try:
+                if self._fd is None or self._pid != os.getpid():
+                    self._fd = os.open(
+                        self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+                    )
+                    self._pid = os.getpid()
+                os.write(self._fd, line)
+            except OSError as exc:
+                logger.warning(f"Failed to export span to {self.path}: {exc}")
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Creates spans and exports the sampled ones.
+
+    Sampling is decided once per trace, at its root (head-based), and
+    carried in the `traceparent` of its children, in this process and
+    downstream. Child spans (node calls, Redis commands) are only created
+    inside a sampled span, so untraced code pays one context lookup.
+    """
+
+    def __init__(self, exporter=None, sample_rate: float = TRACING_SAMPLE_RATE):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def export(self, span: Span) -> None:
+        try:
+            self.exporter.export(span.to_dict())
+        except Exception as exc:
+            logger.warning(f"Failed to export span {span.name}: {exc}")
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def current_traceparent(self) -> Optional[str]:
+        span = _current_span.get()
+        return span.traceparent if span is not None else None
+
+    def start_span(
+        self,
+        name: str,
+        traceparent: Optional[str] = None,
+        root: bool = False,
+        attributes: Optional[dict] = None,
+        start_time: Optional[float] = None,
+    ) -> Optional[Span]:
+        """
+        Starts a span, child of `traceparent` or of the current span.
+
+        Returns:
+            Span: The span, None if tracing is disabled, or if there is no
+                parent and `root` is not set.
+        """
+
+        if not self.enabled:
+            return None
+        context = parse_traceparent(traceparent)
+        if context is None:
+            parent = _current_span.get()
+            if parent is not None:
+                context = parent.trace_id, parent.span_id, parent.sampled
+        if context is None:
+            if not root:
+                return None
+            sampled = random.random() < self.sample_rate
+            context = os.urandom(16).hex(), None, sampled
+        trace_id, parent_id, sampled = context
+        return Span(self, name, trace_id, parent_id, sampled, attributes, start_time)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        traceparent: Optional[str] = None,
+        root: bool = False,
+        **attributes,
+    ) -> Iterator[Optional[Span]]:
+        """
+        Runs a block in a span, made the current span. Exceptions mark the
+        span as failed. Yields None when no span is started.
+        """
+
+        span = self.start_span(name, traceparent, root, attributes)
+        if span is None:
+            yield None
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.set_error(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    @contextmanager
+    def child_span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """
+        Like `span`, only inside a sampled span: the cheap path for the
+        frequent operations (node calls, Redis commands).
+        """
+
+        parent = _current_span.get()
+        if parent is None or not parent.sampled or not self.enabled:
+            yield None
+            return
+        with self.span(name, **attributes) as span:
+            yield span
+
+    def activate(self, span: Optional[Span]):
+        """
+        Makes `span` the current span until `deactivate` is called with the
+        returned token, for spans opened and closed by separate callbacks.
+        """
+
+        return _current_span.set(span)
+
+    def deactivate(self, token) -> None:
+        _current_span.reset(token)
+
+
+def build_exporter(kind: str = TRACING_EXPORTER, path: str = TRACING_PATH):
+    if kind == "jsonl":
+        return JsonlExporter(path)
+    if kind == "memory":
+        return InMemoryExporter()
+    if kind:
+        logger.warning(f"Unknown tracing exporter {kind}, tracing disabled.")
+    return None
+
+
+tracer = Tracer(build_exporter())
+
+# Span of the message being published by this thread, and spans of the
+# tasks running in this process with the token restoring the previous span
+_publishing = threading.local()
+_task_spans: Dict[str, tuple] = {}
+
+
+def inject_on_publish(sender=None, headers=None, **kwargs) -> None:
+    """
+    Propagates the current trace in the headers of a published task, under
+    a span of the publish. Messages queued with a `traceparent` already
+    (buffered or fairly scheduled tasks) keep it.
+
+    Connected to Celery's `before_task_publish` signal.
+    """
+
+    # A failed publish never reaches after_task_publish, its span is dropped
+    _publishing.span = None
+    if headers is None:
+        return
+    headers[PUBLISHED_AT_HEADER] = time.time()
+    if headers.get(TRACEPARENT_HEADER):
+        return
+    span = tracer.start_span(f"publish {sender}", attributes={"task": sender})
+    if span is not None:
+        headers[TRACEPARENT_HEADER] = span.traceparent
+        _publishing.span = span
+
+
+def end_publish_span(**kwargs) -> None:
+    """
+    Connected to Celery's `after_task_publish` signal.
+    """
+
+    span = getattr(_publishing, "span", None)
+    if span is not None:
+        _publishing.span = None
+        span.end()
+
+
+def start_task_span(task_id=None, task=None, **kwargs) -> None:
+    """
+    Starts the span of a task, child of the trace in its message headers.
+    A `queued` span covers the time between the publish and the start.
+
+    Connected to Celery's `task_prerun` signal.
+    """
+
+    traceparent = getattr(task.request, TRACEPARENT_HEADER, None)
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None)
+    span = tracer.start_span(
+        f"run {task.name}",
+        traceparent,
+        root=True,
+        attributes={"task_id": task_id, "retries": task.request.retries},
+    )
+    if span is None:
+        return
+    if published_at and span.sampled:
+        queued = Span(
+            tracer,
+            f"queued {task.name}",
+            span.trace_id,
+            span.parent_id,
+            True,
+            start_time=float(published_at),
+        )
+        queued.end(span.start_time)
+    _task_spans[task_id] = (span, tracer.activate(span))
+
+
+def end_task_span(task_id=None, state=None, **kwargs) -> None:
+    """
+    Connected to Celery's `task_postrun` signal.
+    """
+
+    span, token = _task_spans.pop(task_id, (None, None))
+    if span is None:
+        return
+    tracer.deactivate(token)
+    span.set_attribute("state", state)
+    if state not in ("SUCCESS", "RETRY"):
+        span.status = "error"
+    span.end()
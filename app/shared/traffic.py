@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from httpx import URL, Response
+
+from config.app_config import TRAFFIC_RECORD_MAX_BYTES, TRAFFIC_RECORD_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class TrafficRecorder:
+    """
+    Appends a compact trace of API requests and node calls to a file, one
+    JSON object per line, for `python -m benchmarks.replay`.
+
+    API processes and workers can share the file: each record is written
+    with a single append. Records carry the wall clock time (`t`) so the
+    ones of different processes line up, and their duration in
+    milliseconds (`ms`). Recording stops once the file reaches `max_bytes`.
+    """
+
+    def __init__(
+        self, path: str = TRAFFIC_RECORD_PATH, max_bytes: int = TRAFFIC_RECORD_MAX_BYTES
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = bool(path)
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._pid: Optional[int] = None
+
+    def _write(self, record: dict) -> None:
+        line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+        with self._lock:
+            try:
+                if self._fd is None or self._pid != os.getpid():
+                    # Opened lazily, and again in forked worker processes
+                    self._fd = os.open(
+                        self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+                    )
+                    self._pid = os.getpid()
+                if os.fstat(self._fd).st_size + len(line) > self.max_bytes:
+                    logger.warning(f"Traffic trace {self.path} is full, stopping.")
+                    self.enabled = False
+                    return
+                os.write(self._fd, line)
+            except OSError as exc:
+                logger.warning(f"Failed to record traffic to {self.path}: {exc}")
+
+    def record_request(
+        self,
+        method: str,
+        path: str,
+        body,
+        headers: dict,
+        status: int,
+        started_at: float,
+        task_id: Optional[str] = None,
+    ) -> None:
+        """
+        Records an API request. `started_at` is a `perf_counter` time.
+        """
+
+        if not self.enabled:
+            return
+        elapsed = time.perf_counter() - started_at
+        record = {
+            "t": round(time.time() - elapsed, 6),
+            "src": "api",
+            "method": method,
+            "path": path,
+            "status": status,
+            "ms": round(elapsed * 1000, 3),
+        }
+        if body is not None:
+            record["body"] = body
+        if headers:
+            record["headers"] = headers
+        if task_id:
+            record["task_id"] = task_id
+        self._write(record)
+
+    def record_node_call(
+        self,
+        method: str,
+        url: str,
+        started_at: float,
+        response: Optional[Response] = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        """
+        Records a node call that got `response`, or failed with `error`
+        (recorded with status 0). `started_at` is a `perf_counter` time.
+        """
+
+        if not self.enabled:
+            return
+        elapsed = time.perf_counter() - started_at
+        url = URL(url)
+        record = {
+            "t": round(time.time() - elapsed, 6),
+            "src": "node",
+            "node": f"{url.host}:{url.port}" if url.port else url.host,
+            "method": method,
+            "path": url.path,
+            "status": response.status_code if response is not None else 0,
+            "ms": round(elapsed * 1000, 3),
+        }
+        if error is not None:
+            record["error"] = type(error).__name__
+        self._write(record)
+
+
+traffic_recorder = TrafficRecorder()
@@ -0,0 +1,116 @@
+"""
+Microbenchmarks of the task hot paths, e.g.:
+
+    python -m benchmarks
+    python -m benchmarks --only create_group --iterations 500
+    python -m benchmarks --update-baseline
+
+Exits with status 1 if a path is slower, or allocates more, than its
+baseline beyond the thresholds. Each path runs --runs times and the median
+run is compared. The API paths, noisier, run three times the rounds and are
+gated by --api-threshold. Baselines are machine specific: record them
+on the machine that checks them.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from functools import partial
+from pathlib import Path
+from typing import List, Optional
+
+# Publish to an in-memory broker, must be set before the Celery app is built
+os.environ["CELERY_BROKER_URL"] = "memory://"
+os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+from benchmarks.paths import (  # noqa: E402
+    API_BENCHMARKS,
+    API_REPEAT_FACTOR,
+    BENCHMARKS,
+)
+from benchmarks.runner import compare, measure, median_result  # noqa: E402
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--runs", type=int, default=3, help="runs of each path, the median counts"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="tolerated throughput loss"
+    )
+    parser.add_argument(
+        "--api-threshold",
+        type=float,
+        default=0.4,
+        help="tolerated throughput loss of the API paths",
+    )
+    parser.add_argument(
+        "--alloc-threshold", type=float, default=0.1, help="tolerated alloc growth"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="store the results"
+    )
+    return parser
+
+
+def _configure_logging() -> None:
+    # Keep the formatting cost of the task logs in the measurements
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logging.basicConfig(level=logging.INFO, handlers=[handler], force=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    _configure_logging()
+
+    results = {}
+    print(f"{'benchmark':<24}{'ops/s':>12}{'peak bytes':>12}{'vs baseline':>14}")
+    baseline = (
+        json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    )
+    for name in args.only or BENCHMARKS:
+        repeat = args.repeat * (API_REPEAT_FACTOR if name in API_BENCHMARKS else 1)
+        run = partial(measure, iterations=args.iterations, repeat=repeat)
+        result = results[name] = median_result(
+            [BENCHMARKS[name](run) for _ in range(max(args.runs, 1))]
+        )
+        change = ""
+        if name in baseline:
+            ratio = result["ops_per_sec"] / baseline[name]["ops_per_sec"] - 1
+            change = f"{ratio:+.1%}"
+        print(
+            f"{name:<24}{result['ops_per_sec']:>12.0f}"
+            f"{result['peak_bytes']:>12}{change:>14}"
+        )
+
+    if args.update_baseline:
+        args.baseline.write_text(
+            json.dumps({**baseline, **results}, indent=2, sort_keys=True) + "\n"
+        )
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(
+        results,
+        baseline,
+        args.threshold,
+        args.alloc_threshold,
+        thresholds={name: args.api_threshold for name in API_BENCHMARKS},
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+from fnmatch import fnmatchcase
+
+from redis.exceptions import ConnectionError, TimeoutError
+
+
+class MockPipeline:
+    def __init__(self, redis_client):
+        self._redis_client = redis_client
+        self._commands = []
+
+    def __getattr__(self, name):
+        def queue_command(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+
+        return queue_command
+
+    def execute(self):
+        self._redis_client.round_trips += 1
+        commands, self._commands = self._commands, []
+        return [
+            getattr(self._redis_client, name)(*args, _pipelined=True, **kwargs)
+            for name, args, kwargs in commands
+        ]
+
+
+class MockRedis:
+    def __init__(self, *args, **kwargs):
+        self.data = {"existing_key": "value"}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def _call(self, pipelined):
+        if not pipelined:
+            self.round_trips += 1
+
+    def set(self, name, value, ex=None, px=None, nx=False, xx=False, _pipelined=False):
+        self._call(_pipelined)
+        if name == "error_key":
+            raise ConnectionError("Failed to connect to Redis")
+        if (nx and name in self.data) or (xx and name not in self.data):
+            return None
+        self.data[name] = value
+        if ex:
+            self.ttls[name] = ex
+        return True
+
+    def get(self, name, _pipelined=False):
+        self._call(_pipelined)
+        if name == "timeout_key":
+            raise TimeoutError("Redis operation timed out")
+        return self.data.get(name)
+
+    def delete(self, name, _pipelined=False):
+        self._call(_pipelined)
+        if name == "nonexistent_key":
+            return 0
+        self.ttls.pop(name, None)
+        return self.data.pop(name, None) is not None
+
+    def unlink(self, name, _pipelined=False):
+        return self.delete(name, _pipelined=_pipelined)
+
+    def exists(self, name, _pipelined=False):
+        self._call(_pipelined)
+        return name in self.data
+
+    def incr(self, name, amount=1, _pipelined=False):
+        self._call(_pipelined)
+        self.data[name] = str(int(self.data.get(name, 0)) + amount)
+        return int(self.data[name])
+
+    def expire(self, name, time, _pipelined=False):
+        self._call(_pipelined)
+        self.ttls[name] = time
+        return name in self.data
+
+    def hset(self, name, key=None, value=None, mapping=None, _pipelined=False):
+        self._call(_pipelined)
+        hash_value = self.data.setdefault(name, {})
+        items = dict(mapping or {})
+        if key is not None:
+            items[key] = value
+        added = len(set(items) - set(hash_value))
+        hash_value.update({field: str(item) for field, item in items.items()})
+        return added
+
+    def hget(self, name, key, _pipelined=False):
+        self._call(_pipelined)
+        return self.data.get(name, {}).get(key)
+
+    def hincrby(self, name, key, amount=1, _pipelined=False):
+        self._call(_pipelined)
+        hash_value = self.data.setdefault(name, {})
+        hash_value[key] = str(int(hash_value.get(key, 0)) + amount)
+        return int(hash_value[key])
+
+    def hmget(self, name, keys, _pipelined=False):
+        self._call(_pipelined)
+        hash_value = self.data.get(name, {})
+        return [hash_value.get(key) for key in keys]
+
+    def hgetall(self, name, _pipelined=False):
+        self._call(_pipelined)
+        return dict(self.data.get(name, {}))
+
+    def hdel(self, name, *keys, _pipelined=False):
+        self._call(_pipelined)
+        hash_value = self.data.get(name, {})
+        return sum(1 for key in keys if hash_value.pop(key, None) is not None)
+
+    def rpush(self, name, *values, _pipelined=False):
+        self._call(_pipelined)
+        list_value = self.data.setdefault(name, [])
+        list_value.extend(str(value) for value in values)
+        return len(list_value)
+
+    def lpush(self, name, *values, _pipelined=False):
+        self._call(_pipelined)
+        list_value = self.data.setdefault(name, [])
+        for value in values:
+            list_value.insert(0, str(value))
+        return len(list_value)
+
+    def lpop(self, name, _pipelined=False):
+        self._call(_pipelined)
+        list_value = self.data.get(name)
+        if not list_value:
+            return None
+        value = list_value.pop(0)
+        if not list_value:
+            del self.data[name]
+        return value
+
+    def llen(self, name, _pipelined=False):
+        self._call(_pipelined)
+        return len(self.data.get(name, []))
+
+    def sadd(self, name, *values, _pipelined=False):
+        self._call(_pipelined)
+        set_value = self.data.setdefault(name, set())
+        added = len(set(values) - set_value)
+        set_value.update(values)
+        return added
+
+    def srem(self, name, *values, _pipelined=False):
+        self._call(_pipelined)
+        set_value = self.data.get(name, set())
+        removed = len(set(values) & set_value)
+        set_value.difference_update(values)
+        if not set_value:
+            self.data.pop(name, None)
+        return removed
+
+    def smembers(self, name, _pipelined=False):
+        self._call(_pipelined)
+        return set(self.data.get(name, set()))
+
+    def smismember(self, name, values, _pipelined=False):
+        self._call(_pipelined)
+        set_value = self.data.get(name, set())
+        return [int(value in set_value) for value in values]
+
+    def ttl(self, name, _pipelined=False):
+        self._call(_pipelined)
+        if name not in self.data:
+            return -2
+        return self.ttls.get(name, -1)
+
+    @staticmethod
+    def _scan_page(names, cursor, match, count):
+        names = sorted(names)
+        page = names[cursor : cursor + count]
+        next_cursor = cursor + count if cursor + count < len(names) else 0
+        return next_cursor, [
+            name for name in page if match is None or fnmatchcase(name, match)
+        ]
+
+    def scan(self, cursor=0, match=None, count=None, _pipelined=False):
+        self._call(_pipelined)
+        return self._scan_page(self.data, cursor, match, count or 10)
+
+    def hscan(self, name, cursor=0, match=None, count=None, _pipelined=False):
+        self._call(_pipelined)
+        hash_value = self.data.get(name, {})
+        next_cursor, fields = self._scan_page(hash_value, cursor, match, count or 10)
+        return next_cursor, {field: hash_value[field] for field in fields}
+
+    def sscan(self, name, cursor=0, match=None, count=None, _pipelined=False):
+        self._call(_pipelined)
+        return self._scan_page(self.data.get(name, set()), cursor, match, count or 10)
+
+    def pipeline(self, transaction=True):
+        return MockPipeline(self)
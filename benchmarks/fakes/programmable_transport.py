@@ -0,0 +1,291 @@
+import json
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from httpx import BaseTransport, ConnectError, ReadError, Request, Response
+
+# A latency distribution draws a delay in seconds from the scenario's RNG
+Distribution = Callable[[random.Random], float]
+
+
+def constant(seconds: float) -> Distribution:
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> Distribution:
+    return lambda rng: rng.uniform(low, high)
+
+
+def exponential(mean: float) -> Distribution:
+    return lambda rng: rng.expovariate(1 / mean)
+
+
+def lognormal(median: float, sigma: float) -> Distribution:
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+
+class RealClock:
+    def now(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Clock whose sleeps only move time forward, so scenarios spanning minutes
+    run instantly and deterministically.
+    """
+
+    def __init__(self):
+        self._now = 0.0
+
+    def now(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float) -> None:
+        self._now += max(seconds, 0)
+
+    def advance(self, seconds: float) -> None:
+        self.sleep(seconds)
+
+
+@dataclass
+class Rule:
+    kind: str
+    start: float = 0.0
+    end: float = math.inf
+    operations: Optional[set] = None
+    latency: Optional[Distribution] = None
+    factor: float = 1.0
+    status: Optional[int] = None
+    probability: float = 1.0
+    period: float = 0.0
+    down_for: float = 0.0
+
+    def active(self, at: float, operation: str) -> bool:
+        if not self.start <= at < self.end:
+            return False
+        if self.operations and operation not in self.operations:
+            return False
+        if self.kind == "flap":
+            return (at - self.start) % self.period < self.down_for
+        return True
+
+
+@dataclass
+class Call:
+    at: float
+    node: str
+    operation: str
+    group_id: str
+    outcome: str
+    duration: float
+
+
+class NodeScenario:
+    """
+    Behaviour of one node over time. Every method returns the node so rules
+    can be chained, times are seconds since the transport started.
+    """
+
+    def __init__(self, scenario: "Scenario", name: str):
+        self._scenario = scenario
+        self.name = name
+        self.rules: List[Rule] = []
+        self.groups = set()
+
+    def _add(self, rule: Rule) -> "NodeScenario":
+        self.rules.append(rule)
+        return self
+
+    def latency(self, distribution: Distribution, start=0.0, end=math.inf, on=None):
+        return self._add(Rule("latency", start, end, _ops(on), latency=distribution))
+
+    def slowdown(self, factor: float, start=0.0, end=math.inf, on=None):
+        return self._add(Rule("slowdown", start, end, _ops(on), factor=factor))
+
+    def outage(self, start=0.0, end=math.inf, status: Optional[int] = None, on=None):
+        """
+        Fails requests with `status`, or refuses connections if no status.
+        """
+        return self._add(Rule("outage", start, end, _ops(on), status=status))
+
+    def errors(self, status: int, probability=1.0, start=0.0, end=math.inf, on=None):
+        rule = Rule(
+            "outage", start, end, _ops(on), status=status, probability=probability
+        )
+        return self._add(rule)
+
+    def resets(self, probability=1.0, start=0.0, end=math.inf, on=None):
+        """
+        Resets the connection after the request was sent.
+        """
+        return self._add(Rule("reset", start, end, _ops(on), probability=probability))
+
+    def flapping(self, period: float, down_for: float, start=0.0, end=math.inf):
+        """
+        Refuses connections during the first `down_for` seconds of every period.
+        """
+        return self._add(Rule("flap", start, end, period=period, down_for=down_for))
+
+    def with_groups(self, *group_ids: str) -> "NodeScenario":
+        self.groups.update(group_ids)
+        return self
+
+    def node(self, name: str) -> "NodeScenario":
+        return self._scenario.node(name)
+
+
+def _ops(on) -> Optional[set]:
+    if on is None:
+        return None
+    return {on} if isinstance(on, str) else set(on)
+
+
+class Scenario:
+    """
+    Programmable, stateful stand-in for the node API.
+
+    Example:
+        scenario = Scenario(seed=1)
+        scenario.all_nodes(["n1", "n2"]).latency(constant(0.01))
+        scenario.node("n2").outage(start=5, end=10, status=503)
+        client = NodeClient(Client(transport=ProgrammableTransport(scenario)))
+    """
+
+    def __init__(self, seed: int = 0, clock=None):
+        self.rng = random.Random(seed)
+        self.clock = clock or RealClock()
+        self.nodes: Dict[str, NodeScenario] = {}
+        self._default = NodeScenario(self, "*")
+
+    def node(self, name: str) -> NodeScenario:
+        if name not in self.nodes:
+            self.nodes[name] = NodeScenario(self, name)
+        return self.nodes[name]
+
+    def all_nodes(self, names: List[str]) -> "_NodeGroup":
+        return _NodeGroup([self.node(name) for name in names])
+
+    def every_node(self) -> NodeScenario:
+        """
+        Rules applying to every node, including ones never named.
+        """
+        return self._default
+
+
+class _NodeGroup:
+    def __init__(self, nodes: List[NodeScenario]):
+        self._nodes = nodes
+
+    def __getattr__(self, name):
+        def apply(*args, **kwargs):
+            for node in self._nodes:
+                getattr(node, name)(*args, **kwargs)
+            return self
+
+        return apply
+
+
+@dataclass
+class CallLog:
+    calls: List[Call] = field(default_factory=list)
+
+    def count(self, node=None, operation=None, outcome=None) -> int:
+        return sum(
+            1
+            for call in self.calls
+            if (node is None or call.node == node)
+            and (operation is None or call.operation == operation)
+            and (outcome is None or call.outcome == outcome)
+        )
+
+
+class ProgrammableTransport(BaseTransport):
+    """
+    httpx transport serving `NodeClient` requests according to a scenario.
+    """
+
+    def __init__(self, scenario: Scenario):
+        self.scenario = scenario
+        self.log = CallLog()
+        self.started_at = scenario.clock.now()
+
+    def elapsed(self) -> float:
+        return self.scenario.clock.now() - self.started_at
+
+    def handle_request(self, request: Request) -> Response:
+        node_name = request.url.netloc.decode()
+        node = self.scenario.node(node_name)
+        operation, group_id = _parse(request)
+        at = self.elapsed()
+        rules = [
+            rule
+            for rule in self.scenario.every_node().rules + node.rules
+            if rule.active(at, operation)
+        ]
+
+        delay = 0.0
+        for rule in rules:
+            if rule.kind == "latency":
+                delay = rule.latency(self.scenario.rng)
+        for rule in rules:
+            if rule.kind == "slowdown":
+                delay *= rule.factor
+
+        for rule in rules:
+            if rule.kind == "flap" or (rule.kind == "outage" and rule.status is None):
+                self._record(at, node_name, operation, group_id, "refused", 0.0)
+                raise ConnectError("Connection refused", request=request)
+
+        self.scenario.clock.sleep(delay)
+
+        for rule in rules:
+            if rule.kind not in ("outage", "reset"):
+                continue
+            if self.scenario.rng.random() >= rule.probability:
+                continue
+            if rule.kind == "reset":
+                self._record(at, node_name, operation, group_id, "reset", delay)
+                raise ReadError("Connection reset by peer", request=request)
+            self._record(at, node_name, operation, group_id, rule.status, delay)
+            return Response(rule.status, json={"message": "Injected failure"})
+
+        status = _apply(node, operation, group_id)
+        self._record(at, node_name, operation, group_id, status, delay)
+        return Response(status, json={"groupId": group_id})
+
+    def _record(self, at, node, operation, group_id, outcome, duration):
+        self.log.calls.append(
+            Call(at, node, operation, group_id, str(outcome), duration)
+        )
+
+    def close(self):
+        pass
+
+
+def _parse(request: Request):
+    if request.method == "GET":
+        return "get", request.url.path.rstrip("/").split("/")[-1]
+    body = json.loads(request.content.decode())
+    operation = "create" if request.method == "POST" else "delete"
+    return operation, body["groupId"]
+
+
+def _apply(node: NodeScenario, operation: str, group_id: str) -> int:
+    if operation == "create":
+        if group_id in node.groups:
+            return 400
+        node.groups.add(group_id)
+        return 201
+    if operation == "delete":
+        if group_id not in node.groups:
+            return 400
+        node.groups.discard(group_id)
+        return 200
+    return 200 if group_id in node.groups else 404
@@ -0,0 +1,103 @@
+"""
+Closed-loop HTTP load against a running API, e.g.:
+
+    python main.py &
+    python -m benchmarks.http_load --url http://127.0.0.1:8000 --duration 10
+
+Each of `--concurrency` clients sends its next request as soon as the previous
+one answered. Reports the requests per second and latency percentiles of
+`POST /groups/create` and `GET /groups/task/{id}`, the latter for a task ID
+returned by the former.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from typing import List, Optional
+
+import httpx
+
+
+async def _run_client(
+    client: httpx.AsyncClient, request, deadline: float, latencies: List[float]
+) -> int:
+    errors = 0
+    while time.perf_counter() < deadline:
+        started_at = time.perf_counter()
+        try:
+            response = await request(client)
+        except httpx.TransportError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started_at)
+        errors += response.status_code != 200
+    return errors
+
+
+async def load(url: str, request, concurrency: int, duration: float) -> dict:
+    """
+    Sends requests from `concurrency` clients for `duration` seconds.
+
+    Returns:
+        dict: `requests_per_sec`, `p50_ms`, `p99_ms` and `errors`.
+    """
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+        latencies: List[float] = []
+        started_at = time.perf_counter()
+        errors = await asyncio.gather(
+            *(
+                _run_client(client, request, started_at + duration, latencies)
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started_at
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests_per_sec": len(latencies) / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "errors": sum(errors),
+    }
+
+
+async def _main(args) -> None:
+    def create(client):
+        group_id = f"load-{uuid.uuid4().hex}"
+        return client.post("/groups/create", json={"group_id": group_id})
+
+    async with httpx.AsyncClient(base_url=args.url) as client:
+        task_id = (await create(client)).json()["task_id"]
+
+    def task_status(client):
+        return client.get(f"/groups/task/{task_id}")
+
+    print(f"{'route':<28}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, request in (
+        ("POST /groups/create", create),
+        ("GET /groups/task/{id}", task_status),
+    ):
+        result = await load(args.url, request, args.concurrency, args.duration)
+        print(
+            f"{name:<28}{result['requests_per_sec']:>10.0f}"
+            f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            f"{result['errors']:>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.http_load")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    asyncio.run(_main(parser.parse_args(argv)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Hot paths of the group tasks, run against an in-memory Redis and a fake node
+transport. Broker publishes go through whatever broker the Celery app is
+configured with, `python -m benchmarks` points it at kombu's in-memory one.
+
+The API paths drive the ASGI app directly, without sockets: they measure the
+framework, middleware and serialization cost of a request, not the server.
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import ExitStack, contextmanager
+from types import SimpleNamespace
+from typing import Callable, Dict, Tuple
+from unittest.mock import patch
+
+from httpx import Client, MockTransport, Request, Response
+
+from app.celery_tasks import create_task, dead_letter_task, delete_task
+from app.clients.node_client import NodeClient
+from benchmarks.fakes.mock_redis import MockRedis
+
+HOSTS = ["node1", "node2", "node3", "node4", "node5"]
+GROUP_ID = "bench-group"
+TASK_ID = "bench-task"
+
+# Status codes served by the fake nodes, by (node, method), "*" for any node
+Statuses = Dict[Tuple[str, str], int]
+HEALTHY: Statuses = {("*", "POST"): 201, ("*", "DELETE"): 200, ("*", "GET"): 200}
+
+
+def _node_client(statuses: Statuses) -> NodeClient:
+    def handler(request: Request) -> Response:
+        node = request.url.netloc.decode()
+        status = statuses.get((node, request.method), statuses[("*", request.method)])
+        return Response(status, json={"groupId": GROUP_ID})
+
+    return NodeClient(Client(transport=MockTransport(handler)))
+
+
+@contextmanager
+def fake_environment(statuses: Statuses = HEALTHY):
+    """
+    Points the task modules at an in-memory Redis and fake nodes.
+
+    Yields:
+        MockRedis: The Redis stand-in, so benchmarks can seed their state.
+    """
+
+    redis = MockRedis()
+    node_client = _node_client(statuses)
+    with ExitStack() as stack:
+        for module in (create_task, delete_task):
+            stack.enter_context(patch.object(module, "node_client", node_client))
+            stack.enter_context(patch.object(module, "HOSTS", HOSTS))
+        for target in (
+            "app.celery_tasks.create_task",
+            "app.celery_tasks.delete_task",
+            "app.celery_tasks.dead_letter_task",
+            "app.shared.dead_letters",
+            "app.shared.progress",
+        ):
+            stack.enter_context(patch(f"{target}.redis_client", redis))
+        yield redis
+
+
+@contextmanager
+def task_request(task, task_id: str = TASK_ID):
+    """
+    Runs a task body as if executed by a worker, with a request ID, without
+    the tracing machinery of `apply`.
+    """
+
+    task.push_request(id=task_id, retries=0)
+    try:
+        yield task.run
+    finally:
+        task.pop_request()
+
+
+def _seed_rollback(redis: MockRedis, key: str) -> Callable[[], None]:
+    value = json.dumps({"group_id": GROUP_ID, "nodes": HOSTS, "task_id": TASK_ID})
+    return lambda: redis.set(key, value, ex=60 * 60)
+
+
+def bench_create_group(measure) -> dict:
+    with fake_environment(), task_request(create_task.create_group) as run:
+        return measure(lambda: run(GROUP_ID))
+
+
+def bench_create_group_rollback(measure) -> dict:
+    statuses = {**HEALTHY, ("node3", "POST"): 500}
+    with fake_environment(statuses) as redis, task_request(
+        create_task.create_group
+    ) as run:
+        key = f"{create_task.REDIS_KEY_PREFIX}{GROUP_ID}"
+        return measure(lambda: run(GROUP_ID), setup=lambda: redis.delete(key))
+
+
+def bench_is_rollback_needed(measure) -> dict:
+    statuses = {**HEALTHY, ("*", "GET"): 404}
+    with fake_environment(statuses):
+        response = Response(400)
+        return measure(
+            lambda: create_task._is_rollback_needed("node1", GROUP_ID, response)
+        )
+
+
+def bench_update_rollback_data(measure) -> dict:
+    with fake_environment() as redis:
+        key = f"{create_task.REDIS_KEY_PREFIX}{GROUP_ID}"
+        return measure(
+            lambda: create_task._update_rollback_data(GROUP_ID, "node3"),
+            setup=_seed_rollback(redis, key),
+        )
+
+
+def bench_rollback_delete_group(measure) -> dict:
+    with fake_environment() as redis, task_request(
+        delete_task.rollback_delete_group
+    ) as run:
+        key = f"{delete_task.REDIS_KEY_PREFIX}{GROUP_ID}"
+        return measure(lambda: run(GROUP_ID, "node3"), setup=_seed_rollback(redis, key))
+
+
+def bench_process_dead_letter(measure) -> dict:
+    with fake_environment() as redis, task_request(
+        dead_letter_task.process_dead_letter
+    ) as run:
+        key = f"rollback_create_group_{GROUP_ID}"
+        return measure(
+            lambda: run(GROUP_ID, "node3", "rollback_create_group"),
+            setup=_seed_rollback(redis, key),
+        )
+
+
+def _asgi_call(app, method: str, path: str, body: bytes = b"") -> Callable[[], None]:
+    loop = asyncio.new_event_loop()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    request = {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    async def call():
+        messages = [request]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # The client stays connected until the response is sent
+            await asyncio.Future()
+
+        await app(dict(scope), receive, send)
+
+    return lambda: loop.run_until_complete(call())
+
+
+def _api_app():
+    # Building the app configures the API logging, the harness keeps its own
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    from main import app
+
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    return app
+
+
+def bench_api_create_group(measure) -> dict:
+    from app.api.routers import groups
+    app = _api_app()
+
+    task = SimpleNamespace(id=TASK_ID)
+    body = json.dumps({"group_id": GROUP_ID}).encode()
+    with patch.object(groups.create_group, "delay", return_value=task):
+        return measure(_asgi_call(app, "POST", "/groups/create", body))
+
+
+def bench_api_task_status(measure) -> dict:
+    from app.api.routers import groups
+    app = _api_app()
+
+    result = SimpleNamespace(id=TASK_ID, state="SUCCESS", status="SUCCESS")
+    celery_app = SimpleNamespace(AsyncResult=lambda task_id, app: result)
+    with fake_environment() as redis, patch.object(groups, "celery_app", celery_app):
+        with task_request(create_task.create_group) as run:
+            run(GROUP_ID)
+        return measure(_asgi_call(app, "GET", f"/groups/task/{TASK_ID}"))
+
+
+# Paths timing a whole ASGI request vary more from run to run (event loop,
+# middleware, garbage collection): they get more rounds and their own gate
+API_BENCHMARKS = {"api_create_group", "api_task_status"}
+API_REPEAT_FACTOR = 3
+
+BENCHMARKS = {
+    "create_group": bench_create_group,
+    "create_group_rollback": bench_create_group_rollback,
+    "is_rollback_needed": bench_is_rollback_needed,
+    "update_rollback_data": bench_update_rollback_data,
+    "rollback_delete_group": bench_rollback_delete_group,
+    "process_dead_letter": bench_process_dead_letter,
+    "api_create_group": bench_api_create_group,
+    "api_task_status": bench_api_task_status,
+}
@@ -0,0 +1,309 @@
+"""
+Replays a traffic trace recorded with `TRAFFIC_RECORD_PATH`, e.g.:
+
+    python -m benchmarks.replay nodes traffic.jsonl --port 9001
+    HOSTS=127.0.0.1:9001,127.0.0.1:9002 python main.py &
+    python -m benchmarks.replay api traffic.jsonl --speed 4
+
+`nodes` serves one stand-in node per recorded node. Each answers with the
+status and latency the real node gave at the same point of the trace, so
+outages and slowdowns happen at the same time as in production. `api`
+sends the recorded requests open-loop with their recorded spacing, divided
+by `--speed`. Task status polls follow the tasks created by the replay.
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+# Answer of a stand-in for operations absent from the trace
+DEFAULT_STATUSES = {"create_group": 201, "delete_group": 200, "get_group": 404}
+
+
+def load_trace(path: str) -> Tuple[List[dict], List[dict]]:
+    """
+    Returns the API requests and the node calls of a trace, by time.
+    """
+
+    requests, node_calls = [], []
+    with open(path) as trace:
+        for line in trace:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            (requests if record["src"] == "api" else node_calls).append(record)
+    requests.sort(key=lambda record: record["t"])
+    node_calls.sort(key=lambda record: record["t"])
+    return requests, node_calls
+
+
+def _operation(method: str, path: str) -> str:
+    if not path.startswith("/v1/group"):
+        return "ping"
+    return {"POST": "create_group", "DELETE": "delete_group"}.get(method, "get_group")
+
+
+class NodeTimeline:
+    """
+    Recorded answers of one node per operation, looked up by offset since
+    the start of the trace.
+    """
+
+    def __init__(self, calls: List[dict], origin: float):
+        self._offsets: Dict[str, List[float]] = defaultdict(list)
+        self._answers: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for call in calls:
+            operation = _operation(call["method"], call["path"])
+            self._offsets[operation].append(call["t"] - origin)
+            self._answers[operation].append((call["status"], call["ms"] / 1000))
+
+    def answer(self, operation: str, offset: float) -> Tuple[int, float]:
+        """
+        Returns the status (0 for a failed connection) and latency of the
+        last call of `operation` recorded before `offset`.
+        """
+
+        offsets = self._offsets.get(operation)
+        if not offsets:
+            return DEFAULT_STATUSES.get(operation, 200), 0.0
+        index = max(bisect.bisect_right(offsets, offset) - 1, 0)
+        return self._answers[operation][index]
+
+
+class StandInNodes:
+    """
+    HTTP servers on consecutive ports of `host`, answering like the
+    recorded nodes. With more servers than recorded nodes, the timelines
+    are reused in turn.
+
+    The trace clock starts with the first request any stand-in receives,
+    at the offset of the first recorded node call, and runs `speed` times
+    faster than real time.
+    """
+
+    def __init__(
+        self,
+        node_calls: List[dict],
+        origin: float,
+        host: str = "127.0.0.1",
+        port: int = 9001,
+        count: Optional[int] = None,
+        speed: float = 1.0,
+    ):
+        calls_by_node = defaultdict(list)
+        for call in node_calls:
+            calls_by_node[call["node"]].append(call)
+        timelines = [
+            NodeTimeline(calls_by_node[node], origin) for node in sorted(calls_by_node)
+        ] or [NodeTimeline([], origin)]
+        self.speed = speed
+        self._first_offset = node_calls[0]["t"] - origin if node_calls else 0.0
+        self._started_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.servers = [
+            ThreadingHTTPServer(
+                (host, port + index if port else 0),
+                self._handler(timelines[index % len(timelines)]),
+            )
+            for index in range(count or len(timelines))
+        ]
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def hosts(self) -> List[str]:
+        addresses = (server.server_address for server in self.servers)
+        return [f"{host}:{port}" for host, port in addresses]
+
+    def offset(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if self._started_at is None:
+                self._started_at = now
+        return self._first_offset + (now - self._started_at) * self.speed
+
+    def _handler(self, timeline: NodeTimeline):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _answer(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                operation = _operation(self.command, self.path)
+                status, latency = timeline.answer(operation, stand_in.offset())
+                time.sleep(latency)
+                if not status:
+                    # The real node refused or reset the connection
+                    self.close_connection = True
+                    return
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            do_GET = do_POST = do_DELETE = _answer
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StandInNodes":
+        for server in self.servers:
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+
+async def replay(
+    requests: List[dict], client: httpx.AsyncClient, speed: float = 1.0
+) -> dict:
+    """
+    Sends the recorded requests with their recorded spacing divided by
+    `speed`, without waiting for the previous answers.
+
+    Returns:
+        dict: `sent`, `statuses` (count per status), `mismatches` (answers
+            whose status differs from the recorded one), `p50_ms`, `p99_ms`,
+            `max_lag_ms` (largest delay of a request past its due time) and
+            `elapsed`.
+    """
+
+    task_ids: Dict[str, asyncio.Future] = {}
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    mismatches = 0
+    max_lag = 0.0
+
+    async def send(record: dict, task_id: Optional[asyncio.Future]) -> None:
+        nonlocal mismatches
+        path = record["path"]
+        if path.startswith("/groups/task/"):
+            recorded_id = path.rsplit("/", 1)[1]
+            if recorded_id in task_ids:
+                # Poll the task created by the replay, not the recorded one
+                path = f"/groups/task/{await task_ids[recorded_id]}"
+        started_at = time.perf_counter()
+        replayed_id = None
+        try:
+            response = await client.request(
+                record["method"],
+                path,
+                json=record.get("body"),
+                headers=record.get("headers"),
+            )
+            status = response.status_code
+            latencies.append(time.perf_counter() - started_at)
+            if task_id is not None and status == 200:
+                replayed_id = response.json().get("task_id")
+        except httpx.TransportError:
+            status = 0
+        finally:
+            if task_id is not None:
+                # Polls of a task the replay failed to create keep its old ID
+                task_id.set_result(replayed_id or record["task_id"])
+        statuses[status] += 1
+        mismatches += status != record["status"]
+
+    loop = asyncio.get_running_loop()
+    started_at = time.perf_counter()
+    origin = requests[0]["t"] if requests else 0.0
+    pending = []
+    for record in requests:
+        delay = (record["t"] - origin) / speed - (time.perf_counter() - started_at)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            max_lag = max(max_lag, -delay)
+        task_id = None
+        if record.get("task_id"):
+            task_id = task_ids[record["task_id"]] = loop.create_future()
+        pending.append(asyncio.create_task(send(record, task_id)))
+    await asyncio.gather(*pending)
+
+    quantiles = (
+        statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    )
+    return {
+        "sent": len(requests),
+        "statuses": dict(statuses),
+        "mismatches": mismatches,
+        "p50_ms": quantiles[49] * 1000 if quantiles else 0.0,
+        "p99_ms": quantiles[98] * 1000 if quantiles else 0.0,
+        "max_lag_ms": max_lag * 1000,
+        "elapsed": time.perf_counter() - started_at,
+    }
+
+
+def _serve_nodes(args) -> None:
+    requests, node_calls = load_trace(args.trace)
+    origin = min(record["t"] for record in requests + node_calls)
+    nodes = StandInNodes(
+        node_calls, origin, args.host, args.port, args.count, args.speed
+    ).start()
+    print(f"HOSTS={','.join(nodes.hosts)}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        nodes.stop()
+
+
+def _replay_api(args) -> None:
+    requests, _ = load_trace(args.trace)
+
+    async def run():
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(
+            base_url=args.url, limits=limits, timeout=args.timeout
+        ) as client:
+            return await replay(requests, client, args.speed)
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.replay")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    nodes = commands.add_parser("nodes", help="serve stand-in nodes")
+    nodes.add_argument("trace")
+    nodes.add_argument("--host", default="127.0.0.1")
+    nodes.add_argument("--port", type=int, default=9001, help="port of the first node")
+    nodes.add_argument("--count", type=int, help="number of nodes, default recorded")
+    nodes.add_argument("--speed", type=float, default=1.0)
+    nodes.set_defaults(handler=_serve_nodes)
+
+    api = commands.add_parser("api", help="replay the API requests")
+    api.add_argument("trace")
+    api.add_argument("--url", default="http://127.0.0.1:8000")
+    api.add_argument("--speed", type=float, default=1.0)
+    api.add_argument("--concurrency", type=int, default=100)
+    api.add_argument("--timeout", type=float, default=30.0)
+    api.set_defaults(handler=_replay_api)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+
+def measure(
+    operation: Callable[[], None],
+    setup: Optional[Callable[[], None]] = None,
+    iterations: int = 1000,
+    repeat: int = 5,
+    alloc_iterations: int = 50,
+) -> dict:
+    """
+    Measures the throughput and transient memory of an operation.
+
+    Only `operation` is timed, `setup` runs before every call to restore the
+    state the operation consumes (e.g. rollback data it deletes).
+
+    Args:
+        operation (Callable): Operation to measure.
+        setup (Callable, optional): Untimed preparation run before each call.
+        iterations (int): Calls per timed round.
+        repeat (int): Timed rounds, the fastest one is reported.
+        alloc_iterations (int): Calls traced for allocations.
+
+    Returns:
+        dict: `ops_per_sec` of the fastest round and `peak_bytes`, the median
+            memory high-water mark allocated by one call.
+    """
+
+    setup = setup or (lambda: None)
+    for _ in range(min(iterations, 100)):
+        setup()
+        operation()
+
+    best = float("inf")
+    for _ in range(repeat):
+        elapsed = 0.0
+        for _ in range(iterations):
+            setup()
+            started_at = time.perf_counter()
+            operation()
+            elapsed += time.perf_counter() - started_at
+        best = min(best, elapsed)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            setup()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            operation()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": round(iterations / best, 1),
+        "peak_bytes": int(statistics.median(peaks)),
+    }
+
+
+def median_result(results: List[dict]) -> dict:
+    """
+    Combines the measurements of several runs of a benchmark: the median
+    throughput and allocations, so one disturbed run does not decide.
+    """
+
+    return {
+        "ops_per_sec": round(
+            statistics.median(result["ops_per_sec"] for result in results), 1
+        ),
+        "peak_bytes": int(
+            statistics.median(result["peak_bytes"] for result in results)
+        ),
+    }
+
+
+def compare(
+    results: Dict[str, dict],
+    baseline: Dict[str, dict],
+    threshold: float,
+    alloc_threshold: float,
+    thresholds: Optional[Dict[str, float]] = None,
+) -> List[str]:
+    """
+    Lists the benchmarks that regressed beyond the thresholds.
+
+    Args:
+        results (dict): Measurements by benchmark name.
+        baseline (dict): Baseline measurements by benchmark name.
+        threshold (float): Tolerated relative throughput loss (0.25 = 25%).
+        alloc_threshold (float): Tolerated relative allocation growth.
+        thresholds (dict, optional): Tolerated throughput loss of specific
+            benchmarks, in place of `threshold`.
+
+    Returns:
+        List[str]: One message per regression, empty if none.
+    """
+
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        tolerated = (thresholds or {}).get(name, threshold)
+        floor = expected["ops_per_sec"] * (1 - tolerated)
+        if result["ops_per_sec"] < floor:
+            regressions.append(
+                f"{name}: {result['ops_per_sec']:.0f} ops/s, "
+                f"baseline {expected['ops_per_sec']:.0f} ops/s"
+            )
+        # A few hundred bytes of slack so tiny allocations do not flap
+        ceiling = expected["peak_bytes"] * (1 + alloc_threshold) + 256
+        if result["peak_bytes"] > ceiling:
+            regressions.append(
+                f"{name}: {result['peak_bytes']} bytes peak, "
+                f"baseline {expected['peak_bytes']} bytes"
+            )
+    return regressions
@@ -0,0 +1,478 @@
+"""
+Discrete-event simulation of the group pipeline, to size workers, nodes and
+retry settings before changing them, e.g.:
+
+    python -m benchmarks.simulate --nodes 2000 --replicas 3 --workers 16 \\
+        --rate 200 --operations 20000 --latency lognormal:0.02:0.6 \\
+        --error-rate 0.01 --outage-nodes 50 --outage-start 30 --outage-end 90
+
+The bodies of the `create_task`, `delete_task` and `dead_letter_task` tasks
+run unchanged, against an in-memory Redis and modelled nodes, under a
+virtual clock: node latencies and retry delays cost no real time. Each task
+runs to completion when a worker picks it up, its node calls advancing the
+clock, so its side effects are applied in the order tasks start.
+
+Workers share one FIFO queue, including with `--per-node-queues`. Retried
+and delayed tasks join it once due.
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import math
+import random
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from unittest.mock import patch
+
+from celery.exceptions import Retry
+from httpx import Response
+
+from app.celery_tasks import create_task, dead_letter_task, delete_task
+from app.celery_tasks.celery_app import celery_app
+from app.clients.node_client import NodeClient
+from benchmarks.fakes.mock_redis import MockRedis
+from benchmarks.fakes.programmable_transport import (
+    Distribution,
+    constant,
+    exponential,
+    lognormal,
+    uniform,
+)
+
+# Modules whose Redis client the simulated tasks reach
+REDIS_TARGETS = (
+    "app.celery_tasks.create_task",
+    "app.celery_tasks.delete_task",
+    "app.celery_tasks.dead_letter_task",
+    "app.shared.dead_letters",
+    "app.shared.fanout",
+    "app.shared.group_cache",
+    "app.shared.group_catalog",
+    "app.shared.progress",
+    "app.shared.throughput",
+)
+
+# Tasks retried with CELERY_DEFAULT_RETRY_DELAY and CELERY_DEFAULT_MAX_RETRIES
+RETRIED_TASKS = (
+    create_task.rollback_create_group,
+    create_task.repair_create_group,
+    delete_task.rollback_delete_group,
+)
+
+DISTRIBUTIONS = {
+    "constant": constant,
+    "uniform": uniform,
+    "exponential": exponential,
+    "lognormal": lognormal,
+}
+
+
+def parse_distribution(spec: str) -> Distribution:
+    """
+    Parses `name:param:...`, e.g. `lognormal:0.02:0.6` (median, sigma).
+    """
+
+    name, *params = spec.split(":")
+    if name not in DISTRIBUTIONS:
+        raise argparse.ArgumentTypeError(f"Unknown distribution {name}.")
+    return DISTRIBUTIONS[name](*(float(param) for param in params))
+
+
+class SimClock:
+    def __init__(self):
+        self._now = 0.0
+
+    def now(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float) -> None:
+        self._now += max(seconds, 0)
+
+    def set(self, now: float) -> None:
+        self._now = now
+
+
+class SimulatedNodes(NodeClient):
+    """
+    Node client answering from modelled nodes instead of sending requests.
+
+    Each call takes a latency drawn from `latency`, capped at `timeout`
+    (then it fails like a timeout), and fails with a 500 with probability
+    `error_rate`. Nodes in `outages` refuse connections during their window.
+    Groups are kept per node, so creations, deletions and reads answer like
+    the real API.
+    """
+
+    def __init__(
+        self,
+        clock: SimClock,
+        rng: random.Random,
+        latency: Distribution,
+        error_rate: float = 0.0,
+        timeout: float = 5.0,
+        outages: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        self.clock = clock
+        self.rng = rng
+        self.latency = latency
+        self.error_rate = error_rate
+        self.timeout = timeout
+        self.outages = outages or {}
+        self.groups: Dict[str, Set[str]] = {}
+        self.calls: Counter = Counter()
+
+    def _handle_request(self, method, url, **kwargs) -> Response:
+        node, _, path = url[len("http://") :].partition("/")
+        if "json" in kwargs:
+            group_id = kwargs["json"]["groupId"]
+        else:
+            group_id = path.rsplit("/", 1)[1]
+
+        outage = self.outages.get(node)
+        if outage and outage[0] <= self.clock.now() < outage[1]:
+            self.calls["refused"] += 1
+            return Response(status_code=500, content="Connection refused")
+        delay = self.latency(self.rng)
+        if delay >= self.timeout:
+            self.clock.sleep(self.timeout)
+            self.calls["timeout"] += 1
+            return Response(status_code=500, content="Timed out")
+        self.clock.sleep(delay)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.calls["error"] += 1
+            return Response(status_code=500)
+
+        self.calls[method] += 1
+        groups = self.groups.setdefault(node, set())
+        if method == "POST":
+            if group_id in groups:
+                return Response(status_code=400)
+            groups.add(group_id)
+            return Response(status_code=201)
+        if method == "DELETE":
+            if group_id not in groups:
+                return Response(status_code=400)
+            groups.discard(group_id)
+            return Response(status_code=200)
+        return Response(status_code=200 if group_id in groups else 404)
+
+
+@dataclass
+class Operation:
+    kind: str
+    group_id: str
+    arrived_at: float
+    root_id: str
+    pending: int = 0
+    done_at: Optional[float] = None
+    settled_at: Optional[float] = None
+
+
+@dataclass
+class Message:
+    name: str
+    args: tuple
+    kwargs: dict
+    task_id: str
+    retries: int
+    operation: Operation
+    ready_at: float
+
+
+@dataclass
+class SimulationConfig:
+    nodes: int = 100
+    replicas: int = 3
+    write_quorum: int = 0
+    per_node_queues: bool = False
+    workers: int = 8
+    task_overhead: float = 0.001
+    rate: float = 100.0
+    operations: int = 1000
+    delete_ratio: float = 0.2
+    latency: Distribution = field(default_factory=lambda: constant(0.01))
+    error_rate: float = 0.0
+    timeout: float = 5.0
+    outage_nodes: int = 0
+    outage_start: float = 0.0
+    outage_end: float = math.inf
+    retry_delay: float = 10.0
+    max_retries: int = 3
+    seed: int = 0
+
+
+def _percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    quantiles = statistics.quantiles(values, n=100) if len(values) > 1 else values * 99
+    return {
+        "p50": round(quantiles[49] * 1000, 3),
+        "p95": round(quantiles[94] * 1000, 3),
+        "p99": round(quantiles[98] * 1000, 3),
+        "max": round(max(values) * 1000, 3),
+    }
+
+
+class Simulation:
+    """
+    Open-loop arrivals of creations and deletions, Poisson distributed at
+    `rate` per second, served by `workers` workers.
+    """
+
+    def __init__(self, config: SimulationConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.clock = SimClock()
+        self.hosts = [f"node{index}:8001" for index in range(config.nodes)]
+        outages = {
+            node: (config.outage_start, config.outage_end)
+            for node in self.rng.sample(self.hosts, config.outage_nodes)
+        }
+        self.node_client = SimulatedNodes(
+            self.clock,
+            self.rng,
+            config.latency,
+            config.error_rate,
+            config.timeout,
+            outages,
+        )
+        self.redis = MockRedis()
+        self.published: Counter = Counter()
+        self.executed: Counter = Counter()
+        self.operations: List[Operation] = []
+        self.queue_waits: List[float] = []
+        self.busy_time = 0.0
+        self._events: List[tuple] = []
+        self._sequence = 0
+        self._ready: deque = deque()
+        self._idle = config.workers
+        self._current: Optional[Operation] = None
+        self._created: List[str] = []
+
+    def _push(self, at: float, kind: str, payload) -> None:
+        self._sequence += 1
+        heapq.heappush(self._events, (at, self._sequence, kind, payload))
+
+    def _send_task(self, name, args=None, kwargs=None, **options):
+        countdown = options.get("countdown") or 0
+        message = Message(
+            name,
+            tuple(args or ()),
+            dict(kwargs or {}),
+            options.get("task_id") or str(uuid.uuid4()),
+            options.get("retries", 0),
+            self._current,
+            self.clock.now() + countdown,
+        )
+        self.published[name.rsplit(".", 1)[1]] += 1
+        message.operation.pending += 1
+        self._push(message.ready_at, "ready", message)
+
+    def _environment(self) -> ExitStack:
+        config = self.config
+        stack = ExitStack()
+        for module in (create_task, delete_task):
+            stack.enter_context(patch.object(module, "node_client", self.node_client))
+            stack.enter_context(patch.object(module, "HOSTS", self.hosts))
+            stack.enter_context(
+                patch.object(module, "PER_NODE_QUEUES", config.per_node_queues)
+            )
+        for target in REDIS_TARGETS:
+            stack.enter_context(patch(f"{target}.redis_client", self.redis))
+        stack.enter_context(
+            patch("app.shared.placement.GROUP_REPLICAS", config.replicas)
+        )
+        stack.enter_context(
+            patch.object(create_task, "CREATE_WRITE_QUORUM", config.write_quorum)
+        )
+        for task in RETRIED_TASKS:
+            stack.enter_context(
+                patch.object(task, "default_retry_delay", config.retry_delay)
+            )
+            stack.enter_context(patch.object(task, "max_retries", config.max_retries))
+        stack.enter_context(
+            patch.object(celery_app, "send_task", side_effect=self._send_task)
+        )
+        return stack
+
+    def _arrive(self, at: float) -> None:
+        if self._created and self.rng.random() < self.config.delete_ratio:
+            group_id = self._created.pop(self.rng.randrange(len(self._created)))
+            kind, task = "delete", delete_task.delete_group
+        else:
+            group_id = f"group-{len(self.operations)}"
+            kind, task = "create", create_task.create_group
+        operation = Operation(kind, group_id, at, root_id=str(uuid.uuid4()))
+        self.operations.append(operation)
+        self._current = operation
+        self.clock.set(at)
+        self._send_task(task.name, args=(group_id,), task_id=operation.root_id)
+
+    def _run(self, message: Message, now: float) -> float:
+        task = celery_app.tasks[message.name]
+        self.clock.set(now)
+        self._current = message.operation
+        retried = False
+        task.push_request(
+            id=message.task_id,
+            retries=message.retries,
+            args=message.args,
+            kwargs=message.kwargs,
+            called_directly=False,
+        )
+        try:
+            task.run(*message.args, **message.kwargs)
+        except Retry:
+            retried = True
+        except Exception as exc:
+            self.executed["failed"] += 1
+            logging.getLogger(__name__).debug(f"{message.name} failed: {exc!r}")
+        finally:
+            task.pop_request()
+        self.executed[message.name.rsplit(".", 1)[1]] += 1
+        finished_at = self.clock.now() + self.config.task_overhead
+        operation = message.operation
+        if message.task_id == operation.root_id and not retried:
+            operation.done_at = finished_at
+        return finished_at
+
+    def _finish(self, message: Message, at: float) -> None:
+        self._idle += 1
+        operation = message.operation
+        operation.pending -= 1
+        if operation.pending == 0:
+            operation.settled_at = at
+            if operation.kind == "create":
+                self._created.append(operation.group_id)
+
+    def _dispatch(self, now: float) -> None:
+        while self._idle and self._ready:
+            message = self._ready.popleft()
+            self._idle -= 1
+            self.queue_waits.append(now - message.ready_at)
+            finished_at = self._run(message, now)
+            self.busy_time += finished_at - now
+            self._push(finished_at, "done", message)
+
+    def run(self) -> dict:
+        """
+        Runs the simulation until every operation settled.
+
+        Returns:
+            dict: The report of the run, see `report`.
+        """
+
+        started_at = time.perf_counter()
+        at = 0.0
+        for _ in range(self.config.operations):
+            at += self.rng.expovariate(self.config.rate)
+            self._push(at, "arrive", None)
+
+        previous = logging.root.manager.disable
+        logging.disable(logging.CRITICAL)
+        try:
+            with self._environment():
+                while self._events:
+                    now, _, kind, payload = heapq.heappop(self._events)
+                    if kind == "arrive":
+                        self._arrive(now)
+                    elif kind == "ready":
+                        self._ready.append(payload)
+                    else:
+                        self._finish(payload, now)
+                    self._dispatch(now)
+        finally:
+            logging.disable(previous)
+        return self.report(time.perf_counter() - started_at)
+
+    def report(self, real_seconds: float) -> dict:
+        """
+        Returns:
+            dict: Throughput of settled operations per virtual second,
+                percentiles (ms) of the time until the first task finished
+                (`latency_ms`, what the task status shows) and until every
+                task spawned finished (`settle_ms`, rollbacks and retries
+                included), queue waits, worker utilization, messages
+                published and tasks run by name, node calls by outcome,
+                Redis round trips, and their amounts per operation.
+        """
+
+        settled = [op for op in self.operations if op.settled_at is not None]
+        span = max((op.settled_at for op in settled), default=0.0)
+        count = len(self.operations) or 1
+        node_calls = sum(self.node_client.calls.values())
+        tasks = sum(
+            value for name, value in self.executed.items() if name != "failed"
+        )
+        latencies = [op.done_at - op.arrived_at for op in settled if op.done_at]
+        settle_times = [op.settled_at - op.arrived_at for op in settled]
+        capacity = self.config.workers * span
+        return {
+            "operations": len(self.operations),
+            "settled": len(settled),
+            "virtual_seconds": round(span, 3),
+            "throughput_ops_per_sec": round(len(settled) / span, 3) if span else 0.0,
+            "latency_ms": _percentiles(latencies),
+            "settle_ms": _percentiles(settle_times),
+            "queue_wait_ms": _percentiles(self.queue_waits),
+            "worker_utilization": (
+                round(self.busy_time / capacity, 3) if capacity else 0.0
+            ),
+            "messages": dict(self.published),
+            "tasks": dict(self.executed),
+            "node_calls": dict(self.node_client.calls),
+            "redis_round_trips": self.redis.round_trips,
+            "per_operation": {
+                "messages": round(sum(self.published.values()) / count, 3),
+                "tasks": round(tasks / count, 3),
+                "node_calls": round(node_calls / count, 3),
+                "redis_round_trips": round(self.redis.round_trips / count, 3),
+            },
+            "real_seconds": round(real_seconds, 3),
+        }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.simulate")
+    parser.add_argument("--nodes", type=int, default=100)
+    parser.add_argument("--replicas", type=int, default=3, help="0 for every node")
+    parser.add_argument("--write-quorum", type=int, default=0)
+    parser.add_argument("--per-node-queues", action="store_true")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument(
+        "--task-overhead", type=float, default=0.001, help="seconds per task"
+    )
+    parser.add_argument("--rate", type=float, default=100.0, help="operations/s")
+    parser.add_argument("--operations", type=int, default=1000)
+    parser.add_argument("--delete-ratio", type=float, default=0.2)
+    parser.add_argument(
+        "--latency", type=parse_distribution, default=constant(0.01)
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--outage-nodes", type=int, default=0)
+    parser.add_argument("--outage-start", type=float, default=0.0)
+    parser.add_argument("--outage-end", type=float, default=math.inf)
+    parser.add_argument("--retry-delay", type=float, default=10.0)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = vars(build_parser().parse_args(argv))
+    report = Simulation(SimulationConfig(**args)).run()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,3 +16,174 @@ CELERY_DEFAULT_MAX_RETRIES = config("CELERY_DEFAULT_MAX_RETRIES", cast=int, defa
 REDIS_HOST = config("REDIS_HOST", cast=str, default="localhost")
 REDIS_PORT = config("REDIS_PORT", cast=int, default=6379)
 REDIS_DB = config("REDIS_DB", cast=int, default=0)
+
+# Redis deployment: standalone, sentinel or cluster
+REDIS_MODE = config("REDIS_MODE", cast=str, default="standalone")
+REDIS_SENTINELS = config(
+    "REDIS_SENTINELS",
+    cast=lambda v: [i.strip() for i in v.split(",") if i.strip()],
+    default="",
+)
+REDIS_SENTINEL_MASTER = config("REDIS_SENTINEL_MASTER", cast=str, default="mymaster")
+REDIS_CLUSTER_NODES = config(
+    "REDIS_CLUSTER_NODES",
+    cast=lambda v: [i.strip() for i in v.split(",") if i.strip()],
+    default="",
+)
+REDIS_HASH_TAGS = config(
+    "REDIS_HASH_TAGS", cast=bool, default=REDIS_MODE == "cluster"
+)
+
+# Process-local cache of read-heavy keys, kept coherent by Redis client tracking
+REDIS_CLIENT_CACHE = config("REDIS_CLIENT_CACHE", cast=bool, default=False)
+REDIS_CLIENT_CACHE_PREFIXES = config(
+    "REDIS_CLIENT_CACHE_PREFIXES",
+    cast=lambda v: [i.strip() for i in v.split(",") if i.strip()],
+    default="group_summary_,task_progress_",
+)
+REDIS_CLIENT_CACHE_SIZE = config("REDIS_CLIENT_CACHE_SIZE", cast=int, default=10000)
+
+WEBHOOK_SIGNING_SECRET = config("WEBHOOK_SIGNING_SECRET", cast=str, default="")
+WEBHOOK_TIMEOUT = config("WEBHOOK_TIMEOUT", cast=float, default=5.0)
+WEBHOOK_MAX_RETRIES = config("WEBHOOK_MAX_RETRIES", cast=int, default=5)
+WEBHOOK_RETRY_BACKOFF = config("WEBHOOK_RETRY_BACKOFF", cast=int, default=2)
+WEBHOOK_RETRY_BACKOFF_MAX = config("WEBHOOK_RETRY_BACKOFF_MAX", cast=int, default=300)
+WEBHOOK_QUEUE_MAX_LENGTH = config("WEBHOOK_QUEUE_MAX_LENGTH", cast=int, default=10000)
+WEBHOOK_ALLOWED_HOSTS = config(
+    "WEBHOOK_ALLOWED_HOSTS",
+    cast=lambda v: [i.strip().lower() for i in v.split(",") if i.strip()],
+    default="",
+)
+
+ADMISSION_QUEUE_NAME = config("ADMISSION_QUEUE_NAME", cast=str, default="celery")
+ADMISSION_QUEUE_HIGH_WATERMARK = config(
+    "ADMISSION_QUEUE_HIGH_WATERMARK", cast=int, default=0
+)
+ADMISSION_QUEUE_LOW_WATERMARK = config(
+    "ADMISSION_QUEUE_LOW_WATERMARK", cast=int, default=0
+)
+ADMISSION_MAX_QUEUE_DELAY = config("ADMISSION_MAX_QUEUE_DELAY", cast=float, default=0)
+ADMISSION_SAMPLE_INTERVAL = config("ADMISSION_SAMPLE_INTERVAL", cast=float, default=1.0)
+ADMISSION_RETRY_AFTER_MAX = config("ADMISSION_RETRY_AFTER_MAX", cast=int, default=60)
+ADMISSION_CLIENT_HEADER = config(
+    "ADMISSION_CLIENT_HEADER", cast=str, default="X-Client-Id"
+)
+ADMISSION_CLIENT_RATE = config("ADMISSION_CLIENT_RATE", cast=float, default=0)
+ADMISSION_CLIENT_BURST = config("ADMISSION_CLIENT_BURST", cast=int, default=10)
+
+PROGRESS_FLUSH_EVERY = config("PROGRESS_FLUSH_EVERY", cast=int, default=10)
+PROGRESS_FLUSH_INTERVAL = config("PROGRESS_FLUSH_INTERVAL", cast=float, default=1.0)
+PROGRESS_TTL = config("PROGRESS_TTL", cast=int, default=24 * 60 * 60)
+
+GROUP_CACHE_TTL = config("GROUP_CACHE_TTL", cast=int, default=5)
+GROUP_READ_TIMEOUT = config("GROUP_READ_TIMEOUT", cast=float, default=2.0)
+GROUP_READ_CONCURRENCY = config("GROUP_READ_CONCURRENCY", cast=int, default=50)
+
+# Nodes each group is placed on, 0 places every group on every node
+GROUP_REPLICAS = config("GROUP_REPLICAS", cast=int, default=0)
+
+# Nodes that must acknowledge a group creation, 0 requires all of them
+CREATE_WRITE_QUORUM = config("CREATE_WRITE_QUORUM", cast=int, default=0)
+
+# Split group operations into sub-operations on one queue per node
+PER_NODE_QUEUES = config("PER_NODE_QUEUES", cast=bool, default=False)
+
+# Micro-batching of node requests across tasks of a worker, 0 disables it
+NODE_BATCH_WINDOW_MS = config("NODE_BATCH_WINDOW_MS", cast=float, default=0)
+NODE_BATCH_MAX_SIZE = config("NODE_BATCH_MAX_SIZE", cast=int, default=32)
+NODE_MAX_IN_FLIGHT = config("NODE_MAX_IN_FLIGHT", cast=int, default=8)
+
+# Node connections of workers: DNS cache, warm-up at start and keepalive
+NODE_DNS_TTL = config("NODE_DNS_TTL", cast=float, default=30)
+NODE_WARMUP_CONNECTIONS = config("NODE_WARMUP_CONNECTIONS", cast=int, default=1)
+NODE_WARMUP_TIMEOUT = config("NODE_WARMUP_TIMEOUT", cast=float, default=2.0)
+NODE_KEEPALIVE_INTERVAL = config("NODE_KEEPALIVE_INTERVAL", cast=float, default=20)
+NODE_KEEPALIVE_EXPIRY = config("NODE_KEEPALIVE_EXPIRY", cast=float, default=60)
+
+# Weighted fair scheduling of group operations across tenants
+FAIR_SCHEDULING = config("FAIR_SCHEDULING", cast=bool, default=False)
+FAIR_TENANT_HEADER = config("FAIR_TENANT_HEADER", cast=str, default="X-Tenant-Id")
+FAIR_TENANT_SEPARATOR = config("FAIR_TENANT_SEPARATOR", cast=str, default="-")
+FAIR_TENANT_WEIGHTS = config(
+    "FAIR_TENANT_WEIGHTS",
+    cast=lambda v: {
+        tenant.strip(): float(weight)
+        for tenant, _, weight in (item.rpartition(":") for item in v.split(","))
+        if tenant.strip()
+    },
+    default="",
+)
+FAIR_TENANT_CONCURRENCY = config("FAIR_TENANT_CONCURRENCY", cast=int, default=10)
+FAIR_MAX_IN_FLIGHT = config("FAIR_MAX_IN_FLIGHT", cast=int, default=50)
+FAIR_RUNNING_TIMEOUT = config("FAIR_RUNNING_TIMEOUT", cast=int, default=60 * 60)
+
+# API server, see main.run_server. "auto" picks uvloop and httptools if installed
+SERVER_HOST = config("SERVER_HOST", cast=str, default="127.0.0.1")
+SERVER_PORT = config("SERVER_PORT", cast=int, default=8000)
+SERVER_WORKERS = config("SERVER_WORKERS", cast=int, default=1)
+SERVER_RELOAD = config("SERVER_RELOAD", cast=bool, default=True)
+SERVER_LOOP = config("SERVER_LOOP", cast=str, default="auto")
+SERVER_HTTP = config("SERVER_HTTP", cast=str, default="auto")
+SERVER_BACKLOG = config("SERVER_BACKLOG", cast=int, default=2048)
+SERVER_KEEPALIVE_TIMEOUT = config("SERVER_KEEPALIVE_TIMEOUT", cast=int, default=5)
+SERVER_ACCESS_LOG = config("SERVER_ACCESS_LOG", cast=bool, default=True)
+
+# Buffered task publishing from a dedicated thread of the API
+PUBLISH_BUFFERED = config("PUBLISH_BUFFERED", cast=bool, default=False)
+PUBLISH_BUFFER_SIZE = config("PUBLISH_BUFFER_SIZE", cast=int, default=10000)
+PUBLISH_BATCH_SIZE = config("PUBLISH_BATCH_SIZE", cast=int, default=100)
+PUBLISH_CONFIRM_TIMEOUT = config("PUBLISH_CONFIRM_TIMEOUT", cast=float, default=5.0)
+PUBLISH_RETRY_INTERVAL = config("PUBLISH_RETRY_INTERVAL", cast=float, default=1.0)
+PUBLISH_WAIT_CONFIRM = config("PUBLISH_WAIT_CONFIRM", cast=bool, default=False)
+
+# Periodic sweep of the rollback keys, needs celery beat. 0 disables it
+SWEEPER_INTERVAL = config("SWEEPER_INTERVAL", cast=float, default=60)
+SWEEPER_SCAN_BATCH = config("SWEEPER_SCAN_BATCH", cast=int, default=1000)
+SWEEPER_MAX_ACTIONS = config("SWEEPER_MAX_ACTIONS", cast=int, default=50)
+SWEEPER_LOCK_MAX_AGE = config("SWEEPER_LOCK_MAX_AGE", cast=float, default=15 * 60)
+SWEEPER_STUCK_AFTER = config("SWEEPER_STUCK_AFTER", cast=float, default=10 * 60)
+SWEEPER_MAX_REDRIVES = config("SWEEPER_MAX_REDRIVES", cast=int, default=3)
+
+# Backfill of the groups placed on a node added to HOSTS
+BACKFILL_CHUNK_SIZE = config("BACKFILL_CHUNK_SIZE", cast=int, default=500)
+BACKFILL_CONCURRENCY = config("BACKFILL_CONCURRENCY", cast=int, default=4)
+BACKFILL_RATE = config("BACKFILL_RATE", cast=float, default=50)
+BACKFILL_PAUSE_QUEUE_DEPTH = config(
+    "BACKFILL_PAUSE_QUEUE_DEPTH", cast=int, default=1000
+)
+BACKFILL_PAUSE_INTERVAL = config("BACKFILL_PAUSE_INTERVAL", cast=float, default=30)
+BACKFILL_QUEUE = config("BACKFILL_QUEUE", cast=str, default="celery")
+
+# On-demand sampling profiler of the API and worker processes
+PROFILER_INTERVAL = config("PROFILER_INTERVAL", cast=float, default=0.01)
+PROFILER_MAX_DURATION = config("PROFILER_MAX_DURATION", cast=float, default=60)
+
+# Bulk replay of the dead letters, node by node: entries per chunk,
+# concurrent requests per node, and entries per second per node (0 no limit)
+DEAD_LETTER_REPLAY_CHUNK_SIZE = config(
+    "DEAD_LETTER_REPLAY_CHUNK_SIZE", cast=int, default=200
+)
+DEAD_LETTER_REPLAY_CONCURRENCY = config(
+    "DEAD_LETTER_REPLAY_CONCURRENCY", cast=int, default=4
+)
+DEAD_LETTER_REPLAY_RATE = config("DEAD_LETTER_REPLAY_RATE", cast=int, default=50)
+
+# Logging through a bounded queue written by a background thread, as text or
+# json lines. Hot-path events are limited to LOG_EVENT_RATE per second each
+LOG_LEVEL = config("LOG_LEVEL", cast=str, default="INFO")
+LOG_FORMAT = config("LOG_FORMAT", cast=str, default="text")
+LOG_QUEUE_SIZE = config("LOG_QUEUE_SIZE", cast=int, default=10000)
+LOG_EVENT_RATE = config("LOG_EVENT_RATE", cast=int, default=10)
+
+# Tracing of group operations, disabled without an exporter (jsonl or memory)
+TRACING_EXPORTER = config("TRACING_EXPORTER", cast=str, default="")
+TRACING_PATH = config("TRACING_PATH", cast=str, default="traces.jsonl")
+TRACING_SAMPLE_RATE = config("TRACING_SAMPLE_RATE", cast=float, default=0.1)
+
+# Trace of API requests and node calls for replay, disabled without a path
+TRAFFIC_RECORD_PATH = config("TRAFFIC_RECORD_PATH", cast=str, default="")
+TRAFFIC_RECORD_MAX_BYTES = config(
+    "TRAFFIC_RECORD_MAX_BYTES", cast=int, default=100 * 1024 * 1024
+)
+
+ADMIN_API_TOKEN = config("ADMIN_API_TOKEN", cast=str, default="")
@@ -1,33 +1,73 @@
-import time
-
 import uvicorn as uvicorn
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
-from app.api.routers import groups
+from app.api.middleware import (
+    ProcessTimeMiddleware,
+    TracingMiddleware,
+    TrafficRecordMiddleware,
+)
+from app.api.publisher import task_publisher
+from app.api.routers import admin, groups
+from app.shared.logs import configure_logging
+from app.shared.tracing import tracer
+from app.shared.traffic import traffic_recorder
+from config.app_config import (
+    SERVER_ACCESS_LOG,
+    SERVER_BACKLOG,
+    SERVER_HOST,
+    SERVER_HTTP,
+    SERVER_KEEPALIVE_TIMEOUT,
+    SERVER_LOOP,
+    SERVER_PORT,
+    SERVER_RELOAD,
+    SERVER_WORKERS,
+)
 
 
 def create_app() -> FastAPI:
+    configure_logging()
     current_app = FastAPI(
         title="Group management with Celery and RabbitMQ",
         description="FastAPI Application to create and delete groups on nodes asynchronously using Celery and RabbitMQ.",
         version="1.0.0",
+        default_response_class=ORJSONResponse,
     )
 
     current_app.include_router(groups.router)
+    current_app.include_router(admin.router)
+    current_app.add_middleware(ProcessTimeMiddleware)
+    if traffic_recorder.enabled:
+        current_app.add_middleware(TrafficRecordMiddleware)
+    if tracer.enabled:
+        current_app.add_middleware(TracingMiddleware)
+    # Flush the tasks still buffered for publishing
+    current_app.add_event_handler("shutdown", task_publisher.close)
     return current_app
 
 
 app = create_app()
 
 
-@app.middleware("http")
-async def add_process_time_header(request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(f"{process_time:0.4f} sec")
-    return response
+def run_server() -> None:
+    """
+    Serves the API with the SERVER_* settings. Several workers share the
+    port, each in its own process; reload only applies to a single worker.
+    """
+
+    uvicorn.run(
+        "main:app",
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=SERVER_WORKERS,
+        reload=SERVER_RELOAD and SERVER_WORKERS == 1,
+        loop=SERVER_LOOP,
+        http=SERVER_HTTP,
+        backlog=SERVER_BACKLOG,
+        timeout_keep_alive=SERVER_KEEPALIVE_TIMEOUT,
+        access_log=SERVER_ACCESS_LOG,
+    )
 
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", port=8000, reload=True)
+    run_server()
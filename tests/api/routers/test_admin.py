@@ -0,0 +1,233 @@
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.celery_tasks.celery_app import celery_app
+from main import app
+
+client = TestClient(app)
+
+ADMIN_HEADERS = {"X-Admin-Token": "s3cret"}
+
+
+@pytest.fixture(autouse=True)
+def admin_token():
+    with patch("app.api.dependencies.ADMIN_API_TOKEN", "s3cret"):
+        yield
+
+
+def test_admin_api_disabled_without_token():
+    with patch("app.api.dependencies.ADMIN_API_TOKEN", ""):
+        response = client.get("/admin/rollbacks", headers=ADMIN_HEADERS)
+    assert response.status_code == 403
+
+
+def test_admin_api_rejects_invalid_token():
+    response = client.get("/admin/rollbacks", headers={"X-Admin-Token": "wrong"})
+    assert response.status_code == 401
+    response = client.get("/admin/rollbacks")
+    assert response.status_code == 401
+
+
+def test_list_rollbacks():
+    rollbacks = [
+        {
+            "key": "rollback_create_group_group1",
+            "operation": "create_group",
+            "group_id": "group1",
+            "state": "rolling_back",
+            "nodes": ["node1"],
+            "ttl": 3600,
+        }
+    ]
+    with patch(
+        "app.api.routers.admin.scan_rollbacks", return_value=(42, rollbacks)
+    ) as mock_scan:
+        response = client.get(
+            "/admin/rollbacks",
+            params={
+                "cursor": 7,
+                "count": 50,
+                "node": "node1",
+                "operation": "create_group",
+            },
+            headers=ADMIN_HEADERS,
+        )
+    assert response.status_code == 200
+    assert response.json() == {"items": rollbacks, "next_cursor": 42}
+    mock_scan.assert_called_once_with(7, 50, "node1", "create_group")
+
+
+def test_list_rollbacks_rejects_unknown_operation():
+    response = client.get(
+        "/admin/rollbacks", params={"operation": "unknown"}, headers=ADMIN_HEADERS
+    )
+    assert response.status_code == 422
+
+
+def test_list_dead_letters():
+    entries = [
+        {
+            "id": "rollback_delete_group|group1|node1",
+            "task": "rollback_delete_group",
+            "group_id": "group1",
+            "node": "node1",
+            "dead_lettered_at": 1700000000.0,
+        }
+    ]
+    with patch(
+        "app.api.routers.admin.scan_dead_letters", return_value=(0, entries)
+    ) as mock_scan:
+        response = client.get("/admin/dead-letters", headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.json() == {"items": entries, "next_cursor": 0}
+    mock_scan.assert_called_once_with(0, 100, None, None)
+
+
+def test_list_dead_letters_of_repairs():
+    with patch(
+        "app.api.routers.admin.scan_dead_letters", return_value=(0, [])
+    ) as mock_scan:
+        response = client.get(
+            "/admin/dead-letters",
+            params={"operation": "repair_create_group"},
+            headers=ADMIN_HEADERS,
+        )
+    assert response.status_code == 200
+    mock_scan.assert_called_once_with(0, 100, None, "repair_create_group")
+
+
+def test_list_metrics():
+    snapshots = {"worker1:1": {"counters": {"pings_total": 1}, "gauges": {}}}
+    with patch(
+        "app.api.routers.admin.read_published_metrics", return_value=snapshots
+    ) as mock_read:
+        response = client.get("/admin/metrics", headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.json() == snapshots
+    mock_read.assert_called_once_with()
+
+
+def test_sweeper_report():
+    report = {"scanned": 10, "stale": 1, "swept_at": 1000.0}
+    with patch("app.api.routers.admin.read_sweep_report", return_value=report):
+        response = client.get("/admin/sweeper", headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.json() == report
+
+
+def test_start_backfill():
+    state = {"status": "running", "phase": "copy", "cursor": 0}
+    with patch(
+        "app.api.routers.admin.start_backfill", return_value=state
+    ) as mock_start:
+        response = client.post("/admin/backfill/node4:8001", headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.json() == state
+    mock_start.assert_called_once_with("node4:8001", False)
+
+
+def test_start_backfill_of_unknown_node():
+    with patch(
+        "app.api.routers.admin.start_backfill",
+        side_effect=ValueError("Node node9 is not in HOSTS."),
+    ):
+        response = client.post("/admin/backfill/node9", headers=ADMIN_HEADERS)
+    assert response.status_code == 400
+
+
+def test_get_backfill_not_found():
+    with patch("app.api.routers.admin.read_backfill", return_value={}):
+        response = client.get("/admin/backfill/node4", headers=ADMIN_HEADERS)
+    assert response.status_code == 404
+
+
+def test_profile_api_returns_collapsed_stacks():
+    stacks = Counter({"MainThread;serve;handle": 2})
+    with patch("app.api.routers.admin.sample", return_value=stacks) as mock_sample:
+        response = client.post(
+            "/admin/profile", params={"seconds": 2}, headers=ADMIN_HEADERS
+        )
+    assert response.status_code == 200
+    assert response.text == "MainThread;serve;handle 2\n"
+    assert mock_sample.call_args.args[0] == 2
+
+
+def test_profile_api_rejects_long_profiles():
+    response = client.post(
+        "/admin/profile", params={"seconds": 3600}, headers=ADMIN_HEADERS
+    )
+    assert response.status_code == 422
+
+
+def test_profile_workers_merges_process_profiles():
+    replies = [
+        {"worker1@host": {"ok": "profiling", "processes": [1, 2]}},
+        {"worker2@host": {"ok": "profiling", "processes": [3]}},
+    ]
+    profiles = {"host:3": "host:3;a 1\n", "host:1": "host:1;b 2\n"}
+    with patch.object(
+        celery_app.control, "broadcast", return_value=replies
+    ) as mock_broadcast, patch(
+        "app.api.routers.admin.read_profiles", return_value=profiles
+    ), patch(
+        "app.api.routers.admin.PROFILE_GRACE", 0.1
+    ):
+        response = client.post(
+            "/admin/profile/workers",
+            params={"seconds": 0.01, "worker": "worker1@host"},
+            headers=ADMIN_HEADERS,
+        )
+    assert response.status_code == 200
+    assert response.text == "host:1;b 2\nhost:3;a 1\n"
+    assert mock_broadcast.call_args.kwargs["destination"] == ["worker1@host"]
+
+
+def test_profile_workers_without_workers():
+    with patch.object(celery_app.control, "broadcast", return_value=[]):
+        response = client.post(
+            "/admin/profile/workers", params={"seconds": 1}, headers=ADMIN_HEADERS
+        )
+    assert response.status_code == 503
+
+
+def test_start_dead_letter_replay():
+    state = {"status": "running", "nodes": {"node1": "running"}}
+    with patch(
+        "app.api.routers.admin.start_replay", return_value=state
+    ) as mock_start:
+        response = client.post(
+            "/admin/dead-letters/replay?node=node1&operation=rollback_create_group",
+            headers=ADMIN_HEADERS,
+        )
+    assert response.status_code == 200
+    assert response.json() == state
+    mock_start.assert_called_once_with("node1", "rollback_create_group")
+
+
+def test_start_dead_letter_replay_of_unknown_node():
+    with patch(
+        "app.api.routers.admin.start_replay",
+        side_effect=ValueError("Node node9 is not in HOSTS."),
+    ):
+        response = client.post(
+            "/admin/dead-letters/replay?node=node9", headers=ADMIN_HEADERS
+        )
+    assert response.status_code == 400
+
+
+def test_get_dead_letter_replay():
+    with patch("app.api.routers.admin.read_replay", return_value={}):
+        response = client.get("/admin/dead-letters/replay", headers=ADMIN_HEADERS)
+    assert response.status_code == 404
+
+    outcomes = [{"id": "rollback_create_group|group1|node1", "outcome": "replayed"}]
+    with patch(
+        "app.api.routers.admin.scan_replay_outcomes", return_value=(0, outcomes)
+    ):
+        response = client.get(
+            "/admin/dead-letters/replay/outcomes", headers=ADMIN_HEADERS
+        )
+    assert response.json() == {"items": outcomes, "next_cursor": 0}
@@ -1,7 +1,8 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from fastapi.testclient import TestClient
 
+from app.shared.placement import nodes_for_group
 from main import app
 
 client = TestClient(app)
@@ -15,7 +16,9 @@ def test_create_group():
         response = client.post("/groups/create", json={"group_id": test_group_id})
         assert response.status_code == 200
         assert response.json() == {"task_id": mock_task_id}
-        mock_create.assert_called_once_with(test_group_id)
+        mock_create.assert_called_once_with(
+            test_group_id, callback_url=None, write_quorum=None
+        )
 
 
 def test_delete_group():
@@ -26,7 +29,110 @@ def test_delete_group():
         response = client.post("/groups/delete", json={"group_id": test_group_id})
         assert response.status_code == 200
         assert response.json() == {"task_id": mock_task_id}
-        mock_delete.assert_called_once_with(test_group_id)
+        mock_delete.assert_called_once_with(test_group_id, callback_url=None)
+
+
+def test_create_group_with_buffered_publishing():
+    with patch("app.api.routers.groups.PUBLISH_BUFFERED", True), patch(
+        "app.api.routers.groups.task_publisher.publish", return_value="buffered_id"
+    ) as mock_publish, patch("app.api.routers.groups.create_group.delay") as mock_create:
+        response = client.post("/groups/create", json={"group_id": "group1"})
+        assert response.status_code == 200
+        assert response.json() == {"task_id": "buffered_id"}
+        mock_create.assert_not_called()
+        mock_publish.assert_called_once_with(
+            "app.celery_tasks.create_task.create_group",
+            ["group1"],
+            {"callback_url": None, "write_quorum": None},
+        )
+
+
+def test_create_group_with_fair_scheduling():
+    with patch("app.api.routers.groups.FAIR_SCHEDULING", True), patch(
+        "app.api.routers.groups.submit", return_value="queued_task_id"
+    ) as mock_submit, patch("app.api.routers.groups.create_group.delay") as mock_create:
+        response = client.post(
+            "/groups/create",
+            json={"group_id": "bulk-group1"},
+            headers={"X-Tenant-Id": "team-a"},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"task_id": "queued_task_id"}
+        mock_create.assert_not_called()
+        tenant, task_name, args, kwargs, _ = mock_submit.call_args.args
+        assert tenant == "team-a"
+        assert task_name == "app.celery_tasks.create_task.create_group"
+        assert args == ["bulk-group1"]
+        assert kwargs == {"callback_url": None, "write_quorum": None}
+
+
+def test_delete_group_with_fair_scheduling_uses_group_prefix():
+    with patch("app.api.routers.groups.FAIR_SCHEDULING", True), patch(
+        "app.api.routers.groups.submit", return_value="queued_task_id"
+    ) as mock_submit:
+        response = client.post("/groups/delete", json={"group_id": "bulk-group1"})
+        assert response.status_code == 200
+        assert mock_submit.call_args.args[0] == "bulk"
+
+
+def test_create_group_with_callback_url():
+    test_group_id = "test_group_id"
+    callback_url = "https://example.com/hooks/groups"
+    with patch("app.api.routers.groups.create_group.delay") as mock_create:
+        mock_create.return_value = MagicMock(id="mock_task_id")
+        response = client.post(
+            "/groups/create",
+            json={"group_id": test_group_id, "callback_url": callback_url},
+        )
+        assert response.status_code == 200
+        mock_create.assert_called_once_with(
+            test_group_id, callback_url=callback_url, write_quorum=None
+        )
+
+
+def test_create_group_rejects_invalid_callback_url():
+    with patch("app.api.routers.groups.create_group.delay") as mock_create:
+        response = client.post(
+            "/groups/create",
+            json={"group_id": "test_group_id", "callback_url": "not-a-url"},
+        )
+        assert response.status_code == 422
+        mock_create.assert_not_called()
+
+
+def test_create_group_rejects_internal_callback_url():
+    with patch("app.api.routers.groups.create_group.delay") as mock_create:
+        response = client.post(
+            "/groups/create",
+            json={
+                "group_id": "test_group_id",
+                "callback_url": "http://169.254.169.254/latest/meta-data",
+            },
+        )
+        assert response.status_code == 422
+        assert "not public" in response.text
+        mock_create.assert_not_called()
+
+
+def test_create_group_with_write_quorum():
+    with patch("app.api.routers.groups.create_group.delay") as mock_create:
+        mock_create.return_value = MagicMock(id="mock_task_id")
+        response = client.post(
+            "/groups/create", json={"group_id": "test_group_id", "write_quorum": 2}
+        )
+        assert response.status_code == 200
+        mock_create.assert_called_once_with(
+            "test_group_id", callback_url=None, write_quorum=2
+        )
+
+
+def test_create_group_rejects_invalid_write_quorum():
+    with patch("app.api.routers.groups.create_group.delay") as mock_create:
+        response = client.post(
+            "/groups/create", json={"group_id": "test_group_id", "write_quorum": 0}
+        )
+        assert response.status_code == 422
+        mock_create.assert_not_called()
 
 
 def test_get_task_status():
@@ -35,11 +141,76 @@ def test_get_task_status():
         "task_id": task_id,
         "state": "SUCCESS",
         "status": "Completed",
+        "progress": None,
     }
-    with patch("app.api.routers.groups.celery_app") as mock_async_result:
+    with patch("app.api.routers.groups.celery_app") as mock_async_result, patch(
+        "app.api.routers.groups.read_progress", return_value=None
+    ):
         mock_async_result.AsyncResult.return_value = MagicMock(
             id="some_task_id", state="SUCCESS", status="Completed"
         )
         response = client.get(f"/groups/task/{task_id}")
         assert response.status_code == 200
         assert response.json() == mock_result
+
+
+def test_get_task_status_with_progress():
+    progress = {
+        "operation": "create_group",
+        "total": 3,
+        "processed": 2,
+        "counts": {"created": 1, "failed": 1, "rolling_back": 1},
+        "current": None,
+        "nodes": {
+            "node1": {
+                "status": "created",
+                "duration_ms": 12.5,
+                "rollback": "rolling_back",
+            },
+            "node2": {"status": "failed", "duration_ms": 3001.0},
+        },
+    }
+    with patch("app.api.routers.groups.celery_app") as mock_celery_app, patch(
+        "app.api.routers.groups.read_progress", return_value=progress
+    ) as mock_read_progress:
+        mock_celery_app.AsyncResult.return_value = MagicMock(
+            id="some_task_id", state="SUCCESS", status="SUCCESS"
+        )
+        response = client.get("/groups/task/some_task_id")
+        assert response.status_code == 200
+        assert response.json()["progress"] == progress
+        mock_read_progress.assert_called_once_with("some_task_id")
+
+
+def test_read_group():
+    summary = {
+        "group_id": "group123",
+        "present_on": ["node1"],
+        "missing_on": [],
+        "unreachable": [],
+        "consistent": True,
+        "checked_at": 1700000000.0,
+        "cached": False,
+    }
+    with patch(
+        "app.api.routers.groups.group_reader.get_summary",
+        new=AsyncMock(return_value=summary),
+    ) as mock_get_summary, patch("app.api.routers.groups.HOSTS", ["node1"]):
+        response = client.get("/groups/group123", params={"refresh": "true"})
+        assert response.status_code == 200
+        assert response.json() == summary
+        mock_get_summary.assert_awaited_once_with("group123", ["node1"], refresh=True)
+
+
+def test_read_group_queries_placed_nodes():
+    hosts = ["node1", "node2", "node3", "node4"]
+    with patch(
+        "app.api.routers.groups.group_reader.get_summary",
+        new=AsyncMock(return_value={}),
+    ) as mock_get_summary, patch("app.api.routers.groups.HOSTS", hosts), patch(
+        "app.shared.placement.GROUP_REPLICAS", 2
+    ):
+        client.get("/groups/group123")
+        mock_get_summary.assert_awaited_once_with(
+            "group123", nodes_for_group("group123", hosts, 2), refresh=False
+        )
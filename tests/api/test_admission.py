@@ -0,0 +1,178 @@
+import math
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.admission import AdmissionController, TokenBucket, admission_control
+from main import app
+
+client = TestClient(app)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=2, burst=2, now=0)
+    assert bucket.take(0) == 0
+    assert bucket.take(0) == 0
+    assert bucket.take(0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0
+
+
+def test_disabled_by_default():
+    controller = AdmissionController(high_watermark=0, max_queue_delay=0)
+    assert controller.enabled is False
+
+
+def test_service_rate_from_completed_tasks(clock):
+    controller = AdmissionController(high_watermark=100, clock=clock)
+    controller.update(depth=50, completed=0, now=0)
+    assert controller.service_rate is None
+    controller.update(depth=50, completed=20, now=2)
+    assert controller.service_rate == 10
+    controller.update(depth=50, completed=20, now=3)
+    assert controller.service_rate == pytest.approx(7)
+
+
+def test_depth_counts_the_node_queues():
+    depth_reader = MagicMock(return_value=7)
+    controller = AdmissionController(
+        queue_name="celery",
+        per_node_queues=True,
+        hosts=["node1", "node2"],
+        depth_reader=depth_reader,
+        completed_reader=lambda: 0,
+    )
+    assert controller._sample() == (7, 0)
+    depth_reader.assert_called_once_with("celery", "node.node1", "node.node2")
+
+
+def test_depth_counts_the_fair_backlog():
+    controller = AdmissionController(
+        per_node_queues=False,
+        fair_scheduling=True,
+        depth_reader=MagicMock(return_value=7),
+        backlog_reader=lambda: 30,
+        completed_reader=lambda: 0,
+    )
+    assert controller._sample() == (37, 0)
+
+
+def test_shedding_with_watermark_hysteresis():
+    controller = AdmissionController(high_watermark=100, low_watermark=50)
+    controller.update(depth=99, completed=0, now=0)
+    assert controller.shedding is False
+    controller.update(depth=100, completed=10, now=1)
+    assert controller.shedding is True
+    controller.update(depth=60, completed=50, now=2)
+    assert controller.shedding is True
+    controller.update(depth=50, completed=60, now=3)
+    assert controller.shedding is False
+
+
+def test_shedding_on_queue_delay():
+    controller = AdmissionController(high_watermark=0, max_queue_delay=10)
+    controller.update(depth=100, completed=0, now=0)
+    assert controller.shedding is False
+    controller.update(depth=100, completed=5, now=1)
+    assert controller.estimated_delay() == 20
+    assert controller.shedding is True
+    assert controller.retry_after() == 10
+
+
+def test_retry_after_bounds():
+    controller = AdmissionController(high_watermark=10, retry_after_max=30)
+    controller.update(depth=1000, completed=0, now=0)
+    assert controller.retry_after() == 30
+    controller.update(depth=1000, completed=0, now=1)
+    assert controller.service_rate == 0
+    assert controller.retry_after() == 30
+    assert math.isinf(controller.estimated_delay())
+
+
+@pytest.fixture
+def override_admission():
+    def override(controller):
+        app.dependency_overrides[admission_control] = controller
+
+    yield override
+    app.dependency_overrides.pop(admission_control, None)
+
+
+@patch("app.api.routers.groups.create_group.delay")
+def test_create_sheds_load_above_watermark(mock_create, clock, override_admission):
+    override_admission(
+        AdmissionController(
+            high_watermark=100,
+            depth_reader=MagicMock(return_value=500),
+            completed_reader=MagicMock(return_value=0),
+            clock=clock,
+        )
+    )
+    response = client.post("/groups/create", json={"group_id": "group123"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
+    mock_create.assert_not_called()
+
+
+@patch("app.api.routers.groups.delete_group.delay")
+def test_delete_admitted_below_watermark(mock_delete, clock, override_admission):
+    mock_delete.return_value = MagicMock(id="mock_task_id")
+    override_admission(
+        AdmissionController(
+            high_watermark=100,
+            depth_reader=MagicMock(return_value=10),
+            completed_reader=MagicMock(return_value=0),
+            clock=clock,
+        )
+    )
+    response = client.post("/groups/delete", json={"group_id": "group123"})
+    assert response.status_code == 200
+
+
+@patch("app.api.routers.groups.create_group.delay")
+def test_create_fails_open_when_broker_unreachable(
+    mock_create, clock, override_admission
+):
+    mock_create.return_value = MagicMock(id="mock_task_id")
+    override_admission(
+        AdmissionController(
+            high_watermark=100,
+            depth_reader=MagicMock(side_effect=ConnectionError("broker down")),
+            clock=clock,
+        )
+    )
+    response = client.post("/groups/create", json={"group_id": "group123"})
+    assert response.status_code == 200
+
+
+@patch("app.api.routers.groups.create_group.delay")
+def test_client_quota(mock_create, clock, override_admission):
+    mock_create.return_value = MagicMock(id="mock_task_id")
+    override_admission(
+        AdmissionController(
+            high_watermark=0, client_rate=0.5, client_burst=1, clock=clock
+        )
+    )
+    headers = {"X-Client-Id": "team-a"}
+    response = client.post("/groups/create", json={"group_id": "g1"}, headers=headers)
+    assert response.status_code == 200
+    response = client.post("/groups/create", json={"group_id": "g2"}, headers=headers)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    response = client.post(
+        "/groups/create", json={"group_id": "g3"}, headers={"X-Client-Id": "team-b"}
+    )
+    assert response.status_code == 200
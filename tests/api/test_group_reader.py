@@ -0,0 +1,123 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.api.group_reader import GroupReader
+from app.clients.node_client import AsyncNodeClient
+
+NODES = ["node1", "node2", "node3"]
+
+
+class NodeStandIn:
+    """
+    Async transport answering group reads per node, counting the calls.
+    """
+
+    def __init__(self, statuses, delay=0.01):
+        self.statuses = statuses
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, request: httpx.Request):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        status = self.statuses[request.url.netloc.decode()]
+        if status is None:
+            raise httpx.ConnectError("Connection failed")
+        return httpx.Response(status, json={})
+
+
+def build_reader(stand_in):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(stand_in))
+    return GroupReader(node_client=AsyncNodeClient(client))
+
+
+@pytest.fixture
+def cache():
+    store = {}
+    with patch(
+        "app.api.group_reader.get_cached_summary", side_effect=store.get
+    ), patch(
+        "app.api.group_reader.set_cached_summary", side_effect=store.__setitem__
+    ):
+        yield store
+
+
+def test_summary_classifies_nodes(cache):
+    stand_in = NodeStandIn({"node1": 200, "node2": 404, "node3": None})
+    summary = asyncio.run(build_reader(stand_in).get_summary("group123", NODES))
+    assert summary["present_on"] == ["node1"]
+    assert summary["missing_on"] == ["node2"]
+    assert summary["unreachable"] == ["node3"]
+    assert summary["consistent"] is False
+    assert summary["cached"] is False
+
+
+def test_summary_consistent_when_present_everywhere(cache):
+    stand_in = NodeStandIn({"node1": 200, "node2": 200, "node3": 200})
+    summary = asyncio.run(build_reader(stand_in).get_summary("group123", NODES))
+    assert summary["consistent"] is True
+
+
+def test_nodes_queried_concurrently(cache):
+    stand_in = NodeStandIn({"node1": 200, "node2": 200, "node3": 200}, delay=0.2)
+    reader = build_reader(stand_in)
+
+    async def timed_read():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await reader.get_summary("group123", NODES)
+        return loop.time() - started
+
+    assert asyncio.run(timed_read()) < 0.4
+
+
+def test_summary_served_from_cache(cache):
+    stand_in = NodeStandIn({"node1": 200, "node2": 200, "node3": 200})
+    reader = build_reader(stand_in)
+
+    async def read_twice():
+        await reader.get_summary("group123", NODES)
+        return await reader.get_summary("group123", NODES)
+
+    summary = asyncio.run(read_twice())
+    assert summary["cached"] is True
+    assert stand_in.calls == len(NODES)
+
+
+def test_refresh_bypasses_cache(cache):
+    stand_in = NodeStandIn({"node1": 200, "node2": 200, "node3": 200})
+    reader = build_reader(stand_in)
+
+    async def read_then_refresh():
+        await reader.get_summary("group123", NODES)
+        return await reader.get_summary("group123", NODES, refresh=True)
+
+    summary = asyncio.run(read_then_refresh())
+    assert summary["cached"] is False
+    assert stand_in.calls == 2 * len(NODES)
+
+
+def test_concurrent_reads_share_one_fan_out(cache):
+    stand_in = NodeStandIn({"node1": 200, "node2": 404, "node3": 200}, delay=0.05)
+    reader = build_reader(stand_in)
+
+    async def burst():
+        return await asyncio.gather(
+            *(reader.get_summary("group123", NODES) for _ in range(20))
+        )
+
+    summaries = asyncio.run(burst())
+    assert stand_in.calls == len(NODES)
+    assert all(summary["missing_on"] == ["node2"] for summary in summaries)
+
+
+def test_cache_errors_fall_back_to_nodes():
+    stand_in = NodeStandIn({"node1": 200, "node2": 200, "node3": 200})
+    with patch(
+        "app.api.group_reader.get_cached_summary", side_effect=ConnectionError()
+    ), patch("app.api.group_reader.set_cached_summary", side_effect=ConnectionError()):
+        summary = asyncio.run(build_reader(stand_in).get_summary("group123", NODES))
+    assert summary["present_on"] == NODES
@@ -0,0 +1,83 @@
+import json
+import re
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.middleware import (
+    ProcessTimeMiddleware,
+    TracingMiddleware,
+    TrafficRecordMiddleware,
+)
+from app.shared.tracing import InMemoryExporter, Tracer
+from app.shared.traffic import TrafficRecorder
+
+
+def test_process_time_header():
+    app = FastAPI()
+    app.add_middleware(ProcessTimeMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"pong": True}
+
+    response = TestClient(app).get("/ping")
+
+    assert response.status_code == 200
+    assert response.json() == {"pong": True}
+    assert re.fullmatch(r"\d+\.\d{4} sec", response.headers["X-Process-Time"])
+
+
+def test_traffic_record_middleware(tmp_path):
+    recorder = TrafficRecorder(path=str(tmp_path / "traffic.jsonl"))
+    app = FastAPI()
+    app.add_middleware(TrafficRecordMiddleware, recorder=recorder)
+
+    @app.post("/groups/create")
+    async def create(body: dict):
+        return {"task_id": "task1"}
+
+    @app.get("/ping")
+    async def ping():
+        return {"pong": True}
+
+    client = TestClient(app)
+    client.post(
+        "/groups/create", json={"group_id": "group1"}, headers={"X-Tenant-Id": "acme"}
+    )
+    client.get("/ping")
+
+    lines = (tmp_path / "traffic.jsonl").read_text().splitlines()
+    (record,) = [json.loads(line) for line in lines]
+    assert record["method"] == "POST"
+    assert record["path"] == "/groups/create"
+    assert record["body"] == {"group_id": "group1"}
+    assert record["headers"] == {"X-Tenant-Id": "acme"}
+    assert record["status"] == 200
+    assert record["task_id"] == "task1"
+
+
+def test_tracing_middleware_continues_the_incoming_trace():
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter, sample_rate=0.0)
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+
+    @app.post("/groups/create")
+    def create():
+        # Sync endpoints run in the thread pool, with the request's context
+        return {"traceparent": tracer.current_traceparent()}
+
+    incoming = f"00-{'a' * 32}-{'b' * 16}-01"
+    response = TestClient(app).post(
+        "/groups/create", headers={"traceparent": incoming}
+    )
+
+    (span,) = exporter.spans
+    assert span["name"] == "POST /groups/create"
+    assert span["trace_id"] == "a" * 32
+    assert span["parent_id"] == "b" * 16
+    assert span["attributes"] == {"status_code": 200}
+    traceparent = f"00-{'a' * 32}-{span['span_id']}-01"
+    assert response.headers["traceparent"] == traceparent
+    assert response.json() == {"traceparent": traceparent}
@@ -0,0 +1,175 @@
+import asyncio
+import threading
+from collections import defaultdict
+from unittest.mock import patch
+
+import pytest
+from celery import Celery
+from fastapi import HTTPException
+
+from app.api.publisher import ConfirmTracker, TaskPublisher
+from app.shared.tracing import InMemoryExporter, Tracer
+
+CREATE = "app.celery_tasks.create_task.create_group"
+
+
+class ConfirmingChannel:
+    """
+    AMQP-like channel in confirm mode, nacking the tags listed in `nack`.
+    """
+
+    def __init__(self, nack=()):
+        self.events = defaultdict(set)
+        self.nack = set(nack)
+        self.published = 0
+        self.unconfirmed = []
+
+    def confirm_select(self):
+        pass
+
+    def confirm(self):
+        for tag in self.unconfirmed:
+            event = "basic_nack" if tag in self.nack else "basic_ack"
+            for callback in self.events[event]:
+                callback(tag, False)
+        self.unconfirmed = []
+
+
+class FakeConnection:
+    def __init__(self, channel):
+        self.channel = channel
+        self.released = False
+
+    def ensure_connection(self, max_retries=None):
+        pass
+
+    def Producer(self):
+        return type("Producer", (), {"channel": self.channel})()
+
+    def drain_events(self, timeout=None):
+        self.channel.confirm()
+
+    def release(self):
+        self.released = True
+
+
+class FakeApp:
+    """
+    Celery app stand-in publishing to a ConfirmingChannel.
+    """
+
+    def __init__(self, channel, fail_connections=0):
+        self.channel = channel
+        self.fail_connections = fail_connections
+        self.sent = []
+
+    def connection_for_write(self):
+        if self.fail_connections:
+            self.fail_connections -= 1
+            raise ConnectionError("Broker unreachable")
+        return FakeConnection(self.channel)
+
+    def send_task(self, name, args, kwargs, task_id, producer):
+        self.channel.published += 1
+        self.channel.unconfirmed.append(self.channel.published)
+        self.sent.append((args[0], task_id))
+
+
+def run(coroutine):
+    return asyncio.new_event_loop().run_until_complete(coroutine)
+
+
+def test_publish_returns_task_id_and_publishes_in_background():
+    app = Celery(broker="memory://", backend="cache+memory://")
+    publisher = TaskPublisher(app=app)
+
+    task_id = run(publisher.publish(CREATE, ["group1"], {"callback_url": None}))
+    publisher.close()
+
+    with app.connection_for_write() as connection:
+        message = connection.SimpleQueue("celery").get(timeout=1)
+    assert message.headers["id"] == task_id
+    assert message.headers["task"] == CREATE
+    assert message.payload[0] == ["group1"]
+    assert publisher.published == 1
+
+
+def test_publish_carries_the_trace_of_the_request():
+    app = Celery(broker="memory://", backend="cache+memory://")
+    publisher = TaskPublisher(app=app)
+    tracer = Tracer(InMemoryExporter(), sample_rate=1.0)
+
+    with patch("app.api.publisher.tracer", tracer):
+        with tracer.span("request", root=True) as span:
+            run(publisher.publish(CREATE, ["group1"], {"callback_url": None}))
+    publisher.close()
+
+    with app.connection_for_write() as connection:
+        message = connection.SimpleQueue("celery").get(timeout=1)
+    assert message.headers["traceparent"] == span.traceparent
+
+
+def test_batch_confirms_and_republishes_nacked_messages():
+    channel = ConfirmingChannel(nack={2})
+    app = FakeApp(channel)
+    publisher = TaskPublisher(app=app, wait_confirm=True, retry_interval=0.01)
+
+    async def publish_all():
+        return await asyncio.gather(
+            *(publisher.publish(CREATE, [f"group{i}"], {}) for i in range(3))
+        )
+
+    task_ids = run(publish_all())
+    publisher.close()
+
+    assert sorted(task_id for _, task_id in app.sent[:3]) == sorted(task_ids)
+    # The nacked message was published again with the same task ID
+    assert len(app.sent) == 4
+    assert app.sent[3] == app.sent[1]
+    assert publisher.published == 3
+
+
+def test_publisher_retries_while_broker_is_unreachable():
+    app = FakeApp(ConfirmingChannel(), fail_connections=2)
+    publisher = TaskPublisher(app=app, wait_confirm=True, retry_interval=0.01)
+
+    task_id = run(publisher.publish(CREATE, ["group1"], {}))
+    publisher.close()
+
+    assert app.sent == [("group1", task_id)]
+
+
+def test_full_buffer_rejects_requests():
+    release = threading.Event()
+    app = FakeApp(ConfirmingChannel())
+    send_task = app.send_task
+    app.send_task = lambda *args, **kwargs: release.wait(5) and send_task(
+        *args, **kwargs
+    )
+    publisher = TaskPublisher(app=app, buffer_size=1, batch_size=1)
+
+    async def publish_until_full():
+        for index in range(3):
+            await publisher.publish(CREATE, [f"group{index}"], {})
+            await asyncio.sleep(0.05)
+
+    with pytest.raises(HTTPException) as exc_info:
+        run(publish_until_full())
+    release.set()
+    publisher.close()
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "1"}
+
+
+def test_confirm_tracker_multiple_ack():
+    channel = ConfirmingChannel()
+    tracker = ConfirmTracker(channel)
+    tags = [tracker.expect() for _ in range(3)]
+
+    class Connection:
+        def drain_events(self, timeout=None):
+            for callback in channel.events["basic_ack"]:
+                callback(3, True)
+
+    assert tracker.wait(Connection(), tags, timeout=1) == {1: True, 2: True, 3: True}
@@ -0,0 +1,197 @@
+from unittest.mock import patch
+
+import pytest
+from httpx import Client, MockTransport, Response
+
+from app.celery_tasks import backfill_task
+from app.celery_tasks.backfill_task import (
+    backfill_chunk,
+    pause_backfill,
+    read_backfill,
+    start_backfill,
+)
+from app.clients.node_client import NodeClient
+from app.shared.group_catalog import CATALOG_KEY, import_groups
+from benchmarks.fakes.mock_redis import MockRedis
+
+HOSTS = ["node1", "node2", "node3"]
+
+
+class FakeNode:
+    """
+    Node API keeping its groups in memory, failing the groups in `failing`.
+    """
+
+    def __init__(self):
+        self.groups = set()
+        self.failing = set()
+        self.calls = 0
+        self.on_create = lambda group_id: None
+
+    def handle(self, request):
+        self.calls += 1
+        if request.method == "GET":
+            group_id = request.url.path.rsplit("/", 1)[1]
+            if group_id in self.failing:
+                return Response(500)
+            return Response(200 if group_id in self.groups else 404)
+        group_id = request.read().decode().split('"')[3]
+        if group_id in self.failing:
+            return Response(500)
+        if request.method == "POST":
+            if group_id in self.groups:
+                return Response(400)
+            self.groups.add(group_id)
+            self.on_create(group_id)
+            return Response(201)
+        self.groups.discard(group_id)
+        return Response(200)
+
+
+@pytest.fixture
+def node():
+    return FakeNode()
+
+
+@pytest.fixture
+def harness(node):
+    mock_redis = MockRedis()
+    queued = []
+    node_client = NodeClient(Client(transport=MockTransport(node.handle)))
+    with patch("app.celery_tasks.backfill_task.redis_client", mock_redis), patch(
+        "app.shared.group_catalog.redis_client", mock_redis
+    ), patch.object(backfill_task, "node_client", node_client), patch.object(
+        backfill_task, "HOSTS", HOSTS
+    ), patch.object(
+        backfill_task, "BACKFILL_CHUNK_SIZE", 10
+    ), patch.object(
+        backfill_task, "BACKFILL_PAUSE_QUEUE_DEPTH", 0
+    ), patch.object(
+        backfill_task.celery_app,
+        "send_task",
+        side_effect=lambda name, kwargs, **options: queued.append((kwargs, options)),
+    ):
+        yield mock_redis, queued
+
+
+def drain(queued):
+    while queued:
+        kwargs, _ = queued.pop(0)
+        backfill_chunk(**kwargs)
+
+
+def test_backfill_copies_then_verifies(harness, node):
+    _, queued = harness
+    import_groups(f"group{index:02}" for index in range(25))
+    node.groups.add("group03")
+
+    start_backfill("node3")
+    drain(queued)
+
+    assert node.groups == {f"group{index:02}" for index in range(25)}
+    state = read_backfill("node3")
+    assert state["status"] == "done"
+    assert (state["scanned"], state["created"], state["existing"]) == (50, 24, 1)
+    assert (state["verified"], state["repaired"], state["failed"]) == (25, 0, 0)
+
+
+def test_backfill_only_copies_groups_placed_on_the_node(harness, node):
+    _, queued = harness
+    import_groups(f"group{index:02}" for index in range(25))
+
+    with patch("app.shared.placement.GROUP_REPLICAS", 1):
+        start_backfill("node3")
+        drain(queued)
+
+    placed = {
+        group_id
+        for group_id in (f"group{index:02}" for index in range(25))
+        if backfill_task.nodes_for_group(group_id, HOSTS, replicas=1) == ["node3"]
+    }
+    assert 0 < len(placed) < 25
+    assert node.groups == placed
+
+
+def test_verification_repairs_missing_groups(harness, node):
+    _, queued = harness
+    import_groups(["group1", "group2", "group3"])
+    node.groups.add("group1")
+    node.failing.add("group3")
+
+    start_backfill("node3", verify_only=True)
+    drain(queued)
+
+    state = read_backfill("node3")
+    assert (state["verified"], state["repaired"], state["unverified"]) == (1, 1, 1)
+    assert state["created"] == 0
+    assert node.groups == {"group1", "group2"}
+
+
+def test_groups_deleted_meanwhile_are_removed_again(harness, node):
+    mock_redis, queued = harness
+    import_groups(["group1", "group2"])
+    # The deletion of group2 completes while the chunk runs
+    node.on_create = lambda group_id: group_id == "group2" and mock_redis.srem(
+        CATALOG_KEY, "group2"
+    )
+
+    start_backfill("node3")
+    drain(queued)
+
+    assert node.groups == {"group1"}
+    assert read_backfill("node3")["removed"] == 1
+
+
+def test_backfill_resumes_from_checkpoint_after_pause(harness, node):
+    _, queued = harness
+    import_groups(f"group{index:02}" for index in range(25))
+
+    start_backfill("node3")
+    backfill_chunk(**queued.pop(0)[0])
+    pause_backfill("node3")
+    drain(queued)
+
+    state = read_backfill("node3")
+    assert (state["status"], state["created"], state["cursor"]) == ("paused", 10, 10)
+
+    start_backfill("node3")
+    drain(queued)
+
+    state = read_backfill("node3")
+    assert (state["status"], state["created"]) == ("done", 25)
+
+
+def test_stale_runs_stop(harness, node):
+    _, queued = harness
+    import_groups(["group1"])
+    start_backfill("node3")
+    stale_chunk = queued.pop(0)[0]
+
+    start_backfill("node3")
+    assert backfill_chunk(**stale_chunk) is None
+    assert node.calls == 0
+
+
+def test_chunks_are_paced_and_postponed_under_load(harness, node):
+    _, queued = harness
+    import_groups(f"group{index:02}" for index in range(25))
+    start_backfill("node3")
+    first_chunk = queued.pop(0)[0]
+
+    with patch.object(backfill_task, "BACKFILL_PAUSE_QUEUE_DEPTH", 100), patch(
+        "app.celery_tasks.backfill_task.get_queue_depth", return_value=500
+    ):
+        assert backfill_chunk(**first_chunk) is None
+    assert node.calls == 0
+    assert queued[-1][1]["countdown"] == backfill_task.BACKFILL_PAUSE_INTERVAL
+    assert read_backfill("node3")["throttled"] == 1
+
+    with patch.object(backfill_task, "BACKFILL_RATE", 10):
+        backfill_chunk(**queued.pop(0)[0])
+    # 10 groups at 10 per second
+    assert 0.5 < queued[-1][1]["countdown"] <= 1
+
+
+def test_start_rejects_unknown_node(harness):
+    with pytest.raises(ValueError):
+        start_backfill("node4")
@@ -21,6 +21,17 @@ class TestCeleryConfiguration(unittest.TestCase):
             "app.celery_tasks.delete_task.rollback_delete_group",
             "app.celery_tasks.create_task.create_group",
             "app.celery_tasks.delete_task.delete_group",
+            "app.celery_tasks.webhook_task.deliver_webhook",
         ]
         discovered_tasks = list(celery_app.tasks.keys())
         self.assertTrue(all(task in discovered_tasks for task in my_tasks))
+
+    def test_webhook_queue_is_bounded(self):
+        queues = {queue.name: queue for queue in self.celery_config.task_queues}
+        self.assertIn("x-max-length", queues["webhooks"].queue_arguments)
+        self.assertEqual(
+            self.celery_config.task_routes[
+                "app.celery_tasks.webhook_task.deliver_webhook"
+            ],
+            {"queue": "webhooks"},
+        )
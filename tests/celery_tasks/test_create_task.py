@@ -1,3 +1,4 @@
+import itertools
 import json
 from unittest.mock import MagicMock, call, patch
 import httpx
@@ -9,6 +10,7 @@ from app.celery_tasks.create_task import (
     _update_rollback_data,
     create_group,
     logger,
+    resolve_write_quorum,
     rollback_create_group,
     trigger_rollback,
 )
@@ -89,12 +91,34 @@ def test_create_group_skips_creation_if_rollback_data_exists(
 
 
 def test_create_group_processes_all_nodes_successfully(
-    setup_redis, setup_node_client, mock_is_rollback_needed
+    mocker, setup_redis, setup_node_client, mock_is_rollback_needed
 ):
+    mock_pipeline = mocker.patch.object(redis_client, "pipeline").return_value
     group_id = "test_group_id"
     create_group(group_id)
     assert NodeClient.create_group.call_count == len(HOSTS)
-    redis_client.delete.assert_called_once_with(f"rollback_create_group_{group_id}")
+    # The lock is released and the group cataloged in one round trip
+    mock_pipeline.delete.assert_called_once_with(f"rollback_create_group_{group_id}")
+    mock_pipeline.sadd.assert_called_once_with("group_catalog", group_id)
+    mock_pipeline.execute.assert_called_once_with()
+
+
+@patch("app.celery_tasks.create_task.HOSTS", ["node1", "node2", "node3", "node4"])
+@patch("app.celery_tasks.create_task.LOCK_REFRESH_INTERVAL", 60)
+def test_long_creation_refreshes_its_lock(
+    mocker, setup_redis, setup_node_client, mock_is_rollback_needed
+):
+    mocker.patch.object(redis_client, "pipeline")
+    # 40 seconds pass between two reads of the clock
+    mock_time = mocker.patch("app.celery_tasks.create_task.time")
+    mock_time.time.side_effect = itertools.count(0, 40)
+    create_group("test_group_id")
+    refreshed = [
+        json.loads(lock)["locked_at"]
+        for (_, lock), options in redis_client.set.call_args_list
+        if options.get("xx")
+    ]
+    assert refreshed == [80, 160]
 
 
 def test_create_group_triggers_rollback_on_failure(mocker, setup_redis):
@@ -110,10 +134,11 @@ def test_create_group_triggers_rollback_on_failure(mocker, setup_redis):
         "app.celery_tasks.create_task.trigger_rollback"
     )
     create_group(group_id)
-    mock_trigger_rollback.assert_called_once_with(group_id, [])
-    redis_client.set.assert_called_once_with(
-        f"rollback_create_group_{group_id}", json.dumps([])
-    )
+    mock_trigger_rollback.assert_called_once_with(group_id, [], None)
+    # Creation locked with its acquisition time
+    ((key, lock), _) = redis_client.set.call_args
+    assert key == f"rollback_create_group_{group_id}"
+    assert set(json.loads(lock)) == {"locked_at", "task_id"}
 
 
 @patch("app.celery_tasks.create_task.rollback_create_group.retry")
@@ -226,3 +251,10 @@ def test_trigger_rollback(mock_send_task, mock_redis_set, group_id_node_setup):
         for node in nodes_processed
     ]
     mock_send_task.assert_has_calls(calls, any_order=True)
+
+
+@patch("app.celery_tasks.create_task.CREATE_WRITE_QUORUM", 2)
+def test_resolve_write_quorum():
+    assert resolve_write_quorum(None, 5) == 2
+    assert resolve_write_quorum(0, 5) == 5
+    assert resolve_write_quorum(9, 5) == 5
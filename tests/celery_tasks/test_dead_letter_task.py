@@ -1,24 +1,48 @@
 import json
 from unittest.mock import patch
 
-from app.celery_tasks.dead_letter_task import process_dead_letter
+import pytest
+from httpx import Client, ConnectError, MockTransport, Response
 
+from app.celery_tasks import dead_letter_task
+from app.celery_tasks.dead_letter_task import (
+    process_dead_letter,
+    read_replay,
+    replay_dead_letters,
+    scan_replay_outcomes,
+    start_replay,
+)
+from app.clients.node_client import NodeClient
+from app.shared.dead_letters import (
+    DEAD_LETTERS_KEY,
+    record_dead_letter,
+    scan_dead_letters,
+)
+from app.shared.group_catalog import import_groups
+from benchmarks.fakes.mock_redis import MockRedis
 
+
+@patch("app.celery_tasks.dead_letter_task.record_dead_letter")
 @patch("app.celery_tasks.dead_letter_task.redis_client.get")
 @patch("app.celery_tasks.dead_letter_task.redis_client.delete")
 @patch("app.celery_tasks.dead_letter_task.redis_client.set")
 @patch("app.celery_tasks.dead_letter_task.logger")
-def test_no_rollback_item_found(mock_logger, mock_set, mock_delete, mock_get):
+def test_no_rollback_item_found(
+    mock_logger, mock_set, mock_delete, mock_get, mock_record_dead_letter
+):
     mock_get.return_value = None
     process_dead_letter("group123", "nodeA", "task1")
     mock_logger.info.assert_called_with("No rollback item found for task1_group123")
 
 
+@patch("app.celery_tasks.dead_letter_task.record_dead_letter")
 @patch("app.celery_tasks.dead_letter_task.redis_client.get")
 @patch("app.celery_tasks.dead_letter_task.redis_client.delete")
 @patch("app.celery_tasks.dead_letter_task.redis_client.set")
 @patch("app.celery_tasks.dead_letter_task.logger")
-def test_invalid_rollback_item_format(mock_logger, mock_set, mock_delete, mock_get):
+def test_invalid_rollback_item_format(
+    mock_logger, mock_set, mock_delete, mock_get, mock_record_dead_letter
+):
     mock_get.return_value = '{"invalid": "data"}'
     process_dead_letter("group123", "nodeA", "task1")
     mock_logger.error.assert_called_with(
@@ -26,11 +50,14 @@ def test_invalid_rollback_item_format(mock_logger, mock_set, mock_delete, mock_g
     )
 
 
+@patch("app.celery_tasks.dead_letter_task.record_dead_letter")
 @patch("app.celery_tasks.dead_letter_task.redis_client.get")
 @patch("app.celery_tasks.dead_letter_task.redis_client.delete")
 @patch("app.celery_tasks.dead_letter_task.redis_client.set")
 @patch("app.celery_tasks.dead_letter_task.logger")
-def test_node_not_in_rollback_item_nodes(mock_logger, mock_set, mock_delete, mock_get):
+def test_node_not_in_rollback_item_nodes(
+    mock_logger, mock_set, mock_delete, mock_get, mock_record_dead_letter
+):
     mock_get.return_value = json.dumps({"nodes": ["nodeB", "nodeC"]})
     process_dead_letter("group123", "nodeA", "task1")
     mock_logger.info.assert_called_with(
@@ -38,12 +65,13 @@ def test_node_not_in_rollback_item_nodes(mock_logger, mock_set, mock_delete, moc
     )
 
 
+@patch("app.celery_tasks.dead_letter_task.record_dead_letter")
 @patch("app.celery_tasks.dead_letter_task.redis_client.get")
 @patch("app.celery_tasks.dead_letter_task.redis_client.delete")
 @patch("app.celery_tasks.dead_letter_task.redis_client.set")
 @patch("app.celery_tasks.dead_letter_task.logger")
 def test_delete_rollback_item_no_nodes_left(
-    mock_logger, mock_set, mock_delete, mock_get
+    mock_logger, mock_set, mock_delete, mock_get, mock_record_dead_letter
 ):
     mock_get.return_value = json.dumps({"nodes": ["nodeA"]})
     process_dead_letter("group123", "nodeA", "task1")
@@ -53,12 +81,13 @@ def test_delete_rollback_item_no_nodes_left(
     )
 
 
+@patch("app.celery_tasks.dead_letter_task.record_dead_letter")
 @patch("app.celery_tasks.dead_letter_task.redis_client.get")
 @patch("app.celery_tasks.dead_letter_task.redis_client.delete")
 @patch("app.celery_tasks.dead_letter_task.redis_client.set")
 @patch("app.celery_tasks.dead_letter_task.logger")
 def test_update_rollback_item_with_remaining_nodes(
-    mock_logger, mock_set, mock_delete, mock_get
+    mock_logger, mock_set, mock_delete, mock_get, mock_record_dead_letter
 ):
     mock_get.return_value = json.dumps({"nodes": ["nodeA", "nodeB"]})
     process_dead_letter("group123", "nodeA", "task1")
@@ -66,3 +95,201 @@ def test_update_rollback_item_with_remaining_nodes(
     mock_logger.info.assert_called_with(
         "Updated task1_group123 in Redis with remaining nodes."
     )
+
+
+@patch("app.celery_tasks.dead_letter_task.record_dead_letter")
+@patch("app.celery_tasks.dead_letter_task.redis_client.get")
+@patch("app.celery_tasks.dead_letter_task.logger")
+def test_dead_letter_recorded(mock_logger, mock_get, mock_record_dead_letter):
+    mock_get.return_value = None
+    process_dead_letter("group123", "nodeA", "rollback_create_group")
+    mock_record_dead_letter.assert_called_once_with(
+        "rollback_create_group", "group123", "nodeA"
+    )
+
+
+class FakeNodes:
+    """
+    Node APIs keeping their groups in memory. Groups in `failing` get a 500,
+    nodes in `down` refuse connections.
+    """
+
+    def __init__(self):
+        self.groups = {}
+        self.failing = set()
+        self.down = set()
+
+    def handle(self, request):
+        node = request.url.host
+        if node in self.down:
+            raise ConnectError("Connection refused", request=request)
+        if request.url.path == "/":
+            return Response(200)
+        groups = self.groups.setdefault(node, set())
+        if request.method == "GET":
+            group_id = request.url.path.rsplit("/", 1)[1]
+            return Response(200 if group_id in groups else 404)
+        group_id = request.read().decode().split('"')[3]
+        if group_id in self.failing:
+            return Response(500)
+        if request.method == "POST":
+            if group_id in groups:
+                return Response(400)
+            groups.add(group_id)
+            return Response(201)
+        if group_id not in groups:
+            return Response(400)
+        groups.discard(group_id)
+        return Response(200)
+
+
+@pytest.fixture
+def nodes():
+    return FakeNodes()
+
+
+@pytest.fixture
+def replay_harness(nodes):
+    mock_redis = MockRedis()
+    queued = []
+    node_client = NodeClient(Client(transport=MockTransport(nodes.handle)))
+    with patch("app.celery_tasks.dead_letter_task.redis_client", mock_redis), patch(
+        "app.shared.dead_letters.redis_client", mock_redis
+    ), patch("app.shared.group_catalog.redis_client", mock_redis), patch.object(
+        dead_letter_task, "node_client", node_client
+    ), patch.object(
+        dead_letter_task, "HOSTS", ["node1", "node2"]
+    ), patch.object(
+        dead_letter_task.celery_app,
+        "send_task",
+        side_effect=lambda name, kwargs, **options: queued.append((kwargs, options)),
+    ):
+        yield mock_redis, queued
+
+
+def drain(queued):
+    while queued:
+        kwargs, _ = queued.pop(0)
+        replay_dead_letters(**kwargs)
+
+
+def remaining_dead_letters():
+    _, entries = scan_dead_letters(count=1000)
+    return {entry["id"]: entry for entry in entries}
+
+
+def test_replay_resolves_dead_letters(nodes, replay_harness):
+    _, queued = replay_harness
+    nodes.groups["node1"] = {"group1"}
+    nodes.failing.add("group4")
+    import_groups(["group2", "group3", "group4"])
+    # Created on node1, its rollback failed: delete it
+    record_dead_letter("rollback_create_group", "group1", "node1")
+    # Created again since the rollback: keep it
+    record_dead_letter("rollback_create_group", "group2", "node1")
+    # Deletion rolled back, the group must exist again
+    record_dead_letter("rollback_delete_group", "group3", "node1")
+    record_dead_letter("repair_create_group", "group4", "node1")
+    record_dead_letter("rollback_create_group", "group5", "node2")
+
+    start_replay(node="node1")
+    drain(queued)
+
+    assert nodes.groups["node1"] == {"group3"}
+    remaining = remaining_dead_letters()
+    assert set(remaining) == {
+        "repair_create_group|group4|node1",
+        "rollback_create_group|group5|node2",
+    }
+    assert remaining["repair_create_group|group4|node1"]["replays"] == 1
+    assert remaining["repair_create_group|group4|node1"]["last_outcome"] == "failed"
+    replay = read_replay()
+    assert replay["status"] == "done"
+    assert replay["nodes"] == {"node1": "done"}
+    assert (replay["replayed"], replay["superseded"], replay["failed"]) == (2, 1, 1)
+    _, outcomes = scan_replay_outcomes(count=100)
+    by_id = {outcome["id"]: outcome for outcome in outcomes}
+    assert by_id["rollback_create_group|group1|node1"]["status_code"] == 200
+    assert by_id["rollback_create_group|group2|node1"]["outcome"] == "superseded"
+    assert by_id["repair_create_group|group4|node1"]["status_code"] == 500
+
+
+def test_replay_of_groups_outside_of_the_catalog(nodes, replay_harness):
+    _, queued = replay_harness
+    # Created before the catalog, never backfilled
+    nodes.groups["node2"] = {"group1", "group2"}
+    record_dead_letter("rollback_delete_group", "group1", "node1")
+    record_dead_letter("rollback_create_group", "group2", "node1")
+    # Missing on node2 too: deleted since
+    record_dead_letter("repair_create_group", "group3", "node1")
+
+    start_replay(node="node1")
+    drain(queued)
+    nodes.down.add("node2")
+    record_dead_letter("rollback_delete_group", "group4", "node1")
+    start_replay(node="node1")
+    drain(queued)
+
+    assert nodes.groups["node1"] == {"group1"}
+    remaining = remaining_dead_letters()
+    assert set(remaining) == {"rollback_delete_group|group4|node1"}
+    assert remaining["rollback_delete_group|group4|node1"]["last_outcome"] == (
+        "undetermined"
+    )
+    assert read_replay()["undetermined"] == 1
+
+
+def test_replay_leaves_unhealthy_nodes_alone(nodes, replay_harness):
+    _, queued = replay_harness
+    nodes.down.add("node2")
+    import_groups(["group1"])
+    record_dead_letter("rollback_delete_group", "group1", "node1")
+    record_dead_letter("rollback_create_group", "group2", "node2")
+
+    start_replay()
+    drain(queued)
+
+    assert set(remaining_dead_letters()) == {"rollback_create_group|group2|node2"}
+    replay = read_replay()
+    assert replay["nodes"] == {"node1": "done", "node2": "unhealthy"}
+    assert replay["unhealthy_nodes"] == 1
+    assert replay["status"] == "done"
+
+
+def test_replay_is_chunked_and_paced(nodes, replay_harness):
+    _, queued = replay_harness
+    nodes.failing.update(f"group{i}" for i in range(25))
+    for i in range(25):
+        record_dead_letter("rollback_create_group", f"group{i}", "node1")
+
+    with patch.object(
+        dead_letter_task, "DEAD_LETTER_REPLAY_CHUNK_SIZE", 10
+    ), patch.object(dead_letter_task, "DEAD_LETTER_REPLAY_RATE", 10):
+        start_replay(node="node1")
+        countdowns = []
+        while queued:
+            kwargs, options = queued.pop(0)
+            countdowns.append(options["countdown"])
+            replay_dead_letters(**kwargs)
+
+    assert len(countdowns) == 3
+    assert countdowns[1] > 0.5
+    assert read_replay()["failed"] == 25
+    assert len(remaining_dead_letters()) == 25
+
+
+def test_new_replay_stops_the_previous_one(replay_harness):
+    mock_redis, queued = replay_harness
+    record_dead_letter("rollback_create_group", "group1", "node1")
+
+    start_replay(node="node1")
+    stale, _ = queued.pop(0)
+    start_replay(node="node1")
+
+    assert replay_dead_letters(**stale) is None
+    assert DEAD_LETTERS_KEY in mock_redis.data
+
+
+def test_replay_of_unknown_node(replay_harness):
+    with pytest.raises(ValueError):
+        start_replay(node="node9")
@@ -8,27 +8,39 @@ from app.celery_tasks.delete_task import (
 )
 
 
+@patch("app.celery_tasks.delete_task.remove_from_catalog")
+@patch("app.celery_tasks.delete_task.redis_client.delete")
 @patch("app.celery_tasks.delete_task.node_client.delete_group")
 @patch("app.celery_tasks.delete_task.logger")
 @patch("app.celery_tasks.delete_task.trigger_rollback")
 @patch("app.celery_tasks.delete_task.HOSTS", ["node1", "node2"])
-def test_all_nodes_success(mock_trigger_rollback, mock_logger, mock_delete_group):
+def test_all_nodes_success(
+    mock_trigger_rollback,
+    mock_logger,
+    mock_delete_group,
+    mock_redis_delete,
+    mock_remove_from_catalog,
+):
     mock_delete_group.return_value = MagicMock(status_code=200)
     delete_group("group123")
+    mock_redis_delete.assert_called_once_with("repair_create_group_group123")
+    mock_remove_from_catalog.assert_called_once_with("group123")
+    event = {"event": "group_deleted_on_node"}
     calls = [
-        call("Group group123 deleted on node1"),
-        call("Group group123 deleted on node2"),
+        call("Group %s deleted on %s", "group123", "node1", extra=event),
+        call("Group %s deleted on %s", "group123", "node2", extra=event),
     ]
     mock_logger.info.assert_has_calls(calls, any_order=True)
     mock_trigger_rollback.assert_not_called()
 
 
+@patch("app.celery_tasks.delete_task.redis_client.delete")
 @patch("app.celery_tasks.delete_task.node_client.delete_group")
 @patch("app.celery_tasks.delete_task.logger")
 @patch("app.celery_tasks.delete_task.trigger_rollback")
 @patch("app.celery_tasks.delete_task.HOSTS", ["node1", "node2"])
 def test_partial_success_trigger_rollback(
-    mock_trigger_rollback, mock_logger, mock_delete_group
+    mock_trigger_rollback, mock_logger, mock_delete_group, mock_redis_delete
 ):
     mock_delete_group.side_effect = [
         MagicMock(status_code=200),
@@ -38,22 +50,23 @@ def test_partial_success_trigger_rollback(
     mock_logger.error.assert_called_with(
         "Group group123 could not be deleted on node2. Retrying..."
     )
-    mock_trigger_rollback.assert_called_once_with("group123", ["node1"])
+    mock_trigger_rollback.assert_called_once_with("group123", ["node1"], None)
 
 
+@patch("app.celery_tasks.delete_task.redis_client.delete")
 @patch("app.celery_tasks.delete_task.node_client.delete_group")
 @patch("app.celery_tasks.delete_task.logger")
 @patch("app.celery_tasks.delete_task.trigger_rollback")
 @patch("app.celery_tasks.delete_task.HOSTS", ["node1"])
 def test_failure_no_success_nodes(
-    mock_trigger_rollback, mock_logger, mock_delete_group
+    mock_trigger_rollback, mock_logger, mock_delete_group, mock_redis_delete
 ):
     mock_delete_group.return_value = MagicMock(status_code=404)
     delete_group("group123")
     mock_logger.error.assert_called_with(
         "Group group123 could not be deleted on node1. Retrying..."
     )
-    mock_trigger_rollback.assert_called_once_with("group123", [])
+    mock_trigger_rollback.assert_called_once_with("group123", [], None)
 
 
 @patch("app.celery_tasks.delete_task.redis_client.set")
@@ -105,7 +118,11 @@ def test_rollback_failure_with_retry(
 def test_no_rollback_data_found(mock_logger, mock_get):
     mock_get.return_value = None
     rollback_delete_group("group123", "node1")
-    mock_logger.info.assert_called_with("No rollback needed for group group123.")
+    mock_logger.info.assert_called_with(
+        "No rollback needed for group %s.",
+        "group123",
+        extra={"event": "rollback_not_needed"},
+    )
 
 
 @patch("app.celery_tasks.delete_task.redis_client.get")
@@ -0,0 +1,307 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.celery_tasks import create_task, delete_task
+from app.shared.dead_letters import DEAD_LETTERS_KEY
+from app.shared.placement import nodes_for_group
+from benchmarks.fakes.programmable_transport import (
+    Scenario,
+    VirtualClock,
+    constant,
+    lognormal,
+)
+from tests.mocks.scenario_harness import ScenarioHarness
+
+HOSTS = ["node1", "node2", "node3", "node4", "node5"]
+
+
+@pytest.fixture
+def scenario():
+    return Scenario(seed=42, clock=VirtualClock())
+
+
+def _leftover_groups(scenario):
+    return {name: node.groups for name, node in scenario.nodes.items() if node.groups}
+
+
+def test_healthy_fan_out_is_bounded(scenario):
+    scenario.all_nodes(HOSTS).latency(constant(0.02))
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",))
+        harness.drain()
+
+    assert harness.node_calls() == 5
+    assert harness.elapsed() == pytest.approx(0.1)
+    assert not harness.executed
+    # Lock check, lock, progress flush and lock release, then the completion
+    # counter and group cache invalidation of the postrun handlers
+    assert harness.redis.round_trips == 6
+
+
+def test_healthy_fan_out_wall_clock():
+    scenario = Scenario(seed=42)
+    scenario.all_nodes(HOSTS).latency(constant(0.02))
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",))
+
+    # Sequential fan-out plus a generous allowance for the task machinery
+    assert 0.1 <= harness.elapsed() < 0.5
+
+
+def test_outage_mid_fan_out_rolls_back_processed_nodes(scenario):
+    scenario.all_nodes(HOSTS).latency(constant(1))
+    scenario.node("node4").outage(start=2.5, end=60)
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",))
+        harness.drain()
+
+    assert harness.node_calls(operation="create") == 4
+    assert harness.node_calls(node="node4", outcome="refused") == 1
+    assert harness.executed_count("rollback_create_group") == 3
+    assert harness.node_calls(operation="delete", outcome="200") == 3
+    assert harness.node_calls(node="node5") == 0
+    assert _leftover_groups(scenario) == {}
+    assert harness.redis.get("rollback_create_group_group123") is None
+
+
+def test_connection_reset_triggers_rollback(scenario):
+    scenario.node("node2").resets(on="create")
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",))
+        harness.drain()
+
+    assert harness.node_calls(node="node2", outcome="reset") == 1
+    assert harness.executed_count("rollback_create_group") == 1
+    # The reset request reached node2 before failing, but nothing was created
+    assert _leftover_groups(scenario) == {}
+
+
+def test_slow_node_dominates_latency(scenario):
+    scenario.all_nodes(HOSTS).latency(constant(0.01))
+    scenario.node("node3").slowdown(100)
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",))
+
+    slowest = max(harness.transport.log.calls, key=lambda call: call.duration)
+    assert slowest.node == "node3"
+    assert harness.elapsed() == pytest.approx(1.04)
+
+
+def test_flapping_node_rolls_back_every_failure(scenario):
+    scenario.all_nodes(HOSTS).latency(lognormal(0.05, 0.5))
+    scenario.node("node3").flapping(period=10, down_for=3)
+
+    group_ids = [f"group{i}" for i in range(50)]
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        for group_id in group_ids:
+            create_task.create_group.apply(args=(group_id,))
+            harness.drain()
+            scenario.clock.advance(1)
+
+    failures = harness.node_calls(node="node3", operation="create", outcome="refused")
+    assert 0 < failures < len(group_ids)
+    # Each failure rolls back the two nodes created before node3
+    assert harness.executed_count("rollback_create_group") == 2 * failures
+    created = {node: groups for node, groups in _leftover_groups(scenario).items()}
+    assert set(created) == set(HOSTS)
+    assert all(len(groups) == len(group_ids) - failures for groups in created.values())
+
+
+def test_exhausted_rollback_is_dead_lettered(scenario):
+    scenario.all_nodes(HOSTS).with_groups("group123")
+    scenario.node("node3").outage(status=503, on="delete")
+    scenario.node("node2").outage(on="create")
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        delete_task.delete_group.apply(args=("group123",))
+        harness.drain()
+
+    # The rollback of node2 is tried once and retried three times
+    assert harness.node_calls(node="node1", operation="create", outcome="201") == 1
+    assert harness.node_calls(node="node2", operation="create") == 4
+    assert harness.executed_count("process_dead_letter") == 1
+    entries = harness.redis.hgetall(DEAD_LETTERS_KEY)
+    assert list(entries) == ["rollback_delete_group|group123|node2"]
+    assert harness.redis.get("rollback_delete_group_group123") is None
+
+
+def test_same_seed_replays_identically():
+    def run():
+        scenario = Scenario(seed=7, clock=VirtualClock())
+        scenario.all_nodes(HOSTS).latency(lognormal(0.05, 1))
+        scenario.every_node().errors(500, probability=0.05, on="create")
+        with ScenarioHarness(scenario, HOSTS) as harness:
+            for i in range(20):
+                create_task.create_group.apply(args=(f"group{i}",))
+                harness.drain()
+        return harness.transport.log.calls
+
+    assert run() == run()
+
+
+def test_quorum_create_tolerates_failures_and_repairs(scenario):
+    scenario.node("node2").outage(end=5, on="create")
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",), kwargs={"write_quorum": 3})
+        # Returned after four nodes, node2 failed and node5 was not contacted
+        assert harness.node_calls(operation="create") == 4
+        assert harness.node_calls(node="node5") == 0
+        assert not harness.redis.exists("rollback_create_group_group123")
+        scenario.clock.advance(10)
+        harness.drain()
+
+    assert harness.executed_count("repair_create_group") == 2
+    assert harness.executed_count("rollback_create_group") == 0
+    assert all("group123" in scenario.node(node).groups for node in HOSTS)
+    assert harness.redis.get("repair_create_group_group123") is None
+
+
+def test_quorum_create_rolls_back_once_unreachable(scenario):
+    scenario.node("node2").outage(on="create")
+    scenario.node("node4").outage(on="create")
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",), kwargs={"write_quorum": 4})
+        harness.drain()
+
+    # The second failure makes a quorum of four out of reach
+    assert harness.node_calls(node="node5") == 0
+    assert harness.executed_count("rollback_create_group") == 2
+    assert harness.executed_count("repair_create_group") == 0
+    assert _leftover_groups(scenario) == {}
+
+
+def test_failed_repair_is_dead_lettered(scenario):
+    scenario.node("node1").outage(on="create")
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",), kwargs={"write_quorum": 4})
+        harness.drain()
+
+    assert harness.node_calls(node="node1", operation="create") == 5
+    entries = harness.redis.hgetall(DEAD_LETTERS_KEY)
+    assert list(entries) == ["repair_create_group|group123|node1"]
+    assert harness.redis.get("repair_create_group_group123") is None
+
+
+def test_delete_cancels_pending_repairs(scenario):
+    scenario.node("node5").outage(on="create")
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",), kwargs={"write_quorum": 2})
+        delete_task.delete_group.apply(args=("group123",))
+        harness.drain()
+
+    assert harness.executed_count("repair_create_group") == 3
+    assert harness.node_calls(operation="create") == 2
+    assert _leftover_groups(scenario) == {}
+
+
+@patch("app.shared.placement.GROUP_REPLICAS", 2)
+def test_placed_group_only_touches_its_nodes(scenario):
+    placed = nodes_for_group("group123", HOSTS, 2)
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",))
+        assert harness.node_calls() == 2
+        assert set(_leftover_groups(scenario)) == set(placed)
+
+        delete_task.delete_group.apply(args=("group123",))
+
+    assert {call.node for call in harness.transport.log.calls} == set(placed)
+    assert _leftover_groups(scenario) == {}
+
+
+@pytest.fixture
+def per_node_queues():
+    with patch("app.celery_tasks.create_task.PER_NODE_QUEUES", True), patch(
+        "app.celery_tasks.delete_task.PER_NODE_QUEUES", True
+    ), patch("app.shared.fanout.PER_NODE_QUEUES", True):
+        yield
+
+
+def test_slow_node_only_delays_its_queue(scenario, per_node_queues):
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",))
+        # node3's worker is stuck, every other node is processed meanwhile
+        harness.drain(hold=["node.node3"])
+        assert harness.node_calls(operation="create") == 4
+        assert harness.queued_to("node.node3") == 1
+        assert harness.redis.exists("rollback_create_group_group123")
+
+        harness.drain()
+
+    assert harness.executed_count("create_group_on_node") == 5
+    assert all("group123" in scenario.node(node).groups for node in HOSTS)
+    assert not harness.redis.exists("rollback_create_group_group123")
+
+
+def test_per_node_failure_compensates_only_created_nodes(scenario, per_node_queues):
+    scenario.node("node2").outage(on="create")
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",))
+        harness.drain()
+
+    # node3 to node5 are skipped once node2 failed, only node1 is rolled back
+    assert harness.node_calls(operation="create") == 2
+    assert harness.executed_count("rollback_create_group") == 1
+    assert _leftover_groups(scenario) == {}
+
+
+def test_per_node_quorum_repairs_failed_nodes(scenario, per_node_queues):
+    scenario.all_nodes(HOSTS).latency(constant(1))
+    scenario.node("node2").outage(end=5.5, status=503, on="create")
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        create_task.create_group.apply(args=("group123",), kwargs={"write_quorum": 4})
+        harness.drain()
+
+    # The repair joins after node5 (t=5), fails once and succeeds on retry
+    assert harness.executed_count("repair_create_group") == 1
+    assert harness.node_calls(node="node2", operation="create") == 3
+    assert all("group123" in scenario.node(node).groups for node in HOSTS)
+
+
+def test_per_node_delete_rolls_back_processed_nodes(scenario, per_node_queues):
+    scenario.all_nodes(HOSTS).with_groups("group123")
+    scenario.node("node4").outage(status=503, on="delete")
+
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        delete_task.delete_group.apply(args=("group123",))
+        harness.drain()
+
+    assert harness.executed_count("rollback_delete_group") == 3
+    assert all("group123" in scenario.node(node).groups for node in HOSTS)
+
+
+def test_per_node_joins_invalidate_the_cached_summary(scenario, per_node_queues):
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        for task in (create_task.create_group, delete_task.delete_group):
+            task.apply(args=("group123",))
+            # Cached while the per-node tasks run
+            harness.redis.set("group_summary_group123", "{}")
+            harness.drain(hold=["node.node3"])
+            assert harness.redis.exists("group_summary_group123")
+
+            harness.drain()
+            assert not harness.redis.exists("group_summary_group123")
+
+
+@patch("app.shared.fair_queue.FAIR_SCHEDULING", True)
+def test_per_node_operation_holds_its_fair_slot(scenario, per_node_queues):
+    with ScenarioHarness(scenario, HOSTS) as harness:
+        harness.redis.hset("fair_running", "task1", '{"tenant": "t"}')
+        create_task.create_group.apply(args=("group123",), task_id="task1")
+        harness.drain(hold=["node.node3"])
+        assert harness.redis.hget("fair_running", "task1")
+
+        harness.drain()
+        assert not harness.redis.hget("fair_running", "task1")
@@ -0,0 +1,31 @@
+from unittest.mock import MagicMock, patch
+
+from app.celery_tasks.profile_command import profile
+from app.shared.profiler import PROFILE_SIGNAL
+
+
+def worker_state(processes):
+    state = MagicMock()
+    state.consumer.pool.info = {"processes": processes} if processes else {}
+    return state
+
+
+@patch("app.celery_tasks.profile_command.request_profile")
+@patch("app.celery_tasks.profile_command.os.kill")
+def test_prefork_pool_processes_are_signaled(mock_kill, mock_request_profile):
+    mock_kill.side_effect = [None, ProcessLookupError()]
+
+    reply = profile(worker_state([101, 102]), "request1", 5.0, 0.01)
+
+    assert reply == {"ok": "profiling", "processes": [101]}
+    mock_request_profile.assert_called_once_with("request1", 5.0, 0.01, [101, 102])
+    mock_kill.assert_any_call(101, PROFILE_SIGNAL)
+
+
+@patch("app.celery_tasks.profile_command.start_profile")
+@patch("app.celery_tasks.profile_command.os.getpid", return_value=42)
+def test_solo_pool_profiles_the_worker_process(mock_getpid, mock_start_profile):
+    reply = profile(worker_state([]), "request1", 5.0, 0.01)
+
+    assert reply == {"ok": "profiling", "processes": [42]}
+    mock_start_profile.assert_called_once_with("request1", 5.0, 0.01)
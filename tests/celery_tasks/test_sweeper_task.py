@@ -0,0 +1,169 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.celery_tasks.sweeper_task import (
+    SWEEPER_REPORT_KEY,
+    SWEEPER_SEEN_KEY,
+    read_sweep_report,
+    sweep,
+    sweep_rollbacks,
+)
+from app.shared.redis_client import scan_keys
+from benchmarks.fakes.mock_redis import MockRedis
+
+LOCK = json.dumps([])
+
+
+def rollback(group_id, nodes):
+    return json.dumps({"group_id": group_id, "nodes": nodes, "task_id": "task1"})
+
+
+@pytest.fixture
+def mock_redis():
+    mock_redis = MockRedis()
+    with patch("app.celery_tasks.sweeper_task.redis_client", mock_redis), patch(
+        "app.shared.rollback_data.redis_client", mock_redis
+    ):
+        yield mock_redis
+
+
+@pytest.fixture
+def mock_send_task():
+    with patch("app.celery_tasks.sweeper_task.celery_app.send_task") as mock_send:
+        yield mock_send
+
+
+def test_orphaned_lock_is_cleared_on_a_later_sweep(mock_redis, mock_send_task):
+    mock_redis.set("rollback_create_group_group1", LOCK)
+
+    assert sweep(now=1000)["orphaned_locks"] == 0
+    assert mock_redis.exists("rollback_create_group_group1")
+
+    report = sweep(now=1000 + 15 * 60)
+
+    assert report["orphaned_locks"] == 1
+    assert not mock_redis.exists("rollback_create_group_group1")
+    assert mock_redis.hgetall(SWEEPER_SEEN_KEY) == {}
+
+
+def test_lock_is_aged_from_its_acquisition(mock_redis, mock_send_task):
+    for group_id, task_id in (("group1", "task1"), ("group2", "task2")):
+        lock = json.dumps({"locked_at": 1000, "task_id": task_id})
+        mock_redis.set(f"rollback_create_group_{group_id}", lock)
+    # The per-node fan-out creating group2 is still running
+    mock_redis.hset("fanout_task2", "__meta__", "{}")
+
+    report = sweep(now=1000 + 15 * 60)
+
+    assert report["orphaned_locks"] == 1
+    assert not mock_redis.exists("rollback_create_group_group1")
+    assert mock_redis.exists("rollback_create_group_group2")
+
+
+def test_sweep_bounds_the_keys_scanned(mock_redis, mock_send_task):
+    for index in range(1000):
+        mock_redis.set(f"other_key{index}", "value")
+
+    with patch("app.shared.rollback_data.scan_keys", wraps=scan_keys) as scan:
+        report = sweep(max_keys=300, now=1000)
+
+    assert scan.call_count == 3
+    assert not report["cycle_completed"]
+
+
+def test_stale_rollback_is_cleared(mock_redis, mock_send_task):
+    mock_redis.set("rollback_delete_group_group1", rollback("group1", []), ex=3600)
+    mock_redis.set("rollback_delete_group_group2", "not json", ex=3600)
+
+    report = sweep(now=1000)
+
+    assert report["stale"] == 2
+    assert not mock_redis.exists("rollback_delete_group_group1")
+    assert not mock_redis.exists("rollback_delete_group_group2")
+
+
+def test_stuck_rollback_is_redriven_then_dead_lettered(mock_redis, mock_send_task):
+    key = "rollback_create_group_group1"
+    mock_redis.set(key, rollback("group1", ["node1", "node2"]), ex=60)
+
+    sweep(now=1000)
+    mock_send_task.assert_not_called()
+
+    report = sweep(now=1000 + 10 * 60)
+    assert report["redriven"] == 1
+    assert mock_redis.ttl(key) == 3600
+    assert [call.kwargs["kwargs"]["node"] for call in mock_send_task.call_args_list] == [
+        "node1",
+        "node2",
+    ]
+    assert mock_send_task.call_args.args[0] == (
+        "app.celery_tasks.create_task.rollback_create_group"
+    )
+
+    now = 1000 + 10 * 60
+    for _ in range(3):
+        now += 10 * 60
+        report = sweep(now=now)
+    assert report["dead_lettered"] == 1
+    assert mock_send_task.call_args.args[0] == (
+        "app.celery_tasks.dead_letter_task.process_dead_letter"
+    )
+
+
+def test_progress_resets_stuck_clock(mock_redis, mock_send_task):
+    key = "rollback_delete_group_group1"
+    mock_redis.set(key, rollback("group1", ["node1", "node2"]), ex=3600)
+    sweep(now=1000)
+
+    mock_redis.set(key, rollback("group1", ["node2"]), ex=3600)
+    report = sweep(now=1000 + 10 * 60)
+
+    assert report["redriven"] == 0
+    mock_send_task.assert_not_called()
+
+
+def test_rollback_without_expiry_is_rearmed(mock_redis, mock_send_task):
+    key = "rollback_delete_group_group1"
+    mock_redis.set(key, rollback("group1", ["node2"]))
+
+    assert sweep(now=1000)["rearmed"] == 1
+    assert mock_redis.ttl(key) == 3600
+
+
+def test_actions_are_rate_limited(mock_redis, mock_send_task):
+    for index in range(5):
+        mock_redis.set(f"rollback_delete_group_group{index}", "not json")
+
+    with patch("app.celery_tasks.sweeper_task.SWEEPER_MAX_ACTIONS", 2):
+        assert sweep(now=1000)["stale"] == 2
+        assert sweep(now=1001)["stale"] == 2
+        assert sweep(now=1002)["stale"] == 1
+
+
+def test_sweep_is_incremental(mock_redis, mock_send_task):
+    for index in range(250):
+        mock_redis.set(f"rollback_create_group_group{index:03}", LOCK)
+
+    first = sweep(max_keys=100, now=1000)
+    second = sweep(max_keys=100, now=1001)
+    third = sweep(max_keys=100, now=1002)
+
+    assert first["scanned"] + second["scanned"] + third["scanned"] == 250
+    assert not first["cycle_completed"]
+    assert third["cycle_completed"]
+
+
+def test_sweep_rollbacks_stores_report(mock_redis, mock_send_task):
+    mock_redis.set("rollback_delete_group_group1", "not json")
+
+    report = sweep_rollbacks()
+
+    assert report["stale"] == 1
+    assert read_sweep_report() == json.loads(mock_redis.get(SWEEPER_REPORT_KEY))
+
+
+def test_sweep_rollbacks_skipped_while_running(mock_redis, mock_send_task):
+    mock_redis.set("sweeper_lock", "other-worker")
+    assert sweep_rollbacks() is None
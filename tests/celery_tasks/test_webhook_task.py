@@ -0,0 +1,198 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.celery_tasks import create_task, delete_task
+from app.celery_tasks.webhook_task import (
+    SIGNATURE_HEADER,
+    TIMESTAMP_HEADER,
+    build_callback,
+    deliver_webhook,
+    notify_completion,
+    record_node_outcome,
+    sign_payload,
+)
+from app.clients.callback_transport import CallbackTransport
+from tests.mocks.mock_webhook_receiver import WebhookReceiver
+
+
+@pytest.fixture(autouse=True)
+def local_receiver_allowed():
+    # The receiver listens on 127.0.0.1, which deliveries refuse otherwise
+    with patch("app.shared.callback_urls.WEBHOOK_ALLOWED_HOSTS", ["127.0.0.1"]):
+        yield
+
+
+@pytest.fixture
+def payload():
+    return {
+        "task_id": "task-1",
+        "operation": "create_group",
+        "group_id": "group123",
+        "state": "SUCCESS",
+        "nodes": {"node1": "created"},
+    }
+
+
+def test_build_callback_without_url():
+    assert build_callback(None, "task-1", "create_group", "group123") is None
+
+
+def test_record_node_outcome():
+    callback = build_callback("http://hook", "task-1", "create_group", "group123")
+    record_node_outcome(callback, "node1", "created")
+    record_node_outcome(None, "node1", "created")
+    assert callback["nodes"] == {"node1": "created"}
+
+
+@patch("app.celery_tasks.webhook_task.celery_app.send_task")
+def test_notify_completion_queues_delivery(mock_send_task, payload):
+    callback = build_callback("http://hook", "task-1", "create_group", "group123")
+    record_node_outcome(callback, "node1", "created")
+    notify_completion(callback, "SUCCESS")
+    mock_send_task.assert_called_once_with(
+        "app.celery_tasks.webhook_task.deliver_webhook",
+        kwargs={"url": "http://hook", "payload": payload},
+    )
+
+
+@patch("app.celery_tasks.webhook_task.celery_app.send_task")
+def test_notify_completion_without_callback(mock_send_task):
+    notify_completion(None, "SUCCESS")
+    mock_send_task.assert_not_called()
+
+
+@patch("app.celery_tasks.webhook_task.WEBHOOK_SIGNING_SECRET", "s3cret")
+def test_deliver_webhook_posts_signed_payload(payload):
+    with WebhookReceiver() as receiver:
+        deliver_webhook(receiver.url, payload)
+
+    assert receiver.payloads() == [payload]
+    headers = receiver.deliveries[0]["headers"]
+    expected = sign_payload(
+        receiver.deliveries[0]["body"], headers[TIMESTAMP_HEADER], "s3cret"
+    )
+    assert headers[SIGNATURE_HEADER] == expected
+
+
+@patch("app.celery_tasks.webhook_task.WEBHOOK_SIGNING_SECRET", "")
+def test_deliver_webhook_unsigned_without_secret(payload):
+    with WebhookReceiver() as receiver:
+        deliver_webhook(receiver.url, payload)
+
+    assert SIGNATURE_HEADER not in receiver.deliveries[0]["headers"]
+
+
+@patch("app.celery_tasks.webhook_task.deliver_webhook.retry")
+def test_deliver_webhook_retries_on_server_error(mock_retry, payload):
+    with WebhookReceiver(responses=[503]) as receiver:
+        deliver_webhook(receiver.url, payload)
+
+    assert len(receiver.deliveries) == 1
+    mock_retry.assert_called_once()
+    assert mock_retry.call_args.kwargs["countdown"] == 2
+
+
+@patch("app.celery_tasks.webhook_task.deliver_webhook.retry")
+def test_deliver_webhook_drops_on_client_error(mock_retry, payload):
+    with WebhookReceiver(responses=[404]) as receiver:
+        deliver_webhook(receiver.url, payload)
+
+    assert len(receiver.deliveries) == 1
+    mock_retry.assert_not_called()
+
+
+@patch("app.celery_tasks.webhook_task.deliver_webhook.retry")
+def test_deliver_webhook_drops_internal_targets(mock_retry, payload):
+    with WebhookReceiver() as receiver, patch(
+        "app.shared.callback_urls.WEBHOOK_ALLOWED_HOSTS", []
+    ):
+        deliver_webhook(receiver.url, payload)
+
+    assert receiver.deliveries == []
+    mock_retry.assert_not_called()
+
+
+@patch("app.celery_tasks.webhook_task.deliver_webhook.retry")
+def test_deliver_webhook_retries_on_connection_error(mock_retry, payload):
+    with WebhookReceiver() as receiver:
+        url = receiver.url
+    deliver_webhook(url, payload)
+    mock_retry.assert_called_once()
+
+
+def test_callback_transport_builds_a_single_pool():
+    with patch("app.clients.callback_transport.httpcore.ConnectionPool") as pool:
+        transport = CallbackTransport()
+    pool.assert_called_once()
+    assert transport._pool is pool.return_value
+
+
+@patch("app.celery_tasks.create_task.notify_completion")
+@patch("app.celery_tasks.create_task.redis_client")
+@patch("app.celery_tasks.create_task.node_client")
+@patch("app.celery_tasks.create_task.HOSTS", ["node1", "node2"])
+def test_create_group_notifies_success(mock_node_client, mock_redis, mock_notify):
+    mock_redis.exists.return_value = False
+    mock_node_client.create_group.return_value = MagicMock(status_code=201)
+    create_task.create_group("group123", callback_url="http://hook")
+    callback, state = mock_notify.call_args.args
+    assert state == "SUCCESS"
+    assert callback["nodes"] == {"node1": "created", "node2": "created"}
+
+
+@patch("app.celery_tasks.create_task.celery_app.send_task")
+@patch("app.celery_tasks.create_task.notify_completion")
+@patch("app.celery_tasks.create_task.redis_client")
+@patch("app.celery_tasks.create_task.node_client")
+@patch("app.celery_tasks.create_task.HOSTS", ["node1", "node2"])
+def test_create_group_stores_callback_for_rollback(
+    mock_node_client, mock_redis, mock_notify, mock_send_task
+):
+    mock_redis.exists.return_value = False
+    mock_node_client.create_group.side_effect = [
+        MagicMock(status_code=201),
+        MagicMock(status_code=500),
+    ]
+    create_task.create_group("group123", callback_url="http://hook")
+    rollback_data = json.loads(mock_redis.set.call_args_list[-1].args[1])
+    assert rollback_data["nodes"] == ["node1"]
+    assert rollback_data["callback"]["nodes"] == {
+        "node1": "created",
+        "node2": "failed",
+    }
+    mock_notify.assert_not_called()
+
+
+@patch("app.celery_tasks.create_task.notify_completion")
+@patch("app.celery_tasks.create_task.redis_client")
+def test_last_rollback_notifies_rolled_back(mock_redis, mock_notify):
+    callback = build_callback("http://hook", "task-1", "create_group", "group123")
+    mock_redis.get.return_value = json.dumps(
+        {"group_id": "group123", "nodes": ["node1"], "callback": callback}
+    )
+    create_task._update_rollback_data("group123", "node1")
+    mock_redis.delete.assert_called_once_with("rollback_create_group_group123")
+    callback, state = mock_notify.call_args.args
+    assert state == "ROLLED_BACK"
+    assert callback["nodes"] == {"node1": "rolled_back"}
+
+
+@patch("app.celery_tasks.delete_task.celery_app.send_task")
+@patch("app.celery_tasks.delete_task.notify_completion")
+@patch("app.celery_tasks.delete_task.redis_client")
+@patch("app.celery_tasks.delete_task.node_client")
+def test_exhausted_delete_rollback_notifies_rollback_failed(
+    mock_node_client, mock_redis, mock_notify, mock_send_task
+):
+    callback = build_callback("http://hook", "task-1", "delete_group", "group123")
+    mock_redis.get.return_value = json.dumps(
+        {"group_id": "group123", "nodes": ["node1"], "callback": callback}
+    )
+    mock_node_client.create_group.return_value = MagicMock(status_code=500)
+    with patch.object(delete_task.rollback_delete_group, "max_retries", 0):
+        delete_task.rollback_delete_group("group123", "node1")
+    callback, state = mock_notify.call_args.args
+    assert state == "ROLLBACK_FAILED"
+    assert callback["nodes"] == {"node1": "dead_lettered"}
@@ -0,0 +1,150 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from httpx import Client, ConnectError, Request, Response
+
+from app.clients.batching_node_client import (
+    BatchingNodeClient,
+    build_node_client,
+)
+from app.clients.node_client import NodeClient
+from app.shared.tracing import InMemoryExporter, Tracer
+
+
+class CountingTransport:
+    """
+    Serves every request after `delay` seconds, tracking concurrency.
+    """
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: Request) -> Response:
+        with self._lock:
+            self.requests.append((request.method, str(request.url)))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if self.fail:
+                raise ConnectError("Connection refused", request=request)
+            status = {"POST": 201, "DELETE": 200, "GET": 200}[request.method]
+            return Response(status, json={"path": request.url.path})
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def close(self):
+        pass
+
+
+def _concurrently(calls, workers=20):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda call: call(), calls))
+
+
+@pytest.fixture
+def transport():
+    return CountingTransport(delay=0.01)
+
+
+def test_identical_reads_share_a_request(transport):
+    with BatchingNodeClient(
+        Client(transport=transport), window=0.05, max_batch=100
+    ) as client:
+        responses = _concurrently(
+            [lambda: client.get_group("node1", "group1")] * 20
+        )
+
+    assert [response.status_code for response in responses] == [200] * 20
+    assert len(transport.requests) < 20
+    assert client.dispatchers["node1"].batches < 20
+
+
+def test_writes_are_never_coalesced(transport):
+    with BatchingNodeClient(Client(transport=transport), window=0.05) as client:
+        responses = _concurrently(
+            [lambda: client.create_group("node1", "group1")] * 10
+        )
+
+    assert [response.status_code for response in responses] == [201] * 10
+    assert len(transport.requests) == 10
+
+
+def test_in_flight_requests_are_bounded_per_node(transport):
+    with BatchingNodeClient(
+        Client(transport=transport), window=0.001, max_in_flight=2
+    ) as client:
+        _concurrently(
+            [
+                lambda i=i: client.create_group("node1", f"group{i}")
+                for i in range(20)
+            ]
+        )
+
+    assert transport.max_in_flight == 2
+    assert len(transport.requests) == 20
+
+
+def test_responses_are_routed_to_their_callers(transport):
+    with BatchingNodeClient(Client(transport=transport), window=0.01) as client:
+        responses = _concurrently(
+            [
+                lambda node=node, i=i: client.get_group(node, f"group{i}")
+                for i in range(10)
+                for node in ("node1", "node2")
+            ]
+        )
+
+    assert [response.json()["path"] for response in responses] == [
+        f"/v1/group/group{i}" for i in range(10) for _ in range(2)
+    ]
+    assert set(client.dispatchers) == {"node1", "node2"}
+
+
+def test_full_batch_is_sent_before_the_window_ends(transport):
+    with BatchingNodeClient(
+        Client(transport=transport), window=10, max_batch=4
+    ) as client:
+        started_at = time.monotonic()
+        _concurrently(
+            [lambda i=i: client.delete_group("node1", f"group{i}") for i in range(4)]
+        )
+        assert time.monotonic() - started_at < 5
+
+
+def test_transport_errors_become_server_errors():
+    transport = CountingTransport(fail=True)
+    with BatchingNodeClient(Client(transport=transport), window=0.001) as client:
+        response = client.create_group("node1", "group1")
+
+    assert response.status_code == 500
+
+
+def test_node_calls_keep_the_trace_of_their_caller(transport):
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter, sample_rate=1.0)
+
+    with patch("app.clients.node_client.tracer", tracer), BatchingNodeClient(
+        Client(transport=transport), window=0.001
+    ) as client:
+        with tracer.span("run create_group", root=True):
+            client.create_group("node1", "group1")
+
+    spans = exporter.by_name()
+    assert spans["node POST"]["parent_id"] == spans["run create_group"]["span_id"]
+
+
+def test_build_node_client():
+    with patch("app.clients.batching_node_client.NODE_BATCH_WINDOW_MS", 0):
+        assert type(build_node_client()) is NodeClient
+    with patch("app.clients.batching_node_client.NODE_BATCH_WINDOW_MS", 5):
+        assert isinstance(build_node_client(), BatchingNodeClient)
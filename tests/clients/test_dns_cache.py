@@ -0,0 +1,99 @@
+import socket
+from unittest.mock import patch
+
+import httpcore
+import pytest
+from httpx import Client
+
+from app.clients.batching_node_client import build_node_client
+from app.clients.dns_cache import CachedDnsTransport, DnsCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def addrinfo(address):
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, 8001))]
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_resolve_is_cached_until_ttl(clock):
+    cache = DnsCache(ttl=30, clock=clock)
+    with patch(
+        "app.clients.dns_cache.socket.getaddrinfo",
+        side_effect=[addrinfo("10.0.0.1"), addrinfo("10.0.0.2")],
+    ) as mock_getaddrinfo:
+        assert cache.resolve("node1", 8001) == "10.0.0.1"
+        clock.now = 29
+        assert cache.resolve("node1", 8001) == "10.0.0.1"
+        assert mock_getaddrinfo.call_count == 1
+
+        clock.now = 31
+        assert cache.resolve("node1", 8001) == "10.0.0.2"
+        assert mock_getaddrinfo.call_count == 2
+
+
+def test_resolve_serves_stale_address_on_failure(clock):
+    cache = DnsCache(ttl=30, clock=clock)
+    with patch(
+        "app.clients.dns_cache.socket.getaddrinfo",
+        side_effect=[addrinfo("10.0.0.1"), socket.gaierror("down")],
+    ):
+        cache.resolve("node1", 8001)
+        clock.now = 31
+        assert cache.resolve("node1", 8001) == "10.0.0.1"
+
+
+def test_resolve_raises_without_cached_address(clock):
+    cache = DnsCache(ttl=30, clock=clock)
+    with patch(
+        "app.clients.dns_cache.socket.getaddrinfo",
+        side_effect=socket.gaierror("down"),
+    ):
+        with pytest.raises(socket.gaierror):
+            cache.resolve("node1", 8001)
+
+
+def test_transport_connects_to_cached_address(clock):
+    cache = DnsCache(ttl=30, clock=clock)
+    client = Client(transport=CachedDnsTransport(cache))
+    with patch(
+        "app.clients.dns_cache.socket.getaddrinfo", return_value=addrinfo("10.0.0.1")
+    ), patch.object(
+        httpcore.SyncBackend,
+        "connect_tcp",
+        side_effect=httpcore.ConnectError("refused"),
+    ) as mock_connect:
+        with pytest.raises(Exception):
+            client.get("http://node1:8001/")
+    assert mock_connect.call_args.args[:2] == ("10.0.0.1", 8001)
+
+
+def test_transport_builds_a_single_pool():
+    with patch("app.clients.dns_cache.httpcore.ConnectionPool") as pool:
+        transport = CachedDnsTransport(DnsCache())
+    pool.assert_called_once()
+    assert transport._pool is pool.return_value
+
+
+def test_unresolvable_host_fails_like_a_connection_error():
+    node_client = build_node_client()
+    with patch(
+        "app.clients.dns_cache.socket.getaddrinfo",
+        side_effect=socket.gaierror(-2, "Name or service not known"),
+    ):
+        response = node_client.create_group("no-such-host.invalid:8080", "g1")
+        reachable = node_client.ping("no-such-host.invalid:8080")
+
+    assert response.status_code == 500
+    assert "Name or service not known" in response.text
+    assert reachable is False
@@ -1,6 +1,10 @@
+import asyncio
+from unittest.mock import patch
+
 import pytest
-from app.clients.node_client import NodeClient
-from httpx import Client
+from app.clients.node_client import AsyncNodeClient, NodeClient
+from app.shared.tracing import InMemoryExporter, Tracer
+from httpx import AsyncClient, Client, ConnectError, MockTransport
 from tests.mocks.mock_transports import CustomTransport
 
 
@@ -51,3 +55,59 @@ def test_get_group_not_found(client):
     response = client.get_group(node="node", group_id="nonexistent-group")
     assert response.status_code == 404
     assert response.json() == {"message": "Not found"}
+
+
+def test_ping_reachable_node(client):
+    assert client.ping(node="node") is True
+
+
+def test_ping_unreachable_node():
+    def refuse(request):
+        raise ConnectError("Connection refused", request=request)
+
+    with NodeClient(httpx_client=Client(transport=MockTransport(refuse))) as client:
+        assert client.ping(node="node") is False
+
+
+def test_async_get_group():
+    async def get_groups():
+        async_client = AsyncClient(transport=CustomTransport())
+        async with AsyncNodeClient(httpx_client=async_client) as client_instance:
+            return (
+                await client_instance.get_group("node", "existing-group"),
+                await client_instance.get_group("node", "nonexistent-group"),
+                await client_instance.get_group("node", "connection-error"),
+            )
+
+    found, not_found, unreachable = asyncio.run(get_groups())
+    assert found.status_code == 200
+    assert found.json() == {"groupId": "existing-group"}
+    assert not_found.status_code == 404
+    assert unreachable.status_code == 500
+
+
+def test_node_calls_are_recorded(client):
+    with patch("app.clients.node_client.traffic_recorder") as mock_recorder:
+        response = client.create_group(node="node", group_id="new-group")
+
+    method, url, _ = mock_recorder.record_node_call.call_args.args
+    assert (method, url) == ("POST", "http://node/v1/group/")
+    assert mock_recorder.record_node_call.call_args.kwargs == {"response": response}
+
+
+def test_node_calls_are_traced_in_sampled_traces(client):
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter, sample_rate=1.0)
+
+    with patch("app.clients.node_client.tracer", tracer):
+        client.create_group(node="node", group_id="new-group")
+        with tracer.span("run create_group", root=True):
+            client.create_group(node="node", group_id="new-group")
+
+    spans = exporter.by_name()
+    assert spans["node POST"]["parent_id"] == spans["run create_group"]["span_id"]
+    assert spans["node POST"]["attributes"] == {
+        "url": "http://node/v1/group/",
+        "status_code": 201,
+    }
+    assert len(exporter.spans) == 2
@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.clients.warmup import NodeKeepalive, warm_up_nodes, warm_up_worker
+from app.shared.metrics import metrics
+from benchmarks.fakes.mock_redis import MockRedis
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    with patch("app.clients.warmup.dns_cache.resolve", return_value="127.0.0.1"):
+        yield
+    metrics.reset()
+
+
+def test_warm_up_opens_connections_to_each_node():
+    node_client = MagicMock()
+    node_client.ping.return_value = True
+
+    results = warm_up_nodes(node_client, ["node1", "node2"], connections=3)
+
+    assert results == {"node1": True, "node2": True}
+    assert node_client.ping.call_count == 6
+    counters = metrics.snapshot()["counters"]
+    assert counters['node_warmup_total{node="node1",result="ok"}'] == 1
+
+
+def test_warm_up_skips_node_that_is_down():
+    node_client = MagicMock()
+    node_client.ping.side_effect = lambda node: node != "node2"
+
+    results = warm_up_nodes(node_client, ["node1", "node2"], connections=1)
+
+    assert results == {"node1": True, "node2": False}
+    counters = metrics.snapshot()["counters"]
+    assert counters['node_warmup_total{node="node2",result="failed"}'] == 1
+
+
+def test_warm_up_is_bounded_by_timeout():
+    release = threading.Event()
+    node_client = MagicMock()
+    node_client.ping.side_effect = lambda node: node == "node1" or release.wait(5)
+
+    started_at = time.perf_counter()
+    results = warm_up_nodes(node_client, ["node1", "node2"], timeout=0.1)
+    release.set()
+
+    assert time.perf_counter() - started_at < 1
+    assert results == {"node1": True, "node2": False}
+
+
+def test_warm_up_worker_does_not_fail_start():
+    node_client = MagicMock()
+    with patch("app.clients.warmup.HOSTS", ["node1"]), patch(
+        "app.clients.warmup.shared_node_client", return_value=node_client
+    ), patch(
+        "app.clients.warmup.warm_up_nodes", side_effect=RuntimeError("boom")
+    ), patch(
+        "app.clients.warmup.NODE_KEEPALIVE_INTERVAL", 0
+    ):
+        warm_up_worker()
+
+
+def test_keepalive_tick_pings_nodes_and_publishes_metrics():
+    node_client = MagicMock()
+    node_client.ping.return_value = True
+    mock_redis = MockRedis()
+    keepalive = NodeKeepalive(node_client, ["node1"], interval=1, source="w1:1")
+
+    with patch("app.shared.metrics.redis_client", mock_redis):
+        keepalive.tick()
+
+    node_client.ping.assert_called_once_with("node1")
+    published = json.loads(mock_redis.get("metrics_w1:1"))
+    assert published["counters"] == {
+        'node_keepalive_total{node="node1",result="ok"}': 1
+    }
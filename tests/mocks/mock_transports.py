@@ -35,5 +35,13 @@ class CustomTransport:
 
         return Response(404, json={"message": "Not Found"})
 
+    async def handle_async_request(self, request: Request):
+        response = self.handle_request(request)
+        await response.aread()
+        return response
+
     def close(self):
+        pass
+
+    async def aclose(self):
         pass
\ No newline at end of file
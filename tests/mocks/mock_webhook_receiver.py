@@ -0,0 +1,50 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class WebhookReceiver:
+    """
+    Local HTTP server standing in for a client's webhook endpoint.
+
+    Every delivery is recorded; `responses` is consumed in order to choose the
+    status code returned to each delivery, defaulting to 200 once exhausted.
+    """
+
+    def __init__(self, responses=None):
+        self.deliveries = []
+        self.responses = list(responses or [])
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                receiver.deliveries.append(
+                    {"headers": dict(self.headers), "body": body}
+                )
+                status = receiver.responses.pop(0) if receiver.responses else 200
+                self.send_response(status)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/hook"
+
+    def payloads(self):
+        return [json.loads(delivery["body"]) for delivery in self.deliveries]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,97 @@
+from contextlib import ExitStack
+from typing import Iterable, List
+from unittest.mock import patch
+
+from httpx import Client
+
+from app.celery_tasks import create_task, dead_letter_task, delete_task
+from app.celery_tasks.celery_app import celery_app
+from app.clients.node_client import NodeClient
+from benchmarks.fakes.mock_redis import MockRedis
+from benchmarks.fakes.programmable_transport import ProgrammableTransport, Scenario
+
+
+class ScenarioHarness:
+    """
+    Runs the group tasks in-process against a programmable node scenario.
+
+    Node calls go through a real `NodeClient` on a `ProgrammableTransport`,
+    Redis is an in-memory `MockRedis` counting round trips, and tasks sent to
+    the broker are queued locally until `drain` runs them eagerly (retries
+    included).
+    """
+
+    def __init__(self, scenario: Scenario, hosts: List[str]):
+        self.scenario = scenario
+        self.hosts = hosts
+        self.transport = ProgrammableTransport(scenario)
+        self.node_client = NodeClient(Client(transport=self.transport))
+        self.redis = MockRedis()
+        self.queued = []
+        self.executed = []
+        self._stack = ExitStack()
+
+    def __enter__(self):
+        for module in (create_task, delete_task):
+            self._patch(module, "node_client", self.node_client)
+            self._patch(module, "HOSTS", self.hosts)
+        for target in (
+            create_task,
+            delete_task,
+            dead_letter_task,
+            "app.shared.dead_letters",
+            "app.shared.fair_queue",
+            "app.shared.fanout",
+            "app.shared.group_catalog",
+            "app.shared.group_cache",
+            "app.shared.progress",
+            "app.shared.throughput",
+        ):
+            self._patch(target, "redis_client", self.redis)
+        self._stack.enter_context(
+            patch.object(celery_app, "send_task", side_effect=self._send_task)
+        )
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stack.close()
+
+    def _patch(self, target, attribute, value):
+        if isinstance(target, str):
+            self._stack.enter_context(patch(f"{target}.{attribute}", value))
+        else:
+            self._stack.enter_context(patch.object(target, attribute, value))
+
+    def _send_task(self, name, args=None, kwargs=None, **options):
+        self.queued.append((name, kwargs or {}, options.get("queue")))
+
+    def drain(self, hold: Iterable[str] = ()) -> None:
+        """
+        Runs queued tasks, and the tasks they queue, until none are left.
+
+        Args:
+            hold (Iterable[str]): Queues whose tasks are kept queued, as if
+                their workers were stuck.
+        """
+
+        held = []
+        while self.queued:
+            name, kwargs, queue = task = self.queued.pop(0)
+            if queue in hold:
+                held.append(task)
+                continue
+            self.executed.append((name, kwargs))
+            celery_app.tasks[name].apply(kwargs=kwargs)
+        self.queued = held
+
+    def queued_to(self, queue: str) -> int:
+        return sum(1 for _, _, task_queue in self.queued if task_queue == queue)
+
+    def executed_count(self, name: str) -> int:
+        return sum(1 for executed, _ in self.executed if executed.endswith(name))
+
+    def node_calls(self, **filters) -> int:
+        return self.transport.log.count(**filters)
+
+    def elapsed(self) -> float:
+        return self.transport.elapsed()
@@ -0,0 +1,56 @@
+import socket
+from unittest.mock import patch
+
+import pytest
+
+from app.shared.callback_urls import (
+    ForbiddenCallbackTarget,
+    check_callback_url,
+    resolve_callback_host,
+)
+
+
+def _addresses(*addresses):
+    return [
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, 443))
+        for address in addresses
+    ]
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "http://127.0.0.1:8000/hook",
+        "http://10.1.2.3/hook",
+        "http://169.254.169.254/latest/meta-data",
+        "http://[::1]/hook",
+        "http://[::ffff:192.168.0.1]/hook",
+        "http://localhost/hook",
+    ],
+)
+def test_internal_callback_urls_are_refused(url):
+    with pytest.raises(ForbiddenCallbackTarget):
+        check_callback_url(url)
+
+
+def test_public_callback_urls_are_accepted():
+    check_callback_url("https://example.com/hooks")
+    check_callback_url("http://93.184.216.34/hooks")
+
+
+@patch("app.shared.callback_urls.WEBHOOK_ALLOWED_HOSTS", ["10.1.2.3"])
+def test_allowed_hosts_replace_the_address_check():
+    check_callback_url("http://10.1.2.3/hook")
+    assert resolve_callback_host("10.1.2.3", 80) == "10.1.2.3"
+    with pytest.raises(ForbiddenCallbackTarget):
+        check_callback_url("https://example.com/hooks")
+
+
+@patch("app.shared.callback_urls.socket.getaddrinfo")
+def test_host_names_are_checked_once_resolved(mock_getaddrinfo):
+    mock_getaddrinfo.return_value = _addresses("93.184.216.34")
+    assert resolve_callback_host("example.com", 443) == "93.184.216.34"
+
+    mock_getaddrinfo.return_value = _addresses("93.184.216.34", "10.0.0.1")
+    with pytest.raises(ForbiddenCallbackTarget):
+        resolve_callback_host("rebound.example.com", 443)
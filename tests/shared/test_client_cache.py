@@ -0,0 +1,146 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import redis
+
+from app.shared.client_cache import ClientCache
+
+
+class FakeConnection:
+    """
+    Answers the commands sent by the tracking thread from `responses`
+    (called first if callable), then fails like a closed connection.
+    """
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.commands = []
+        self.disconnected = False
+
+    def send_command(self, *args):
+        self.commands.append(args)
+
+    def read_response(self):
+        response = self.responses.pop(0)
+        return response() if callable(response) else response
+
+    def can_read(self, timeout=0):
+        if not self.responses:
+            raise redis.ConnectionError("Connection closed by server.")
+        return True
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+@pytest.fixture
+def cache():
+    cache = ClientCache(MagicMock(), prefixes=["group_summary_"], max_keys=2)
+    # Tracking connection up, without starting its thread
+    cache._ensure_started = lambda: None
+    cache._tracking.set()
+    return cache
+
+
+def test_reads_are_cached_until_invalidated(cache):
+    fetch = MagicMock(side_effect=["v1", "v2"])
+
+    assert cache.read("group_summary_g1", fetch) == "v1"
+    assert cache.read("group_summary_g1", fetch) == "v1"
+    cache.invalidate(["group_summary_g1"])
+    assert cache.read("group_summary_g1", fetch) == "v2"
+
+    assert fetch.call_count == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_invalidation_during_a_read_is_not_overwritten(cache):
+    def fetch():
+        # The key changed while its old value was on the way
+        cache.invalidate(["group_summary_g1"])
+        return "stale"
+
+    assert cache.read("group_summary_g1", fetch) == "stale"
+    assert cache.read("group_summary_g1", lambda: "fresh") == "fresh"
+
+
+def test_cached_values_are_copies(cache):
+    value = cache.read("group_summary_g1", lambda: {"a": "1"})
+    value.pop("a")
+
+    assert cache.read("group_summary_g1", lambda: {}) == {"a": "1"}
+
+
+def test_other_keys_evictions_and_lost_tracking_bypass_the_cache(cache):
+    fetch = MagicMock(return_value="value")
+
+    cache.read("task_progress_t1", fetch)
+    cache.read("task_progress_t1", fetch)
+    for group_id in ("g1", "g2", "g3"):
+        cache.read(f"group_summary_{group_id}", fetch)
+    assert list(cache._entries) == ["group_summary_g2", "group_summary_g3"]
+    cache._tracking.clear()
+    cache.read("group_summary_g3", fetch)
+
+    assert fetch.call_count == 6
+
+
+def test_listener_survives_unexpected_errors(cache):
+    class Stop(BaseException):
+        pass
+
+    calls = []
+
+    def track():
+        calls.append(cache._tracking.is_set())
+        if len(calls) == 1:
+            raise ValueError("Unexpected message")
+        raise Stop
+
+    cache._entries["group_summary_g1"] = "v1"
+    cache._track = track
+    with patch("app.shared.client_cache.time.sleep"), pytest.raises(Stop):
+        cache._listen()
+
+    # Reconnected after the error, with the cache emptied and bypassed
+    assert calls == [True, False]
+    assert not cache._entries
+    assert not cache._tracking.is_set()
+
+
+def test_tracking_connection_applies_invalidations():
+    client = MagicMock()
+    cache = ClientCache(client, prefixes=["group_summary_", "task_progress_"])
+    # Stored by a read while the previous connection was down
+    cache._entries["group_summary_g0"] = "v0"
+
+    def invalidation():
+        cache._entries.update({"group_summary_g1": "v1", "group_summary_g2": "v2"})
+        return ["message", "__redis__:invalidate", ["group_summary_g1"]]
+
+    connection = FakeConnection(
+        [7, "OK", ["subscribe", "__redis__:invalidate", 1], invalidation]
+    )
+    client.connection_pool.make_connection.return_value = connection
+
+    with pytest.raises(redis.ConnectionError):
+        cache._track()
+
+    assert connection.commands[:3] == [
+        ("CLIENT", "ID"),
+        (
+            "CLIENT",
+            "TRACKING",
+            "ON",
+            "REDIRECT",
+            7,
+            "BCAST",
+            "PREFIX",
+            "group_summary_",
+            "PREFIX",
+            "task_progress_",
+        ),
+        ("SUBSCRIBE", "__redis__:invalidate"),
+    ]
+    assert list(cache._entries) == ["group_summary_g2"]
+    assert connection.disconnected
@@ -0,0 +1,125 @@
+import json
+from unittest import mock
+
+import pytest
+
+from app.shared.dead_letters import (
+    DEAD_LETTERS_KEY,
+    DEAD_LETTERS_NODE_KEY_PREFIX,
+    index_dead_letters,
+    record_dead_letter,
+    record_replay_failure,
+    resolve_dead_letter,
+    scan_dead_letters,
+)
+from benchmarks.fakes.mock_redis import MockRedis
+
+
+@pytest.fixture
+def mock_redis_client():
+    with mock.patch(
+        "app.shared.dead_letters.redis_client", new_callable=MockRedis
+    ) as mock_obj:
+        yield mock_obj
+
+
+def test_record_dead_letter(mock_redis_client):
+    entry = record_dead_letter("rollback_create_group", "group123", "node1")
+    assert entry["id"] == "rollback_create_group|group123|node1"
+    assert DEAD_LETTERS_KEY not in mock_redis_client.ttls
+
+    record_dead_letter("rollback_create_group", "group123", "node1")
+    assert len(mock_redis_client.data[DEAD_LETTERS_KEY]) == 1
+
+
+def test_scan_dead_letters_pages(mock_redis_client):
+    for i in range(25):
+        record_dead_letter("rollback_create_group", f"group{i}", "node1")
+
+    cursor, seen = 0, []
+    while True:
+        cursor, entries = scan_dead_letters(cursor, count=10)
+        seen.extend(entry["group_id"] for entry in entries)
+        if cursor == 0:
+            break
+    assert sorted(seen) == sorted(f"group{i}" for i in range(25))
+
+
+def test_scan_dead_letters_filters(mock_redis_client):
+    record_dead_letter("rollback_create_group", "group1", "node1")
+    record_dead_letter("rollback_create_group", "group2", "node2")
+    record_dead_letter("rollback_delete_group", "group3", "node1")
+
+    _, entries = scan_dead_letters(count=100, node="node1")
+    assert sorted(entry["group_id"] for entry in entries) == ["group1", "group3"]
+
+    _, entries = scan_dead_letters(count=100, operation="rollback_delete_group")
+    assert [entry["group_id"] for entry in entries] == ["group3"]
+
+
+def test_entries_are_stored_compactly(mock_redis_client):
+    entry = record_dead_letter("rollback_create_group", "group|1", "node1:8001")
+
+    stored = mock_redis_client.data[DEAD_LETTERS_KEY][entry["id"]]
+    assert set(json.loads(stored)) == {"dead_lettered_at"}
+    _, (scanned,) = scan_dead_letters(count=100, node="node1:8001")
+    assert scanned == entry
+    assert scanned["group_id"] == "group|1"
+
+
+def test_legacy_entries_are_read(mock_redis_client):
+    legacy = {
+        "id": "rollback_delete_group|group1|node1",
+        "task": "rollback_delete_group",
+        "group_id": "group1",
+        "node": "node1",
+        "dead_lettered_at": 1700000000.0,
+    }
+    mock_redis_client.hset(DEAD_LETTERS_KEY, legacy["id"], json.dumps(legacy))
+
+    _, entries = scan_dead_letters(count=100)
+    assert entries == [legacy]
+
+
+def test_replay_failure_and_resolution(mock_redis_client):
+    entry = record_dead_letter("rollback_create_group", "group1", "node1")
+
+    record_replay_failure(entry, "failed")
+    _, (failed,) = scan_dead_letters(count=100)
+    record_replay_failure(failed, "failed")
+    _, (failed,) = scan_dead_letters(count=100)
+    assert failed["replays"] == 2
+    assert failed["last_outcome"] == "failed"
+    assert failed["dead_lettered_at"] == entry["dead_lettered_at"]
+
+    resolve_dead_letter(failed)
+    assert scan_dead_letters(count=100) == (0, [])
+
+
+def test_node_listing_reads_only_its_index(mock_redis_client):
+    record_dead_letter("rollback_create_group", "group1", "node1")
+    record_dead_letter("rollback_create_group", "group2", "node2")
+
+    with mock.patch.object(mock_redis_client, "hscan") as hscan:
+        _, entries = scan_dead_letters(count=100, node="node1")
+    hscan.assert_not_called()
+    assert [entry["group_id"] for entry in entries] == ["group1"]
+
+    resolve_dead_letter(entries[0])
+    assert f"{DEAD_LETTERS_NODE_KEY_PREFIX}node1" not in mock_redis_client.data
+
+
+def test_entries_recorded_before_the_index_are_indexed_once(mock_redis_client):
+    legacy_id = "rollback_delete_group|group1|node1"
+    mock_redis_client.hset(DEAD_LETTERS_KEY, legacy_id, json.dumps({}))
+    assert scan_dead_letters(count=100, node="node1") == (0, [])
+
+    index_dead_letters()
+    _, (entry,) = scan_dead_letters(count=100, node="node1")
+    assert entry["id"] == legacy_id
+
+    # Resolved behind the index, e.g. while it was built
+    mock_redis_client.hdel(DEAD_LETTERS_KEY, legacy_id)
+    index_dead_letters()
+    assert scan_dead_letters(count=100, node="node1") == (0, [])
+    assert f"{DEAD_LETTERS_NODE_KEY_PREFIX}node1" not in mock_redis_client.data
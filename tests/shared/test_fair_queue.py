@@ -0,0 +1,179 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.shared.fair_queue import (
+    FAIR_LOCK_KEY,
+    FAIR_PENDING_KEY,
+    FAIR_RUNNING_KEY,
+    FAIR_TENANTS_KEY,
+    dispatch,
+    enqueue,
+    read_fair_backlog,
+    read_fair_queues,
+    release_on_task_finished,
+    release_slot,
+    resolve_tenant,
+    submit,
+)
+from benchmarks.fakes.mock_redis import MockRedis
+
+CREATE = "app.celery_tasks.create_task.create_group"
+
+
+@pytest.fixture
+def mock_redis():
+    mock_redis = MockRedis()
+    with patch("app.shared.fair_queue.redis_client", mock_redis), patch(
+        "app.shared.fair_queue.FAIR_SCHEDULING", True
+    ), patch("app.shared.fair_queue.FAIR_MAX_IN_FLIGHT", 1), patch(
+        "app.shared.fair_queue.FAIR_TENANT_CONCURRENCY", 0
+    ):
+        yield mock_redis
+
+
+class Sender:
+    """
+    Records sent tasks, as `celery_app.send_task` would queue them.
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.app = MagicMock(send_task=self)
+
+    def __call__(self, name, args, kwargs, task_id):
+        self.sent.append((args[0], task_id))
+
+    def finish(self, index=-1):
+        _, task_id = self.sent[index]
+        release_on_task_finished(sender=self, task_id=task_id, state="SUCCESS")
+
+    def groups(self):
+        return [group_id for group_id, _ in self.sent]
+
+
+def test_resolve_tenant():
+    assert resolve_tenant("team-a", "bulk-group1") == "team-a"
+    assert resolve_tenant(None, "bulk-group1") == "bulk"
+    assert resolve_tenant(None, "group1") == "default"
+    assert resolve_tenant("team a/1", "group1") == "team_a_1"
+
+
+def test_idle_tenant_is_served_before_backlog(mock_redis):
+    sender = Sender()
+    for index in range(100):
+        submit("bulk", CREATE, [f"bulk-{index}"], {}, sender)
+    assert sender.groups() == ["bulk-0"]
+
+    submit("interactive", CREATE, ["interactive-0"], {}, sender)
+    sender.finish()
+
+    assert sender.groups() == ["bulk-0", "interactive-0"]
+    sender.finish()
+    assert sender.groups()[-1] == "bulk-1"
+
+
+def test_weighted_share_of_backlogged_tenants(mock_redis):
+    sender = Sender()
+    with patch("app.shared.fair_queue.FAIR_TENANT_WEIGHTS", {"heavy": 3}):
+        for index in range(20):
+            enqueue("light", CREATE, [f"light-{index}"], {})
+            enqueue("heavy", CREATE, [f"heavy-{index}"], {})
+        dispatch(sender)
+        for _ in range(15):
+            sender.finish()
+
+    served = [group_id.split("-")[0] for group_id in sender.groups()]
+    assert served.count("heavy") == 12
+    assert served.count("light") == 4
+
+
+def test_tenant_concurrency_cap(mock_redis):
+    sender = Sender()
+    with patch("app.shared.fair_queue.FAIR_MAX_IN_FLIGHT", 10), patch(
+        "app.shared.fair_queue.FAIR_TENANT_CONCURRENCY", 2
+    ):
+        for index in range(5):
+            enqueue("bulk", CREATE, [f"bulk-{index}"], {})
+        enqueue("other", CREATE, ["other-0"], {})
+        dispatch(sender)
+
+    assert sorted(sender.groups()) == ["bulk-0", "bulk-1", "other-0"]
+    assert read_fair_queues()["bulk"] == {"backlog": 3, "running": 2, "weight": 1.0}
+
+
+def test_drained_tenant_is_retired(mock_redis):
+    sender = Sender()
+    submit("team", CREATE, ["team-0"], {}, sender)
+    sender.finish()
+    assert FAIR_TENANTS_KEY not in mock_redis.data
+    assert mock_redis.hgetall(FAIR_RUNNING_KEY) == {}
+
+
+def test_retry_does_not_release_slot(mock_redis):
+    sender = Sender()
+    submit("team", CREATE, ["team-0"], {}, sender)
+    submit("team", CREATE, ["team-1"], {}, sender)
+    _, task_id = sender.sent[0]
+
+    release_on_task_finished(sender=sender, task_id=task_id, state="RETRY")
+
+    assert sender.groups() == ["team-0"]
+
+
+def test_fanned_out_task_keeps_its_slot_until_joined(mock_redis):
+    sender = Sender()
+    submit("team", CREATE, ["team-0"], {}, sender)
+    submit("team", CREATE, ["team-1"], {}, sender)
+    _, task_id = sender.sent[0]
+    # Per-node tasks of the operation still running
+    mock_redis.hset(f"fanout_{task_id}", "__meta__", "{}")
+
+    sender.finish()
+    assert sender.groups() == ["team-0"]
+
+    mock_redis.delete(f"fanout_{task_id}")
+    release_slot(task_id, sender)
+    assert sender.groups() == ["team-0", "team-1"]
+
+
+def test_read_fair_backlog(mock_redis):
+    enqueue("team", CREATE, ["team-0"], {})
+    enqueue("team", CREATE, ["team-1"], {})
+    enqueue("other", CREATE, ["other-0"], {})
+    assert read_fair_backlog() == 3
+
+
+def test_timed_out_slot_is_released(mock_redis):
+    sender = Sender()
+    mock_redis.hset(
+        FAIR_RUNNING_KEY,
+        "lost-task",
+        json.dumps({"tenant": "team", "dispatched_at": time.time() - 7200}),
+    )
+    submit("team", CREATE, ["team-0"], {}, sender)
+    assert sender.groups() == ["team-0"]
+
+
+def test_failed_send_keeps_task_queued(mock_redis):
+    def failing_send(*args, **kwargs):
+        raise ConnectionError("Broker down")
+
+    with pytest.raises(ConnectionError):
+        submit("team", CREATE, ["team-0"], {}, failing_send)
+
+    sender = Sender()
+    dispatch(sender)
+    assert sender.groups() == ["team-0"]
+
+
+def test_dispatch_skipped_while_locked(mock_redis):
+    sender = Sender()
+    mock_redis.set(FAIR_LOCK_KEY, "other-process")
+
+    submit("team", CREATE, ["team-0"], {}, sender)
+
+    assert sender.sent == []
+    assert mock_redis.exists(FAIR_PENDING_KEY)
@@ -0,0 +1,50 @@
+from unittest import mock
+
+import pytest
+
+from app.shared.fanout import (
+    FANOUT_KEY_PREFIX,
+    node_route,
+    read_fanout,
+    record_node_result,
+    start_fanout,
+)
+from benchmarks.fakes.mock_redis import MockRedis
+
+
+@pytest.fixture
+def mock_redis_client():
+    with mock.patch("app.shared.fanout.redis_client", new_callable=MockRedis) as mock_obj:
+        yield mock_obj
+
+
+def test_read_fanout(mock_redis_client):
+    start_fanout("op-1", {"group_id": "group1", "total": 2})
+    assert read_fanout("op-1") == {"group_id": "group1", "total": 2, "failed": 0}
+    assert read_fanout("unknown") is None
+
+
+def test_last_node_joins_the_operation(mock_redis_client):
+    start_fanout("op-1", {"group_id": "group1", "total": 3})
+    assert record_node_result("op-1", "node1", "created", False, 3) is None
+    assert record_node_result("op-1", "node2", "failed", True, 3) is None
+    assert read_fanout("op-1")["failed"] == 1
+
+    outcomes = record_node_result("op-1", "node3", "skipped", True, 3)
+    assert outcomes == {"node1": "created", "node2": "failed", "node3": "skipped"}
+    assert f"{FANOUT_KEY_PREFIX}op-1" not in mock_redis_client.data
+
+
+def test_late_duplicate_does_not_reopen_the_operation(mock_redis_client):
+    start_fanout("op-1", {"group_id": "group1", "total": 1})
+    assert record_node_result("op-1", "node1", "created", False, 1)
+
+    assert record_node_result("op-1", "node1", "created", False, 1) is None
+    assert f"{FANOUT_KEY_PREFIX}op-1" not in mock_redis_client.data
+
+
+def test_node_route():
+    with mock.patch("app.shared.fanout.PER_NODE_QUEUES", False):
+        assert node_route("node1") == {}
+    with mock.patch("app.shared.fanout.PER_NODE_QUEUES", True):
+        assert node_route("node1") == {"queue": "node.node1"}
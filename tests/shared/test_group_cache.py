@@ -0,0 +1,68 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from redis.exceptions import ConnectionError
+
+from app.shared.group_cache import (
+    get_cached_summary,
+    invalidate_on_task_finished,
+    set_cached_summary,
+)
+
+
+def task(name):
+    sender = MagicMock()
+    sender.name = name
+    return sender
+
+
+@patch("app.shared.group_cache.redis_client")
+def test_set_and_get_cached_summary(mock_redis):
+    set_cached_summary("group123", {"present_on": ["node1"]})
+    key, value = mock_redis.set.call_args.args
+    assert key == "group_summary_group123"
+    assert mock_redis.set.call_args.kwargs["ex"] == 5
+
+    mock_redis.get.return_value = value
+    assert get_cached_summary("group123") == {"present_on": ["node1"]}
+    mock_redis.get.return_value = None
+    assert get_cached_summary("group123") is None
+
+
+@patch("app.shared.group_cache.redis_client")
+def test_invalidate_on_group_task_finished(mock_redis):
+    invalidate_on_task_finished(
+        sender=task("app.celery_tasks.create_task.create_group"), args=("group123",)
+    )
+    invalidate_on_task_finished(
+        sender=task("app.celery_tasks.delete_task.rollback_delete_group"),
+        args=(),
+        kwargs={"group_id": "group456", "node": "node1"},
+    )
+    invalidate_on_task_finished(
+        sender=task("app.celery_tasks.create_task.repair_create_group"),
+        args=(),
+        kwargs={"group_id": "group789", "node": "node1"},
+    )
+    assert [call.args[0] for call in mock_redis.unlink.call_args_list] == [
+        "group_summary_group123",
+        "group_summary_group456",
+        "group_summary_group789",
+    ]
+
+
+@patch("app.shared.group_cache.redis_client")
+def test_other_tasks_do_not_invalidate(mock_redis):
+    invalidate_on_task_finished(
+        sender=task("app.celery_tasks.webhook_task.deliver_webhook"),
+        kwargs={"url": "http://hook", "payload": json.dumps({})},
+    )
+    mock_redis.unlink.assert_not_called()
+
+
+@patch("app.shared.group_cache.redis_client")
+def test_invalidate_ignores_redis_errors(mock_redis):
+    mock_redis.unlink.side_effect = ConnectionError("Failed to connect to Redis")
+    invalidate_on_task_finished(
+        sender=task("app.celery_tasks.create_task.create_group"), args=("group123",)
+    )
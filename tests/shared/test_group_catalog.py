@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.shared.group_catalog import (
+    CATALOG_KEY,
+    add_to_catalog,
+    import_groups,
+    in_catalog,
+    remove_from_catalog,
+    scan_catalog,
+)
+from benchmarks.fakes.mock_redis import MockRedis
+
+
+@pytest.fixture
+def mock_redis():
+    mock_redis = MockRedis()
+    with patch("app.shared.group_catalog.redis_client", mock_redis):
+        yield mock_redis
+
+
+def test_add_and_remove(mock_redis):
+    add_to_catalog("group1")
+    pipe = mock_redis.pipeline()
+    add_to_catalog("group2", pipe)
+    pipe.execute()
+    remove_from_catalog("group1")
+
+    assert mock_redis.smembers(CATALOG_KEY) == {"group2"}
+    assert in_catalog(["group1", "group2"]) == [False, True]
+
+
+def test_import_groups_in_chunks(mock_redis):
+    add_to_catalog("group0")
+    round_trips = mock_redis.round_trips
+
+    added = import_groups((f"group{index}" for index in range(5)), chunk_size=2)
+
+    assert added == 4
+    assert mock_redis.round_trips - round_trips == 3
+
+
+def test_scan_catalog_pages(mock_redis):
+    import_groups(f"group{index:02}" for index in range(25))
+
+    cursor, group_ids = scan_catalog(count=10)
+    seen = list(group_ids)
+    while cursor:
+        cursor, group_ids = scan_catalog(cursor, count=10)
+        seen.extend(group_ids)
+
+    assert sorted(seen) == [f"group{index:02}" for index in range(25)]
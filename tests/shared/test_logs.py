@@ -0,0 +1,69 @@
+import json
+import logging
+import queue
+from unittest.mock import patch
+
+from app.shared.logs import (
+    EventRateFilter,
+    NonBlockingQueueHandler,
+    StructuredFormatter,
+)
+
+
+def make_record(msg="Group %s deleted on %s", level=logging.INFO, **extra):
+    args = ("group1", "node1")
+    record = logging.LogRecord("app", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_rate_filter_limits_events_and_reports_suppressed():
+    rate_filter = EventRateFilter(rate=2)
+
+    with patch("app.shared.logs.time.monotonic", return_value=100.0):
+        passed = [
+            rate_filter.filter(make_record(event="group_deleted")) for _ in range(5)
+        ]
+        # Records without an event, and errors, always pass
+        assert rate_filter.filter(make_record())
+        error = make_record(level=logging.ERROR, event="group_deleted")
+        assert rate_filter.filter(error)
+    with patch("app.shared.logs.time.monotonic", return_value=101.0):
+        record = make_record(event="group_deleted")
+        assert rate_filter.filter(record)
+
+    assert passed == [True, True, False, False, False]
+    assert record.suppressed == 3
+
+
+def test_text_format_appends_extra_fields():
+    formatter = StructuredFormatter("text")
+
+    line = formatter.format(make_record(event="group_deleted", suppressed=2))
+
+    assert line.endswith(
+        "INFO app Group group1 deleted on node1 event=group_deleted suppressed=2"
+    )
+
+
+def test_json_format():
+    formatter = StructuredFormatter("json")
+
+    entry = json.loads(formatter.format(make_record(event="group_deleted")))
+
+    assert entry["level"] == "INFO"
+    assert entry["message"] == "Group group1 deleted on node1"
+    assert entry["event"] == "group_deleted"
+
+
+def test_queue_handler_drops_without_formatting():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+
+    first, second = make_record(), make_record()
+    handler.handle(first)
+    handler.handle(second)
+
+    assert handler.queue.get_nowait() is first
+    assert first.msg == "Group %s deleted on %s"
+    assert first.args == ("group1", "node1")
+    assert handler.dropped == 1
@@ -0,0 +1,41 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.shared.metrics import Metrics, read_published_metrics
+from benchmarks.fakes.mock_redis import MockRedis
+
+
+@pytest.fixture
+def mock_redis():
+    mock_redis = MockRedis()
+    with patch("app.shared.metrics.redis_client", mock_redis):
+        yield mock_redis
+
+
+def test_metrics_snapshot_by_series():
+    metrics = Metrics()
+    metrics.increment("requests_total", node="node1")
+    metrics.increment("requests_total", 2, node="node1")
+    metrics.set("warmup_seconds", 0.5)
+
+    assert metrics.snapshot() == {
+        "counters": {'requests_total{node="node1"}': 3},
+        "gauges": {"warmup_seconds": 0.5},
+    }
+
+
+def test_publish_and_read_metrics(mock_redis):
+    first, second = Metrics(), Metrics()
+    first.increment("pings_total")
+    second.set("warmup_seconds", 1.5)
+    first.publish("worker1:1")
+    second.publish("worker2:1")
+    mock_redis.set("group_group1", json.dumps({}))
+
+    assert read_published_metrics(count=1) == {
+        "worker1:1": {"counters": {"pings_total": 1}, "gauges": {}},
+        "worker2:1": {"counters": {}, "gauges": {"warmup_seconds": 1.5}},
+    }
+    assert mock_redis.ttl("metrics_worker1:1") > 0
@@ -0,0 +1,58 @@
+from collections import Counter
+from unittest.mock import patch
+
+from app.shared.placement import nodes_for_group
+
+NODES = [f"node{i}" for i in range(10)]
+GROUP_IDS = [f"group{i}" for i in range(2000)]
+
+
+def test_places_every_group_everywhere_by_default():
+    assert nodes_for_group("group1", NODES, replicas=0) == NODES
+    assert nodes_for_group("group1", NODES, replicas=20) == NODES
+
+
+@patch("app.shared.placement.GROUP_REPLICAS", 3)
+def test_uses_configured_replicas():
+    nodes = nodes_for_group("group1", NODES)
+    assert len(nodes) == 3
+    assert nodes == [node for node in NODES if node in nodes]
+
+
+def test_placement_is_deterministic():
+    assert nodes_for_group("group1", NODES, 3) == nodes_for_group("group1", NODES, 3)
+    assert nodes_for_group("group1", NODES, 3) == nodes_for_group(
+        "group1", list(reversed(NODES)), 3
+    )[::-1]
+
+
+def test_groups_are_spread_evenly():
+    load = Counter(
+        node for group_id in GROUP_IDS for node in nodes_for_group(group_id, NODES, 3)
+    )
+    expected = len(GROUP_IDS) * 3 / len(NODES)
+    assert all(0.8 * expected < count < 1.2 * expected for count in load.values())
+
+
+def test_adding_a_node_moves_few_groups():
+    grown = NODES + ["node10"]
+    moved = 0
+    for group_id in GROUP_IDS:
+        before = set(nodes_for_group(group_id, NODES, 3))
+        after = set(nodes_for_group(group_id, grown, 3))
+        # A group only moves to the new node, giving up a single replica
+        assert len(before - after) <= 1
+        assert after - before <= {"node10"}
+        moved += before != after
+    assert moved < len(GROUP_IDS) * 3 / len(grown) * 1.2
+
+
+def test_removing_a_node_only_moves_its_groups():
+    shrunk = NODES[1:]
+    for group_id in GROUP_IDS:
+        before = set(nodes_for_group(group_id, NODES, 3))
+        after = set(nodes_for_group(group_id, shrunk, 3))
+        if "node0" not in before:
+            assert before == after
+        else:
+            assert len(after - before) == 1
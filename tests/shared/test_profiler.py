@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.shared import profiler
+from app.shared.profiler import (
+    ProfilerBusy,
+    collapse,
+    install_profile_handler,
+    read_profiles,
+    request_profile,
+    sample,
+)
+from benchmarks.fakes.mock_redis import MockRedis
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def test_sample_collects_stacks_of_other_threads(busy_thread):
+    stacks = sample(0.2, interval=0.01)
+
+    busy = [stack for stack in stacks if stack.startswith("busy;")]
+    assert busy
+    assert all("busy_loop (tests/shared/test_profiler.py:" in stack for stack in busy)
+    assert not any("sample (" in stack for stack in stacks)
+    assert sum(stacks[stack] for stack in busy) >= 5
+
+
+def test_one_profile_at_a_time():
+    with profiler._profiling:
+        with pytest.raises(ProfilerBusy):
+            sample(0.01)
+
+
+def test_collapse_format():
+    stacks = profiler.Counter({"main;run;work": 3, "main;run": 1})
+
+    assert collapse(stacks) == "main;run;work 3\nmain;run 1\n"
+    assert collapse(stacks, root="host:1").splitlines()[0] == "host:1;main;run;work 3"
+
+
+def test_signaled_process_stores_its_profiles(busy_thread):
+    mock_redis = MockRedis()
+    previous = profiler.signal.getsignal(profiler.PROFILE_SIGNAL)
+    with patch("app.shared.profiler.redis_client", mock_redis):
+        install_profile_handler()
+        try:
+            # Concurrent requests are queued, not overwritten
+            for request_id in ("request1", "request2"):
+                request_profile(
+                    request_id, duration=0.1, interval=0.01, pids=[os.getpid()]
+                )
+            os.kill(os.getpid(), profiler.PROFILE_SIGNAL)
+            deadline = time.monotonic() + 5
+            while not read_profiles("request2") and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            profiler.signal.signal(profiler.PROFILE_SIGNAL, previous)
+
+        ((source, collapsed),) = read_profiles("request1").items()
+        assert list(read_profiles("request2")) == [source]
+    assert source.endswith(f":{os.getpid()}")
+    assert f"{source};busy;" in collapsed
@@ -0,0 +1,153 @@
+from unittest import mock
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.shared.progress import (
+    CURRENT_FIELD,
+    PROGRESS_KEY_PREFIX,
+    ProgressRecorder,
+    read_progress,
+    record_node_status,
+    record_rollback_status,
+)
+from benchmarks.fakes.mock_redis import MockRedis
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def mock_redis_client():
+    with mock.patch(
+        "app.shared.progress.redis_client", new_callable=MockRedis
+    ) as mock_obj:
+        yield mock_obj
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_recorder_without_task_id_records_nothing(mock_redis_client):
+    progress = ProgressRecorder(None, "create_group", 2)
+    progress.start("node1")
+    progress.finish("node1", "created")
+    progress.flush(done=True)
+    assert mock_redis_client.round_trips == 0
+
+
+def test_recorder_batches_writes(mock_redis_client, clock):
+    nodes = [f"node{i}" for i in range(50)]
+    progress = ProgressRecorder(
+        "task-1",
+        "create_group",
+        len(nodes),
+        flush_every=10,
+        flush_interval=60,
+        clock=clock,
+    )
+    for node in nodes:
+        progress.start(node)
+        clock.now += 0.01
+        progress.finish(node, "created")
+    progress.flush(done=True)
+
+    assert mock_redis_client.round_trips == 6
+    assert mock_redis_client.ttls[f"{PROGRESS_KEY_PREFIX}task-1"] > 0
+    summary = read_progress("task-1")
+    assert summary["operation"] == "create_group"
+    assert summary["total"] == 50
+    assert summary["processed"] == 50
+    assert summary["counts"] == {"created": 50}
+    assert summary["current"] is None
+    assert summary["nodes"]["node7"] == {"status": "created", "duration_ms": 10.0}
+
+
+def test_recorder_flushes_slow_progress(mock_redis_client, clock):
+    progress = ProgressRecorder(
+        "task-1", "create_group", 3, flush_every=10, flush_interval=1, clock=clock
+    )
+    progress.start("node1")
+    progress.finish("node1", "created")
+    assert mock_redis_client.round_trips == 0
+
+    clock.now += 1
+    progress.start("node2")
+    assert mock_redis_client.round_trips == 1
+    summary = read_progress("task-1")
+    assert summary["current"]["node"] == "node2"
+    assert summary["processed"] == 1
+
+    clock.now += 5
+    progress.finish("node2", "failed")
+    progress.flush(done=True)
+    summary = read_progress("task-1")
+    assert summary["current"] is None
+    assert summary["nodes"]["node2"] == {"status": "failed", "duration_ms": 5000.0}
+    assert CURRENT_FIELD not in mock_redis_client.data[f"{PROGRESS_KEY_PREFIX}task-1"]
+
+
+def test_record_rollback_status(mock_redis_client, clock):
+    progress = ProgressRecorder("task-1", "create_group", 3, clock=clock)
+    progress.start("node1")
+    progress.finish("node1", "created")
+    progress.start("node2")
+    progress.finish("node2", "failed")
+    progress.flush(done=True)
+
+    record_rollback_status("task-1", ["node1"], "rolling_back")
+    record_rollback_status("task-1", ["node1"], "rolled_back")
+    summary = read_progress("task-1")
+    assert summary["nodes"]["node1"]["rollback"] == "rolled_back"
+    assert summary["counts"] == {"created": 1, "failed": 1, "rolled_back": 1}
+
+
+def test_record_rollback_status_without_task_id(mock_redis_client):
+    record_rollback_status(None, ["node1"], "rolled_back")
+    assert mock_redis_client.round_trips == 0
+
+
+def test_read_progress_reports_replication(mock_redis_client, clock):
+    progress = ProgressRecorder("task-1", "create_group", 3, quorum=2, clock=clock)
+    progress.finish("node1", "created")
+    progress.finish("node2", "created")
+    progress.finish("node3", "pending_repair")
+    progress.flush(done=True)
+    summary = read_progress("task-1")
+    assert summary["processed"] == 2
+    assert summary["pending_repair"] == 1
+    assert summary["replication"] == {
+        "required": 2,
+        "acknowledged": 2,
+        "pending_repair": 1,
+        "total": 3,
+    }
+
+    record_node_status("task-1", "node3", "repaired")
+    summary = read_progress("task-1")
+    assert summary["nodes"]["node3"]["status"] == "repaired"
+    assert summary["processed"] == 3
+    assert summary["replication"]["acknowledged"] == 3
+    assert summary["replication"]["pending_repair"] == 0
+
+
+def test_read_progress_unknown_task(mock_redis_client):
+    assert read_progress("unknown") is None
+
+
+def test_recorder_ignores_redis_errors(clock):
+    with mock.patch("app.shared.progress.redis_client") as mock_redis:
+        mock_redis.pipeline.return_value.execute.side_effect = ConnectionError(
+            "Failed to connect to Redis"
+        )
+        progress = ProgressRecorder("task-1", "create_group", 1, clock=clock)
+        progress.start("node1")
+        progress.finish("node1", "created")
+        progress.flush(done=True)
@@ -0,0 +1,16 @@
+from unittest.mock import MagicMock, patch
+
+from app.shared.queue_depth import get_queue_depth
+
+
+@patch("app.shared.queue_depth.Connection")
+def test_queue_depth_of_undeclared_queues(mock_connection):
+    connection = mock_connection.return_value.__enter__.return_value
+    connection.channel_errors = (LookupError,)
+    declared, undeclared = MagicMock(), MagicMock()
+    declared.queue_declare.return_value.message_count = 3
+    undeclared.queue_declare.side_effect = LookupError("NOT_FOUND")
+    connection.channel.side_effect = [declared, undeclared]
+
+    assert get_queue_depth("celery", "node.node1") == 3
+    undeclared.close.assert_called_once()
@@ -1,9 +1,17 @@
 from unittest import mock
 
 import pytest
+from redis.cluster import RedisCluster
 from redis.exceptions import ConnectionError, TimeoutError
 
-from tests.mocks.mock_redis import MockRedis
+from app.shared.redis_client import (
+    TracedRedis,
+    create_redis_client,
+    group_id_from_key,
+    group_key,
+    scan_keys,
+)
+from benchmarks.fakes.mock_redis import MockRedis
 
 
 @pytest.fixture(scope="module")
@@ -44,3 +52,54 @@ def test_redis_get_timeout_error(mock_redis_client):
 def test_redis_delete_nonexistent_key(mock_redis_client):
     result = mock_redis_client.delete("nonexistent_key")
     assert result == 0
+
+
+def test_group_key_hash_tag():
+    assert group_key("rollback_create_group_", "g1") == "rollback_create_group_g1"
+    with mock.patch("app.shared.redis_client.REDIS_HASH_TAGS", True):
+        key = group_key("rollback_create_group_", "g1")
+
+    assert key == "rollback_create_group_{g1}"
+    assert group_id_from_key("rollback_create_group_", key) == "g1"
+    assert group_id_from_key("repair_create_group_", "repair_create_group_g1") == "g1"
+
+
+def test_scan_keys_walks_cluster_primaries():
+    nodes = [mock.Mock(), mock.Mock()]
+    nodes[0].name, nodes[1].name = "10.0.0.2:6379", "10.0.0.1:6379"
+    pages = {
+        "10.0.0.1:6379": {0: (5, ["a"]), 5: (0, ["b"])},
+        "10.0.0.2:6379": {0: (0, ["c"])},
+    }
+    client = mock.Mock(spec=RedisCluster)
+    client.get_primaries.return_value = nodes
+
+    def get_redis_connection(node):
+        connection = mock.Mock()
+        connection.scan.side_effect = lambda cursor, **kwargs: pages[node.name][cursor]
+        return connection
+
+    client.get_redis_connection.side_effect = get_redis_connection
+
+    cursor, keys = 0, []
+    while True:
+        cursor, page = scan_keys(client, cursor, match="*", count=10)
+        keys += page
+        if cursor == 0:
+            break
+
+    assert keys == ["a", "b", "c"]
+
+
+def test_create_redis_client_modes():
+    with mock.patch("app.shared.redis_client.Sentinel") as sentinel, mock.patch(
+        "app.shared.redis_client.REDIS_SENTINELS", ["10.0.0.1:26379"]
+    ):
+        create_redis_client("sentinel")
+
+    sentinel.assert_called_once_with([("10.0.0.1", 26379)])
+    master_for = sentinel.return_value.master_for
+    assert master_for.call_args.kwargs["redis_class"] is TracedRedis
+    assert isinstance(create_redis_client("standalone"), TracedRedis)
+    with pytest.raises(ValueError):
+        create_redis_client("replicated")
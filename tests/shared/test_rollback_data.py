@@ -0,0 +1,85 @@
+import json
+from unittest import mock
+
+import pytest
+
+from app.shared.rollback_data import decode_rollback_item, scan_rollbacks
+from benchmarks.fakes.mock_redis import MockRedis
+
+
+@pytest.mark.parametrize(
+    "rollback_item,expected",
+    [
+        (None, {}),
+        ("invalid json", {}),
+        (json.dumps([]), {}),
+        (json.dumps({"nodes": ["node1"]}), {"nodes": ["node1"]}),
+    ],
+)
+def test_decode_rollback_item(rollback_item, expected):
+    assert decode_rollback_item(rollback_item) == expected
+
+
+@pytest.fixture
+def mock_redis_client():
+    with mock.patch(
+        "app.shared.rollback_data.redis_client", new_callable=MockRedis
+    ) as mock_obj:
+        mock_obj.set("rollback_create_group_group1", json.dumps([]))
+        mock_obj.set(
+            "rollback_create_group_group2",
+            json.dumps({"group_id": "group2", "nodes": ["node1", "node2"]}),
+            ex=3600,
+        )
+        mock_obj.set(
+            "rollback_delete_group_group3",
+            json.dumps({"group_id": "group3", "nodes": ["node2"]}),
+            ex=3600,
+        )
+        mock_obj.set("rollback_delete_group_group4", "invalid json")
+        yield mock_obj
+
+
+def test_scan_rollbacks(mock_redis_client):
+    _, rollbacks = scan_rollbacks(count=100)
+    assert {rollback["group_id"]: rollback["state"] for rollback in rollbacks} == {
+        "group1": "lock",
+        "group2": "rolling_back",
+        "group3": "rolling_back",
+        "group4": "invalid",
+    }
+    rollbacks = {rollback["group_id"]: rollback for rollback in rollbacks}
+    assert rollbacks["group2"] == {
+        "key": "rollback_create_group_group2",
+        "operation": "create_group",
+        "group_id": "group2",
+        "state": "rolling_back",
+        "nodes": ["node1", "node2"],
+        "ttl": 3600,
+    }
+
+
+def test_scan_rollbacks_filters(mock_redis_client):
+    _, rollbacks = scan_rollbacks(count=100, node="node2", operation="delete_group")
+    assert [rollback["group_id"] for rollback in rollbacks] == ["group3"]
+
+
+def test_scan_rollbacks_pages(mock_redis_client):
+    cursor, seen = 0, []
+    while True:
+        cursor, rollbacks = scan_rollbacks(cursor, count=2)
+        seen.extend(rollback["group_id"] for rollback in rollbacks)
+        if cursor == 0:
+            break
+    assert sorted(seen) == ["group1", "group2", "group3", "group4"]
+
+
+def test_scan_rollbacks_lists_timestamped_locks(mock_redis_client):
+    lock = json.dumps({"locked_at": 1000.0, "task_id": "task5"})
+    mock_redis_client.set("rollback_create_group_group5", lock)
+
+    _, rollbacks = scan_rollbacks(count=100)
+
+    (entry,) = [rollback for rollback in rollbacks if rollback["group_id"] == "group5"]
+    assert entry["state"] == "lock"
+    assert (entry["locked_at"], entry["task_id"]) == (1000.0, "task5")
@@ -0,0 +1,50 @@
+from unittest.mock import MagicMock, patch
+
+from redis.exceptions import ConnectionError
+
+from app.shared.throughput import (
+    TASKS_COMPLETED_KEY,
+    read_tasks_completed,
+    record_task_completed,
+)
+
+
+def task(name):
+    sender = MagicMock()
+    sender.name = name
+    return sender
+
+
+@patch("app.shared.throughput.redis_client")
+def test_record_task_completed(mock_redis):
+    record_task_completed(sender=task("app.celery_tasks.create_task.create_group"))
+    record_task_completed(
+        sender=task("app.celery_tasks.delete_task.delete_group_on_node")
+    )
+    assert mock_redis.incr.call_count == 2
+    mock_redis.incr.assert_called_with(TASKS_COMPLETED_KEY)
+
+
+@patch("app.shared.throughput.redis_client")
+def test_record_task_completed_skips_other_tasks(mock_redis):
+    for name in (
+        "app.celery_tasks.webhook_task.deliver_webhook",
+        "app.celery_tasks.sweeper_task.sweep_rollbacks",
+        "app.celery_tasks.backfill_task.backfill_chunk",
+    ):
+        record_task_completed(sender=task(name))
+    mock_redis.incr.assert_not_called()
+
+
+@patch("app.shared.throughput.redis_client")
+def test_record_task_completed_ignores_redis_errors(mock_redis):
+    mock_redis.incr.side_effect = ConnectionError("Failed to connect to Redis")
+    record_task_completed(sender=task("app.celery_tasks.create_task.create_group"))
+
+
+@patch("app.shared.throughput.redis_client")
+def test_read_tasks_completed(mock_redis):
+    mock_redis.get.return_value = None
+    assert read_tasks_completed() == 0
+    mock_redis.get.return_value = "42"
+    assert read_tasks_completed() == 42
@@ -0,0 +1,142 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.shared import tracing
+from app.shared.tracing import (
+    InMemoryExporter,
+    JsonlExporter,
+    Tracer,
+    parse_traceparent,
+)
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemoryExporter()
+    with patch.object(tracing, "tracer", Tracer(exporter, sample_rate=1.0)):
+        yield exporter
+
+
+def test_disabled_tracer_starts_no_span():
+    tracer = Tracer(exporter=None)
+
+    with tracer.span("request", root=True) as span:
+        assert span is None
+        assert tracer.current_traceparent() is None
+
+
+def test_child_spans_share_the_trace():
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter, sample_rate=1.0)
+
+    with tracer.span("request", root=True, path="/groups") as root:
+        with tracer.child_span("redis GET"):
+            pass
+
+    spans = exporter.by_name()
+    assert spans["request"]["parent_id"] is None
+    assert spans["request"]["attributes"] == {"path": "/groups"}
+    assert spans["redis GET"]["trace_id"] == root.trace_id
+    assert spans["redis GET"]["parent_id"] == root.span_id
+    assert tracer.current_span() is None
+
+
+def test_sampling_is_decided_at_the_root():
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter, sample_rate=0.0)
+
+    with tracer.span("request", root=True) as root:
+        assert root.traceparent.endswith("-00")
+        with tracer.child_span("redis GET") as child:
+            assert child is None
+    # An upstream sampling decision is kept
+    sampled = f"00-{'a' * 32}-{'b' * 16}-01"
+    with tracer.span("request", sampled, root=True):
+        pass
+
+    assert [span["name"] for span in exporter.spans] == ["request"]
+    assert exporter.spans[0]["trace_id"] == "a" * 32
+    assert exporter.spans[0]["parent_id"] == "b" * 16
+
+
+def test_exception_marks_the_span_failed():
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter, sample_rate=1.0)
+
+    with pytest.raises(ValueError):
+        with tracer.span("request", root=True):
+            raise ValueError("boom")
+
+    assert exporter.spans[0]["status"] == "error"
+    assert "boom" in exporter.spans[0]["attributes"]["error"]
+
+
+def test_parse_traceparent_rejects_malformed_values():
+    assert parse_traceparent(None) is None
+    assert parse_traceparent("00-abc-def-01") is None
+    assert parse_traceparent(f"00-{'a' * 32}-{'b' * 16}-zz") is None
+    traceparent = f"00-{'a' * 32}-{'b' * 16}-01"
+    assert parse_traceparent(traceparent) == ("a" * 32, "b" * 16, True)
+
+
+def test_jsonl_exporter(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(JsonlExporter(str(path)), sample_rate=1.0)
+
+    with tracer.span("request", root=True):
+        pass
+
+    (span,) = [json.loads(line) for line in path.read_text().splitlines()]
+    assert span["name"] == "request"
+    assert span["duration_ms"] >= 0
+
+
+def test_trace_crosses_the_broker(exporter):
+    tracer = tracing.tracer
+    headers = {}
+    with tracer.span("POST /groups/create", root=True) as request:
+        tracing.inject_on_publish(sender="create_group", headers=headers)
+        tracing.end_publish_span()
+
+    task = SimpleNamespace(
+        name="create_group",
+        request=SimpleNamespace(
+            traceparent=headers["traceparent"],
+            trace_published_at=headers["trace_published_at"],
+            retries=0,
+        ),
+    )
+    tracing.start_task_span(task_id="task1", task=task)
+    # Spawned rollback task
+    rollback_headers = {}
+    tracing.inject_on_publish(sender="rollback", headers=rollback_headers)
+    tracing.end_publish_span()
+    with tracer.child_span("node POST"):
+        pass
+    tracing.end_task_span(task_id="task1", state="SUCCESS")
+
+    spans = exporter.by_name()
+    assert {span["trace_id"] for span in exporter.spans} == {request.trace_id}
+    publish = spans["publish create_group"]
+    assert publish["parent_id"] == request.span_id
+    assert spans["queued create_group"]["parent_id"] == publish["span_id"]
+    run = spans["run create_group"]
+    assert run["parent_id"] == publish["span_id"]
+    assert run["attributes"]["state"] == "SUCCESS"
+    assert spans["node POST"]["parent_id"] == run["span_id"]
+    assert spans["publish rollback"]["parent_id"] == run["span_id"]
+    assert tracer.current_span() is None
+
+
+def test_publish_keeps_a_propagated_traceparent(exporter):
+    headers = {"traceparent": f"00-{'a' * 32}-{'b' * 16}-01"}
+
+    with tracing.tracer.span("request", root=True):
+        tracing.inject_on_publish(sender="create_group", headers=headers)
+        tracing.end_publish_span()
+
+    assert headers["traceparent"] == f"00-{'a' * 32}-{'b' * 16}-01"
+    assert [span["name"] for span in exporter.spans] == ["request"]
@@ -0,0 +1,71 @@
+import json
+import time
+
+from httpx import ConnectError, Response
+
+from app.shared.traffic import TrafficRecorder
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_disabled_without_path(tmp_path):
+    recorder = TrafficRecorder(path="")
+
+    recorder.record_request("POST", "/groups/create", {}, {}, 200, time.perf_counter())
+
+    assert not recorder.enabled
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_records_requests_and_node_calls(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    recorder = TrafficRecorder(path=str(path))
+    started_at = time.perf_counter()
+
+    recorder.record_request(
+        "POST",
+        "/groups/create",
+        {"group_id": "group1"},
+        {"X-Tenant-Id": "acme"},
+        200,
+        started_at,
+        task_id="task1",
+    )
+    recorder.record_node_call(
+        "POST", "http://node1:8001/v1/group/", started_at, response=Response(201)
+    )
+    recorder.record_node_call(
+        "GET", "http://node2/v1/group/group1", started_at, error=ConnectError("down")
+    )
+
+    api, created, failed = read_records(path)
+    assert api["src"] == "api"
+    assert api["body"] == {"group_id": "group1"}
+    assert api["headers"] == {"X-Tenant-Id": "acme"}
+    assert api["task_id"] == "task1"
+    assert api["ms"] >= 0
+    assert (created["node"], created["path"], created["status"]) == (
+        "node1:8001",
+        "/v1/group/",
+        201,
+    )
+    assert (failed["node"], failed["status"], failed["error"]) == (
+        "node2",
+        0,
+        "ConnectError",
+    )
+
+
+def test_stops_once_file_is_full(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    recorder = TrafficRecorder(path=str(path), max_bytes=300)
+
+    for _ in range(10):
+        recorder.record_node_call(
+            "DELETE", "http://node1/v1/group/", time.perf_counter(), Response(200)
+        )
+
+    assert not recorder.enabled
+    assert 0 < path.stat().st_size <= 300
@@ -0,0 +1,68 @@
+from functools import partial
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.paths import BENCHMARKS
+from benchmarks.runner import compare, measure, median_result
+
+BASELINE = {"create_group": {"ops_per_sec": 1000.0, "peak_bytes": 10000}}
+
+
+def test_measure_reports_throughput_and_allocations():
+    calls = []
+    result = measure(
+        lambda: calls.append(bytearray(4096)),
+        setup=calls.clear,
+        iterations=10,
+        repeat=2,
+        alloc_iterations=5,
+    )
+    assert result["ops_per_sec"] > 0
+    assert result["peak_bytes"] >= 4096
+
+
+def test_median_result_ignores_a_disturbed_run():
+    runs = [
+        {"ops_per_sec": 1000.0, "peak_bytes": 100},
+        {"ops_per_sec": 500.0, "peak_bytes": 300},
+        {"ops_per_sec": 980.0, "peak_bytes": 100},
+    ]
+    assert median_result(runs) == {"ops_per_sec": 980.0, "peak_bytes": 100}
+
+
+def test_compare_within_thresholds():
+    results = {"create_group": {"ops_per_sec": 800.0, "peak_bytes": 11000}}
+    assert compare(results, BASELINE, threshold=0.25, alloc_threshold=0.1) == []
+
+
+def test_compare_reports_regressions():
+    results = {"create_group": {"ops_per_sec": 700.0, "peak_bytes": 12000}}
+    regressions = compare(results, BASELINE, threshold=0.25, alloc_threshold=0.1)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("create_group: 700 ops/s")
+
+
+def test_compare_with_benchmark_thresholds():
+    results = {"create_group": {"ops_per_sec": 700.0, "peak_bytes": 10000}}
+    regressions = compare(
+        results,
+        BASELINE,
+        threshold=0.25,
+        alloc_threshold=0.1,
+        thresholds={"create_group": 0.4},
+    )
+    assert regressions == []
+
+
+def test_compare_ignores_benchmarks_without_baseline():
+    results = {"new_path": {"ops_per_sec": 1.0, "peak_bytes": 10**9}}
+    assert compare(results, BASELINE, threshold=0.25, alloc_threshold=0.1) == []
+
+
+@pytest.mark.parametrize("name", list(BENCHMARKS))
+@patch("app.celery_tasks.celery_app.celery_app.send_task")
+def test_benchmarks_run(mock_send_task, name):
+    run = partial(measure, iterations=3, repeat=1, alloc_iterations=1)
+    result = BENCHMARKS[name](run)
+    assert set(result) == {"ops_per_sec", "peak_bytes"}
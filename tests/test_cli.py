@@ -0,0 +1,40 @@
+import json
+from unittest.mock import patch
+
+from app.cli import main
+
+
+@patch("app.cli.scan_rollbacks")
+def test_rollbacks_single_page(mock_scan, capsys):
+    mock_scan.return_value = (5, [{"group_id": "group1"}])
+    main(["rollbacks", "--node", "node1", "--operation", "create_group"])
+    out, err = capsys.readouterr()
+    assert [json.loads(line) for line in out.splitlines()] == [{"group_id": "group1"}]
+    assert "next_cursor: 5" in err
+    mock_scan.assert_called_once_with(0, 100, "node1", "create_group")
+
+
+@patch("app.cli.scan_dead_letters")
+def test_dead_letters_all_pages(mock_scan, capsys):
+    mock_scan.side_effect = [(3, [{"id": "a"}]), (0, [{"id": "b"}])]
+    main(["dead-letters", "--all", "--count", "10"])
+    out, _ = capsys.readouterr()
+    assert [json.loads(line)["id"] for line in out.splitlines()] == ["a", "b"]
+    assert mock_scan.call_args_list[1].args == (3, 10, None, None)
+
+
+@patch("app.cli.scan_dead_letters")
+def test_dead_letters_of_repairs(mock_scan, capsys):
+    mock_scan.return_value = (0, [])
+    main(["dead-letters", "--operation", "repair_create_group"])
+    mock_scan.assert_called_once_with(0, 100, None, "repair_create_group")
+
+
+@patch("app.cli.import_groups")
+def test_catalog_import(mock_import, tmp_path, capsys):
+    path = tmp_path / "groups.txt"
+    path.write_text("group1\n\ngroup2\n")
+    mock_import.side_effect = lambda group_ids: len(list(group_ids))
+    main(["catalog-import", str(path)])
+    out, _ = capsys.readouterr()
+    assert out == "2 groups added to the catalog\n"
@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from benchmarks.replay import NodeTimeline, StandInNodes, load_trace, replay
+
+
+def node_call(t, node, method, status, ms=1.0, path="/v1/group/"):
+    return {
+        "t": t,
+        "src": "node",
+        "node": node,
+        "method": method,
+        "path": path,
+        "status": status,
+        "ms": ms,
+    }
+
+
+def api_request(t, path, status=200, body=None, task_id=None):
+    record = {
+        "t": t,
+        "src": "api",
+        "method": "POST" if body else "GET",
+        "path": path,
+        "status": status,
+        "ms": 1.0,
+    }
+    if body:
+        record["body"] = body
+    if task_id:
+        record["task_id"] = task_id
+    return record
+
+
+def test_load_trace_splits_and_sorts(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    records = [
+        node_call(101, "node1", "POST", 201),
+        api_request(100, "/groups/create", body={"group_id": "g"}),
+    ]
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\n")
+
+    requests, node_calls = load_trace(str(path))
+
+    assert [record["t"] for record in requests] == [100]
+    assert [record["t"] for record in node_calls] == [101]
+
+
+def test_node_timeline_replays_answers_at_their_offset():
+    timeline = NodeTimeline(
+        [
+            node_call(100, "node1", "POST", 201, ms=10),
+            node_call(110, "node1", "POST", 0),
+            node_call(120, "node1", "POST", 201, ms=20),
+        ],
+        origin=100,
+    )
+
+    assert timeline.answer("create_group", 5) == (201, 0.01)
+    assert timeline.answer("create_group", 15) == (0, 0.001)
+    assert timeline.answer("create_group", 30) == (201, 0.02)
+    assert timeline.answer("delete_group", 5) == (200, 0.0)
+
+
+def test_stand_in_nodes_answer_like_the_recorded_ones():
+    calls = [
+        node_call(100, "node1", "POST", 201),
+        node_call(100, "node2", "POST", 0),
+    ]
+    nodes = StandInNodes(calls, origin=100, port=0, count=3).start()
+    try:
+        with httpx.Client() as client:
+            node1, node2, node3 = (f"http://{host}" for host in nodes.hosts)
+            assert client.post(f"{node1}/v1/group/", json={}).status_code == 201
+            with pytest.raises(httpx.TransportError):
+                client.post(f"{node2}/v1/group/", json={})
+            # Timelines are reused past the recorded nodes
+            assert client.post(f"{node3}/v1/group/", json={}).status_code == 201
+    finally:
+        nodes.stop()
+
+
+def test_replay_follows_replayed_tasks_and_compresses_time():
+    requests = [
+        api_request(100, "/groups/create", body={"group_id": "g"}, task_id="old1"),
+        api_request(100.2, "/groups/task/old1"),
+        api_request(100.4, "/groups/create", status=200, body={"group_id": "g"}),
+    ]
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        if request.url.path == "/groups/create":
+            return httpx.Response(200, json={"task_id": "new1"})
+        return httpx.Response(200, json={"state": "SUCCESS"})
+
+    async def run():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://api"
+        ) as client:
+            return await replay(requests, client, speed=4)
+
+    report = asyncio.run(run())
+
+    assert seen == ["/groups/create", "/groups/task/new1", "/groups/create"]
+    assert report["sent"] == 3
+    assert report["statuses"] == {200: 3}
+    assert report["mismatches"] == 0
+    assert 0.1 <= report["elapsed"] < 0.3
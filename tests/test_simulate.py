@@ -0,0 +1,93 @@
+import random
+
+from benchmarks.fakes.programmable_transport import constant
+from benchmarks.simulate import (
+    SimClock,
+    SimulatedNodes,
+    Simulation,
+    SimulationConfig,
+    main,
+    parse_distribution,
+)
+
+
+def test_nodes_answer_like_the_api():
+    clock = SimClock()
+    nodes = SimulatedNodes(clock, random.Random(0), constant(0.01))
+
+    assert nodes.create_group("node1:8001", "group1").status_code == 201
+    assert nodes.create_group("node1:8001", "group1").status_code == 400
+    assert nodes.get_group("node1:8001", "group1").status_code == 200
+    assert nodes.delete_group("node1:8001", "group1").status_code == 200
+    assert nodes.delete_group("node1:8001", "group1").status_code == 400
+    assert round(clock.now(), 6) == 0.05
+
+
+def test_nodes_refuse_during_outage_and_time_out():
+    clock = SimClock()
+    nodes = SimulatedNodes(
+        clock,
+        random.Random(0),
+        constant(10),
+        timeout=5.0,
+        outages={"node1:8001": (0.0, 1.0)},
+    )
+
+    assert nodes.create_group("node1:8001", "group1").status_code == 500
+    assert clock.now() == 0.0
+    clock.set(2.0)
+    assert nodes.create_group("node1:8001", "group1").status_code == 500
+    assert clock.now() == 7.0
+    assert nodes.calls == {"refused": 1, "timeout": 1}
+
+
+def test_healthy_run_calls_each_replica_once():
+    report = Simulation(
+        SimulationConfig(nodes=20, replicas=3, operations=200, delete_ratio=0.2)
+    ).run()
+
+    assert report["settled"] == 200
+    messages = report["messages"]
+    assert messages["create_group"] + messages["delete_group"] == 200
+    assert set(messages) == {"create_group", "delete_group"}
+    assert report["per_operation"]["node_calls"] == 3.0
+    assert report["latency_ms"]["p50"] >= 30
+    assert report["redis_round_trips"] > 0
+
+
+def test_node_errors_add_rollbacks_retries_and_dead_letters():
+    config = SimulationConfig(
+        nodes=5,
+        replicas=3,
+        operations=100,
+        delete_ratio=0.3,
+        error_rate=0.3,
+        retry_delay=10.0,
+        max_retries=2,
+    )
+
+    report = Simulation(config).run()
+
+    messages = report["messages"]
+    assert messages["rollback_create_group"] > 0
+    assert messages["process_dead_letter"] > 0
+    assert report["node_calls"]["error"] > 0
+    # Dead-lettered rollbacks gave up after their retry delays
+    assert report["settle_ms"]["max"] >= 2 * 10.0 * 1000
+    assert report["latency_ms"]["max"] < 10.0 * 1000
+
+
+def test_more_workers_cut_queue_waits():
+    def run(workers):
+        config = SimulationConfig(
+            nodes=10, operations=500, rate=400, workers=workers, seed=1
+        )
+        return Simulation(config).run()
+
+    assert run(16)["queue_wait_ms"]["p99"] < run(2)["queue_wait_ms"]["p99"]
+
+
+def test_cli(capsys):
+    assert main(["--nodes", "10", "--operations", "50"]) == 0
+    assert '"settled": 50' in capsys.readouterr().out
+    assert parse_distribution("lognormal:0.02:0.5")(random.Random(0)) > 0